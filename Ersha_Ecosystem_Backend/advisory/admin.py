@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Expert, AdvisoryContent, Course, Resource, 
-    UserBookmark, UserLike, ConsultationRequest
+    UserBookmark, UserLike, UserCourseView, UserResourceDownload, ConsultationRequest
 )
 
 
@@ -153,6 +153,24 @@ class UserLikeAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
 
 
+@admin.register(UserCourseView)
+class UserCourseViewAdmin(admin.ModelAdmin):
+    list_display = ['user', 'course', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['user__username', 'course__title']
+    readonly_fields = ['created_at']
+    date_hierarchy = 'created_at'
+
+
+@admin.register(UserResourceDownload)
+class UserResourceDownloadAdmin(admin.ModelAdmin):
+    list_display = ['user', 'resource', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['user__username', 'resource__title']
+    readonly_fields = ['created_at']
+    date_hierarchy = 'created_at'
+
+
 @admin.register(ConsultationRequest)
 class ConsultationRequestAdmin(admin.ModelAdmin):
     list_display = ['user', 'expert', 'subject', 'preferred_date', 'duration_hours', 'total_cost', 'status']
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from advisory.services import RelevanceRankingService
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the per-segment (region, product category) rankings of news, advisory content and courses '
+        'that personalized feeds read. Run periodically, e.g. hourly: recency changes even when content does not.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int,
+                            help='Newest items of each kind to score (default: ADVISORY_RANKING_CANDIDATES)')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rows = RelevanceRankingService.rebuild(candidate_limit=options['candidates'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rows} segment rankings in {time.monotonic() - started:.1f}s'
+        ))
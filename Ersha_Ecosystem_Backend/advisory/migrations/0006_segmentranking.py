@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advisory', '0005_usercourseview_userresourcedownload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SegmentRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(blank=True, max_length=100)),
+                ('product_category', models.CharField(blank=True, max_length=20)),
+                ('kind', models.CharField(choices=[('news', 'News'), ('advisory', 'Advisory Content'), ('course', 'Course')], max_length=20)),
+                ('items', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('region', 'product_category', 'kind'), name='unique_segment_ranking')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advisory', '0006_segmentranking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expert',
+            name='profile_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advisory', '0007_expert_profile_image_variants'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='expert',
+            name='profile_image_variants',
+        ),
+    ]
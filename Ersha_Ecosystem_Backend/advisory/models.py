@@ -222,6 +222,34 @@ class UserLike(models.Model):
         return f"{self.user.username} liked {self.advisory_content.title}"
 
 
+class UserCourseView(models.Model):
+    """Courses a user has opened"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ['user', 'course']
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.user.username} viewed {self.course.title}"
+
+
+class UserResourceDownload(models.Model):
+    """Resources a user has downloaded"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ['user', 'resource']
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.user.username} downloaded {self.resource.title}"
+
+
 class ConsultationRequest(models.Model):
     """Expert consultation requests"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -248,3 +276,29 @@ class ConsultationRequest(models.Model):
 
     def __str__(self):
         return f"Consultation: {self.user.username} with {self.expert.name}"
+
+
+class SegmentRanking(models.Model):
+    """
+    Precomputed ranking of one kind of content (news, advisory, courses)
+    for a (region, product category) segment; see advisory/ranking.py.
+    Empty region or category means "any".
+    """
+    region = models.CharField(max_length=100, blank=True)
+    product_category = models.CharField(max_length=20, blank=True)
+    kind = models.CharField(max_length=20, choices=[
+        ('news', 'News'),
+        ('advisory', 'Advisory Content'),
+        ('course', 'Course'),
+    ])
+    # [[id, score, category], ...], best first
+    items = models.JSONField(default=list)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['region', 'product_category', 'kind'], name='unique_segment_ranking'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.region or 'any region'} / {self.product_category or 'any category'}"
@@ -0,0 +1,142 @@
+"""
+Relevance scoring of news, advisory content and courses for audience
+segments.
+
+A segment is a (region, product category) pair, either of which may be
+empty for "any". An item's score for a segment blends:
+
+- recency, halving every ``half_life_days`` of the item's kind;
+- popularity, from its engagement counters on a log scale that saturates
+  at POPULARITY_SATURATION, so a score never depends on other items;
+- relevance, the overlap of the item's tags, category, crop and title
+  words with the segment's region and product keywords.
+
+Because scores are independent per item, one changed item can be rescored
+and merged into the stored lists without recomputing the rest.
+"""
+import math
+import re
+
+from advisory.models import AdvisoryContent, Course
+from news.models import NewsArticle
+
+NEWS = 'news'
+ADVISORY = 'advisory'
+COURSE = 'course'
+
+RECENCY_WEIGHT = 0.35
+POPULARITY_WEIGHT = 0.25
+RELEVANCE_WEIGHT = 0.4
+FEATURED_BONUS = 0.05
+# Content written for another region still ranks, below local content
+OTHER_REGION_FACTOR = 0.5
+POPULARITY_SATURATION = 10_000
+
+# Words that tie content to a marketplace product category
+CATEGORY_KEYWORDS = {
+    'vegetables': {
+        'vegetable', 'vegetables', 'tomato', 'tomatoes', 'onion', 'onions', 'cabbage', 'pepper', 'horticulture',
+    },
+    'fruits': {'fruit', 'fruits', 'mango', 'banana', 'avocado', 'papaya', 'orange', 'horticulture'},
+    'grains': {'grain', 'grains', 'cereal', 'cereals', 'teff', 'wheat', 'maize', 'barley', 'sorghum', 'millet'},
+    'dairy': {'dairy', 'milk', 'cattle', 'cow', 'cows', 'livestock', 'butter', 'cheese'},
+    'coffee': {'coffee', 'tea', 'arabica', 'sidama', 'yirgacheffe', 'export'},
+    'spices': {'spice', 'spices', 'herb', 'herbs', 'ginger', 'turmeric', 'pepper', 'korarima'},
+    'legumes': {'legume', 'legumes', 'bean', 'beans', 'chickpea', 'chickpeas', 'lentil', 'lentils', 'pea', 'peas'},
+    'tubers': {'tuber', 'tubers', 'potato', 'potatoes', 'cassava', 'enset', 'yam'},
+    'other': set(),
+}
+
+KINDS = {
+    NEWS: {
+        'queryset': lambda: NewsArticle.objects.all(),
+        'order_by': ['-published_at'],
+        'fields': ['id', 'title', 'category', 'tags', 'featured', 'published_at', 'views'],
+        'half_life_days': 7,
+    },
+    ADVISORY: {
+        'queryset': lambda: AdvisoryContent.objects.all(),
+        'order_by': ['-published_at'],
+        'fields': [
+            'id', 'title', 'category', 'tags', 'featured', 'published_at', 'views', 'likes', 'bookmarks',
+            'crop_type', 'region',
+        ],
+        'half_life_days': 90,
+    },
+    COURSE: {
+        # Generated courses belong to the user they were generated for
+        'queryset': lambda: Course.objects.filter(is_ai_generated=False),
+        'order_by': ['-published_at'],
+        'fields': ['id', 'title', 'category', 'featured', 'published_at', 'views', 'rating'],
+        'half_life_days': 90,
+    },
+}
+
+WORD = re.compile(r'[a-z]{3,}')
+
+
+def normalize_region(region):
+    return (region or '').strip().lower()
+
+
+def segment_keywords(region, product_category):
+    return set(WORD.findall(normalize_region(region))) | CATEGORY_KEYWORDS.get(product_category, set())
+
+
+def _engagement(kind, row):
+    if kind == ADVISORY:
+        return row['views'] + 3 * row['likes'] + 2 * row['bookmarks']
+    if kind == COURSE:
+        return row['views'] * (1 + float(row['rating'] or 0) / 5)
+    return row['views']
+
+
+def features(kind, row):
+    """Segment-independent features of one item, from a values() row of KINDS[kind]['fields']"""
+    tags = row.get('tags') or []
+    text = ' '.join([
+        row['title'], row.get('category') or '', row.get('crop_type') or '',
+        ' '.join(str(tag) for tag in tags if isinstance(tag, str)),
+    ]).lower()
+    engagement = max(0, _engagement(kind, row))
+    return {
+        'id': str(row['id']),
+        'category': row.get('category') or '',
+        'region': normalize_region(row.get('region')),
+        'published_at': row['published_at'],
+        'popularity': min(1.0, math.log1p(engagement) / math.log1p(POPULARITY_SATURATION)),
+        'featured': bool(row.get('featured')),
+        'tokens': set(WORD.findall(text)),
+        'half_life_days': KINDS[kind]['half_life_days'],
+    }
+
+
+def candidates(kind, ids=None, limit=None):
+    """Features of the kind's items, newest first; only the given IDs when ids is set"""
+    config = KINDS[kind]
+    queryset = config['queryset']()
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    rows = queryset.order_by(*config['order_by']).values(*config['fields'])
+    if limit:
+        rows = rows[:limit]
+    return [features(kind, row) for row in rows]
+
+
+def score(item, region, product_category, now, keywords=None):
+    """Relevance of one item for a segment, between 0 and about 1"""
+    age_days = max(0.0, (now - item['published_at']).total_seconds() / 86400)
+    recency = 0.5 ** (age_days / item['half_life_days'])
+
+    keywords = segment_keywords(region, product_category) if keywords is None else keywords
+    relevance = 0.0
+    if keywords:
+        relevance = min(1.0, len(item['tokens'] & keywords) / min(3, len(keywords)))
+
+    value = (
+        RECENCY_WEIGHT * recency + POPULARITY_WEIGHT * item['popularity'] + RELEVANCE_WEIGHT * relevance
+        + (FEATURED_BONUS if item['featured'] else 0)
+    )
+    if region and item['region'] and item['region'] != normalize_region(region):
+        value *= OTHER_REGION_FACTOR
+    return round(value, 5)
@@ -3,6 +3,21 @@ from .models import (
     Expert, AdvisoryContent, Course, Resource, 
     UserBookmark, UserLike, ConsultationRequest
 )
+from .services import UserInteractionService
+
+
+class UserInteractionMixin:
+    """
+    Answers per-user flags (is_bookmarked, is_liked, ...) from sets loaded
+    once per request and shared by every row and nested serializer.
+    """
+
+    def has_interaction(self, kind, obj):
+        loaded = self.context.setdefault('interaction_ids', {})
+        if kind not in loaded:
+            request = self.context.get('request')
+            loaded[kind] = UserInteractionService.get_ids(request.user if request else None, kind)
+        return obj.id in loaded[kind]
 
 
 class ExpertSerializer(serializers.ModelSerializer):
@@ -20,7 +35,7 @@ class ExpertSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'rating', 'total_consultations', 'created_at', 'updated_at']
 
 
-class AdvisoryContentSerializer(serializers.ModelSerializer):
+class AdvisoryContentSerializer(UserInteractionMixin, serializers.ModelSerializer):
     """Serializer for AdvisoryContent model"""
     author_name = serializers.CharField(read_only=True)
     is_bookmarked = serializers.SerializerMethodField()
@@ -39,21 +54,16 @@ class AdvisoryContentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'views', 'likes', 'bookmarks', 'created_at', 'updated_at']
 
     def get_is_bookmarked(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return UserBookmark.objects.filter(user=request.user, advisory_content=obj).exists()
-        return False
+        return self.has_interaction('bookmarked', obj)
 
     def get_is_liked(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return UserLike.objects.filter(user=request.user, advisory_content=obj).exists()
-        return False
+        return self.has_interaction('liked', obj)
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(UserInteractionMixin, serializers.ModelSerializer):
     """Serializer for Course model"""
     author_name = serializers.CharField(read_only=True)
+    is_viewed = serializers.SerializerMethodField()
     
     class Meta:
         model = Course
@@ -64,13 +74,18 @@ class CourseSerializer(serializers.ModelSerializer):
             'rating', 'featured', 'is_ai_generated', 'ai_generation_data',
             'ai_model_used', 'generated_for_user', 'generation_timestamp',
             'download_url', 'file_size', 'file_size_bytes',
-            'published_at', 'created_at', 'updated_at'
+            'published_at', 'created_at', 'updated_at', 'is_viewed'
         ]
         read_only_fields = ['id', 'views', 'rating', 'created_at', 'updated_at']
 
+    def get_is_viewed(self, obj):
+        return self.has_interaction('viewed_courses', obj)
 
-class ResourceSerializer(serializers.ModelSerializer):
+
+class ResourceSerializer(UserInteractionMixin, serializers.ModelSerializer):
     """Serializer for Resource model"""
+    is_downloaded = serializers.SerializerMethodField()
+    
     class Meta:
         model = Resource
         fields = [
@@ -78,10 +93,13 @@ class ResourceSerializer(serializers.ModelSerializer):
             'file_url', 'file_size', 'file_size_bytes', 'downloads',
             'image', 'featured', 'is_ai_generated', 'ai_generation_data',
             'ai_model_used', 'generated_for_user', 'generation_timestamp',
-            'created_at', 'updated_at'
+            'created_at', 'updated_at', 'is_downloaded'
         ]
         read_only_fields = ['id', 'downloads', 'created_at', 'updated_at']
 
+    def get_is_downloaded(self, obj):
+        return self.has_interaction('downloaded_resources', obj)
+
 
 class UserBookmarkSerializer(serializers.ModelSerializer):
     """Serializer for UserBookmark model"""
@@ -128,9 +146,11 @@ class ConsultationRequestSerializer(serializers.ModelSerializer):
         return obj.user.email if obj.user else None
 
 
-class AdvisoryContentListSerializer(serializers.ModelSerializer):
+class AdvisoryContentListSerializer(UserInteractionMixin, serializers.ModelSerializer):
     """Simplified serializer for list views"""
     author_name = serializers.CharField(read_only=True)
+    is_bookmarked = serializers.SerializerMethodField()
+    is_liked = serializers.SerializerMethodField()
     
     class Meta:
         model = AdvisoryContent
@@ -138,9 +158,15 @@ class AdvisoryContentListSerializer(serializers.ModelSerializer):
             'id', 'title', 'excerpt', 'category', 'crop_type', 'region',
             'season', 'difficulty', 'read_time', 'author_name', 'author_role',
             'tags', 'images', 'featured', 'verified', 'views', 'likes',
-            'bookmarks', 'published_at'
+            'bookmarks', 'published_at', 'is_bookmarked', 'is_liked'
         ]
 
+    def get_is_bookmarked(self, obj):
+        return self.has_interaction('bookmarked', obj)
+
+    def get_is_liked(self, obj):
+        return self.has_interaction('liked', obj)
+
 
 class ExpertListSerializer(serializers.ModelSerializer):
     """Simplified serializer for expert list views"""
@@ -153,9 +179,10 @@ class ExpertListSerializer(serializers.ModelSerializer):
         ]
 
 
-class CourseListSerializer(serializers.ModelSerializer):
+class CourseListSerializer(UserInteractionMixin, serializers.ModelSerializer):
     """Simplified serializer for course list views"""
     author_name = serializers.CharField(read_only=True)
+    is_viewed = serializers.SerializerMethodField()
     
     class Meta:
         model = Course
@@ -164,16 +191,24 @@ class CourseListSerializer(serializers.ModelSerializer):
             'duration', 'modules', 'author_name', 'price', 'is_free',
             'image', 'views', 'rating', 'featured', 'is_ai_generated',
             'ai_model_used', 'generation_timestamp', 'download_url',
-            'file_size', 'published_at'
+            'file_size', 'published_at', 'is_viewed'
         ]
 
+    def get_is_viewed(self, obj):
+        return self.has_interaction('viewed_courses', obj)
 
-class ResourceListSerializer(serializers.ModelSerializer):
+
+class ResourceListSerializer(UserInteractionMixin, serializers.ModelSerializer):
     """Simplified serializer for resource list views"""
+    is_downloaded = serializers.SerializerMethodField()
+    
     class Meta:
         model = Resource
         fields = [
             'id', 'title', 'description', 'resource_type', 'category',
             'file_size', 'downloads', 'image', 'featured', 'is_ai_generated',
-            'ai_model_used', 'generation_timestamp', 'created_at'
-        ] 
\ No newline at end of file
+            'ai_model_used', 'generation_timestamp', 'created_at', 'is_downloaded'
+        ]
+
+    def get_is_downloaded(self, obj):
+        return self.has_interaction('downloaded_resources', obj) 
\ No newline at end of file
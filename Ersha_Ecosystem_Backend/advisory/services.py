@@ -1,4 +1,5 @@
 import os
+import heapq
 import json
 import google.generativeai as genai
 from reportlab.lib.pagesizes import letter, A4
@@ -9,18 +10,22 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 from io import BytesIO
 from django.conf import settings
-from django.core.files.base import ContentFile
+from django.core.cache import cache
 from django.core.files.storage import default_storage
-from django.db.models import Q, Sum, Count
+from django.db import transaction
+from django.db.models import F, Q, Sum, Count
 from django.utils import timezone
 from datetime import timedelta
-import uuid
 from datetime import datetime
 
+from core import media
+from core.background import defer
 from users.models import User, Profile
 from marketplace.models import Product
-from weather.models import WeatherData
+from weather.services import WeatherIngestionService
 from news.models import NewsArticle
+from . import ranking
+from .models import AdvisoryContent, Resource, SegmentRanking, UserBookmark, UserLike, UserCourseView, UserResourceDownload
 from .translation_service import translation_service
 
 class UserDataService:
@@ -135,7 +140,7 @@ class UserDataService:
                 return {}
             
             # Get latest weather data for user's region
-            weather_data = WeatherData.objects.filter(
+            weather_data = WeatherIngestionService.latest_observations().filter(
                 region__icontains=self.user.region
             ).order_by('-created_at').first()
             
@@ -160,9 +165,12 @@ class UserDataService:
     def get_relevant_news(self):
         """Get relevant agricultural news for user's region and products"""
         try:
-            news_articles = NewsArticle.objects.filter(
-                Q(category='agriculture') | Q(category='farming')
-            ).order_by('-published_at')[:5]
+            # Precomputed per region and product category; latest news until rankings are built
+            ranked = RelevanceRankingService.feed(self.user, limit=5, kinds=[ranking.NEWS])[ranking.NEWS]
+            if ranked:
+                news_articles = [article for article, _ in RelevanceRankingService.load(ranking.NEWS, ranked)]
+            else:
+                news_articles = NewsArticle.objects.order_by('-published_at')[:5]
             
             news_data = []
             for article in news_articles:
@@ -586,13 +594,275 @@ Make the course practical, educational, and specifically tailored to Ethiopian a
         return buffer
     
     def _save_pdf(self, pdf_buffer, title):
-        """Save PDF to storage and return file path"""
-        
-        # Generate unique filename
-        filename = f"ai_courses/{uuid.uuid4().hex}_{title.replace(' ', '_')[:50]}.pdf"
-        
-        # Save to storage
-        default_storage.save(filename, ContentFile(pdf_buffer.getvalue()))
+        """Save PDF to storage under a content-hashed name and return its URL"""
+        # The name never changes meaning, so the file is served as immutable;
+        # the title is given back as the download filename (see CourseViewSet.pdf)
+        filename = media.store(pdf_buffer.getvalue(), 'ai_courses', 'pdf')
+        return default_storage.url(filename)
+
+
+class UserInteractionService:
+    """
+    Per-user sets of the content a user has bookmarked, liked, viewed or
+    downloaded.
+
+    Each set is loaded with one query and kept in the cache until one of
+    the user's interactions of that kind changes (see signals.py), so
+    personalised lists cost the same queries as anonymous ones.
+    """
+    
+    KINDS = {
+        'bookmarked': (UserBookmark, 'advisory_content_id'),
+        'liked': (UserLike, 'advisory_content_id'),
+        'viewed_courses': (UserCourseView, 'course_id'),
+        'downloaded_resources': (UserResourceDownload, 'resource_id'),
+    }
+    CACHE_TIMEOUT = 60 * 60
+    
+    @staticmethod
+    def cache_key(kind, user_id):
+        return f'advisory:{kind}:{user_id}'
+    
+    @staticmethod
+    def get_ids(user, kind):
+        """IDs of the content the user interacted with; empty for anonymous users"""
+        if not user or not user.is_authenticated:
+            return frozenset()
+        key = UserInteractionService.cache_key(kind, user.id)
+        ids = cache.get(key)
+        if ids is None:
+            model, field = UserInteractionService.KINDS[kind]
+            ids = frozenset(model.objects.filter(user=user).values_list(field, flat=True))
+            cache.set(key, ids, UserInteractionService.CACHE_TIMEOUT)
+        return ids
+    
+    @staticmethod
+    def invalidate(kind, user_id):
+        cache.delete(UserInteractionService.cache_key(kind, user_id))
+    
+    @staticmethod
+    def kind_for(model):
+        for kind, (kind_model, _) in UserInteractionService.KINDS.items():
+            if kind_model is model:
+                return kind
+        return None
+
+
+class DownloadService:
+    """
+    Resource download counters, recorded in the background so counting
+    never holds up the bytes.
+    """
+
+    @staticmethod
+    def is_new_download(request):
+        """Resumed downloads (a Range past byte 0) and revalidations are not counted again"""
+        byte_range = request.META.get('HTTP_RANGE', '')
+        return request.method == 'GET' and (not byte_range or byte_range.replace(' ', '').startswith('bytes=0-'))
+
+    @staticmethod
+    def record_resource(resource_id, user_id=None):
+        Resource.objects.filter(pk=resource_id).update(downloads=F('downloads') + 1)
+        if user_id is not None:
+            UserResourceDownload.objects.get_or_create(user_id=user_id, resource_id=resource_id)
+
+    @staticmethod
+    def schedule_resource(resource, user):
+        defer(DownloadService.record_resource, resource.pk, user.pk if user.is_authenticated else None)
+
+
+class RelevanceRankingService:
+    """
+    Precomputed relevance rankings of news, advisory content and courses
+    per (region, product category) segment, and the personalized feeds
+    served from them.
+
+    rebuild() scores every candidate for every segment (run it
+    periodically with the rebuild_relevance_rankings command, since
+    recency keeps changing). In between, content saves and engagement
+    counter changes rescore just the changed items and merge them into the
+    stored lists (see signals.py). A feed reads the user's few segment rows
+    and merges them with the user's interaction sets in memory.
+    """
+    
+    # Rescore an item at most this often when only its counters change
+    REFRESH_INTERVAL = 60
+    # Demote what the user already engaged with; favour categories they engage with
+    SEEN_FACTOR = 0.5
+    AFFINITY_FACTOR = 1.2
+    # Interaction sets (UserInteractionService kinds) per ranked kind
+    HISTORY = {
+        ranking.ADVISORY: ['liked', 'bookmarked'],
+        ranking.COURSE: ['viewed_courses'],
+    }
+    
+    @staticmethod
+    def size():
+        return getattr(settings, 'ADVISORY_RANKING_SIZE', 50)
+    
+    @staticmethod
+    def segments():
+        """Every (region, product category) pair with users or content, plus the catch-all ones"""
+        regions = {ranking.normalize_region(region) for region in User.objects.filter(
+            user_type=User.UserType.FARMER
+        ).exclude(region='').values_list('region', flat=True).distinct()}
+        regions |= {ranking.normalize_region(region) for region in AdvisoryContent.objects.exclude(
+            region=''
+        ).values_list('region', flat=True).distinct()}
+        regions.add('')
+        categories = list(Product.CategoryChoices.values) + ['']
+        return [(region, category) for region in sorted(regions) for category in categories]
+    
+    @staticmethod
+    def _rank(items, region, product_category, now):
+        keywords = ranking.segment_keywords(region, product_category)
+        scored = [
+            [item['id'], ranking.score(item, region, product_category, now, keywords), item['category']]
+            for item in items
+        ]
+        return heapq.nlargest(RelevanceRankingService.size(), scored, key=lambda entry: entry[1])
+    
+    @staticmethod
+    def rebuild(candidate_limit=None):
+        """Recompute every segment's rankings; returns the number of rows written"""
+        candidate_limit = candidate_limit or getattr(settings, 'ADVISORY_RANKING_CANDIDATES', 2000)
+        segments = RelevanceRankingService.segments()
+        now = timezone.now()
+        rows = []
+        for kind in ranking.KINDS:
+            items = ranking.candidates(kind, limit=candidate_limit)
+            for region, category in segments:
+                rows.append(SegmentRanking(
+                    region=region, product_category=category, kind=kind,
+                    items=RelevanceRankingService._rank(items, region, category, now), computed_at=now
+                ))
+        
+        with transaction.atomic():
+            # Segments whose region no longer has users or content are dropped
+            SegmentRanking.objects.exclude(region__in={region for region, _ in segments}).delete()
+            SegmentRanking.objects.bulk_create(
+                rows, batch_size=500, update_conflicts=True,
+                unique_fields=['region', 'product_category', 'kind'], update_fields=['items', 'computed_at']
+            )
+        return len(rows)
+    
+    @staticmethod
+    def refresh_items(kind, ids):
+        """
+        Rescore the given items of a kind in every stored segment, dropping
+        the ones that no longer exist or qualify. An item that falls out of
+        a segment's list only makes room for others at the next rebuild.
+        Only the segments whose list changes are locked and written, so an
+        item outside most lists costs a read of the kind's rows. Returns
+        the number of rows written.
+        """
+        ids = {str(pk) for pk in ids}
+        items = ranking.candidates(kind, ids=ids)
+        now = timezone.now()
+        size = RelevanceRankingService.size()
+
+        def merged(region, product_category, entries):
+            entries = [entry for entry in entries if entry[0] not in ids]
+            keywords = ranking.segment_keywords(region, product_category)
+            entries.extend(
+                [item['id'], ranking.score(item, region, product_category, now, keywords), item['category']]
+                for item in items
+            )
+            entries.sort(key=lambda entry: entry[1], reverse=True)
+            return entries[:size]
+
+        changed = [
+            pk for pk, region, product_category, entries in SegmentRanking.objects.filter(kind=kind).values_list(
+                'pk', 'region', 'product_category', 'items'
+            )
+            if merged(region, product_category, entries) != entries
+        ]
+        if not changed:
+            return 0
+        with transaction.atomic():
+            segments = list(SegmentRanking.objects.select_for_update().filter(pk__in=changed))
+            for segment in segments:
+                segment.items = merged(segment.region, segment.product_category, segment.items)
+            SegmentRanking.objects.bulk_update(segments, ['items'], batch_size=500)
+        return len(segments)
+    
+    @staticmethod
+    def schedule_refresh(kind, pk, force=False):
+        """
+        Rescore an item after commit, at most once per REFRESH_INTERVAL
+        unless forced; later changes within the interval wait for the item's
+        next refresh or the next rebuild.
+        """
+        key = f'advisory_ranking_refresh:{kind}:{pk}'
+        if force or cache.add(key, True, RelevanceRankingService.REFRESH_INTERVAL):
+            defer(RelevanceRankingService.refresh_items, kind, [pk])
+    
+    @staticmethod
+    def user_segments(user):
+        """The user's region and the categories of the products they sell"""
+        categories = sorted(set(
+            Product.objects.filter(farmer=user, is_active=True).values_list('category', flat=True)
+        ))
+        return ranking.normalize_region(user.region), categories
+    
+    @staticmethod
+    def feed(user, limit=10, kinds=None):
+        """
+        Ranked (id, score, reason) lists per kind for the user. The user's
+        region lists stand in for the any-region ones wherever they exist,
+        so content for other regions stays demoted; the lists of the user's
+        product categories are then merged by best score. Content the user
+        already engaged with is demoted and content in the categories they
+        engage with promoted.
+        """
+        kinds = kinds or list(ranking.KINDS)
+        region, categories = RelevanceRankingService.user_segments(user)
+        rows = {
+            (segment.region, segment.product_category, segment.kind): segment
+            for segment in SegmentRanking.objects.filter(
+                kind__in=kinds, region__in={region, ''}, product_category__in=set(categories) | {''}
+            )
+        }
         
-        # Return the file URL
-        return default_storage.url(filename) 
\ No newline at end of file
+        merged = {kind: {} for kind in kinds}
+        for kind in kinds:
+            for category in categories + ['']:
+                segment = rows.get((region, category, kind)) or rows.get(('', category, kind))
+                if segment is None:
+                    continue
+                if category:
+                    reason = f'Matches your {category} products'
+                elif segment.region:
+                    reason = f'Popular in {user.region}'
+                else:
+                    reason = 'Popular and recent'
+                for item_id, score, item_category in segment.items:
+                    current = merged[kind].get(item_id)
+                    if current is None or score > current[0]:
+                        merged[kind][item_id] = (score, reason, item_category)
+        
+        feeds = {}
+        for kind, entries in merged.items():
+            seen = set()
+            for interaction in RelevanceRankingService.HISTORY.get(kind, []):
+                seen |= {str(pk) for pk in UserInteractionService.get_ids(user, interaction)}
+            affinity = {entries[item_id][2] for item_id in seen if item_id in entries}
+            
+            ranked = []
+            for item_id, (score, reason, category) in entries.items():
+                if item_id in seen:
+                    score *= RelevanceRankingService.SEEN_FACTOR
+                elif category in affinity:
+                    score *= RelevanceRankingService.AFFINITY_FACTOR
+                    reason = f'Like other {category} content you engaged with'
+                ranked.append((item_id, round(score, 5), reason))
+            ranked.sort(key=lambda entry: entry[1], reverse=True)
+            feeds[kind] = ranked[:limit]
+        return feeds
+    
+    @staticmethod
+    def load(kind, ranked, queryset=None):
+        """(object, reason) pairs for a ranked list, in order, in one query"""
+        queryset = queryset if queryset is not None else ranking.KINDS[kind]['queryset']()
+        objects = {str(obj.pk): obj for obj in queryset.filter(pk__in=[item_id for item_id, _, _ in ranked])}
+        return [(objects[item_id], reason) for item_id, _, reason in ranked if item_id in objects]
@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core.background import defer
+from news.models import NewsArticle
+from news.services import articles_ingested
+from . import ranking
+from .models import AdvisoryContent, Course, UserBookmark, UserLike, UserCourseView, UserResourceDownload
+from .services import RelevanceRankingService, UserInteractionService
+
+RANKED_KINDS = {NewsArticle: ranking.NEWS, AdvisoryContent: ranking.ADVISORY, Course: ranking.COURSE}
+
+
+@receiver(post_save, sender=UserBookmark)
+@receiver(post_delete, sender=UserBookmark)
+@receiver(post_save, sender=UserLike)
+@receiver(post_delete, sender=UserLike)
+@receiver(post_save, sender=UserCourseView)
+@receiver(post_delete, sender=UserCourseView)
+@receiver(post_save, sender=UserResourceDownload)
+@receiver(post_delete, sender=UserResourceDownload)
+def invalidate_interaction_ids(sender, instance, **kwargs):
+    """Drop the user's cached set once the change is visible to other requests"""
+    kind = UserInteractionService.kind_for(sender)
+    transaction.on_commit(lambda: UserInteractionService.invalidate(kind, instance.user_id))
+
+
+@receiver(post_save, sender=NewsArticle)
+@receiver(post_save, sender=AdvisoryContent)
+@receiver(post_save, sender=Course)
+def rescore_content(sender, instance, created, **kwargs):
+    """New content is ranked right away; edits and counter bumps (views, likes) at most once a minute"""
+    RelevanceRankingService.schedule_refresh(RANKED_KINDS[sender], instance.pk, force=created)
+
+
+@receiver(post_delete, sender=NewsArticle)
+@receiver(post_delete, sender=AdvisoryContent)
+@receiver(post_delete, sender=Course)
+def unrank_content(sender, instance, **kwargs):
+    RelevanceRankingService.schedule_refresh(RANKED_KINDS[sender], instance.pk, force=True)
+
+
+@receiver(articles_ingested)
+def rank_ingested_articles(sender, ids, **kwargs):
+    defer(RelevanceRankingService.refresh_items, ranking.NEWS, ids)
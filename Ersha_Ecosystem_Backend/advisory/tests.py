@@ -1,3 +1,238 @@
-from django.test import TestCase
+import tempfile
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+
+from core import media
+from marketplace.models import Product
+from news.models import NewsArticle
+from .models import AdvisoryContent, Course, Resource, SegmentRanking, UserBookmark, UserLike, UserResourceDownload
+from .services import RelevanceRankingService
+from . import ranking
+
+User = get_user_model()
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class UserInteractionSetsTestCase(APITestCase):
+    def setUp(self):
+        """Set up a farmer, a few articles, a course and a resource"""
+        cache.clear()
+        self.farmer = User.objects.create_user(
+            username='farmer@test.com',
+            email='farmer@test.com',
+            password='testpass123',
+            user_type=User.UserType.FARMER
+        )
+        self.articles = [
+            AdvisoryContent.objects.create(
+                title=f'Article {i}', content='...', category='farming', difficulty='beginner'
+            )
+            for i in range(5)
+        ]
+        UserBookmark.objects.create(user=self.farmer, advisory_content=self.articles[0])
+        self.course = Course.objects.create(
+            title='Soil health', description='...', category='farming', difficulty='beginner',
+            duration='45 mins', duration_minutes=45
+        )
+        self.resource = Resource.objects.create(
+            title='Planting guide', description='...', resource_type='PDF Guide', category='planning',
+            file_url='https://example.com/guide.pdf', file_size='1 MB', file_size_bytes=1048576
+        )
+        self.client = APIClient()
+
+    def test_personalised_list_costs_the_same_as_anonymous(self):
+        """Test that flags come from per-user sets instead of one query per row"""
+        with self.assertNumQueries(2):
+            anonymous = self.client.get('/api/advisory/advisory-content/')
+        self.assertFalse(any(item['is_bookmarked'] for item in anonymous.data['results']))
+
+        self.client.force_authenticate(user=self.farmer)
+        # count, page, bookmarked ids, liked ids
+        with self.assertNumQueries(4):
+            self.client.get('/api/advisory/advisory-content/')
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/advisory/advisory-content/')
+        bookmarked = {item['id'] for item in response.data['results'] if item['is_bookmarked']}
+        self.assertEqual(bookmarked, {str(self.articles[0].id)})
+
+    def test_like_and_bookmark_refresh_the_cached_sets(self):
+        """Test that toggling an interaction is reflected in the next read"""
+        self.client.force_authenticate(user=self.farmer)
+        self.client.get('/api/advisory/advisory-content/')
+
+        article = self.articles[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/advisory/advisory-content/{article.id}/like/')
+            self.client.post(f'/api/advisory/advisory-content/{self.articles[0].id}/bookmark/')
+
+        response = self.client.get(f'/api/advisory/advisory-content/{article.id}/')
+        self.assertTrue(response.data['is_liked'])
+        self.assertFalse(response.data['is_bookmarked'])
+
+    def test_course_views_and_resource_downloads_are_flagged(self):
+        """Test that opened courses and downloaded resources are marked for the user"""
+        self.client.force_authenticate(user=self.farmer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(f'/api/advisory/courses/{self.course.id}/')
+            self.client.post(f'/api/advisory/resources/{self.resource.id}/download/')
+
+        response = self.client.get('/api/advisory/courses/')
+        self.assertTrue(response.data['results'][0]['is_viewed'])
+        response = self.client.get('/api/advisory/resources/')
+        self.assertTrue(response.data['results'][0]['is_downloaded'])
+
+        self.client.force_authenticate(user=None)
+        response = self.client.get('/api/advisory/resources/')
+        self.assertFalse(response.data['results'][0]['is_downloaded'])
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class RelevanceRankingTestCase(APITestCase):
+    def setUp(self):
+        """Set up a coffee farmer in Oromia and content for several segments"""
+        cache.clear()
+        self.farmer = User.objects.create_user(
+            username='coffee@test.com', email='coffee@test.com', password='testpass123',
+            user_type=User.UserType.FARMER, region='Oromia'
+        )
+        Product.objects.create(
+            farmer=self.farmer, name='Sidama beans', description='Washed', price=300, quantity=50,
+            category='coffee', harvest_date=date.today()
+        )
+        week_ago = timezone.now() - timedelta(days=7)
+        self.coffee_news = NewsArticle.objects.create(
+            title='Coffee export prices climb', content='...', category='market', tags=['Coffee'],
+            published_at=week_ago
+        )
+        self.other_news = NewsArticle.objects.create(title='Port congestion eases', content='...', category='market')
+        self.local = AdvisoryContent.objects.create(
+            title='Pruning coffee trees', content='...', category='farming', crop_type='coffee', region='Oromia'
+        )
+        self.elsewhere = AdvisoryContent.objects.create(
+            title='Pruning coffee in the north', content='...', category='farming', crop_type='coffee', region='Amhara'
+        )
+        self.course = Course.objects.create(
+            title='Coffee processing', description='...', category='farming', duration='45 mins', duration_minutes=45
+        )
+        RelevanceRankingService.rebuild()
+        self.client.force_authenticate(user=self.farmer)
+
+    def test_feed_ranks_segment_content_first(self):
+        """Product and region matches outrank fresher unrelated content, from a few segment rows"""
+        # Product categories, segment rows, three interaction sets, one query per kind of content
+        with self.assertNumQueries(8):
+            response = self.client.get('/api/advisory/advisory-content/feed/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in response.data['news']], [str(self.coffee_news.id), str(self.other_news.id)]
+        )
+        self.assertEqual(response.data['news'][0]['reason'], 'Matches your coffee products')
+        self.assertEqual(
+            [item['id'] for item in response.data['advisory']], [str(self.local.id), str(self.elsewhere.id)]
+        )
+        self.assertEqual(response.data['courses'][0]['id'], str(self.course.id))
+
+        # What the user already liked drops below what they have not seen
+        UserLike.objects.create(user=self.farmer, advisory_content=self.local)
+        cache.clear()
+        feed = RelevanceRankingService.feed(self.farmer)
+        self.assertEqual([item_id for item_id, _, _ in feed['advisory']], [str(self.elsewhere.id), str(self.local.id)])
+
+    def test_content_changes_refresh_stored_rankings(self):
+        """New and deleted content is merged into every stored segment without a rebuild"""
+        with self.captureOnCommitCallbacks(execute=True):
+            fresh = NewsArticle.objects.create(
+                title='Coffee auction opens', content='...', category='market', tags=['coffee', 'export']
+            )
+        segment = SegmentRanking.objects.get(region='oromia', product_category='coffee', kind='news')
+        self.assertEqual(segment.items[0][0], str(fresh.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.coffee_news.delete()
+        ids = {entry[0] for entry in SegmentRanking.objects.get(pk=segment.pk).items}
+        self.assertEqual(ids, {str(fresh.id), str(self.other_news.id)})
+
+        response = self.client.get('/api/advisory/courses/get_course_recommendations/')
+        self.assertEqual(response.data['recommendations'][0]['id'], str(self.course.id))
+        self.assertEqual(response.data['user_data_summary']['product_categories'], ['coffee'])
+
+    def test_counter_bumps_move_items_without_a_rebuild(self):
+        """A views bump rescores the item in the stored lists, at most once per interval"""
+        segment = SegmentRanking.objects.get(region='', product_category='', kind=ranking.ADVISORY)
+        computed_at = segment.computed_at
+        self.local.views = 5000
+        with self.captureOnCommitCallbacks(execute=True):
+            self.local.save(update_fields=['views'])
+        segment.refresh_from_db()
+        self.assertEqual(segment.items[0][0], str(self.local.id))
+        self.assertEqual(segment.computed_at, computed_at)
+
+        # Within the interval a further bump waits for the next refresh
+        self.elsewhere.views = 90000
+        with self.captureOnCommitCallbacks(execute=True):
+            self.elsewhere.save(update_fields=['views'])
+        self.elsewhere.views = 90001
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.elsewhere.save(update_fields=['views'])
+        self.assertEqual(callbacks, [])
+        segment.refresh_from_db()
+        self.assertEqual(segment.items[0][0], str(self.elsewhere.id))
+
+    @override_settings(ADVISORY_RANKING_SIZE=1)
+    def test_refresh_only_writes_segments_that_change(self):
+        """An item that stays out of a full list leaves that segment row untouched"""
+        RelevanceRankingService.rebuild()
+        total = SegmentRanking.objects.filter(kind=ranking.ADVISORY).count()
+        written = RelevanceRankingService.refresh_items(ranking.ADVISORY, [self.elsewhere.pk])
+        self.assertLess(written, total)
+        segment = SegmentRanking.objects.get(region='oromia', product_category='coffee', kind=ranking.ADVISORY)
+        self.assertEqual([entry[0] for entry in segment.items], [str(self.local.id)])
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class ResourceFileTestCase(APITestCase):
+    def setUp(self):
+        """Set up a resource whose PDF is stored locally"""
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        overrides = override_settings(MEDIA_ROOT=media_root.name, MEDIA_OFFLOAD='')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.content = b'%PDF-1.4 ' + b'x' * 5000
+        name = media.store(self.content, 'resources', 'pdf')
+        self.resource = Resource.objects.create(
+            title='Teff planting guide', description='...', resource_type='PDF Guide', category='planning',
+            file_url=f'/media/{name}', file_size='5 KB', file_size_bytes=len(self.content)
+        )
+        self.farmer = User.objects.create_user(
+            username='farmer@test.com', email='farmer@test.com', password='testpass123',
+            user_type=User.UserType.FARMER
+        )
+        self.client.force_authenticate(user=self.farmer)
+
+    def test_download_resumes_and_is_counted_once(self):
+        """Test that the file is resumable and only the first request counts as a download"""
+        url = f'/api/advisory/resources/{self.resource.id}/file/'
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="teff-planting-guide.pdf"')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(url, HTTP_RANGE='bytes=4000-', HTTP_IF_RANGE=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+            self.assertEqual(b''.join(response.streaming_content), self.content[4000:])
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.resource.refresh_from_db()
+        self.assertEqual(self.resource.downloads, 1)
+        self.assertTrue(UserResourceDownload.objects.filter(user=self.farmer, resource=self.resource).exists())
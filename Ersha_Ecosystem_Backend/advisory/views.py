@@ -1,3 +1,5 @@
+import posixpath
+
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -6,10 +8,12 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, F
 from django.utils import timezone
 from django.conf import settings
+from django.http import Http404, HttpResponseRedirect
+from django.utils.text import slugify
 
 from .models import (
     Expert, AdvisoryContent, Course, Resource, 
-    UserBookmark, UserLike, ConsultationRequest
+    UserBookmark, UserLike, UserCourseView, UserResourceDownload, ConsultationRequest
 )
 from .serializers import (
     ExpertSerializer, ExpertListSerializer,
@@ -19,7 +23,23 @@ from .serializers import (
     UserBookmarkSerializer, UserLikeSerializer,
     ConsultationRequestSerializer
 )
-from .services import AIContentGenerator, UserDataService
+from . import ranking
+from .services import AIContentGenerator, DownloadService, RelevanceRankingService, UserDataService
+from core import media
+from core.services import PlatformStatsService
+from news.serializers import NewsArticleListSerializer
+
+
+def send_stored_file(request, url, title):
+    """Serve a file of local media as a download named after the title; redirect to external files"""
+    name = media.local_name(url)
+    if not name:
+        if not url:
+            raise Http404
+        return HttpResponseRedirect(url)
+    filename = (slugify(title) or 'download') + posixpath.splitext(name)[1]
+    # The view URL is stable while the file may be replaced, so it is always revalidated
+    return media.file_response(request, name, filename=filename, attachment=True, immutable=False)
 
 
 class ExpertViewSet(viewsets.ModelViewSet):
@@ -74,30 +94,16 @@ class ExpertViewSet(viewsets.ModelViewSet):
         if not request.user.is_admin:
             return Response({'error': 'Admin access required'}, status=403)
         
-        total_experts = Expert.objects.count()
-        verified_experts = Expert.objects.filter(verified=True).count()
-        featured_experts = Expert.objects.filter(featured=True).count()
-        available_experts = Expert.objects.filter(availability='available').count()
-        
-        # Expert performance stats
-        top_experts = Expert.objects.filter(verified=True).order_by('-rating')[:5]
-        expert_stats = []
-        for expert in top_experts:
-            expert_stats.append({
-                'name': expert.name,
-                'specialization': expert.specialization,
-                'rating': float(expert.rating),
-                'total_consultations': expert.total_consultations,
-                'verified': expert.verified,
-                'featured': expert.featured
-            })
+        snapshot = PlatformStatsService.get_latest(fresh=PlatformStatsService.wants_fresh(request))
+        experts = snapshot.stats['experts']
         
         return Response({
-            'total_experts': total_experts,
-            'verified_experts': verified_experts,
-            'featured_experts': featured_experts,
-            'available_experts': available_experts,
-            'top_experts': expert_stats
+            'total_experts': experts['total'],
+            'verified_experts': experts['verified'],
+            'featured_experts': experts['featured'],
+            'available_experts': experts['available'],
+            'top_experts': experts['top_experts'],
+            'last_updated': snapshot.created_at.isoformat()
         })
 
     @action(detail=False, methods=['get'])
@@ -274,7 +280,7 @@ class AdvisoryContentViewSet(viewsets.ModelViewSet):
         """Increment view count when content is viewed"""
         instance = self.get_object()
         instance.views = F('views') + 1
-        instance.save()
+        instance.save(update_fields=['views'])
         instance.refresh_from_db()
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
@@ -286,6 +292,27 @@ class AdvisoryContentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(content, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        """Personalized news, advisory content and courses for the user's region and products"""
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), RelevanceRankingService.size())
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        feeds = RelevanceRankingService.feed(request.user, limit=max(1, limit))
+        sections = {
+            ranking.NEWS: ('news', NewsArticleListSerializer),
+            ranking.ADVISORY: ('advisory', AdvisoryContentListSerializer),
+            ranking.COURSE: ('courses', CourseListSerializer),
+        }
+        
+        body = {}
+        for kind, (name, serializer_class) in sections.items():
+            loaded = RelevanceRankingService.load(kind, feeds[kind])
+            data = serializer_class([obj for obj, _ in loaded], many=True, context={'request': request}).data
+            body[name] = [{**item, 'reason': reason} for item, (_, reason) in zip(data, loaded)]
+        return Response(body)
+
     @action(detail=False, methods=['get'])
     def verified(self, request):
         """Get verified advisory content"""
@@ -306,13 +333,13 @@ class AdvisoryContentViewSet(viewsets.ModelViewSet):
         
         if created:
             content.likes = F('likes') + 1
-            content.save()
+            content.save(update_fields=['likes'])
             content.refresh_from_db()
             return Response({'status': 'liked'}, status=status.HTTP_201_CREATED)
         else:
             like.delete()
             content.likes = F('likes') - 1
-            content.save()
+            content.save(update_fields=['likes'])
             content.refresh_from_db()
             return Response({'status': 'unliked'}, status=status.HTTP_200_OK)
 
@@ -359,11 +386,19 @@ class CourseViewSet(viewsets.ModelViewSet):
         """Increment view count when course is viewed"""
         instance = self.get_object()
         instance.views = F('views') + 1
-        instance.save()
+        instance.save(update_fields=['views'])
         instance.refresh_from_db()
+        if request.user.is_authenticated:
+            UserCourseView.objects.get_or_create(user=request.user, course=instance)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def pdf(self, request, pk=None):
+        """Send the course PDF, resumable with Range requests"""
+        course = self.get_object()
+        return send_stored_file(request, course.download_url, course.title)
+
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Get featured courses"""
@@ -466,75 +501,35 @@ class CourseViewSet(viewsets.ModelViewSet):
     def get_course_recommendations(self, request):
         """Get personalized course recommendations based on user data"""
         try:
-            # Get user data
-            user_data_service = UserDataService(request.user)
-            user_data = user_data_service.get_comprehensive_user_data()
-            
-            # Generate course recommendations based on user data
-            recommendations = []
-            
-            # Get user's farming products
-            user_products = user_data.get('products', {}).get('categories', [])
-            user_region = user_data.get('profile', {}).get('region', '')
-            
-            # Define course recommendations based on user data
-            if 'vegetables' in user_products:
-                recommendations.append({
-                    'title': 'Advanced Vegetable Farming Techniques',
-                    'description': 'Learn advanced techniques for growing vegetables in Ethiopian climate conditions',
-                    'category': 'farming',
-                    'difficulty': 'intermediate',
-                    'duration': '90 mins',
-                    'reason': 'Based on your vegetable farming activities'
-                })
+            ranked = RelevanceRankingService.feed(request.user, kinds=[ranking.COURSE])[ranking.COURSE]
+            courses = RelevanceRankingService.load(ranking.COURSE, ranked)
+            if not courses:
+                # Rankings not built yet: the most popular courses
+                popular = Course.objects.filter(is_ai_generated=False).order_by('-featured', '-views')[:10]
+                courses = [(course, 'Popular with farmers') for course in popular]
             
-            if 'coffee' in user_products:
-                recommendations.append({
-                    'title': 'Coffee Farming Excellence',
-                    'description': 'Master the art of coffee cultivation and processing for better yields',
-                    'category': 'farming',
-                    'difficulty': 'intermediate',
-                    'duration': '120 mins',
-                    'reason': 'Based on your coffee farming activities'
-                })
-            
-            if user_region:
-                recommendations.append({
-                    'title': f'Climate-Smart Farming for {user_region}',
-                    'description': f'Learn farming techniques specifically adapted to {user_region} climate and soil conditions',
-                    'category': 'climate',
-                    'difficulty': 'beginner',
-                    'duration': '75 mins',
-                    'reason': f'Based on your location in {user_region}'
-                })
-            
-            # Add general recommendations
-            recommendations.extend([
-                {
-                    'title': 'Soil Health Management',
-                    'description': 'Learn how to maintain and improve soil fertility for better crop yields',
-                    'category': 'soil',
-                    'difficulty': 'beginner',
-                    'duration': '60 mins',
-                    'reason': 'Essential for all farmers'
-                },
+            recommendations = [
                 {
-                    'title': 'Market Access and Pricing Strategies',
-                    'description': 'Learn how to access better markets and get fair prices for your products',
-                    'category': 'planning',
-                    'difficulty': 'beginner',
-                    'duration': '45 mins',
-                    'reason': 'Based on your sales activities'
+                    'id': str(course.id),
+                    'title': course.title,
+                    'description': course.description,
+                    'category': course.category,
+                    'difficulty': course.difficulty,
+                    'duration': course.duration,
+                    'reason': reason
                 }
-            ])
+                for course, reason in courses
+            ]
             
+            _, product_categories = RelevanceRankingService.user_segments(request.user)
+            profile = getattr(request.user, 'profile', None)
             return Response({
                 'recommendations': recommendations,
                 'user_data_summary': {
-                    'region': user_region,
-                    'farm_size': user_data.get('profile', {}).get('farm_size'),
-                    'product_categories': user_products,
-                    'total_products': user_data.get('products', {}).get('total_products', 0)
+                    'region': request.user.region,
+                    'farm_size': str(profile.farm_size) if profile and profile.farm_size else None,
+                    'product_categories': product_categories,
+                    'total_products': request.user.products.filter(is_active=True).count()
                 }
             })
             
@@ -564,11 +559,18 @@ class ResourceViewSet(viewsets.ModelViewSet):
     def download(self, request, pk=None):
         """Increment download count"""
         resource = self.get_object()
-        resource.downloads = F('downloads') + 1
-        resource.save()
-        resource.refresh_from_db()
+        DownloadService.schedule_resource(resource, request.user)
         return Response({'status': 'download recorded'}, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['get'])
+    def file(self, request, pk=None):
+        """Send the resource file, resumable with Range requests, and count the download"""
+        resource = self.get_object()
+        response = send_stored_file(request, resource.file_url, resource.title)
+        if response.status_code in (200, 206, 302) and DownloadService.is_new_download(request):
+            DownloadService.schedule_resource(resource, request.user)
+        return response
+
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Get featured resources"""
@@ -653,7 +655,7 @@ class UserBookmarkViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return UserBookmark.objects.filter(user=self.request.user)
+        return UserBookmark.objects.filter(user=self.request.user).select_related('advisory_content')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -665,7 +667,7 @@ class UserLikeViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return UserLike.objects.filter(user=self.request.user)
+        return UserLike.objects.filter(user=self.request.user).select_related('advisory_content')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
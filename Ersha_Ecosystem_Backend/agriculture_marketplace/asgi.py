@@ -12,7 +12,6 @@ from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 from django.urls import path
-from orders.routing import websocket_urlpatterns as orders_websocket_urls
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'agriculture_marketplace.settings')
 
@@ -20,11 +19,15 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'agriculture_marketplace.setting
 # is populated before importing code that may import ORM models.
 django_asgi_app = get_asgi_application()
 
+from orders.routing import websocket_urlpatterns as orders_websocket_urlpatterns
+from logistics.routing import websocket_urlpatterns as logistics_websocket_urlpatterns
+from weather.routing import websocket_urlpatterns as weather_websocket_urlpatterns
+
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
     "websocket": AuthMiddlewareStack(
         URLRouter(
-            orders_websocket_urlpatterns
+            orders_websocket_urlpatterns + logistics_websocket_urlpatterns + weather_websocket_urlpatterns
         )
     ),
 })
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 from decouple import config
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -64,6 +65,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.QueryInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -106,13 +108,27 @@ if config('USE_POSTGRESQL', default=False, cast=bool):
             'PASSWORD': config('DB_PASSWORD', default='postgres'),
             'HOST': config('DB_HOST', default='localhost'),
             'PORT': config('DB_PORT', default='5432'),
+            # Persistent connections are per thread, and under ASGI (gunicorn.conf.py
+            # runs UvicornWorker) each request may run on a new thread, leaving the old
+            # connections open; reuse comes from the pool below instead
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0, cast=int),
+            'CONN_HEALTH_CHECKS': True,
         }
     }
+    if config('DB_POOL', default=True, cast=bool):
+        # psycopg's pool replaces persistent connections (psycopg[pool] in requirements.txt)
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+                'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            }
+        }
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
         }
     }
 
@@ -125,6 +141,83 @@ CACHES = {
         'TIMEOUT': 600,  # 10 minutes
     }
 }
+# Multi-worker deployments need a cache shared between processes
+if config('CACHE_URL', default=''):
+    CACHES['default'].update({
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('CACHE_URL'),
+    })
+# Answer request.user from token claims (core/authentication.py). Role changes
+# and bans reach older tokens through the cache, so this needs CACHE_URL.
+AUTH_TOKEN_CLAIMS = bool(config('CACHE_URL', default='')) and config('AUTH_TOKEN_CLAIMS', default=True, cast=bool)
+
+# Deferred side effects (see core/background.py)
+BACKGROUND_TASK_WORKERS = config('BACKGROUND_TASK_WORKERS', default=2, cast=int)
+BACKGROUND_TASKS_EAGER = config('BACKGROUND_TASKS_EAGER', default=False, cast=bool)
+
+# Per-request SQL instrumentation (see core/middleware.py)
+QUERY_INSTRUMENTATION_ENABLED = config('QUERY_INSTRUMENTATION_ENABLED', default=True, cast=bool)
+QUERY_INSTRUMENTATION_HEADERS = config('QUERY_INSTRUMENTATION_HEADERS', default=DEBUG, cast=bool)
+# Fraction of requests aggregated into EndpointQueryStats for query_report. Each
+# sampled request updates its view's row for the day, a hot row on busy views,
+# so sampling is opt-in: raise it while investigating and set it back to 0 after.
+QUERY_STATS_SAMPLE_RATE = config('QUERY_STATS_SAMPLE_RATE', default=0.0, cast=float)
+# Raise instead of logging when a view exceeds its budget; on by default under manage.py test
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default='test' in sys.argv, cast=bool)
+# Maximum queries per request, by dotted view name, with request.user served
+# from token claims. Without AUTH_TOKEN_CLAIMS (the default unless CACHE_URL is
+# set) authentication loads the user row, and the middleware allows requests
+# carrying a token that one extra query.
+QUERY_BUDGETS = {
+    'marketplace.views.ProductViewSet.list': 3,
+    'marketplace.views.ProductViewSet.my_products': 3,
+    'marketplace.views.ProductViewSet.retrieve': 2,
+    'marketplace.views.CartViewSet.list': 5,
+    'marketplace.views.CartViewSet.summary': 5,
+    'orders.views.NotificationViewSet.list': 3,
+    'orders.views.recent_activities_view': 2,
+    'orders.views.OrderViewSet.recent_activities': 2,
+    'news.views.NewsArticleViewSet.list': 3,
+    'news.views.NewsArticleViewSet.front_page': 2,
+    'advisory.views.AdvisoryContentViewSet.feed': 8,
+}
+
+# Weather ingestion (see weather/sources.py)
+WEATHER_SOURCE = config('WEATHER_SOURCE', default='weather.sources.FileWeatherSource')
+WEATHER_SOURCE_PATH = config('WEATHER_SOURCE_PATH', default=str(BASE_DIR / 'weather' / 'data' / 'sample_observations.jsonl'))
+WEATHER_RAW_RETENTION_DAYS = config('WEATHER_RAW_RETENTION_DAYS', default=30, cast=int)
+# Alerts stay valid this long after the observation they were generated from
+WEATHER_ALERT_VALIDITY_HOURS = config('WEATHER_ALERT_VALIDITY_HOURS', default=24, cast=int)
+WEATHER_ALERT_CACHE_SECONDS = config('WEATHER_ALERT_CACHE_SECONDS', default=300, cast=int)
+# Alert push (see weather/consumers.py): a location's alert is not re-sent within the cooldown
+WEATHER_ALERT_PUSH_COOLDOWN_SECONDS = config('WEATHER_ALERT_PUSH_COOLDOWN_SECONDS', default=3 * 3600, cast=int)
+WEATHER_ALERT_NOTIFICATION_BATCH = config('WEATHER_ALERT_NOTIFICATION_BATCH', default=500, cast=int)
+# Connected users count as online this long without a ping
+WEATHER_PRESENCE_TIMEOUT_SECONDS = config('WEATHER_PRESENCE_TIMEOUT_SECONDS', default=3600, cast=int)
+
+# News ingestion (see news/sources.py) and the cached front page
+NEWS_FEED_TIMEOUT = config('NEWS_FEED_TIMEOUT', default=15, cast=int)
+NEWS_FRONT_PAGE_FEATURED = config('NEWS_FRONT_PAGE_FEATURED', default=5, cast=int)
+NEWS_FRONT_PAGE_PER_CATEGORY = config('NEWS_FRONT_PAGE_PER_CATEGORY', default=4, cast=int)
+NEWS_FRONT_PAGE_CACHE_SECONDS = config('NEWS_FRONT_PAGE_CACHE_SECONDS', default=300, cast=int)
+
+# Personalized feeds (see advisory/ranking.py): items kept per segment and newest items scored on rebuild
+ADVISORY_RANKING_SIZE = config('ADVISORY_RANKING_SIZE', default=50, cast=int)
+ADVISORY_RANKING_CANDIDATES = config('ADVISORY_RANKING_CANDIDATES', default=2000, cast=int)
+
+# Periodic jobs run by `python manage.py run_scheduled_jobs`: (management command, seconds between runs)
+SCHEDULED_JOBS = [
+    ('refresh_logistics_analytics', 15 * 60),
+    ('materialize_product_performance', 60 * 60),
+    ('rebuild_relevance_rankings', 60 * 60),
+    ('snapshot_platform_stats', 60 * 60),
+    ('cleanup_pkce_sessions', 60 * 60),
+    ('compact_tracking_history', 24 * 3600),
+    ('compact_weather_history', 24 * 3600),
+]
+
+# Logistics KPIs (see logistics/services.py): hours between full rebuilds by refresh_logistics_analytics
+LOGISTICS_ANALYTICS_FULL_REFRESH_HOURS = config('LOGISTICS_ANALYTICS_FULL_REFRESH_HOURS', default=24, cast=int)
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -187,6 +280,11 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Media delivery (see core/media.py). MEDIA_SERVE mounts MEDIA_URL in Django, by default only under DEBUG;
+# MEDIA_OFFLOAD ('x-accel-redirect' or 'x-sendfile') lets Django check requests and the front server send the bytes
+MEDIA_SERVE = config('MEDIA_SERVE', default=DEBUG, cast=bool)
+MEDIA_OFFLOAD = config('MEDIA_OFFLOAD', default='')
+MEDIA_ACCEL_PREFIX = config('MEDIA_ACCEL_PREFIX', default='/protected-media/')
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -196,12 +294,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.StandardPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -218,6 +316,8 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': True,
+    # Refreshed access tokens carry the user's current role and verification claims
+    'TOKEN_REFRESH_SERIALIZER': 'core.authentication.ClaimsTokenRefreshSerializer',
 }
 
 # CORS Settings
@@ -248,7 +348,15 @@ FAYDA_CONFIG = {
     'EXPIRATION_TIME': config('EXPIRATION_TIME', default=15, cast=int),
     'ALGORITHM': config('ALGORITHM', default='RS256'),
     'CLIENT_ASSERTION_TYPE': config('CLIENT_ASSERTION_TYPE', default=''),
+    # Reuse a signed client assertion across token exchanges for up to this
+    # many seconds; reuse switches itself off if the IdP rejects it
+    'ASSERTION_REUSE_SECONDS': config('FAYDA_ASSERTION_REUSE_SECONDS', default=120, cast=int),
 }
+# Connections kept open to the Fayda IdP per process
+FAYDA_HTTP_POOL_SIZE = config('FAYDA_HTTP_POOL_SIZE', default=20, cast=int)
+# Where PKCE verifiers wait for the callback (see core/pkce.py); must be shared by all workers
+FAYDA_PKCE_STORE = config('FAYDA_PKCE_STORE', default='core.pkce.DatabasePKCEStore')
+FAYDA_PKCE_TTL_SECONDS = config('FAYDA_PKCE_TTL_SECONDS', default=1800, cast=int)
 
 # AI Content Generation Configuration
 GEMINI_API_KEY = config('GEMINI_API_KEY', default='')
@@ -14,15 +14,17 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenRefreshView
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
 from drf_yasg.generators import OpenAPISchemaGenerator
+from core import media
 
 # Custom schema generator with security definitions
 class CustomSchemaGenerator(OpenAPISchemaGenerator):
@@ -96,7 +98,8 @@ urlpatterns = [
     ])),
 ]
 
-# Serve media files in development
-if settings.DEBUG:
-    # Regular media files (public)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Media files, with range requests, validators and cache headers (see core/media.py)
+if settings.MEDIA_SERVE:
+    urlpatterns += [
+        re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.*)$', media.serve, name='media'),
+    ]
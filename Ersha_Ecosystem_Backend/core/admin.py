@@ -1,3 +1,17 @@
 from django.contrib import admin
+from .models import EndpointQueryStats, PlatformStatsSnapshot
 
-# Register your models here.
+
+@admin.register(PlatformStatsSnapshot)
+class PlatformStatsSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['id', 'created_at']
+    readonly_fields = ['stats', 'created_at']
+    ordering = ['-created_at']
+
+
+@admin.register(EndpointQueryStats)
+class EndpointQueryStatsAdmin(admin.ModelAdmin):
+    list_display = ['view_name', 'day', 'requests', 'total_queries', 'max_queries', 'budget_violations']
+    list_filter = ['day']
+    search_fields = ['view_name']
+    ordering = ['-day', '-max_queries']
@@ -0,0 +1,113 @@
+"""
+JWT authentication that serves request.user from token claims.
+
+Tokens carry the user's type and verification status, so authenticating a
+request does not read the users table: request.user is a ClaimsUser built
+from the claims, and the full row is loaded only if a view reads another
+field.
+
+When a user's type, verification status or active flag is saved, the new
+state is written to the shared cache for as long as an access token
+lives. Tokens issued before the change take their claims from that entry
+instead, and tokens of deactivated users are rejected. Refreshing always
+issues an access token with current claims.
+
+That only holds if every worker sees the same cache, so claims are used
+only when settings.AUTH_TOKEN_CLAIMS is on, which requires CACHE_URL;
+otherwise request.user is loaded from the database as usual.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+CLAIM_FIELDS = ('user_type', 'verification_status')
+STATE_FIELDS = CLAIM_FIELDS + ('is_active',)
+
+
+def _state_key(user_id):
+    return f'auth_user_state_{user_id}'
+
+
+def publish_user_state(user, is_active=None):
+    """Record a user's current claims; tokens issued before now will use them"""
+    state = {field: getattr(user, field) for field in STATE_FIELDS}
+    if is_active is not None:
+        state['is_active'] = is_active
+    state['changed_at'] = time.time()
+    # Older access tokens have all expired once this entry does
+    timeout = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()) + 60
+    cache.set(_state_key(user.pk), state, timeout=timeout)
+
+
+def get_published_state(user_id):
+    return cache.get(_state_key(user_id))
+
+
+def current_user_state(user_id):
+    """The user's claims and active flag, or None if the user no longer exists"""
+    from users.models import User
+
+    state = get_published_state(user_id)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values(*STATE_FIELDS).first()
+    return state
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry the user's role and verification claims"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for field in CLAIM_FIELDS:
+            token[field] = getattr(user, field)
+        token._user_state = {field: getattr(user, field) for field in STATE_FIELDS}
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        access.set_iat(at_time=self.current_time)
+        # A refresh token issued at login may carry claims that changed since
+        state = getattr(self, '_user_state', None) or current_user_state(self[api_settings.USER_ID_CLAIM])
+        if state is None or not state['is_active']:
+            raise TokenError(_('User is inactive or no longer exists'))
+        for field in CLAIM_FIELDS:
+            access[field] = state[field]
+        return access
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that answers request.user from claims instead of the database"""
+
+    def get_user(self, validated_token):
+        if not settings.AUTH_TOKEN_CLAIMS or any(field not in validated_token for field in CLAIM_FIELDS):
+            # No shared cache to carry changes to other workers, or issued before tokens carried claims
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        claims = {field: validated_token[field] for field in CLAIM_FIELDS}
+        state = get_published_state(user_id)
+        if state is not None and validated_token.get('iat', 0) <= state['changed_at']:
+            if not state['is_active']:
+                raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+            claims = {field: state[field] for field in CLAIM_FIELDS}
+
+        from users.models import ClaimsUser
+
+        return ClaimsUser.from_claims(user_id, claims)
@@ -0,0 +1,48 @@
+"""
+Run short side effects (notifications, pushes) off the request path.
+
+There is no task queue in this project, so deferred work runs on a small
+in-process thread pool once the surrounding transaction commits. Set
+BACKGROUND_TASKS_EAGER to run it inline instead, e.g. in tests.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 2),
+            thread_name_prefix='background-task'
+        )
+    return _executor
+
+
+def _run(func, args, kwargs, close_connections):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception(f"Background task {func.__name__} failed")
+    finally:
+        if close_connections:
+            # Worker threads open their own connections; don't leak them
+            connections.close_all()
+
+
+def defer(func, *args, **kwargs):
+    """Run func(*args, **kwargs) after the current transaction commits"""
+    def submit():
+        if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+            _run(func, args, kwargs, close_connections=False)
+        else:
+            _get_executor().submit(_run, func, args, kwargs, True)
+
+    transaction.on_commit(submit)
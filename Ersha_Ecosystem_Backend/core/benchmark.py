@@ -0,0 +1,202 @@
+"""
+In-process benchmarks of the hottest API endpoints.
+
+Each endpoint is requested through the DRF test client with a real access
+token, so routing, middleware, authentication and serialization are all
+measured, but not the network or server. Latency percentiles come from
+timed passes; query count and peak allocated memory come from one extra
+pass, so tracing does not inflate the timings.
+
+Results are plain dicts, saved as JSON and compared against a stored
+baseline with compare().
+"""
+import time
+import tracemalloc
+
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .authentication import ClaimsRefreshToken
+
+# Name, method, path (formatted with the context), acting user, request body, per-request preparation
+ENDPOINTS = [
+    {'name': 'product_list', 'method': 'get', 'path': '/api/products/', 'actor': 'buyer'},
+    {'name': 'product_search', 'method': 'get', 'path': '/api/products/?search={search}', 'actor': 'buyer'},
+    {'name': 'cart_summary', 'method': 'get', 'path': '/api/cart/summary/', 'actor': 'buyer', 'prepare': 'cart'},
+    {
+        'name': 'checkout', 'method': 'post', 'path': '/api/orders/orders/create_from_cart/', 'actor': 'buyer',
+        'data': {'delivery_address': 'Bole, Addis Ababa', 'delivery_phone': '+251911000000'},
+        'prepare': 'cart', 'each_request': True,
+    },
+    {'name': 'farmer_dashboard', 'method': 'get', 'path': '/api/analytics/sales/dashboard/', 'actor': 'farmer'},
+    {
+        'name': 'payments_dashboard', 'method': 'get',
+        'path': '/api/payments/analytics/dashboard/?user_id={payer_id}', 'actor': 'buyer',
+    },
+    {'name': 'logistics_dashboard', 'method': 'get', 'path': '/api/logistics/analytics/dashboard/', 'actor': 'buyer'},
+    {'name': 'weather_alerts', 'method': 'get', 'path': '/api/weather/alerts/?region={region}', 'actor': 'farmer'},
+    {
+        'name': 'notification_count', 'method': 'get', 'path': '/api/orders/notifications/unread_count/',
+        'actor': 'notified',
+    },
+]
+
+LATENCY_METRICS = ['p50_ms', 'p95_ms', 'p99_ms']
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def build_context():
+    """
+    Pick the busiest users of the current data as actors, so endpoints are
+    measured at their heaviest. Raises ValueError when there is no data.
+    """
+    from marketplace.models import Product
+    from orders.models import Notification
+    from payments.models import Transaction
+    from users.models import User
+    from weather.models import LatestWeather
+
+    farmer = User.objects.filter(user_type=User.UserType.FARMER).annotate(
+        product_count=Count('products')
+    ).order_by('-product_count', 'id').first()
+    buyer = User.objects.filter(user_type=User.UserType.BUYER).annotate(
+        order_count=Count('orders')
+    ).order_by('-order_count', 'id').first()
+    if farmer is None or buyer is None:
+        raise ValueError('No farmers or buyers to benchmark with; run generate_load_dataset first')
+
+    notified_id = Notification.objects.values('user_id').annotate(
+        total=Count('id')
+    ).order_by('-total').values_list('user_id', flat=True).first()
+    payer_id = Transaction.objects.values('sender_id').annotate(
+        total=Count('id')
+    ).order_by('-total').values_list('sender_id', flat=True).first()
+    region = LatestWeather.objects.values('region').annotate(
+        total=Count('id')
+    ).order_by('-total').values_list('region', flat=True).first()
+    product = Product.objects.filter(is_active=True).order_by('id').first()
+
+    return {
+        'users': {
+            'farmer': farmer,
+            'buyer': buyer,
+            'notified': User.objects.filter(pk=notified_id).first() or farmer,
+        },
+        'payer_id': payer_id or buyer.pk,
+        'region': region or farmer.region or 'Oromia',
+        'search': product.name.split()[0] if product else 'Teff',
+    }
+
+
+def prepare_cart(context):
+    """Put two in-stock products in the buyer's cart"""
+    from marketplace.models import Cart, Product
+
+    buyer = context['users']['buyer']
+    if Cart.objects.filter(user=buyer).exists():
+        return
+    # The least-ordered products are the least likely to fail the availability check
+    products = Product.objects.filter(is_active=True).annotate(
+        ordered=Count('orderitem')
+    ).order_by('ordered', 'id')[:2]
+    Cart.objects.bulk_create([Cart(user=buyer, product=product, quantity=1) for product in products])
+
+
+PREPARE = {'cart': prepare_cart}
+
+
+def measure(client, endpoint, context, iterations, warmup):
+    """Latency percentiles, queries and peak allocation of one endpoint"""
+    path = endpoint['path'].format(**context)
+    send = getattr(client, endpoint['method'])
+    prepare = PREPARE.get(endpoint.get('prepare'))
+
+    def request():
+        return send(path, endpoint.get('data'), format='json')
+
+    # Preparation runs outside the timed region: once, or before every request
+    each = prepare if endpoint.get('each_request') else None
+    if prepare:
+        prepare(context)
+    for _ in range(warmup):
+        if each:
+            each(context)
+        request()
+
+    latencies = []
+    for _ in range(iterations):
+        if each:
+            each(context)
+        started = time.perf_counter()
+        request()
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    if each:
+        each(context)
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'status': response.status_code,
+        'requests': iterations,
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        **{
+            metric: round(percentile(latencies, fraction), 3)
+            for metric, fraction in zip(LATENCY_METRICS, (0.50, 0.95, 0.99))
+        },
+        'queries': len(queries.captured_queries),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run(context, iterations=50, warmup=5, names=None):
+    """Benchmark every endpoint, or the named ones; returns results by endpoint name"""
+    endpoints = [endpoint for endpoint in ENDPOINTS if not names or endpoint['name'] in names]
+    clients = {}
+    for role, user in context['users'].items():
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+        clients[role] = client
+    return {
+        endpoint['name']: measure(clients[endpoint['actor']], endpoint, context, iterations, warmup)
+        for endpoint in endpoints
+    }
+
+
+def compare(results, baseline, latency_threshold=0.25, memory_threshold=0.25, query_threshold=0, min_delta_ms=1.0):
+    """
+    Regressions of results against a baseline, as messages. Latency and
+    memory regress when they grow by more than their relative threshold
+    (latency also by at least min_delta_ms, to ignore timer noise); query
+    counts when they grow by more than query_threshold.
+    """
+    regressions = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current['status'] != base['status']:
+            regressions.append(f"{name}: status {base['status']} -> {current['status']}")
+        for metric in LATENCY_METRICS:
+            limit = max(base[metric] * (1 + latency_threshold), base[metric] + min_delta_ms)
+            if current[metric] > limit:
+                regressions.append(f'{name}: {metric} {base[metric]:.2f} -> {current[metric]:.2f}')
+        if current['queries'] > base['queries'] + query_threshold:
+            regressions.append(f"{name}: queries {base['queries']} -> {current['queries']}")
+        if current['peak_kb'] > base['peak_kb'] * (1 + memory_threshold):
+            regressions.append(f"{name}: peak_kb {base['peak_kb']:.1f} -> {current['peak_kb']:.1f}")
+    return regressions
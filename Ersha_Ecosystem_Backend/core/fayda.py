@@ -1,17 +1,71 @@
 import jwt
+import logging
 import requests
 import json
 import secrets
 import hashlib
 import base64
+import threading
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from django.conf import settings
 from django.utils import timezone
-from django.core.cache import cache
+from jwt.algorithms import RSAAlgorithm
+from requests.adapters import HTTPAdapter
 from users.models import User
+from .pkce import get_pkce_store
+
+logger = logging.getLogger(__name__)
+
+JWK_COMPONENTS = ['n', 'e', 'd', 'p', 'q', 'dp', 'dq', 'qi']
+
+
+@lru_cache(maxsize=4)
+def load_signing_key(private_key):
+    """
+    Parse the configured JWK (JSON, or base64-encoded JSON) into a private
+    key object. Rebuilding and validating the RSA key is the most expensive
+    step of a token exchange, so it is done once per process and key.
+    """
+    try:
+        if private_key.startswith('ew') or private_key.startswith('eyJ'):
+            # It's base64 encoded, decode it first
+            private_key = base64.b64decode(private_key).decode('utf-8')
+        jwk_data = json.loads(private_key)
+    except json.JSONDecodeError as e:
+        raise Exception(f"Failed to parse private key JSON: {str(e)}")
+
+    for component in JWK_COMPONENTS:
+        if component not in jwk_data:
+            raise Exception(f"Missing JWK component: '{component}'")
+    return RSAAlgorithm.from_jwk(jwk_data)
+
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Process-wide session, so token and userinfo calls reuse connections to the IdP"""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=getattr(settings, 'FAYDA_HTTP_POOL_SIZE', 20))
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+    return _http_session
 
 
 class FaydaOIDC:
+    # Client assertions are valid for this long
+    ASSERTION_LIFETIME = 300
+    # A reused assertion must still have this long to live when it is sent
+    ASSERTION_SAFETY_WINDOW = 60
+
     def __init__(self):
         self.config = settings.FAYDA_CONFIG
         self.client_id = self.config['CLIENT_ID']
@@ -22,6 +76,10 @@ class FaydaOIDC:
         self.userinfo_endpoint = self.config['USERINFO_ENDPOINT']
         self.algorithm = self.config['ALGORITHM']
         self.client_assertion_type = self.config['CLIENT_ASSERTION_TYPE']
+        # Seconds a signed client assertion may be reused for; 0 signs one per exchange
+        self.assertion_reuse_seconds = self.config.get('ASSERTION_REUSE_SECONDS', 0)
+        self._assertion = None
+        self._assertion_lock = threading.Lock()
     
     def generate_pkce_pair(self):
         """Generate PKCE code verifier and challenge"""
@@ -35,13 +93,13 @@ class FaydaOIDC:
         
         return code_verifier, code_challenge
     
-    def generate_authorization_url(self, state=None, acr_values='OTP'):
+    def generate_authorization_url(self, state=None, acr_values='OTP', user=None):
         """Generate authorization URL with PKCE"""
         code_verifier, code_challenge = self.generate_pkce_pair()
+        state = state or secrets.token_urlsafe(32)
         
-        # Store code verifier in cache for later use
-        cache_key = f"fayda_pkce_{state or 'default'}"
-        cache.set(cache_key, code_verifier, timeout=1800)  # 30 minutes timeout
+        # Store the code verifier where any worker can find it on callback
+        get_pkce_store().save(state, code_verifier, user=user)
         
         params = {
             'response_type': 'code',
@@ -62,16 +120,22 @@ class FaydaOIDC:
         
         return auth_url, code_verifier
     
-    def generate_client_assertion(self):
-        """Generate JWT client assertion for OAuth2 client credentials flow"""
-        from cryptography.hazmat.primitives import serialization
-        from cryptography.hazmat.primitives.asymmetric import rsa
-        import base64
-        import time
-        
-        # Use current timestamp for better accuracy
+    def generate_client_assertion(self, fresh=False):
+        """
+        Generate JWT client assertion for OAuth2 client credentials flow.
+
+        Within ASSERTION_REUSE_SECONDS the last assertion is returned again,
+        as long as it stays valid for ASSERTION_SAFETY_WINDOW more seconds;
+        pass fresh=True to always sign a new one.
+        """
         now = int(time.time())
-        exp = now + 300  # 5 minutes from now
+        if self.assertion_reuse_seconds and not fresh:
+            with self._assertion_lock:
+                cached = self._assertion
+            if cached and cached[1] > now:
+                return cached[0]
+
+        exp = now + self.ASSERTION_LIFETIME
         
         # Ensure all required fields are present as per Fayda documentation
         payload = {
@@ -84,56 +148,22 @@ class FaydaOIDC:
         }
         
         try:
-            # Parse JWK - decode base64 first if needed
-            if self.private_key.startswith('ew') or self.private_key.startswith('eyJ'):
-                # It's base64 encoded, decode it first
-                import base64
-                decoded_key = base64.b64decode(self.private_key).decode('utf-8')
-                jwk_data = json.loads(decoded_key)
-            else:
-                # Assume it's already JSON
-                jwk_data = json.loads(self.private_key)
-            
-            # Extract RSA components from JWK
-            n = int.from_bytes(base64.urlsafe_b64decode(jwk_data['n'] + '=='), 'big')
-            e = int.from_bytes(base64.urlsafe_b64decode(jwk_data['e'] + '=='), 'big')
-            d = int.from_bytes(base64.urlsafe_b64decode(jwk_data['d'] + '=='), 'big')
-            p = int.from_bytes(base64.urlsafe_b64decode(jwk_data['p'] + '=='), 'big')
-            q = int.from_bytes(base64.urlsafe_b64decode(jwk_data['q'] + '=='), 'big')
-            dp = int.from_bytes(base64.urlsafe_b64decode(jwk_data['dp'] + '=='), 'big')
-            dq = int.from_bytes(base64.urlsafe_b64decode(jwk_data['dq'] + '=='), 'big')
-            qi = int.from_bytes(base64.urlsafe_b64decode(jwk_data['qi'] + '=='), 'big')
-            
-            # Create RSA private key
-            private_numbers = rsa.RSAPrivateNumbers(
-                p=p, q=q, d=d, dmp1=dp, dmq1=dq, iqmp=qi,
-                public_numbers=rsa.RSAPublicNumbers(e=e, n=n)
-            )
-            private_key = private_numbers.private_key()
-            
-            # Convert to PEM format
-            pem_key = private_key.private_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PrivateFormat.PKCS8,
-                encryption_algorithm=serialization.NoEncryption()
-            )
-            
-            # Generate JWT with explicit algorithm specification
-            jwt_token = jwt.encode(payload, pem_key, algorithm='RS256')
-            
-            return jwt_token
-            
-        except json.JSONDecodeError as e:
-            raise Exception(f"Failed to parse private key JSON: {str(e)}")
-        except KeyError as e:
-            raise Exception(f"Missing JWK component: {str(e)}")
+            jwt_token = jwt.encode(payload, load_signing_key(self.private_key), algorithm='RS256')
         except Exception as e:
             raise Exception(f"Failed to generate JWT: {str(e)}")
+
+        if self.assertion_reuse_seconds:
+            reuse_until = min(now + self.assertion_reuse_seconds, exp - self.ASSERTION_SAFETY_WINDOW)
+            with self._assertion_lock:
+                self._assertion = (jwt_token, reuse_until)
+        return jwt_token
     
     def exchange_code_for_tokens(self, authorization_code, code_verifier, state=None):
         """Exchange authorization code for tokens using PKCE"""
         try:
+            cached = self._assertion
             client_assertion = self.generate_client_assertion()
+            reused = cached is not None and cached[0] == client_assertion
             
             # Updated request data according to Fayda documentation
             data = {
@@ -150,7 +180,15 @@ class FaydaOIDC:
                 'Content-Type': 'application/x-www-form-urlencoded'
             }
             
-            response = requests.post(self.token_endpoint, data=data, headers=headers, timeout=30)
+            response = get_http_session().post(self.token_endpoint, data=data, headers=headers, timeout=30)
+
+            if reused and self._is_client_auth_error(response):
+                # The IdP enforces single-use assertions (jti replay checks);
+                # stop reusing them in this process and retry once
+                logger.warning("Fayda rejected a reused client assertion; signing one per exchange from now on")
+                self.assertion_reuse_seconds = 0
+                data['client_assertion'] = self.generate_client_assertion(fresh=True)
+                response = get_http_session().post(self.token_endpoint, data=data, headers=headers, timeout=30)
             
             if response.status_code == 200:
                 response_data = response.json()
@@ -171,6 +209,15 @@ class FaydaOIDC:
             raise Exception(f"Token exchange request failed: {str(e)}")
         except Exception as e:
             raise e
+
+    @staticmethod
+    def _is_client_auth_error(response):
+        if response.status_code not in (400, 401):
+            return False
+        try:
+            return response.json().get('error') in ('invalid_client', 'invalid_assertion')
+        except ValueError:
+            return False
     
     def get_user_info(self, access_token):
         """Get user information using access token"""
@@ -182,7 +229,7 @@ class FaydaOIDC:
         
         try:
             # First, try to decode the access token to see what's in it
-            import jwt
+            decoded_token = {}
             try:
                 decoded_token = jwt.decode(access_token, options={"verify_signature": False})
                 
@@ -210,7 +257,7 @@ class FaydaOIDC:
                 pass
             
             # If no user info in token, try the user info endpoint
-            response = requests.get(self.userinfo_endpoint, headers=headers, timeout=30)
+            response = get_http_session().get(self.userinfo_endpoint, headers=headers, timeout=30)
             
             if response.status_code == 200:
                 # Check if response is empty
@@ -276,39 +323,27 @@ class FaydaOIDC:
         except Exception as e:
             raise Exception(f"Failed to extract user data: {str(e)}")
     
-    def complete_verification_flow(self, authorization_code, state=None):
+    def complete_verification_flow(self, authorization_code, state=None, user=None):
         """Complete the full verification flow"""
-        try:
-            # Retrieve stored code verifier
-            cache_key = f"fayda_pkce_{state or 'default'}"
-            code_verifier = cache.get(cache_key)
-            
-            if not code_verifier:
-                raise Exception("Code verifier not found or expired")
-            
-            # Exchange code for tokens
-            token_response = self.exchange_code_for_tokens(authorization_code, code_verifier, state)
-            access_token = token_response.get('access_token')
-            
-            if not access_token:
-                raise Exception("Access token not received")
-            
-            # Get user information
-            userinfo = self.get_user_info(access_token)
-            
-            # Extract and validate user data
-            user_data = self.verify_and_extract_user_data(userinfo)
-            
-            # Clean up cache
-            cache.delete(cache_key)
-            
-            return user_data
-            
-        except Exception as e:
-            # Clean up cache on error
-            if state:
-                cache.delete(f"fayda_pkce_{state}")
-            raise e
+        # Retrieve the stored code verifier; it can only be used once, as
+        # the authorization code it accompanies
+        code_verifier = get_pkce_store().consume(state, user=user) if state else None
+        
+        if not code_verifier:
+            raise Exception("Code verifier not found or expired")
+        
+        # Exchange code for tokens
+        token_response = self.exchange_code_for_tokens(authorization_code, code_verifier, state)
+        access_token = token_response.get('access_token')
+        
+        if not access_token:
+            raise Exception("Access token not received")
+        
+        # Get user information
+        userinfo = self.get_user_info(access_token)
+        
+        # Extract and validate user data
+        return self.verify_and_extract_user_data(userinfo)
     
     def verify_fayda_id(self, fayda_id):
         """Verify Fayda ID and return user information (for testing)"""
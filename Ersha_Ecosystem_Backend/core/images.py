@@ -0,0 +1,171 @@
+"""
+Image pipeline for uploaded pictures: product photos and profile pictures.
+Expert.profile_image is a plain URL field, typically pointing elsewhere,
+and is not processed.
+
+Saving a model with a new image schedules process() to run in the
+background once the transaction commits (see core/background.py). It
+re-encodes the original without its EXIF data, after applying the EXIF
+orientation, and renders every size of the field in WebP and JPEG. Each
+file is named after the hash of its content (core.media.store), so its URL
+changes whenever its bytes do and can be cached indefinitely. The result
+is recorded in a JSON field next to the image:
+
+    {"source": "product_images/<hash>.jpg", "width": 3000, "height": 2000,
+     "sizes": {"thumb": {"width": 160, "height": 107,
+                         "webp": "product_images/variants/<hash>.webp",
+                         "jpeg": "product_images/variants/<hash>.jpg"}, ...}}
+
+Serializers expose it with core.serializers.ImageVariantsField.
+"""
+import logging
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db.models.fields.files import FieldFile
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+from .background import defer
+from .media import is_hashed, store
+
+logger = logging.getLogger(__name__)
+
+# Longest side of each rendered size, by kind of picture
+SIZES = {
+    'product': {'thumb': 160, 'list': 480, 'detail': 1200},
+    'avatar': {'thumb': 64, 'list': 160, 'detail': 400},
+}
+# Variant formats: Pillow format, file extension and encoder options
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+# Processed image fields: (app_label.Model, field) -> (variants field, sizes)
+IMAGE_FIELDS = {
+    ('marketplace.Product', 'image'): ('image_variants', 'product'),
+    ('users.Profile', 'profile_picture'): ('profile_picture_variants', 'avatar'),
+}
+
+# Sent with the model, primary key and field once an image's variants are stored
+image_processed = Signal()
+
+
+def source_name(value):
+    """Storage name of an image field's value, whether a FieldFile or the raw column"""
+    if isinstance(value, FieldFile):
+        value = value.name
+    return value or ''
+
+
+def schedule(instance, field):
+    """Process the instance's image after commit if it changed since it was last processed"""
+    model_label = instance._meta.label
+    variants_field, _ = IMAGE_FIELDS[(model_label, field)]
+    name = source_name(getattr(instance, field))
+    variants = getattr(instance, variants_field) or {}
+    if name and variants.get('source') != name:
+        defer(process, model_label, instance.pk, field)
+    elif not name and variants:
+        # The image was removed; its variants go with it
+        type(instance).objects.filter(pk=instance.pk).update(**{variants_field: {}})
+
+
+def _encode(image, pillow_format, options):
+    if pillow_format == 'JPEG' and image.mode != 'RGB':
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            # JPEG has no alpha: flatten onto white rather than black
+            rgba = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+    elif pillow_format == 'WEBP' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'P') else 'RGB')
+    buffer = BytesIO()
+    # No exif= argument: the metadata of the upload is not carried over
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue()
+
+
+def render(name, sizes):
+    """Store the stripped original and the variants of one image; returns the variants record"""
+    with default_storage.open(name, 'rb') as handle:
+        image = Image.open(handle)
+        image.load()
+    original_format = image.format if image.format in ('JPEG', 'PNG') else 'JPEG'
+    image = ImageOps.exif_transpose(image)
+    directory = posixpath.dirname(name)
+
+    if original_format == 'PNG':
+        original = _encode(image, 'PNG', {'optimize': True})
+    else:
+        original = _encode(image, 'JPEG', {'quality': 90, 'optimize': True, 'progressive': True})
+    record = {
+        'source': store(original, directory, 'png' if original_format == 'PNG' else 'jpg'),
+        'width': image.width,
+        'height': image.height,
+        'sizes': {},
+    }
+    for size, longest_side in SIZES[sizes].items():
+        resized = image.copy()
+        # Never upscales; small uploads keep their own size
+        resized.thumbnail((longest_side, longest_side), Image.Resampling.LANCZOS)
+        entry = {'width': resized.width, 'height': resized.height}
+        for key, (pillow_format, extension, options) in FORMATS.items():
+            data = _encode(resized, pillow_format, options)
+            entry[key] = store(data, posixpath.join(directory, 'variants'), extension)
+        record['sizes'][size] = entry
+    return record
+
+
+def process(model_label, pk, field):
+    """
+    Render an instance's image and point the field at the stripped
+    original. The row is only updated if the image has not been replaced
+    meanwhile; the raw upload is then deleted. Returns whether the row was
+    updated.
+    """
+    model = apps.get_model(model_label)
+    variants_field, sizes = IMAGE_FIELDS[(model_label, field)]
+    value = model.objects.filter(pk=pk).values_list(field, flat=True).first()
+    name = source_name(value)
+    if not name:
+        return False
+    try:
+        record = render(name, sizes)
+    except (OSError, Image.DecompressionBombError) as e:
+        logger.warning(f'Could not process {model_label} {pk} {field} ({name}): {e}')
+        return False
+
+    updated = model.objects.filter(pk=pk, **{field: value}).update(**{field: record['source'], variants_field: record})
+    if updated:
+        # Content-named files may be shared by identical uploads; only raw uploads are removed
+        if record['source'] != name and not is_hashed(name):
+            default_storage.delete(name)
+        image_processed.send(sender=model, pk=pk, field=field)
+    return bool(updated)
+
+
+def variant_urls(record, build_url=None):
+    """URLs of a variants record by size and format, plus srcset strings per format"""
+    if not record or not record.get('sizes'):
+        return None
+    build_url = build_url or default_storage.url
+    sizes = record['sizes']
+    result = {
+        size: {
+            'width': entry['width'],
+            'height': entry['height'],
+            **{key: build_url(entry[key]) for key in FORMATS if entry.get(key)},
+        }
+        for size, entry in sizes.items()
+    }
+    result['srcset'] = {
+        key: ', '.join(f"{result[size][key]} {result[size]['width']}w" for size in sizes if key in result[size])
+        for key in FORMATS
+    }
+    return result
@@ -0,0 +1,494 @@
+"""
+Synthetic, production-scale dataset for performance work.
+
+LoadDatasetGenerator writes farmers, buyers, products, orders with their
+items and seller rows, notifications, payment transactions and weather
+history with bulk_create in batches, so volumes in the millions load in
+minutes on SQLite or PostgreSQL. Distributions follow the platform:
+farmers spread over Ethiopian regions by population, harvests in each
+crop's season, order volume rising with the Meher harvest and with
+platform growth, and a few popular products taking most of the orders.
+
+Each stage draws from its own generator seeded from the run's seed, so
+the same seed, end date and volumes always produce the same rows, and
+changing one volume leaves the other stages' data unchanged.
+"""
+import math
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+EMAIL_DOMAIN = 'loadtest.ersha.et'
+
+# Region, share of farmers, mean temperature (C), woredas
+REGIONS = [
+    ('Oromia', 34, 20, ['Bishoftu', 'Adama', 'Jimma', 'Nekemte', 'Shashamane', 'Ambo']),
+    ('Amhara', 22, 18, ['Bahir Dar', 'Gondar', 'Dessie', 'Debre Markos', 'Debre Birhan']),
+    ('Somali', 6, 28, ['Jijiga', 'Gode', 'Kebri Dahar']),
+    ('South Ethiopia', 6, 21, ['Arba Minch', 'Sodo', 'Jinka']),
+    ('Central Ethiopia', 6, 18, ['Hosaena', 'Butajira', 'Worabe']),
+    ('Sidama', 5, 19, ['Hawassa', 'Yirgalem', 'Aleta Wondo']),
+    ('Tigray', 5, 18, ['Mekelle', 'Adigrat', 'Axum']),
+    ('Addis Ababa', 4, 17, ['Bole', 'Kolfe Keranio', 'Yeka']),
+    ('South West Ethiopia', 3, 20, ['Bonga', 'Mizan Aman']),
+    ('Afar', 2, 33, ['Semera', 'Asayita', 'Awash']),
+    ('Benishangul-Gumuz', 1, 26, ['Assosa', 'Bambasi']),
+    ('Gambela', 0.5, 28, ['Gambela', 'Itang']),
+    ('Dire Dawa', 0.5, 26, ['Dire Dawa']),
+    ('Harari', 0.3, 22, ['Harar']),
+]
+ARID_REGIONS = {'Afar', 'Somali', 'Dire Dawa'}
+
+# Name, category, unit, price range per unit (ETB), harvest months, popularity
+CROPS = [
+    ('Teff', 'grains', 'quintal', (4500, 7500), [11, 12, 1], 12),
+    ('Maize', 'grains', 'quintal', (2500, 4000), [10, 11, 12], 10),
+    ('Wheat', 'grains', 'quintal', (3500, 5000), [11, 12], 8),
+    ('Sorghum', 'grains', 'quintal', (2800, 4200), [11, 12, 1], 5),
+    ('Barley', 'grains', 'quintal', (3000, 4500), [7, 8, 11, 12], 4),
+    ('Arabica Coffee', 'coffee', 'kg', (250, 450), [10, 11, 12, 1], 10),
+    ('Chickpeas', 'legumes', 'quintal', (5000, 8000), [1, 2, 3], 4),
+    ('Red Lentils', 'legumes', 'kg', (90, 140), [1, 2], 3),
+    ('Haricot Beans', 'legumes', 'quintal', (4000, 6000), [8, 9, 10], 3),
+    ('Potatoes', 'tubers', 'kg', (15, 30), [6, 7, 8, 10, 11], 6),
+    ('Enset (Kocho)', 'tubers', 'kg', (40, 70), list(range(1, 13)), 2),
+    ('Onions', 'vegetables', 'kg', (20, 45), [3, 4, 10, 11], 6),
+    ('Tomatoes', 'vegetables', 'kg', (15, 40), [1, 2, 3, 9, 10], 5),
+    ('Cabbage', 'vegetables', 'piece', (10, 25), list(range(1, 13)), 3),
+    ('Avocado', 'fruits', 'kg', (30, 60), [3, 4, 5, 9, 10], 3),
+    ('Bananas', 'fruits', 'kg', (25, 45), list(range(1, 13)), 3),
+    ('Mango', 'fruits', 'kg', (30, 60), [3, 4, 5], 2),
+    ('Fresh Milk', 'dairy', 'liter', (40, 60), list(range(1, 13)), 3),
+    ('Honey', 'other', 'liter', (350, 600), [5, 6, 11, 12], 2),
+    ('Berbere', 'spices', 'kg', (300, 500), [11, 12, 1], 2),
+    ('Ginger', 'spices', 'kg', (80, 150), [12, 1, 2], 1),
+    ('Sesame', 'other', 'quintal', (9000, 12000), [9, 10, 11], 2),
+]
+
+# Quantity range for one order line, by unit
+ORDER_QUANTITIES = {
+    'quintal': (1, 20), 'kg': (5, 200), 'liter': (5, 100),
+    'piece': (5, 100), 'ton': (1, 5), 'bundle': (1, 20),
+}
+
+# Relative order volume by month: the Meher harvest peaks in December
+MONTH_ACTIVITY = {1: 1.4, 2: 1.1, 3: 0.9, 4: 0.8, 5: 0.8, 6: 0.9, 7: 1.0, 8: 1.0, 9: 1.0, 10: 1.2, 11: 1.5, 12: 1.6}
+# Relative activity by hour of day, UTC (Ethiopia is UTC+3)
+HOUR_ACTIVITY = [1, 1, 1, 2, 4, 6, 8, 9, 9, 8, 8, 9, 9, 8, 7, 6, 5, 4, 2, 1, 1, 1, 1, 1]
+EAT_OFFSET_HOURS = 3
+
+FIRST_NAMES = [
+    'Abebe', 'Almaz', 'Alemu', 'Aster', 'Bekele', 'Birtukan', 'Chaltu', 'Dawit', 'Desta', 'Fatuma',
+    'Genet', 'Girma', 'Hana', 'Haile', 'Kebede', 'Lemlem', 'Meseret', 'Mulugeta', 'Selam', 'Tadesse',
+    'Tigist', 'Tesfaye', 'Wubet', 'Yonas', 'Zewdu',
+]
+LAST_NAMES = [
+    'Abera', 'Alemayehu', 'Ayele', 'Bekele', 'Demissie', 'Gebre', 'Girma', 'Hailu', 'Kassa', 'Lemma',
+    'Mekonnen', 'Negash', 'Tadesse', 'Tekle', 'Wolde', 'Worku', 'Yilma', 'Zeleke',
+]
+
+NOTIFICATION_TYPES = [
+    ('order_status', 35, 'Order #{ref} updated', 'Your order #{ref} status has changed.'),
+    ('order_placed', 20, 'New order #{ref}', 'A buyer placed order #{ref} for your products.'),
+    ('cart_added', 25, 'Product added to cart', 'A buyer added one of your products to their cart.'),
+    ('system', 10, 'Platform update', 'New features are available on Ersha.'),
+    ('weather_alert', 10, 'Weather alert for your area', 'Check the latest weather alerts for your woreda.'),
+]
+TRANSACTION_TYPES = [('sale', 45), ('purchase', 30), ('withdrawal', 10), ('deposit', 8), ('refund', 4), ('fee', 3)]
+TRANSACTION_STATUSES = [
+    ('completed', 85), ('pending', 5), ('failed', 4), ('cancelled', 3), ('processing', 2), ('disputed', 1),
+]
+PAYMENT_PROVIDERS = [
+    ('telebirr', 40), ('cbe_birr', 25), ('m_pesa', 10), ('chapa', 10), ('hellocash', 5), ('awash_bank', 5), ('amole', 5),
+]
+WIND_DIRECTIONS = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
+
+
+def _weighted(options):
+    """(values, cumulative weights) for random.choices"""
+    values, cumulative, total = [], [], 0
+    for value, weight in options:
+        total += weight
+        values.append(value)
+        cumulative.append(total)
+    return values, cumulative
+
+
+def _money(value):
+    return Decimal(f'{value:.2f}')
+
+
+@contextmanager
+def historical_timestamps(*models):
+    """Let bulk_create keep the creation and update times we set, instead of now"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class LoadDatasetGenerator:
+    """Bulk-writes a reproducible synthetic dataset ending at midnight of end_date"""
+
+    def __init__(self, seed=42, end_date=None, days=730, batch_size=5000, log=None):
+        self.seed = seed
+        self.days = days
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        end_date = end_date or timezone.localdate()
+        self.end = timezone.make_aware(datetime.combine(end_date, datetime.min.time()))
+        self.start = self.end - timedelta(days=days)
+
+        # Activity grows with the platform and follows the harvest calendar
+        self.day_starts = [self.start + timedelta(days=day) for day in range(days)]
+        day_weights = [
+            (0.4 + 0.6 * day / max(days - 1, 1)) * MONTH_ACTIVITY[moment.month]
+            for day, moment in enumerate(self.day_starts)
+        ]
+        self.day_cumulative = list(_cumulative(day_weights))
+        self.hour_cumulative = list(_cumulative(HOUR_ACTIVITY))
+
+        self.farmer_ids = []
+        self.buyer_ids = []
+        self.user_regions = {}
+        self.products = []
+        self.product_cumulative = []
+
+    def rng(self, stage):
+        return random.Random(f'{self.seed}:{stage}')
+
+    def moments(self, rng, count):
+        """Activity-weighted timestamps within the window, as (moment, days before the end)"""
+        days = rng.choices(range(self.days), cum_weights=self.day_cumulative, k=count)
+        hours = rng.choices(range(24), cum_weights=self.hour_cumulative, k=count)
+        return [
+            (self.day_starts[day] + timedelta(seconds=hour * 3600 + rng.randrange(3600)), self.days - day)
+            for day, hour in zip(days, hours)
+        ]
+
+    def _write(self, label, total, build):
+        """Call build(rng, start, count) for each batch inside its own transaction"""
+        rng = self.rng(label)
+        started = time.monotonic()
+        for offset in range(0, total, self.batch_size):
+            with transaction.atomic():
+                build(rng, offset, min(self.batch_size, total - offset))
+        elapsed = time.monotonic() - started
+        self.log(f'{label}: {total} in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f}/s)')
+
+    def generate(self, farmers, buyers, products, orders, notifications, transactions,
+                 weather_days=0, weather_interval_hours=3):
+        from users.models import User
+
+        if User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').exists():
+            raise ValueError('A load dataset is already present; generate into a fresh database')
+        if products and not farmers:
+            raise ValueError('Products need farmers')
+        if orders and not (buyers and products):
+            raise ValueError('Orders need buyers and products')
+        if transactions and not (buyers and farmers):
+            raise ValueError('Transactions need buyers and farmers')
+
+        counts = {}
+        counts['farmers'] = self.users('farmer', farmers)
+        counts['buyers'] = self.users('buyer', buyers)
+        counts['products'] = self.create_products(products)
+        counts['orders'], counts['order_items'] = self.create_orders(orders)
+        counts['notifications'] = self.create_notifications(notifications)
+        counts['transactions'] = self.create_transactions(transactions)
+        counts['weather_observations'] = self.create_weather(weather_days, weather_interval_hours)
+        return counts
+
+    def users(self, user_type, total):
+        from users.models import Profile, User
+
+        password = make_password('loadtest-password')
+        regions, region_cumulative = _weighted((region, weight) for region, weight, _, _ in REGIONS)
+        woredas = {region: names for region, _, _, names in REGIONS}
+        statuses, status_cumulative = _weighted([('verified', 35), ('not_verified', 50), ('pending', 10), ('failed', 5)])
+        ids = self.farmer_ids if user_type == 'farmer' else self.buyer_ids
+
+        def build(rng, offset, count):
+            users, farms = [], []
+            joined = self.moments(rng, count)
+            for index in range(offset, offset + count):
+                email = f'{user_type}-{index:07d}@{EMAIL_DOMAIN}'
+                region = rng.choices(regions, cum_weights=region_cumulative)[0]
+                users.append(User(
+                    username=email, email=email, password=password, user_type=user_type,
+                    first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                    phone=f'+2519{rng.randrange(10 ** 8):08d}', region=region,
+                    verification_status=rng.choices(statuses, cum_weights=status_cumulative)[0],
+                    date_joined=joined[index - offset][0],
+                ))
+                farms.append((region, rng.choice(woredas[region]), min(rng.lognormvariate(0.2, 0.8), 50)))
+            User.objects.bulk_create(users, batch_size=self.batch_size)
+            for user, (region, woreda, farm_size) in zip(users, farms):
+                ids.append(user.pk)
+                self.user_regions[user.pk] = (region, woreda)
+            if user_type == 'farmer':
+                Profile.objects.bulk_create([
+                    Profile(user_id=user.pk, woreda=woreda, farm_size=_money(farm_size), farm_size_unit='hectares')
+                    for user, (_, woreda, farm_size) in zip(users, farms)
+                ], batch_size=self.batch_size)
+
+        self._write(f'{user_type}s', total, build)
+        return total
+
+    def create_products(self, total):
+        from marketplace.models import Product
+
+        crops, crop_cumulative = _weighted((crop, crop[5]) for crop in CROPS)
+
+        def harvest_date(rng, months):
+            # The latest harvest of the crop at or before the end of the window
+            day = self.end.date() - timedelta(days=rng.randrange(365))
+            while day.month not in months:
+                day -= timedelta(days=28)
+            return day
+
+        def build(rng, offset, count):
+            rows = []
+            for _ in range(count):
+                name, category, unit, (low, high), months, _ = rng.choices(crops, cum_weights=crop_cumulative)[0]
+                farmer_id = rng.choice(self.farmer_ids)
+                harvested = harvest_date(rng, months)
+                listed = max(
+                    timezone.make_aware(datetime.combine(harvested, datetime.min.time())), self.start
+                ) + timedelta(hours=rng.randrange(72))
+                price = rng.uniform(low, high)
+                rows.append(Product(
+                    farmer_id=farmer_id,
+                    name=f'{name} from {self.user_regions[farmer_id][1]}',
+                    description=f'{name} harvested in {harvested:%B %Y}.',
+                    price=_money(price), quantity=_money(rng.uniform(5, 500)), unit=unit, category=category,
+                    harvest_date=harvested, organic=rng.random() < 0.2, is_active=rng.random() < 0.9,
+                    created_at=min(listed, self.end), updated_at=min(listed, self.end),
+                ))
+            Product.objects.bulk_create(rows, batch_size=self.batch_size)
+            self.products.extend((product.pk, product.farmer_id, float(product.price), product.unit) for product in rows)
+
+        with historical_timestamps(Product):
+            self._write('products', total, build)
+        # Popularity falls off with rank, so a few products take most orders
+        self.product_cumulative = list(_cumulative(1 / (rank + 1) ** 1.07 for rank in range(len(self.products))))
+        return total
+
+    def order_status(self, rng, age):
+        """Status and milestone offsets (hours after creation) for an order placed `age` days ago"""
+        if age <= 2:
+            status = rng.choices(['pending', 'confirmed', 'shipped', 'cancelled'], [50, 30, 15, 5])[0]
+        elif age <= 7:
+            status = rng.choices(['confirmed', 'shipped', 'delivered', 'cancelled'], [15, 35, 40, 10])[0]
+        else:
+            status = rng.choices(['delivered', 'cancelled', 'returned', 'refunded'], [86, 8, 3, 3])[0]
+        confirmed = rng.uniform(1, 12)
+        shipped = confirmed + rng.uniform(12, 48)
+        delivered = shipped + rng.uniform(12, 96)
+        return status, confirmed, shipped, delivered
+
+    def create_orders(self, total):
+        from orders.models import Order, OrderItem, OrderSeller
+
+        items_per_order, items_cumulative = _weighted([(1, 55), (2, 25), (3, 12), (4, 5), (5, 3)])
+        item_count = 0
+
+        def build(rng, offset, count):
+            nonlocal item_count
+            orders, lines = [], []
+            for moment, age in self.moments(rng, count):
+                buyer_id = rng.choice(self.buyer_ids)
+                picks = rng.choices(
+                    range(len(self.products)), cum_weights=self.product_cumulative,
+                    k=rng.choices(items_per_order, cum_weights=items_cumulative)[0]
+                )
+                order_lines = []
+                for index in dict.fromkeys(picks):
+                    product_id, farmer_id, price, unit = self.products[index]
+                    low, high = ORDER_QUANTITIES[unit]
+                    order_lines.append((product_id, farmer_id, _money(rng.uniform(low, high)),
+                                        _money(price * rng.uniform(0.9, 1.05))))
+
+                status, confirmed, shipped, delivered = self.order_status(rng, age)
+                at = lambda hours: min(moment + timedelta(hours=hours), self.end)
+                region, woreda = self.user_regions[buyer_id]
+                order = Order(
+                    buyer_id=buyer_id, status=status,
+                    total_amount=sum(quantity * price for _, _, quantity, price in order_lines),
+                    delivery_address=f'{woreda}, {region}', delivery_phone=f'+2519{rng.randrange(10 ** 8):08d}',
+                    created_at=moment,
+                    confirmed_at=at(confirmed) if status not in ('pending', 'cancelled') else None,
+                    shipped_at=at(shipped) if status in ('shipped', 'delivered', 'returned', 'refunded') else None,
+                    delivered_at=at(delivered) if status in ('delivered', 'returned', 'refunded') else None,
+                    cancelled_at=at(confirmed) if status == 'cancelled' else None,
+                )
+                order.updated_at = max(filter(None, [
+                    order.created_at, order.confirmed_at, order.shipped_at, order.delivered_at, order.cancelled_at
+                ]))
+                orders.append(order)
+                lines.append(order_lines)
+
+            Order.objects.bulk_create(orders, batch_size=self.batch_size)
+            items, sellers = [], []
+            for order, order_lines in zip(orders, lines):
+                shares = {}
+                for product_id, farmer_id, quantity, price in order_lines:
+                    items.append(OrderItem(order_id=order.pk, product_id=product_id, quantity=quantity, unit_price=price))
+                    share = shares.setdefault(farmer_id, [Decimal(0), 0, Decimal(0)])
+                    share[0] += quantity * price
+                    share[1] += 1
+                    share[2] += quantity
+                # Bulk writes skip the signals that keep the seller index in step
+                sellers.extend(
+                    OrderSeller(
+                        order_id=order.pk, farmer_id=farmer_id, buyer_id=order.buyer_id, status=order.status,
+                        created_at=order.created_at, delivered_at=order.delivered_at,
+                        subtotal=subtotal, item_count=count, total_quantity=quantity,
+                    )
+                    for farmer_id, (subtotal, count, quantity) in shares.items()
+                )
+            OrderItem.objects.bulk_create(items, batch_size=self.batch_size)
+            OrderSeller.objects.bulk_create(sellers, batch_size=self.batch_size)
+            item_count += len(items)
+
+        with historical_timestamps(Order):
+            self._write('orders', total, build)
+        return total, item_count
+
+    def create_notifications(self, total):
+        from orders.models import Notification
+
+        if not total:
+            return 0
+        user_ids = self.farmer_ids + self.buyer_ids
+        # A minority of very active users receive most notifications
+        activity_rng = self.rng('notification-activity')
+        user_cumulative = list(_cumulative(activity_rng.paretovariate(1.5) for _ in user_ids))
+        kinds, kind_cumulative = _weighted((kind, kind[1]) for kind in NOTIFICATION_TYPES)
+
+        def build(rng, offset, count):
+            recipients = rng.choices(user_ids, cum_weights=user_cumulative, k=count)
+            rows = []
+            for user_id, (moment, age) in zip(recipients, self.moments(rng, count)):
+                notification_type, _, title, message = rng.choices(kinds, cum_weights=kind_cumulative)[0]
+                ref = rng.randrange(1, 10 ** 6)
+                rows.append(Notification(
+                    user_id=user_id, notification_type=notification_type,
+                    title=title.format(ref=ref), message=message.format(ref=ref),
+                    is_read=rng.random() < (0.9 if age > 7 else 0.4), metadata={'ref': ref}, created_at=moment,
+                ))
+            Notification.objects.bulk_create(rows, batch_size=self.batch_size)
+
+        with historical_timestamps(Notification):
+            self._write('notifications', total, build)
+        return total
+
+    def create_transactions(self, total):
+        from payments.models import Transaction
+
+        types, type_cumulative = _weighted(TRANSACTION_TYPES)
+        statuses, status_cumulative = _weighted(TRANSACTION_STATUSES)
+        providers, provider_cumulative = _weighted(PAYMENT_PROVIDERS)
+        escrow = {'completed': 'released', 'disputed': 'disputed', 'failed': 'refunded', 'cancelled': 'refunded'}
+
+        def build(rng, offset, count):
+            rows = []
+            for index, (moment, _) in enumerate(self.moments(rng, count), start=offset):
+                status = rng.choices(statuses, cum_weights=status_cumulative)[0]
+                amount = min(rng.lognormvariate(7.6, 1.0), 500000)
+                processing_fee, platform_fee = amount * 0.015, amount * 0.02
+                rows.append(Transaction(
+                    id=uuid.UUID(int=rng.getrandbits(128), version=4),
+                    transaction_id=f'LT{self.seed}-{index:09d}',
+                    transaction_type=rng.choices(types, cum_weights=type_cumulative)[0],
+                    amount=_money(amount), processing_fee=_money(processing_fee), platform_fee=_money(platform_fee),
+                    total_amount=_money(amount) + _money(processing_fee) + _money(platform_fee),
+                    status=status, escrow_status=escrow.get(status, 'holding'),
+                    sender_id=str(rng.choice(self.buyer_ids)), receiver_id=str(rng.choice(self.farmer_ids)),
+                    payment_provider=rng.choices(providers, cum_weights=provider_cumulative)[0],
+                    created_at=moment, updated_at=moment,
+                    completed_at=moment + timedelta(minutes=rng.randrange(1, 120)) if status == 'completed' else None,
+                ))
+            Transaction.objects.bulk_create(rows, batch_size=self.batch_size)
+
+        with historical_timestamps(Transaction):
+            self._write('transactions', total, build)
+        return total
+
+    def create_weather(self, days, interval_hours):
+        """
+        Observations every interval_hours for every woreda over the last
+        `days` days: a diurnal temperature cycle, Kiremt (June-September)
+        and Belg (February-May) rains, drier lowlands.
+        """
+        from weather.models import WeatherData
+        from weather.services import WeatherIngestionService
+
+        if not days:
+            return 0
+        steps = days * 24 // interval_hours
+        start = self.end - timedelta(days=days)
+        locations = [(region, temperature, woreda) for region, _, temperature, woredas in REGIONS for woreda in woredas]
+
+        def observation(rng, region, mean_temperature, woreda, moment):
+            hour = (moment.hour + EAT_OFFSET_HOURS) % 24
+            month = moment.month
+            rain_chance = 0.3 if 6 <= month <= 9 else 0.12 if 2 <= month <= 5 else 0.03
+            if region in ARID_REGIONS:
+                rain_chance *= 0.3
+            rainfall = rng.expovariate(1 / 6) if rng.random() < rain_chance else 0
+            seasonal = 2 if 3 <= month <= 5 else -1.5 if month in (7, 8) else 0
+            temperature = mean_temperature + seasonal + 6 * math.sin(2 * math.pi * (hour - 9) / 24) + rng.gauss(0, 1.5)
+            humidity = max(10, min(100, round(45 + (35 if rainfall else 0) + rng.gauss(0, 8))))
+            if rainfall > 10:
+                condition = 'Heavy rain'
+            elif rainfall:
+                condition = 'Light rain'
+            elif humidity > 75:
+                condition = 'Cloudy'
+            else:
+                condition = 'Sunny' if 6 <= hour < 18 else 'Clear'
+            daylight = max(0.0, math.sin(math.pi * (hour - 6) / 12)) if 6 <= hour < 18 else 0.0
+            return WeatherData(
+                id=uuid.UUID(int=rng.getrandbits(128), version=4),
+                region=region, woreda=woreda, created_at=moment,
+                temperature=_money(temperature), humidity=humidity, rainfall=_money(rainfall),
+                wind_speed=_money(abs(rng.gauss(3.5, 2)) + (rng.uniform(6, 12) if rng.random() < 0.02 else 0)),
+                wind_direction=rng.choice(WIND_DIRECTIONS), pressure=_money(rng.gauss(1012, 4)),
+                uv_index=round(11 * daylight * (0.5 if rainfall or humidity > 75 else 1)),
+                visibility=_money(4 if rainfall else 10), weather_condition=condition,
+                data_source='Synthetic load dataset',
+            )
+
+        def build(rng, offset, count):
+            rows = []
+            for index in range(offset, offset + count):
+                step, location = divmod(index, len(locations))
+                rows.append(observation(rng, *locations[location], start + timedelta(hours=(step + 1) * interval_hours)))
+            WeatherData.objects.bulk_create(rows, batch_size=self.batch_size, ignore_conflicts=True)
+
+        self._write('weather', steps * len(locations), build)
+        WeatherIngestionService.refresh_latest({(region, woreda): self.end for region, _, woreda in locations})
+        return steps * len(locations)
+
+
+def _cumulative(weights):
+    total = 0
+    for weight in weights:
+        total += weight
+        yield total
@@ -0,0 +1,105 @@
+import json
+import platform
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core import benchmark
+from core.load_dataset import LoadDatasetGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the hottest API endpoints in-process: latency percentiles, queries and peak memory per '
+        'endpoint. Writes JSON and, with --baseline, fails when a metric regresses beyond its threshold.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per endpoint (default: 50)')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per endpoint first (default: 5)')
+        parser.add_argument('--endpoints', help='Comma-separated endpoint names (default: all)')
+        parser.add_argument('--output', help='Write results to this JSON file')
+        parser.add_argument('--baseline', help='Compare against results previously written with --output')
+        parser.add_argument('--latency-threshold', type=float, default=0.25,
+                            help='Allowed relative growth of p50/p95/p99 (default: 0.25)')
+        parser.add_argument('--memory-threshold', type=float, default=0.25,
+                            help='Allowed relative growth of peak memory (default: 0.25)')
+        parser.add_argument('--query-threshold', type=int, default=0,
+                            help='Allowed extra queries per request (default: 0)')
+        parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                            help='Ignore latency growth smaller than this (default: 1.0)')
+        parser.add_argument('--dataset-scale', type=float,
+                            help='Benchmark a generated dataset of this scale (see generate_load_dataset), '
+                                 'rolled back afterwards, instead of the current data')
+        parser.add_argument('--seed', type=int, default=42, help='Seed for --dataset-scale (default: 42)')
+
+    def handle(self, *args, **options):
+        names = options['endpoints'].split(',') if options['endpoints'] else None
+        unknown = set(names or []) - {endpoint['name'] for endpoint in benchmark.ENDPOINTS}
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+        # The test client's host has to pass ALLOWED_HOSTS; query counts are reported, not enforced
+        test_settings = override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], QUERY_BUDGET_STRICT=False)
+        with test_settings, transaction.atomic():
+            if options['dataset_scale']:
+                self.generate(options['dataset_scale'], options['seed'])
+            try:
+                context = benchmark.build_context()
+            except ValueError as e:
+                raise CommandError(str(e))
+            results = benchmark.run(context, options['iterations'], options['warmup'], names)
+            # Checkout writes orders; leave nothing behind
+            transaction.set_rollback(True)
+
+        self.report(results)
+        if options['output']:
+            Path(options['output']).write_text(json.dumps({
+                'meta': {
+                    'created_at': timezone.now().isoformat(),
+                    'database': connection.vendor,
+                    'python': platform.python_version(),
+                    'iterations': options['iterations'],
+                    'dataset_scale': options['dataset_scale'],
+                },
+                'endpoints': results,
+            }, indent=2))
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            baseline = json.loads(Path(options['baseline']).read_text())['endpoints']
+            regressions = benchmark.compare(
+                results, baseline,
+                latency_threshold=options['latency_threshold'], memory_threshold=options['memory_threshold'],
+                query_threshold=options['query_threshold'], min_delta_ms=options['min_delta_ms'],
+            )
+            if regressions:
+                raise CommandError('Performance regressions:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}"))
+
+    def generate(self, scale, seed):
+        from core.management.commands.generate_load_dataset import VOLUMES
+
+        generator = LoadDatasetGenerator(seed=seed, batch_size=2000)
+        try:
+            generator.generate(
+                weather_days=max(1, round(730 * scale)),
+                **{name: max(1, round(volume * scale)) for name, volume in VOLUMES.items()}
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<20} {'status':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'peak KB':>9}"
+        )
+        for name, result in results.items():
+            line = (
+                f"{name:<20} {result['status']:>6} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                f"{result['p99_ms']:>8.2f} {result['queries']:>8} {result['peak_kb']:>9.1f}"
+            )
+            self.stdout.write(self.style.ERROR(line) if result['status'] >= 400 else line)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.pkce import get_pkce_store
+
+
+class Command(BaseCommand):
+    help = 'Delete expired Fayda PKCE sessions. Intended to run periodically, e.g. hourly from cron.'
+
+    def handle(self, *args, **options):
+        removed = get_pkce_store().cleanup_expired()
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} expired PKCE sessions'))
@@ -0,0 +1,62 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.load_dataset import LoadDatasetGenerator
+
+# Production-scale volumes, multiplied by --scale
+VOLUMES = {
+    'farmers': 100_000,
+    'buyers': 20_000,
+    'products': 150_000,
+    'orders': 1_000_000,
+    'notifications': 5_000_000,
+    'transactions': 500_000,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-generate a reproducible synthetic dataset at production scale (users, products, orders, '
+        'notifications, transactions, weather history) for performance work. Use a fresh database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Multiplier for the default volumes, e.g. 0.01 for a quick dataset (default: 1)')
+        for name, volume in VOLUMES.items():
+            parser.add_argument(f'--{name}', type=int, help=f'Number of {name} (default: {volume:,} x scale)')
+        parser.add_argument('--days', type=int, default=730, help='Days of order and notification history (default: 730)')
+        parser.add_argument('--weather-days', type=int, default=730, help='Days of weather history (default: 730)')
+        parser.add_argument('--weather-interval', type=int, default=3,
+                            help='Hours between weather observations per woreda (default: 3)')
+        parser.add_argument('--end-date', type=date.fromisoformat,
+                            help='Last day of the history, YYYY-MM-DD (default: today); fix it to reproduce a dataset')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert (default: 5000)')
+
+    def handle(self, *args, **options):
+        if options['weather_interval'] < 1 or 24 % options['weather_interval']:
+            raise CommandError('--weather-interval must divide 24')
+        volumes = {
+            name: options[name] if options[name] is not None else round(volume * options['scale'])
+            for name, volume in VOLUMES.items()
+        }
+
+        generator = LoadDatasetGenerator(
+            seed=options['seed'], end_date=options['end_date'], days=options['days'],
+            batch_size=options['batch_size'], log=self.stdout.write
+        )
+        try:
+            counts = generator.generate(
+                weather_days=options['weather_days'], weather_interval_hours=options['weather_interval'], **volumes
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            'Generated ' + ', '.join(f'{count:,} {name.replace("_", " ")}' for name, count in counts.items())
+        ))
+        self.stdout.write(
+            'Run backfill_activity_timeline for activity timelines and generate_weather_alerts for current alerts.'
+        )
@@ -0,0 +1,36 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core import images
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the responsive variants of product photos and profile pictures that have not been processed '
+        'yet, e.g. images uploaded before the pipeline existed. New uploads are processed on save.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', choices=sorted({label for label, _ in images.IMAGE_FIELDS}),
+                            help='Only process this model (repeatable)')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render images that already have variants, e.g. after SIZES changed')
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        for (model_label, field), (variants_field, _) in images.IMAGE_FIELDS.items():
+            if options['model'] and model_label not in options['model']:
+                continue
+            model = apps.get_model(model_label)
+            rows = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            for pk, value, variants in rows.values_list('pk', field, variants_field).iterator():
+                name = images.source_name(value)
+                if not name or (not options['force'] and (variants or {}).get('source') == name):
+                    continue
+                if images.process(model_label, pk, field):
+                    processed += 1
+                else:
+                    failed += 1
+            self.stdout.write(f'{model_label}.{field}: done')
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} images ({failed} skipped or failed)'))
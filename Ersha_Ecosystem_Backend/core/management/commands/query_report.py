@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from core.services import QueryStatsService
+
+
+class Command(BaseCommand):
+    help = 'Report the views issuing the most SQL queries, from sampled request statistics.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Days of statistics to include (default: 7)')
+        parser.add_argument('--limit', type=int, default=20, help='Number of views to list (default: 20)')
+        parser.add_argument(
+            '--order-by',
+            choices=sorted(QueryStatsService.REPORT_ORDERINGS),
+            default='queries',
+            help='Ranking: average queries, max queries, average DB time, duplicate or budget counts (default: queries)'
+        )
+        parser.add_argument(
+            '--prune-days',
+            type=int,
+            help='Also delete statistics older than this many days'
+        )
+
+    def handle(self, *args, **options):
+        rows = QueryStatsService.report(
+            days=options['days'], order_by=options['order_by'], limit=options['limit']
+        )
+        if not rows:
+            self.stdout.write('No query statistics recorded. Is QUERY_STATS_SAMPLE_RATE above 0?')
+        else:
+            self.stdout.write(
+                f"{'view':<60} {'requests':>9} {'avg q':>7} {'max q':>6} {'avg db ms':>10} {'dup':>6} {'over':>6}"
+            )
+            for row in rows:
+                self.stdout.write(
+                    f"{row['view_name'][:60]:<60} {row['total_requests']:>9} {row['avg_queries']:>7.1f} "
+                    f"{row['max_queries']:>6} {row['avg_db_ms']:>10.2f} {row['duplicate_requests']:>6} "
+                    f"{row['budget_violations']:>6}"
+                )
+                if row['top_duplicate']:
+                    self.stdout.write(f"    repeated: {row['top_duplicate'][:200]}")
+
+        if options['prune_days'] is not None:
+            pruned = QueryStatsService.prune(keep_days=options['prune_days'])
+            self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} old rows'))
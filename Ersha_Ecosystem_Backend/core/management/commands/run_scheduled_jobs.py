@@ -0,0 +1,48 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the periodic management commands listed in SCHEDULED_JOBS (materialized analytics, rankings, '
+        'compaction), each at its interval. Run exactly one instance, e.g. the scheduler service of '
+        'docker-compose.yml; a failing job is logged and retried at its next turn.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run every job once and exit, e.g. from cron')
+        parser.add_argument('--tick', type=float, default=30, help='Seconds between checks for due jobs')
+
+    def run(self, name):
+        started = time.monotonic()
+        try:
+            call_command(name, stdout=self.stdout, stderr=self.stderr)
+        except Exception:
+            logger.exception('Scheduled job %s failed', name)
+        finally:
+            # Jobs run far apart; do not hold connections the database may have dropped
+            close_old_connections()
+        logger.info('Scheduled job %s took %.1fs', name, time.monotonic() - started)
+
+    def handle(self, *args, **options):
+        jobs = getattr(settings, 'SCHEDULED_JOBS', [])
+        if options['once']:
+            for name, _ in jobs:
+                self.run(name)
+            return
+
+        # Everything runs at start, so a fresh deployment has its materialized tables right away
+        due = {name: 0.0 for name, _ in jobs}
+        while True:
+            for name, interval in jobs:
+                if time.monotonic() >= due[name]:
+                    due[name] = time.monotonic() + interval
+                    self.run(name)
+            time.sleep(options['tick'])
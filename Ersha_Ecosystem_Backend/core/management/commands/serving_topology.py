@@ -0,0 +1,65 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.serving import topology
+
+
+class Command(BaseCommand):
+    help = 'Print the recommended production serving topology (worker pools and database connections) for this machine.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cpus', type=int, help='Plan for this many CPUs instead of the ones available here')
+        parser.add_argument('--json', action='store_true', help='Output as JSON')
+
+    def database_connections(self, pool):
+        """Peak connections one worker of the pool can hold"""
+        database = settings.DATABASES['default']
+        pool_options = database.get('OPTIONS', {}).get('pool')
+        if pool_options:
+            return pool_options.get('max_size', 10) if isinstance(pool_options, dict) else 10
+        if pool['role'] == 'http':
+            # The request thread plus the deferred-task threads (core/background.py)
+            return 1 + getattr(settings, 'BACKGROUND_TASK_WORKERS', 2)
+        return 1
+
+    def warnings(self, pools):
+        multi_process = sum(pool['workers'] for pool in pools) > 1
+        warnings = []
+        if multi_process and 'locmem' in settings.CACHES['default']['BACKEND'].lower():
+            warnings.append('CACHES uses LocMemCache, which is per process: cached responses, versions and '
+                            'weather presence are not shared between workers. Use a shared cache such as Redis.')
+        if 'inmemory' in settings.CHANNEL_LAYERS['default']['BACKEND'].lower():
+            warnings.append('CHANNEL_LAYERS uses the in-memory layer; pushes from HTTP workers will not reach '
+                            'WebSocket workers.')
+        if settings.DATABASES['default']['ENGINE'].endswith('sqlite3') and multi_process:
+            warnings.append('SQLite serializes writes across workers; set USE_POSTGRESQL=True.')
+        if settings.DEBUG:
+            warnings.append('DEBUG is on.')
+        return warnings
+
+    def handle(self, *args, **options):
+        plan = topology(cpus=options['cpus'])
+        for pool in plan['pools']:
+            pool['db_connections'] = pool['workers'] * self.database_connections(pool)
+        plan['db_connections'] = sum(pool['db_connections'] for pool in plan['pools'])
+        plan['warnings'] = self.warnings(plan['pools'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(plan, indent=2))
+            return
+
+        self.stdout.write(f"CPUs: {plan['cpus']}")
+        for pool in plan['pools']:
+            self.stdout.write(
+                f"{pool['role']:>9} pool: {pool['workers']} workers on :{pool['port']} "
+                f"(graceful timeout {pool['graceful_timeout']}s, max requests {pool['max_requests'] or 'unlimited'}, "
+                f"up to {pool['db_connections']} database connections)"
+            )
+            self.stdout.write(f"           SERVER_ROLE={pool['role']} gunicorn -c gunicorn.conf.py")
+        self.stdout.write(f"Database connections at peak: {plan['db_connections']}")
+        self.stdout.write('Route /ws/ to the websocket pool and everything else to the http pool.')
+        self.stdout.write('Reload gracefully with: kill -HUP <gunicorn master pid>')
+        for warning in plan['warnings']:
+            self.stdout.write(self.style.WARNING(f'Warning: {warning}'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.services import PlatformStatsService
+
+
+class Command(BaseCommand):
+    help = 'Store a snapshot of platform-wide admin statistics. Intended to run periodically, e.g. from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=365,
+            help='Delete snapshots older than this many days (default: 365)'
+        )
+
+    def handle(self, *args, **options):
+        snapshot = PlatformStatsService.take_snapshot()
+        pruned = PlatformStatsService.prune(keep_days=options['keep_days'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully stored platform stats snapshot {snapshot.id} ({pruned} old snapshots pruned)')
+        )
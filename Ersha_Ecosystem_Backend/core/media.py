@@ -0,0 +1,243 @@
+"""
+Delivery of stored media: uploaded images, course PDFs and resource files.
+
+file_response() answers a request for one file of default_storage with:
+
+- a strong ETag and Last-Modified, and 304/412 on conditional requests;
+- single byte ranges (206, or 416 when unsatisfiable), honouring If-Range,
+  so interrupted downloads resume where they stopped;
+- Cache-Control: content-hashed names (see store()) never change, so they
+  are cached for a year as immutable; other files are revalidated;
+- optional offload to the front web server, which then sends the bytes
+  itself: MEDIA_OFFLOAD = 'x-accel-redirect' (nginx, with an internal
+  location at MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT) or 'x-sendfile'
+  (Apache, lighttpd).
+
+serve() is the view behind MEDIA_URL, mounted when MEDIA_SERVE is on (by
+default only under DEBUG). Files in PRIVATE_DIRS, e.g. expert
+certificates, are only sent to admins and their owner; a front server
+serving MEDIA_URL itself must keep those directories internal.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+HASH_LENGTH = 20
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+CHUNK_SIZE = 64 * 1024
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Upload directories that are not public: (model, file field) whose `user` owns each file
+PRIVATE_DIRS = {
+    'expert_certificates/': ('users.Profile', 'certificate_of_expertise'),
+}
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def store(data, directory, extension):
+    """Save bytes under a name derived from their hash; identical content is stored once"""
+    name = posixpath.join(directory, f'{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}.{extension}')
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def is_hashed(name):
+    """Whether a storage name was produced by store(), i.e. its content can never change"""
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    return len(stem) == HASH_LENGTH and all(char in '0123456789abcdef' for char in stem)
+
+
+def local_name(url):
+    """Storage name of a MEDIA_URL address; '' for external URLs"""
+    if not url:
+        return ''
+    if '://' in url or url.startswith('/'):
+        return url[len(settings.MEDIA_URL):] if url.startswith(settings.MEDIA_URL) else ''
+    return url
+
+
+def parse_range(header, size):
+    """
+    (start, end) of a single-range Range header, end inclusive. None when
+    the header is absent, malformed or asks for several ranges, which
+    lets the whole file be sent instead; RangeNotSatisfiable when it asks
+    for bytes past the end, which any range of an empty file does.
+    """
+    match = RANGE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    if size == 0:
+        raise RangeNotSatisfiable
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def _read(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _with_headers(response, headers):
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def _content_disposition(filename, attachment):
+    disposition = 'attachment' if attachment else 'inline'
+    try:
+        filename.encode('ascii')
+        return f'{disposition}; filename="{filename}"'
+    except UnicodeEncodeError:
+        return f"{disposition}; filename*=utf-8''{quote(filename)}"
+
+
+def file_response(request, name, filename=None, attachment=False, immutable=None):
+    """
+    Response sending the stored file `name` (see the module docstring).
+    `filename` sets Content-Disposition; `immutable` defaults to whether
+    the name is content-hashed. Raises Http404 when the file is missing.
+    """
+    try:
+        path = default_storage.path(name)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+
+    size = stat.st_size
+    if immutable is None:
+        immutable = is_hashed(name)
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    etag = f'"{stem}"' if is_hashed(name) else f'"{int(stat.st_mtime):x}-{size:x}"'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': IMMUTABLE if immutable else REVALIDATE,
+        'Accept-Ranges': 'bytes',
+    }
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if conditional is not None:
+        return _with_headers(conditional, headers)
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if filename:
+        headers['Content-Disposition'] = _content_disposition(filename, attachment)
+
+    offload = getattr(settings, 'MEDIA_OFFLOAD', '')
+    if offload:
+        # The front server handles ranges itself and sends the file
+        response = HttpResponse(content_type=content_type)
+        if offload == 'x-accel-redirect':
+            prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = quote(posixpath.join(prefix, name))
+        else:
+            response['X-Sendfile'] = path
+        return _with_headers(response, headers)
+
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return _with_headers(response, headers)
+    if byte_range and not _if_range_matches(request, etag, stat.st_mtime):
+        byte_range = None
+
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read(path, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    return _with_headers(response, headers)
+
+
+def _if_range_matches(request, etag, mtime):
+    """A range only applies if the representation is still the one If-Range names"""
+    validator = request.META.get('HTTP_IF_RANGE')
+    if not validator:
+        return True
+    if validator.startswith('"') or validator.startswith('W/'):
+        return validator == etag
+    return parse_http_date_safe(validator) == int(mtime)
+
+
+def _request_user(request):
+    """The session user, or the user of a bearer token sent to this plain Django view"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    from rest_framework.exceptions import AuthenticationFailed
+    from rest_framework_simplejwt.exceptions import InvalidToken
+
+    from .authentication import ClaimsJWTAuthentication
+
+    try:
+        result = ClaimsJWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return result[0] if result else None
+
+
+def may_read(request, name):
+    """Whether the requester may fetch a stored file; only PRIVATE_DIRS are restricted"""
+    for directory, (model_label, field) in PRIVATE_DIRS.items():
+        if name.startswith(directory):
+            user = _request_user(request)
+            if user is None:
+                return False
+            if user.is_staff or getattr(user, 'is_admin', False):
+                return True
+            return apps.get_model(model_label).objects.filter(**{field: name, 'user_id': user.pk}).exists()
+    return True
+
+
+def serve(request, path):
+    """The view behind MEDIA_URL"""
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponse(status=405, headers={'Allow': 'GET, HEAD'})
+    name = posixpath.normpath(path).lstrip('/')
+    # Not found rather than forbidden, so private names cannot be probed
+    if not may_read(request, name):
+        raise Http404
+    return file_response(request, name)
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .background import defer
+
+logger = logging.getLogger('core.queries')
+
+# Queries JWT authentication issues when it loads the token's user from the database
+AUTH_QUERIES = 1
+
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised for a view over its query budget when QUERY_BUDGET_STRICT is set"""
+
+
+def fingerprint(sql):
+    """Normalise a statement so repeats with different parameters compare equal"""
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return ' '.join(sql.split())
+
+
+def view_name_for(request):
+    """Dotted view path, including the viewset action, for budgets and reports"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    func = match.func
+    cls = getattr(func, 'cls', None)
+    if cls is None:
+        return f'{func.__module__}.{func.__name__}'
+    name = f'{cls.__module__}.{cls.__name__}'
+    actions = getattr(func, 'actions', None)
+    if actions:
+        action = actions.get(request.method.lower())
+        if action:
+            name = f'{name}.{action}'
+    return name
+
+
+class QueryRecorder:
+    """Database execute wrapper collecting statement fingerprints and timings"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        """Statements issued more than once, most repeated first"""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count > 1]
+
+
+@contextmanager
+def _wrap_connections(recorder):
+    """Install one recorder on every configured database connection"""
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records how many SQL queries each request issues and how long they took.
+
+    Per request it logs query count, DB time and repeated statement
+    fingerprints (the usual sign of an N+1) to the ``core.queries`` logger.
+    It optionally adds a Server-Timing header, and checks the count against
+    QUERY_BUDGETS, keyed by dotted view name, e.g.
+    ``'marketplace.views.ProductViewSet.list': 3``, counted with request.user
+    served from token claims: without AUTH_TOKEN_CLAIMS, requests carrying
+    a token are allowed AUTH_QUERIES more. Over-budget requests log
+    a warning, or raise QueryBudgetExceeded when QUERY_BUDGET_STRICT is set
+    (as in tests). When QUERY_STATS_SAMPLE_RATE is set, that fraction of
+    requests is aggregated into EndpointQueryStats for the query_report
+    command.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION_ENABLED', True):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with _wrap_connections(recorder):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        view_name = view_name_for(request)
+        if view_name is None:
+            return response
+
+        duplicates = recorder.duplicates()
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+        authenticated_from_db = (
+            'HTTP_AUTHORIZATION' in request.META and not getattr(settings, 'AUTH_TOKEN_CLAIMS', False)
+        )
+        if budget is not None and authenticated_from_db:
+            # Budgets assume request.user comes from token claims; otherwise the token's user is loaded
+            budget += AUTH_QUERIES
+        over_budget = budget is not None and recorder.count > budget
+        db_ms = recorder.duration * 1000
+
+        stats = {
+            'view': view_name,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(db_ms, 2),
+            'total_ms': round(elapsed * 1000, 2),
+            'duplicate_queries': sum(count - 1 for _, count in duplicates),
+            'budget': budget,
+        }
+        if duplicates:
+            stats['top_duplicate'] = {
+                'sql': duplicates[0][0][:500],
+                'count': duplicates[0][1],
+                'fingerprint': hashlib.sha1(duplicates[0][0].encode()).hexdigest()[:12],
+            }
+
+        # One JSON object per line so log shippers can index the fields
+        message = f"query_stats {json.dumps(stats)}"
+        if over_budget:
+            logger.warning(message, extra={'query_stats': stats})
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(
+                    f"{view_name} issued {recorder.count} queries, budget is {budget}"
+                    + (f"; repeated {duplicates[0][1]}x: {duplicates[0][0]}" if duplicates else '')
+                )
+        else:
+            logger.info(message, extra={'query_stats': stats})
+
+        if getattr(settings, 'QUERY_INSTRUMENTATION_HEADERS', False):
+            response['Server-Timing'] = (
+                f'db;dur={db_ms:.2f};desc="{recorder.count} queries", '
+                f'app;dur={max(elapsed * 1000 - db_ms, 0):.2f}'
+            )
+
+        if random.random() < getattr(settings, 'QUERY_STATS_SAMPLE_RATE', 0):
+            from .services import QueryStatsService
+            defer(
+                QueryStatsService.record, view_name, recorder.count, db_ms,
+                duplicates[0] if duplicates else None, over_budget
+            )
+        return response
+
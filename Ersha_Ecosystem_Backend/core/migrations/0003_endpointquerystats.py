@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_platformstatssnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EndpointQueryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(max_length=255)),
+                ('day', models.DateField()),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('total_queries', models.PositiveBigIntegerField(default=0)),
+                ('max_queries', models.PositiveIntegerField(default=0)),
+                ('total_db_ms', models.FloatField(default=0)),
+                ('duplicate_requests', models.PositiveIntegerField(default=0)),
+                ('budget_violations', models.PositiveIntegerField(default=0)),
+                ('sample_duplicate', models.TextField(blank=True)),
+                ('sample_duplicate_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Endpoint query stats',
+                'ordering': ['-day', 'view_name'],
+                'constraints': [models.UniqueConstraint(fields=('view_name', 'day'), name='unique_endpoint_query_stats_day')],
+            },
+        ),
+    ]
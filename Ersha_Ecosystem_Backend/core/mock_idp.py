@@ -0,0 +1,141 @@
+"""
+A local stand-in for the Fayda identity provider, for tests and offline runs.
+
+It serves the token and userinfo endpoints over real HTTP on an ephemeral
+port, verifies the private_key_jwt client assertion against the client's
+public key and the PKCE verifier against the challenge it was given, and
+records what it received:
+
+    with MockFaydaIdP(public_key, client_id) as idp:
+        code = idp.authorize(code_challenge, {'sub': 'FAN123', 'name': 'Abebe'})
+        ...point FAYDA_CONFIG's endpoints at idp.token_endpoint / idp.userinfo_endpoint
+"""
+import base64
+import hashlib
+import json
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import jwt
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, idp, *args, **kwargs):
+        self.idp = idp
+        super().__init__(*args, **kwargs)
+
+    def process_request(self, request, client_address):
+        self.idp.connections += 1
+        super().process_request(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so connection reuse by the client is observable
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        idp = self.server.idp
+        length = int(self.headers.get('Content-Length', 0))
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+        status, body = idp.token(form)
+        self._reply(status, body)
+
+    def do_GET(self):
+        idp = self.server.idp
+        token = self.headers.get('Authorization', '').removeprefix('Bearer ')
+        claims = idp.access_tokens.get(token)
+        if claims is None:
+            self._reply(401, {'error': 'invalid_token'})
+        else:
+            self._reply(200, claims)
+
+
+class MockFaydaIdP:
+    """Token and userinfo endpoints of a Fayda-like OIDC provider"""
+
+    def __init__(self, public_key, client_id, reject_replayed_assertions=False):
+        self.public_key = public_key
+        self.client_id = client_id
+        self.reject_replayed_assertions = reject_replayed_assertions
+        self.codes = {}
+        self.access_tokens = {}
+        self.assertions = []
+        self.connections = 0
+        self._server = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._server = _Server(self, ('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    @property
+    def token_endpoint(self):
+        return f'{self.base_url}/v1/esignet/oauth/v2/token'
+
+    @property
+    def userinfo_endpoint(self):
+        return f'{self.base_url}/v1/esignet/oidc/userinfo'
+
+    def authorize(self, code_challenge, claims):
+        """Simulate a completed login: returns the authorization code to redeem"""
+        code = secrets.token_urlsafe(16)
+        self.codes[code] = (code_challenge, claims)
+        return code
+
+    def token(self, form):
+        """Handle a token request; returns (status, body)"""
+        assertion = form.get('client_assertion', '')
+        try:
+            claims = jwt.decode(
+                assertion, self.public_key, algorithms=['RS256'],
+                audience=self.token_endpoint, issuer=self.client_id
+            )
+        except jwt.PyJWTError as e:
+            return 401, {'error': 'invalid_client', 'error_description': str(e)}
+        with self._lock:
+            replayed = any(seen['jti'] == claims['jti'] for seen in self.assertions)
+            self.assertions.append(claims)
+        if replayed and self.reject_replayed_assertions:
+            return 401, {'error': 'invalid_client', 'error_description': 'Assertion already used'}
+
+        code_challenge, user_claims = self.codes.pop(form.get('code'), (None, None))
+        verifier = form.get('code_verifier', '')
+        expected = base64.urlsafe_b64encode(hashlib.sha256(verifier.encode()).digest()).decode().rstrip('=')
+        if code_challenge is None or expected != code_challenge:
+            return 400, {'error': 'invalid_grant', 'error_description': 'Unknown code or PKCE mismatch'}
+
+        # Opaque token, so the client has to call the userinfo endpoint
+        access_token = secrets.token_urlsafe(24)
+        self.access_tokens[access_token] = user_claims
+        return 200, {'access_token': access_token, 'token_type': 'Bearer', 'expires_in': 300}
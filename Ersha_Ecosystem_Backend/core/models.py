@@ -22,3 +22,41 @@ class PKCECache(models.Model):
     
     def __str__(self):
         return f"PKCE for user {self.user_id} - {self.state[:10]}..."
+
+
+class PlatformStatsSnapshot(models.Model):
+    """Point-in-time platform counters used by the admin dashboards"""
+    stats = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        get_latest_by = 'created_at'
+    
+    def __str__(self):
+        return f"Platform stats at {self.created_at}"
+
+
+class EndpointQueryStats(models.Model):
+    """Daily SQL query totals per view, recorded by QueryInstrumentationMiddleware"""
+    view_name = models.CharField(max_length=255)
+    day = models.DateField()
+    requests = models.PositiveIntegerField(default=0)
+    total_queries = models.PositiveBigIntegerField(default=0)
+    max_queries = models.PositiveIntegerField(default=0)
+    total_db_ms = models.FloatField(default=0)
+    duplicate_requests = models.PositiveIntegerField(default=0)
+    budget_violations = models.PositiveIntegerField(default=0)
+    # Most repeated statement of the worst request seen, for the report
+    sample_duplicate = models.TextField(blank=True)
+    sample_duplicate_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-day', 'view_name']
+        constraints = [
+            models.UniqueConstraint(fields=['view_name', 'day'], name='unique_endpoint_query_stats_day'),
+        ]
+        verbose_name_plural = 'Endpoint query stats'
+    
+    def __str__(self):
+        return f"{self.view_name} on {self.day}"
@@ -0,0 +1,144 @@
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError as RequestValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    Page-number pagination with two opt-in fast paths for infinite scroll.
+
+    ?count=false skips the COUNT(*) and fetches one extra row to tell
+    whether a next page exists.
+
+    Views that set ``cursor_ordering`` (e.g. ``('-created_at', '-id')``)
+    also accept ?cursor=. An empty cursor starts at the top; each response
+    carries the cursor of the next page. Pages are read with a keyset on
+    the ordering fields, so deep pages cost the same as the first and rows
+    inserted while scrolling never shift or repeat results. The ordering
+    must end in a unique field and its fields must be non-null. A cursor
+    only walks that ordering, so combining it with ?ordering= is a 400.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+    cursor_ordering_message = 'Cursor pages cannot be reordered; drop either cursor or ordering'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.mode = 'page'
+        ordering = getattr(view, 'cursor_ordering', None)
+
+        if ordering and self.cursor_query_param in request.query_params:
+            if request.query_params.get(api_settings.ORDERING_PARAM):
+                raise RequestValidationError({api_settings.ORDERING_PARAM: [self.cursor_ordering_message]})
+            self.mode = 'cursor'
+            return self._paginate_keyset(queryset, request, ordering)
+        if request.query_params.get(self.count_query_param, '').lower() in ('false', '0'):
+            self.mode = 'uncounted'
+            return self._paginate_without_count(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.mode == 'cursor':
+            return Response(OrderedDict([
+                ('next', self._next_cursor_link()),
+                ('next_cursor', self.next_cursor),
+                ('results', data),
+            ]))
+        if self.mode == 'uncounted':
+            return Response(OrderedDict([
+                ('next', self._page_link(self.page_number + 1) if self.has_next else None),
+                ('previous', self._page_link(self.page_number - 1) if self.page_number > 1 else None),
+                ('results', data),
+            ]))
+        return super().get_paginated_response(data)
+
+    def _paginate_without_count(self, queryset, request):
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            self.page_number = 0
+        if self.page_number < 1:
+            raise NotFound(self.invalid_page_message.format(page_number=self.page_number, message='Invalid page.'))
+
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def _page_link(self, page_number):
+        url = self.request.build_absolute_uri()
+        if page_number == 1:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, page_number)
+
+    # Keyset pages
+
+    @staticmethod
+    def _split(ordering):
+        return [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+    @staticmethod
+    def encode_cursor(instance, ordering):
+        values = []
+        for name, _ in StandardPagination._split(ordering):
+            value = getattr(instance, name)
+            values.append(value.isoformat() if isinstance(value, (date, datetime)) else str(value))
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor, model, ordering):
+        """Parse a cursor into typed ordering values; raises NotFound when malformed"""
+        fields = self._split(ordering)
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(fields, values)
+            ]
+        except (ValueError, TypeError, UnicodeDecodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _after(ordering, values):
+        """Rows strictly after the cursor position in the given ordering"""
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(StandardPagination._split(ordering), values):
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+            condition |= Q(**equal, **{lookup: value})
+            equal[name] = value
+        return condition
+
+    def _paginate_keyset(self, queryset, request, ordering):
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(self._after(ordering, self.decode_cursor(cursor, queryset.model, ordering)))
+
+        rows = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_cursor = self.encode_cursor(rows[-1], ordering)
+        return rows
+
+    def _next_cursor_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
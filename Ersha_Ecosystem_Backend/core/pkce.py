@@ -0,0 +1,111 @@
+"""
+Storage for Fayda PKCE verifiers between the authorization redirect and the
+callback.
+
+The callback is often served by a different worker than the one that built
+the authorization URL, so the store must be shared between processes:
+either the database (PKCESession, the default) or a cache backend shared by
+all workers, such as Redis. Choose one with the FAYDA_PKCE_STORE setting.
+Verifiers are single use: of any number of concurrent consumes for a
+state, exactly one gets the verifier. A verifier saved for a user is only
+handed to that user; one saved without a user (an anonymous flow) to any
+caller.
+"""
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class PKCEStore:
+    """Base class for PKCE verifier stores"""
+
+    def save(self, state, code_verifier, user=None, ttl=None):
+        raise NotImplementedError
+
+    def consume(self, state, user=None):
+        """Return the verifier for state and remove it, or None when missing, expired or someone else's"""
+        raise NotImplementedError
+
+    @staticmethod
+    def may_consume(owner_id, user):
+        """Whether user may consume a verifier saved for owner_id"""
+        return owner_id is None or owner_id == getattr(user, 'pk', None)
+
+    def cleanup_expired(self):
+        """Remove expired entries; returns the number removed"""
+        return 0
+
+    @staticmethod
+    def default_ttl():
+        return getattr(settings, 'FAYDA_PKCE_TTL_SECONDS', 1800)
+
+
+class CachePKCEStore(PKCEStore):
+    """Keeps verifiers in the default cache; entries expire with the cache TTL"""
+
+    @staticmethod
+    def _key(state):
+        return f'fayda_pkce_{state}'
+
+    def save(self, state, code_verifier, user=None, ttl=None):
+        cache.set(
+            self._key(state),
+            {'code_verifier': code_verifier, 'user_id': getattr(user, 'pk', None)},
+            timeout=ttl or self.default_ttl()
+        )
+
+    def consume(self, state, user=None):
+        entry = cache.get(self._key(state))
+        # Another user's attempt leaves the state usable by its owner
+        if entry is None or not self.may_consume(entry['user_id'], user):
+            return None
+        # Only the caller whose delete removed the key may use the verifier
+        if not cache.delete(self._key(state)):
+            return None
+        return entry['code_verifier']
+
+
+class DatabasePKCEStore(PKCEStore):
+    """Keeps verifiers in PKCESession rows, swept by cleanup_pkce_sessions"""
+
+    def save(self, state, code_verifier, user=None, ttl=None):
+        from users.models import PKCESession
+
+        PKCESession.objects.create(
+            user=user,
+            state=state,
+            code_verifier=code_verifier,
+            expires_at=timezone.now() + timedelta(seconds=ttl or self.default_ttl())
+        )
+
+    def consume(self, state, user=None):
+        from users.models import PKCESession
+
+        # The same rule as may_consume, so another user's attempt deletes nothing
+        sessions = PKCESession.objects.filter(state=state).filter(
+            Q(user__isnull=True) | Q(user_id=getattr(user, 'pk', None))
+        )
+        code_verifier = sessions.filter(expires_at__gt=timezone.now()).values_list('code_verifier', flat=True).first()
+        # The delete is the atomic step: a concurrent consumer deletes nothing
+        deleted, _ = sessions.delete()
+        return code_verifier if deleted else None
+
+    def cleanup_expired(self):
+        from users.models import PKCESession
+
+        return PKCESession.cleanup_expired()
+
+
+@lru_cache(maxsize=None)
+def _store(path):
+    return import_string(path)()
+
+
+def get_pkce_store():
+    """The configured store instance"""
+    return _store(getattr(settings, 'FAYDA_PKCE_STORE', 'core.pkce.DatabasePKCEStore'))
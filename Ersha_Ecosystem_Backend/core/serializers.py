@@ -0,0 +1,48 @@
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+from .images import variant_urls
+
+
+class SparseFieldsetsMixin:
+    """
+    Lets clients request a subset of fields with ?fields=name,price.
+
+    Unknown names are ignored; when none of the requested names exist the
+    full representation is returned.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request')
+        requested = request.query_params.get('fields') if request is not None else None
+        if not requested:
+            return
+
+        allowed = {name.strip() for name in requested.split(',')} & set(self.fields)
+        if not allowed:
+            return
+        for name in set(self.fields) - allowed:
+            self.fields.pop(name)
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Read-only map of an image's processed variants (see core/images.py):
+    URLs and dimensions by size and format, and a ``srcset`` string per
+    format. None until the image has been processed.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+
+        def build_url(name):
+            url = default_storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+
+        return variant_urls(value, build_url)
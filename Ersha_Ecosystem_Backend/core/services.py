@@ -0,0 +1,275 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField, Max, Q, Sum, Value
+from django.db.models.functions import Cast, Greatest
+from django.utils import timezone
+
+from .models import EndpointQueryStats, PlatformStatsSnapshot
+
+# User types counted as merchants; 'agricultural_business' is a retired type still held by older accounts
+MERCHANT_TYPES = ['buyer', 'agricultural_business']
+
+
+class PlatformStatsService:
+    """Service for computing and reading platform-wide admin statistics"""
+    
+    @staticmethod
+    def compute():
+        """
+        Compute every admin counter.
+        
+        Each table is read with a single conditionally aggregated query,
+        plus one query per top-N list.
+        """
+        from users.models import User
+        from news.models import NewsArticle
+        from logistics.models import ServiceProvider, Delivery
+        from advisory.models import Expert
+        from marketplace.models import Product
+        
+        now = timezone.now()
+        seven_days_ago = now - timedelta(days=7)
+        thirty_days_ago = now - timedelta(days=30)
+        
+        # Users
+        user_aggregates = {
+            'total': Count('id'),
+            'recent_7d': Count('id', filter=Q(date_joined__gte=seven_days_ago)),
+            'recent_30d': Count('id', filter=Q(date_joined__gte=thirty_days_ago)),
+            'merchants': Count('id', filter=Q(user_type__in=MERCHANT_TYPES)),
+        }
+        for value, _ in User.UserType.choices:
+            user_aggregates[f'type_{value}'] = Count('id', filter=Q(user_type=value))
+        for value, _ in User.VerificationStatus.choices:
+            user_aggregates[f'verification_{value}'] = Count('id', filter=Q(verification_status=value))
+        user_counts = User.objects.aggregate(**user_aggregates)
+        
+        users = {
+            'total': user_counts['total'],
+            'farmers': user_counts[f'type_{User.UserType.FARMER}'],
+            'merchants': user_counts['merchants'],
+            'verified': user_counts[f'verification_{User.VerificationStatus.VERIFIED}'],
+            'pending': user_counts[f'verification_{User.VerificationStatus.PENDING}'],
+            'recent_7d': user_counts['recent_7d'],
+            'recent_30d': user_counts['recent_30d'],
+            'by_type': [
+                {'user_type': value, 'count': user_counts[f'type_{value}']}
+                for value, _ in User.UserType.choices if user_counts[f'type_{value}']
+            ],
+            'by_verification_status': [
+                {'verification_status': value, 'count': user_counts[f'verification_{value}']}
+                for value, _ in User.VerificationStatus.choices if user_counts[f'verification_{value}']
+            ],
+        }
+        
+        # News (categories are free text, so group once and total in Python)
+        categories = list(
+            NewsArticle.objects.values('category').annotate(
+                count=Count('id'),
+                total_views=Sum('views'),
+                featured=Count('id', filter=Q(featured=True)),
+                recent_7d=Count('id', filter=Q(created_at__gte=seven_days_ago)),
+            ).order_by('category')
+        )
+        news = {
+            'total': sum(row['count'] for row in categories),
+            'featured': sum(row['featured'] for row in categories),
+            'views': sum(row['total_views'] or 0 for row in categories),
+            'recent_7d': sum(row['recent_7d'] for row in categories),
+            'categories': [
+                {'category': row['category'], 'count': row['count'], 'total_views': row['total_views'] or 0}
+                for row in categories
+            ],
+        }
+        
+        # Logistics
+        logistics = ServiceProvider.objects.aggregate(
+            providers=Count('id'),
+            verified_providers=Count('id', filter=Q(verified=True)),
+            active_providers=Count('id', filter=Q(is_active=True)),
+        )
+        logistics.update(Delivery.objects.aggregate(
+            deliveries=Count('id'),
+            completed_deliveries=Count('id', filter=Q(status='delivered')),
+        ))
+        logistics['top_providers'] = [
+            {
+                'name': provider['name'],
+                'rating': float(provider['rating']),
+                'total_deliveries': provider['total_deliveries'],
+                'verified': provider['verified'],
+            }
+            for provider in ServiceProvider.objects.filter(is_active=True).order_by('-rating').values(
+                'name', 'rating', 'total_deliveries', 'verified'
+            )[:5]
+        ]
+        
+        # Experts
+        experts = Expert.objects.aggregate(
+            total=Count('id'),
+            verified=Count('id', filter=Q(verified=True)),
+            featured=Count('id', filter=Q(featured=True)),
+            available=Count('id', filter=Q(availability='available')),
+        )
+        experts['top_experts'] = [
+            {
+                'name': expert['name'],
+                'specialization': expert['specialization'],
+                'rating': float(expert['rating']),
+                'total_consultations': expert['total_consultations'],
+                'verified': expert['verified'],
+                'featured': expert['featured'],
+            }
+            for expert in Expert.objects.filter(verified=True).order_by('-rating').values(
+                'name', 'specialization', 'rating', 'total_consultations', 'verified', 'featured'
+            )[:5]
+        ]
+        
+        # Marketplace
+        marketplace = Product.objects.aggregate(
+            products=Count('id'),
+            active_products=Count('id', filter=Q(is_active=True)),
+            organic_products=Count('id', filter=Q(organic=True)),
+            recent_products=Count('id', filter=Q(created_at__gte=seven_days_ago)),
+        )
+        marketplace['top_farmers'] = [
+            {
+                'name': f"{farmer['first_name']} {farmer['last_name']}",
+                'email': farmer['email'],
+                'product_count': farmer['product_count'],
+                'region': farmer['region'],
+            }
+            for farmer in User.objects.filter(user_type=User.UserType.FARMER).annotate(
+                product_count=Count('products')
+            ).order_by('-product_count').values(
+                'first_name', 'last_name', 'email', 'product_count', 'region'
+            )[:5]
+        ]
+        
+        return {
+            'users': users,
+            'news': news,
+            'logistics': logistics,
+            'experts': experts,
+            'marketplace': marketplace,
+        }
+    
+    @staticmethod
+    def take_snapshot():
+        """Compute the counters and store them as a new snapshot"""
+        return PlatformStatsSnapshot.objects.create(stats=PlatformStatsService.compute())
+    
+    @staticmethod
+    def get_latest(fresh=False):
+        """
+        Latest stored snapshot. A new one is taken when fresh is requested
+        or when no snapshot exists yet.
+        """
+        if not fresh:
+            snapshot = PlatformStatsSnapshot.objects.order_by('-created_at').first()
+            if snapshot is not None:
+                return snapshot
+        return PlatformStatsService.take_snapshot()
+    
+    @staticmethod
+    def wants_fresh(request):
+        """Whether the request asked to bypass the stored snapshot (?fresh=1)"""
+        return request.query_params.get('fresh', '').lower() in ('1', 'true', 'yes')
+    
+    @staticmethod
+    def get_history(days=30):
+        """Snapshots taken in the last `days` days, oldest first, for trend charts"""
+        since = timezone.now() - timedelta(days=days)
+        return PlatformStatsSnapshot.objects.filter(created_at__gte=since).order_by('created_at')
+    
+    @staticmethod
+    def prune(keep_days=365):
+        """Delete snapshots older than keep_days. Returns the number deleted."""
+        cutoff = timezone.now() - timedelta(days=keep_days)
+        deleted, _ = PlatformStatsSnapshot.objects.filter(created_at__lt=cutoff).delete()
+        return deleted
+
+
+class QueryStatsService:
+    """Service for aggregating and reporting per-view SQL query counts"""
+    
+    REPORT_ORDERINGS = {
+        'queries': 'avg_queries',
+        'max': 'max_queries',
+        'db_time': 'avg_db_ms',
+        'duplicates': 'duplicate_requests',
+        'violations': 'budget_violations',
+    }
+    
+    @staticmethod
+    def record(view_name, queries, db_ms, top_duplicate=None, over_budget=False):
+        """Add one request to today's totals for the view"""
+        rows = EndpointQueryStats.objects.filter(view_name=view_name, day=timezone.localdate())
+        updates = {
+            'requests': F('requests') + 1,
+            'total_queries': F('total_queries') + queries,
+            'max_queries': Greatest(F('max_queries'), Value(queries)),
+            'total_db_ms': F('total_db_ms') + db_ms,
+            'duplicate_requests': F('duplicate_requests') + (1 if top_duplicate else 0),
+            'budget_violations': F('budget_violations') + (1 if over_budget else 0),
+        }
+        if not rows.update(**updates):
+            try:
+                with transaction.atomic():
+                    EndpointQueryStats.objects.create(
+                        view_name=view_name,
+                        day=timezone.localdate(),
+                        requests=1,
+                        total_queries=queries,
+                        max_queries=queries,
+                        total_db_ms=db_ms,
+                        duplicate_requests=1 if top_duplicate else 0,
+                        budget_violations=1 if over_budget else 0,
+                    )
+            except IntegrityError:
+                # Another worker created today's row first
+                rows.update(**updates)
+        
+        if top_duplicate:
+            sql, count = top_duplicate
+            rows.filter(sample_duplicate_count__lt=count).update(
+                sample_duplicate=sql, sample_duplicate_count=count
+            )
+    
+    @staticmethod
+    def report(days=7, order_by='queries', limit=20):
+        """Views with the heaviest query load over the last `days` days"""
+        since = timezone.localdate() - timedelta(days=days - 1)
+        rows = EndpointQueryStats.objects.filter(day__gte=since).values('view_name').annotate(
+            total_requests=Sum('requests'),
+            queries=Sum('total_queries'),
+            max_queries=Max('max_queries'),
+            db_ms=Sum('total_db_ms'),
+            duplicate_requests=Sum('duplicate_requests'),
+            budget_violations=Sum('budget_violations'),
+            top_duplicate_count=Max('sample_duplicate_count'),
+        ).annotate(
+            avg_queries=Cast('queries', FloatField()) / F('total_requests'),
+            avg_db_ms=F('db_ms') / F('total_requests'),
+        ).order_by(f'-{QueryStatsService.REPORT_ORDERINGS[order_by]}', 'view_name')[:limit]
+        rows = list(rows)
+        
+        # Attach the most repeated statement seen for each listed view
+        samples = {}
+        for sample in EndpointQueryStats.objects.filter(
+            day__gte=since,
+            view_name__in=[row['view_name'] for row in rows],
+            sample_duplicate_count__gt=0
+        ).order_by('sample_duplicate_count').values('view_name', 'sample_duplicate'):
+            samples[sample['view_name']] = sample['sample_duplicate']
+        for row in rows:
+            row['top_duplicate'] = samples.get(row['view_name'], '')
+        return rows
+    
+    @staticmethod
+    def prune(keep_days=90):
+        """Delete daily rows older than keep_days. Returns the number deleted."""
+        cutoff = timezone.localdate() - timedelta(days=keep_days)
+        deleted, _ = EndpointQueryStats.objects.filter(day__lt=cutoff).delete()
+        return deleted
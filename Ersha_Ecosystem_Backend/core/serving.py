@@ -0,0 +1,72 @@
+"""
+Process model for serving the ASGI application.
+
+HTTP requests and WebSocket connections run in separate gunicorn pools
+(SERVER_ROLE=http / websocket) so that long-lived sockets never occupy the
+workers answering API requests. This module sizes both pools and is shared
+by gunicorn.conf.py and the serving_topology command; it avoids Django
+imports so the gunicorn master can load it before the application.
+"""
+import os
+
+ROLES = {
+    'http': {
+        'port': 8000,
+        'concurrency_env': 'WEB_CONCURRENCY',
+        'timeout': 30,
+        'graceful_timeout': 30,
+        # Recycle workers periodically to bound memory growth
+        'max_requests': 1000,
+    },
+    'websocket': {
+        'port': 8001,
+        'concurrency_env': 'WS_CONCURRENCY',
+        'timeout': 30,
+        # Give open sockets time to close cleanly on reload
+        'graceful_timeout': 120,
+        # Recycling would drop every connection the worker holds
+        'max_requests': 0,
+    },
+}
+
+
+def available_cpus():
+    """CPUs this process may run on, which respects container CPU sets"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def recommended_workers(role, cpus):
+    if role == 'http':
+        # Django runs sync views on a single thread per worker under ASGI,
+        # so HTTP concurrency comes from processes, sized like a sync server
+        return 2 * cpus + 1
+    # Socket workers mostly wait on the channel layer; a few event loops
+    # hold many connections
+    return max(1, cpus // 2)
+
+
+def role_settings(role, cpus=None, environ=None):
+    """
+    Gunicorn settings for one pool. The worker count can be pinned with
+    WEB_CONCURRENCY (HTTP) or WS_CONCURRENCY (WebSocket).
+    """
+    if role not in ROLES:
+        raise ValueError(f"Unknown SERVER_ROLE {role!r}; expected one of {', '.join(ROLES)}")
+    environ = os.environ if environ is None else environ
+    cpus = cpus or available_cpus()
+    settings = dict(ROLES[role], role=role)
+    pinned = environ.get(settings.pop('concurrency_env'))
+    settings['workers'] = int(pinned) if pinned else recommended_workers(role, cpus)
+    return settings
+
+
+def topology(cpus=None, environ=None):
+    """Settings for every pool on a machine with the given CPU count"""
+    cpus = cpus or available_cpus()
+    return {
+        'cpus': cpus,
+        'pools': [role_settings(role, cpus, environ) for role in ROLES],
+    }
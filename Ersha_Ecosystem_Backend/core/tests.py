@@ -1,3 +1,644 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from datetime import date, timedelta
+from io import StringIO
+import base64
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
 
-# Create your tests here.
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.urls import re_path
+from jwt.algorithms import RSAAlgorithm
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from django.utils import timezone
+
+from marketplace.models import Product
+from orders.models import Notification, Order, OrderItem, OrderSeller
+from weather.models import LatestWeather, WeatherData
+from news.models import NewsArticle
+from users.models import PKCESession, Profile
+from .authentication import ClaimsJWTAuthentication, ClaimsRefreshToken
+from . import media
+from .benchmark import compare
+from .fayda import FaydaOIDC, load_signing_key
+from .middleware import QueryBudgetExceeded, fingerprint
+from .mock_idp import MockFaydaIdP
+from .pkce import CachePKCEStore, DatabasePKCEStore
+from .models import EndpointQueryStats, PlatformStatsSnapshot
+from .serving import role_settings
+from .services import PlatformStatsService, QueryStatsService
+
+User = get_user_model()
+
+# MEDIA_URL is only mounted when MEDIA_SERVE is on; MediaDeliveryTestCase mounts it itself
+urlpatterns = [re_path(r'^media/(?P<path>.*)$', media.serve)]
+
+
+class PlatformStatsSnapshotTestCase(APITestCase):
+    def setUp(self):
+        """Set up users, products and news"""
+        self.admin = User.objects.create_user(
+            username='admin@test.com',
+            email='admin@test.com',
+            password='testpass123',
+            user_type=User.UserType.ADMIN
+        )
+        self.farmer = User.objects.create_user(
+            username='farmer@test.com',
+            email='farmer@test.com',
+            password='testpass123',
+            user_type=User.UserType.FARMER,
+            verification_status=User.VerificationStatus.VERIFIED
+        )
+        Product.objects.create(
+            farmer=self.farmer, name='Teff', description='White teff', price=80,
+            quantity=100, harvest_date=date.today(), organic=True
+        )
+        NewsArticle.objects.create(title='Rains arrive', content='...', category='weather', views=10, featured=True)
+        NewsArticle.objects.create(title='Coffee prices', content='...', category='market', views=5)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_compute_uses_one_query_per_table(self):
+        """Test that counters come from conditional aggregation, not per-counter COUNTs"""
+        for email, user_type in (('buyer@test.com', User.UserType.BUYER), ('agri@test.com', 'agricultural_business')):
+            User.objects.create_user(username=email, email=email, password='testpass123', user_type=user_type)
+        # users, news, providers, deliveries, experts, products + three top-N lists
+        with self.assertNumQueries(9):
+            stats = PlatformStatsService.compute()
+
+        self.assertEqual(stats['users']['total'], 4)
+        self.assertEqual(stats['users']['farmers'], 1)
+        # Accounts of the retired agricultural business type still count as merchants
+        self.assertEqual(stats['users']['merchants'], 2)
+        self.assertEqual(stats['users']['verified'], 1)
+        self.assertEqual(stats['news']['total'], 2)
+        self.assertEqual(stats['news']['featured'], 1)
+        self.assertEqual(stats['news']['views'], 15)
+        self.assertEqual(stats['marketplace']['organic_products'], 1)
+        self.assertEqual(stats['marketplace']['top_farmers'][0]['product_count'], 1)
+
+    def test_admin_endpoints_read_latest_snapshot(self):
+        """Test that admin endpoints reuse the stored snapshot unless ?fresh=1 is passed"""
+        response = self.client.get('/api/auth/admin/comprehensive-dashboard/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['platform_stats']['marketplace']['products'], 1)
+        self.assertEqual(PlatformStatsSnapshot.objects.count(), 1)
+
+        Product.objects.create(
+            farmer=self.farmer, name='Maize', description='Yellow maize', price=30,
+            quantity=50, harvest_date=date.today()
+        )
+
+        response = self.client.get('/api/products/admin_stats/')
+        self.assertEqual(response.data['total_products'], 1)
+
+        response = self.client.get('/api/products/admin_stats/', {'fresh': '1'})
+        self.assertEqual(response.data['total_products'], 2)
+        self.assertEqual(PlatformStatsSnapshot.objects.count(), 2)
+
+        response = self.client.get('/api/auth/admin/stats-history/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['snapshots']), 2)
+
+    def test_non_admin_cannot_read_stats(self):
+        """Test that the stats endpoints stay admin-only"""
+        self.client.force_authenticate(user=self.farmer)
+        response = self.client.get('/api/news/news/admin_stats/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class StandardPaginationTestCase(APITestCase):
+    def setUp(self):
+        """Set up news articles, two of them published at the same instant"""
+        self.now = timezone.now()
+        for i in range(5):
+            NewsArticle.objects.create(
+                title=f'Article {i}', content='...', category='market',
+                published_at=self.now - timedelta(minutes=i)
+            )
+        NewsArticle.objects.create(
+            title='Article 1b', content='...', category='market',
+            published_at=self.now - timedelta(minutes=1)
+        )
+        self.client = APIClient()
+
+    def test_cursor_walk_is_stable_under_inserts(self):
+        """Test that cursor pages return every row once even when rows are added while scrolling"""
+        seen = []
+        params = {'cursor': '', 'page_size': 2}
+        while True:
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/news/news/', params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(article['title'] for article in response.data['results'])
+            if not response.data['next_cursor']:
+                break
+            params['cursor'] = response.data['next_cursor']
+            NewsArticle.objects.create(title='Breaking', content='...', category='market')
+
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(set(seen), {'Article 0', 'Article 1', 'Article 1b', 'Article 2', 'Article 3', 'Article 4'})
+
+        response = self.client.get('/api/news/news/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_rejects_ordering(self):
+        """Test that a cursor request asking for another ordering is refused rather than silently ignored"""
+        response = self.client.get('/api/news/news/', {'cursor': '', 'ordering': 'views'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', response.data)
+
+    def test_count_can_be_skipped(self):
+        """Test that count=false drops the COUNT query but keeps page links"""
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/news/news/', {'count': 'false', 'page_size': 4})
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertIn('page=2', response.data['next'])
+
+        response = self.client.get('/api/news/news/', {'count': 'false', 'page_size': 4, 'page': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get('/api/news/news/')
+        self.assertEqual(response.data['count'], 6)
+
+
+@override_settings(QUERY_BUDGET_STRICT=True, QUERY_INSTRUMENTATION_HEADERS=True, BACKGROUND_TASKS_EAGER=True)
+class QueryInstrumentationTestCase(APITestCase):
+    def setUp(self):
+        """Set up a farmer with a few products"""
+        self.farmer = User.objects.create_user(
+            username='farmer@test.com',
+            email='farmer@test.com',
+            password='testpass123',
+            user_type=User.UserType.FARMER
+        )
+        for i in range(3):
+            Product.objects.create(
+                farmer=self.farmer, name=f'Product {i}', description='Fresh', price=10,
+                quantity=100, harvest_date=date.today()
+            )
+        self.client = APIClient()
+
+    def test_server_timing_and_sampled_stats(self):
+        """Test that requests get a Server-Timing header and sampled requests are aggregated"""
+        with self.settings(QUERY_STATS_SAMPLE_RATE=1), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get('/api/products/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+        stats = EndpointQueryStats.objects.get(view_name='marketplace.views.ProductViewSet.list')
+        self.assertEqual((stats.requests, stats.total_queries, stats.max_queries), (1, 2, 2))
+
+        rows = QueryStatsService.report(days=1)
+        self.assertEqual(rows[0]['view_name'], 'marketplace.views.ProductViewSet.list')
+        self.assertEqual(rows[0]['avg_queries'], 2.0)
+
+    @override_settings(QUERY_BUDGETS={'marketplace.views.ProductViewSet.retrieve': 0})
+    def test_budget_violation_names_the_repeated_statement(self):
+        """Test that strict mode fails requests over their view's budget"""
+        product = Product.objects.first()
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'ProductViewSet.retrieve issued 1 queries'):
+            self.client.get(f'/api/products/{product.id}/')
+
+    @override_settings(AUTH_TOKEN_CLAIMS=False, QUERY_BUDGETS={'marketplace.views.ProductViewSet.retrieve': 1})
+    def test_budget_allows_the_user_query_without_token_claims(self):
+        """Test that loading a token's user from the database is budgeted, and only for token requests"""
+        product = Product.objects.first()
+        token = ClaimsRefreshToken.for_user(self.farmer).access_token
+        response = self.client.get(f'/api/products/{product.id}/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+        with self.settings(QUERY_BUDGETS={'marketplace.views.ProductViewSet.retrieve': 0}):
+            with self.assertRaisesMessage(QueryBudgetExceeded, 'issued 2 queries, budget is 1'):
+                self.client.get(f'/api/products/{product.id}/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_fingerprint_ignores_parameters(self):
+        """Test that statements differing only in values share a fingerprint"""
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) AND x = 5'),
+            fingerprint("SELECT * FROM t WHERE id IN (%s) AND x = 'abc'")
+        )
+
+
+class ServingTopologyTestCase(TestCase):
+    def test_pools_are_sized_from_cpus_unless_pinned(self):
+        """Test that HTTP workers scale with CPUs and the environment can pin either pool"""
+        self.assertEqual(role_settings('http', cpus=4, environ={})['workers'], 9)
+        self.assertEqual(role_settings('websocket', cpus=4, environ={})['workers'], 2)
+        self.assertEqual(role_settings('http', cpus=4, environ={'WEB_CONCURRENCY': '3'})['workers'], 3)
+        # Recycling WebSocket workers would drop their connections
+        self.assertEqual(role_settings('websocket', cpus=1, environ={})['max_requests'], 0)
+        with self.assertRaises(ValueError):
+            role_settings('worker', cpus=4, environ={})
+
+    @override_settings(BACKGROUND_TASK_WORKERS=2)
+    def test_command_reports_connections_and_shared_state_warnings(self):
+        """Test that the plan counts database connections and flags per-process caches"""
+        out = StringIO()
+        call_command('serving_topology', cpus=2, json=True, stdout=out)
+        plan = json.loads(out.getvalue())
+        self.assertEqual([pool['workers'] for pool in plan['pools']], [5, 1])
+        self.assertEqual(plan['db_connections'], 5 * 3 + 1)
+        self.assertTrue(any('LocMemCache' in warning for warning in plan['warnings']))
+
+
+class FaydaTokenExchangeTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        cls.jwk = base64.b64encode(RSAAlgorithm.to_jwk(cls.key).encode()).decode()
+
+    def setUp(self):
+        cache.clear()
+        load_signing_key.cache_clear()
+
+    def run_flow(self, idp, fayda, state):
+        """Drive one verification callback against the mock IdP"""
+        _, code_verifier = fayda.generate_authorization_url(state=state)
+        challenge = base64.urlsafe_b64encode(hashlib.sha256(code_verifier.encode()).digest()).decode().rstrip('=')
+        code = idp.authorize(challenge, {'sub': f'FAN-{state}', 'name': 'Abebe Kebede'})
+        return fayda.complete_verification_flow(code, state)
+
+    def fayda_for(self, idp, reuse_seconds):
+        config = {
+            'CLIENT_ID': 'ersha-client', 'PRIVATE_KEY': self.jwk, 'REDIRECT_URI': 'http://localhost/callback',
+            'AUTHORIZATION_ENDPOINT': f'{idp.base_url}/authorize', 'TOKEN_ENDPOINT': idp.token_endpoint,
+            'USERINFO_ENDPOINT': idp.userinfo_endpoint, 'ALGORITHM': 'RS256',
+            'CLIENT_ASSERTION_TYPE': 'urn:ietf:params:oauth:client-assertion-type:jwt-bearer',
+            'ASSERTION_REUSE_SECONDS': reuse_seconds,
+        }
+        with override_settings(FAYDA_CONFIG=config):
+            return FaydaOIDC()
+
+    def test_callbacks_parse_the_key_once_and_reuse_assertions_and_connections(self):
+        """Test that repeated exchanges share the parsed key, the assertion and the connection"""
+        with MockFaydaIdP(self.key.public_key(), 'ersha-client') as idp:
+            fayda = self.fayda_for(idp, reuse_seconds=120)
+            results = [self.run_flow(idp, fayda, state) for state in ('a', 'b', 'c')]
+
+            self.assertEqual([result['fayda_id'] for result in results], ['FAN-a', 'FAN-b', 'FAN-c'])
+            self.assertEqual(load_signing_key.cache_info().misses, 1)
+            self.assertEqual(len({claims['jti'] for claims in idp.assertions}), 1)
+            # Three token exchanges and three userinfo calls over one connection
+            self.assertEqual(idp.connections, 1)
+
+            fayda.assertion_reuse_seconds = 0
+            fayda.generate_client_assertion()
+            self.assertNotEqual(fayda.generate_client_assertion(), fayda.generate_client_assertion())
+
+    def test_reuse_turns_itself_off_when_the_idp_rejects_replays(self):
+        """Test that a rejected reused assertion is retried once with a fresh one"""
+        with MockFaydaIdP(self.key.public_key(), 'ersha-client', reject_replayed_assertions=True) as idp:
+            fayda = self.fayda_for(idp, reuse_seconds=120)
+            self.run_flow(idp, fayda, 'a')
+            with self.assertLogs('core.fayda', 'WARNING'):
+                self.assertEqual(self.run_flow(idp, fayda, 'b')['fayda_id'], 'FAN-b')
+            self.assertEqual(fayda.assertion_reuse_seconds, 0)
+
+            self.run_flow(idp, fayda, 'c')
+            # The rejected replay, then one fresh assertion per exchange
+            self.assertEqual(len(idp.assertions), 4)
+            self.assertEqual(len({claims['jti'] for claims in idp.assertions}), 3)
+
+
+class PKCEStoreTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='farmer@test.com', email='farmer@test.com', password='testpass123',
+            user_type=User.UserType.FARMER
+        )
+        self.other = User.objects.create_user(
+            username='buyer@test.com', email='buyer@test.com', password='testpass123',
+            user_type=User.UserType.BUYER
+        )
+
+    def test_verifiers_are_single_use_and_bound_to_their_user(self):
+        """Test that both stores hand a verifier out once, to its own user, until it expires; others cannot burn it"""
+        for store in (DatabasePKCEStore(), CachePKCEStore()):
+            store.save('state-1', 'verifier-1', user=self.user)
+            self.assertIsNone(store.consume('state-1', user=self.other))
+            self.assertEqual(store.consume('state-1', user=self.user), 'verifier-1')
+            # A verifier of an anonymous flow goes to whoever completes it; a user's never to an anonymous caller
+            store.save('anonymous', 'verifier-5')
+            self.assertEqual(store.consume('anonymous', user=self.other), 'verifier-5')
+            store.save('owned', 'verifier-6', user=self.user)
+            self.assertIsNone(store.consume('owned'))
+            self.assertEqual(store.consume('owned', user=self.user), 'verifier-6')
+            store.save('state-2', 'verifier-2', user=self.user)
+            self.assertEqual(store.consume('state-2', user=self.user), 'verifier-2')
+            self.assertIsNone(store.consume('state-2', user=self.user))
+
+        store = DatabasePKCEStore()
+        store.save('stale', 'verifier-3', user=self.user, ttl=60)
+        PKCESession.objects.filter(state='stale').update(expires_at=timezone.now() - timedelta(seconds=1))
+        store.save('fresh', 'verifier-4', user=self.user)
+        self.assertEqual(PKCESession.cleanup_expired(batch_size=1), 1)
+        self.assertIsNone(store.consume('stale', user=self.user))
+        self.assertEqual(store.consume('fresh', user=self.user), 'verifier-4')
+
+    def run_worker(self, database, code, store='core.pkce.DatabasePKCEStore'):
+        """Run code in a separate Django process sharing only the database file"""
+        env = dict(os.environ, USE_POSTGRESQL='False', SQLITE_PATH=database, FAYDA_PKCE_STORE=store)
+        result = subprocess.run(
+            [sys.executable, '-W', 'ignore', 'manage.py', 'shell', '-c', code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, timeout=120
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        # The last line is the code's output; settings may log before it
+        return result.stdout.strip().splitlines()[-1].split()
+
+    def test_callback_in_another_worker_finds_the_verifier(self):
+        """Test that a verifier stored by one process is consumed exactly once by another"""
+        authorize = (
+            "from core.fayda import FaydaOIDC\n"
+            "print(FaydaOIDC().generate_authorization_url(state='shared')[1])"
+        )
+        # A retried callback in the same worker must not get the verifier again
+        callback = (
+            "from core.pkce import get_pkce_store\n"
+            "print(get_pkce_store().consume('shared'), get_pkce_store().consume('shared'))"
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, 'workers.sqlite3')
+            env = dict(os.environ, USE_POSTGRESQL='False', SQLITE_PATH=database)
+            subprocess.run(
+                [sys.executable, '-W', 'ignore', 'manage.py', 'migrate', 'users', '--noinput'],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, check=True, timeout=300
+            )
+
+            [verifier] = self.run_worker(database, authorize)
+            self.assertEqual(self.run_worker(database, callback), [verifier, 'None'])
+
+            # A per-process cache loses the verifier between workers
+            self.run_worker(database, authorize, store='core.pkce.CachePKCEStore')
+            self.assertEqual(self.run_worker(database, callback, store='core.pkce.CachePKCEStore'), ['None', 'None'])
+
+
+@override_settings(AUTH_TOKEN_CLAIMS=True)
+class ClaimsAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.farmer = User.objects.create_user(
+            username='farmer@test.com', email='farmer@test.com', password='testpass123',
+            user_type=User.UserType.FARMER, first_name='Abebe'
+        )
+        self.admin = User.objects.create_user(
+            username='admin@test.com', email='admin@test.com', password='testpass123',
+            user_type=User.UserType.ADMIN
+        )
+        self.refresh = ClaimsRefreshToken.for_user(self.farmer)
+        self.access = str(self.refresh.access_token)
+
+    def authenticate(self, access):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def test_requests_authenticate_from_claims_until_a_view_reads_the_row(self):
+        """Test that role checks need no query and the first other field loads the whole row once"""
+        with self.assertNumQueries(0):
+            user = self.authenticate(self.access)
+            self.assertTrue(user.is_farmer)
+            self.assertFalse(user.is_verified)
+            self.assertEqual(user, self.farmer)
+            Product.objects.filter(farmer=user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual((user.first_name, user.email, user.region), ('Abebe', 'farmer@test.com', None))
+
+        response = self.client.post('/api/auth/refresh/', {'refresh': str(self.refresh)})
+        self.assertEqual(AccessToken(response.data['access'])['user_type'], 'farmer')
+
+    def test_verification_and_bans_reach_tokens_issued_before_them(self):
+        """Test that existing tokens see a new verification status and stop working after a ban"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.farmer.mark_as_verified()
+        with self.assertNumQueries(0):
+            self.assertTrue(self.authenticate(self.access).is_verified)
+
+        # Once the change has aged out of the cache, refreshing reads it from the database
+        cache.clear()
+        response = self.client.post('/api/auth/refresh/', {'refresh': str(self.refresh)})
+        self.assertEqual(AccessToken(response.data['access'])['verification_status'], 'verified')
+
+        admin_access = str(ClaimsRefreshToken.for_user(self.admin).access_token)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/auth/admin/users/{self.farmer.id}/ban_user/', HTTP_AUTHORIZATION=f'Bearer {admin_access}'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.access)
+        response = self.client.post('/api/auth/refresh/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_saving_request_user_keeps_changes_made_after_the_token(self):
+        """Test that saving request.user does not write the token's stale claims back to the row"""
+        User.objects.filter(pk=self.farmer.pk).update(
+            user_type=User.UserType.BUYER, verification_status=User.VerificationStatus.VERIFIED
+        )
+        response = self.client.post(
+            '/api/auth/change-password/',
+            {'old_password': 'testpass123', 'new_password': 'newpass12345', 'new_password_confirm': 'newpass12345'},
+            HTTP_AUTHORIZATION=f'Bearer {self.access}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.farmer.refresh_from_db()
+        self.assertTrue(self.farmer.check_password('newpass12345'))
+        self.assertEqual(
+            (self.farmer.user_type, self.farmer.verification_status),
+            (User.UserType.BUYER, User.VerificationStatus.VERIFIED)
+        )
+
+    @override_settings(AUTH_TOKEN_CLAIMS=False)
+    def test_without_a_shared_cache_the_user_is_read_from_the_database(self):
+        """Test that claims are ignored when changes cannot reach every worker"""
+        User.objects.filter(pk=self.farmer.pk).update(user_type=User.UserType.BUYER)
+        with self.assertNumQueries(1):
+            self.assertTrue(self.authenticate(self.access).is_buyer)
+
+
+class LoadDatasetTestCase(TestCase):
+    def generate(self, **volumes):
+        options = {
+            'farmers': 30, 'buyers': 10, 'products': 40, 'orders': 60, 'notifications': 100,
+            'transactions': 20, 'weather_days': 2, 'end_date': date(2026, 1, 15), 'batch_size': 25,
+        }
+        options.update(volumes)
+        call_command('generate_load_dataset', stdout=StringIO(), **options)
+
+    def snapshot(self):
+        return (
+            list(Product.objects.order_by('created_at', 'name').values_list('name', 'price', 'harvest_date')),
+            list(Order.objects.order_by('created_at').values_list('created_at', 'status', 'total_amount')),
+            list(WeatherData.objects.order_by('created_at', 'woreda').values_list('woreda', 'temperature')),
+        )
+
+    def test_dataset_is_reproducible_and_consistent(self):
+        """Test that a seed reproduces the rows and the derived seller index matches the items"""
+        savepoint = transaction.savepoint()
+        self.generate()
+        first = self.snapshot()
+        transaction.savepoint_rollback(savepoint)
+
+        self.generate()
+        self.assertEqual(self.snapshot(), first)
+        self.assertEqual(Notification.objects.count(), 100)
+        self.assertEqual(Order.objects.filter(created_at__gte=timezone.make_aware(
+            timezone.datetime(2026, 1, 15))).count(), 0)
+
+        pairs = set(OrderItem.objects.values_list('order_id', 'product__farmer_id'))
+        self.assertEqual(set(OrderSeller.objects.values_list('order_id', 'farmer_id')), pairs)
+        self.assertEqual(WeatherData.objects.count(), LatestWeather.objects.count() * 16)
+
+        with self.assertRaises(CommandError):
+            self.generate()
+
+
+class APIBenchmarkTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.baseline = {
+            'product_list': {'status': 200, 'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0, 'queries': 2, 'peak_kb': 100.0},
+        }
+
+    def test_compare_flags_metrics_beyond_their_thresholds(self):
+        """Test that noise within the thresholds passes and real regressions are reported"""
+        within = {'product_list': dict(self.baseline['product_list'], p50_ms=10.9, p99_ms=36.0, peak_kb=120.0)}
+        self.assertEqual(compare(within, self.baseline), [])
+
+        worse = {'product_list': dict(self.baseline['product_list'], p95_ms=30.0, queries=3, status=500)}
+        regressions = compare(worse, self.baseline)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(any('queries 2 -> 3' in regression for regression in regressions))
+
+    def test_command_benchmarks_every_endpoint_and_checks_the_baseline(self):
+        """Test that a generated dataset serves every endpoint and a stored baseline gates regressions"""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'baseline.json')
+            options = {'dataset_scale': 0.0005, 'iterations': 2, 'warmup': 1, 'stdout': StringIO()}
+            call_command('benchmark_api', output=output, **options)
+
+            with open(output) as f:
+                results = json.load(f)['endpoints']
+            self.assertEqual(len(results), 9)
+            for name, result in results.items():
+                self.assertLess(result['status'], 400, name)
+            self.assertFalse(Product.objects.exists())
+
+            call_command('benchmark_api', baseline=output, latency_threshold=100, memory_threshold=100, **options)
+
+            results['notification_count']['queries'] -= 1
+            with open(output, 'w') as f:
+                json.dump({'endpoints': results}, f)
+            with self.assertRaisesMessage(CommandError, 'notification_count: queries'):
+                call_command('benchmark_api', baseline=output, latency_threshold=100, memory_threshold=100, **options)
+
+
+
+class MediaDeliveryTestCase(TestCase):
+    def setUp(self):
+        """Store one content-hashed and one plainly named file in a temporary MEDIA_ROOT"""
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        overrides = override_settings(MEDIA_ROOT=media_root.name, MEDIA_OFFLOAD='', ROOT_URLCONF=__name__)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.content = bytes(range(256)) * 40
+        self.hashed = media.store(self.content, 'ai_courses', 'pdf')
+        os.makedirs(os.path.join(media_root.name, 'reports'))
+        with open(os.path.join(media_root.name, 'reports', 'latest.pdf'), 'wb') as handle:
+            handle.write(self.content)
+
+    def test_ranges_resume_and_validators(self):
+        """Test byte ranges, If-Range, unsatisfiable ranges and conditional requests"""
+        url = f'/media/{self.hashed}'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Cache-Control'], media.IMMUTABLE)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_RANGE='bytes=1000-')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 1000-{len(self.content) - 1}/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[1000:])
+        response = self.client.get(url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+
+        # A range of an older version is not applied: the whole file is sent again
+        response = self.client.get(url, HTTP_RANGE='bytes=1000-', HTTP_IF_RANGE='"0123456789abcdef0123"')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Cache-Control'], media.IMMUTABLE)
+
+        # Names that do not carry their hash may change and are revalidated
+        response = self.client.get('/media/reports/latest.pdf')
+        self.assertEqual(response['Cache-Control'], media.REVALIDATE)
+        self.assertEqual(self.client.get('/media/../settings.py').status_code, 404)
+
+    def test_ranges_of_an_empty_file_are_unsatisfiable(self):
+        """Test that a suffix range of a 0-byte file is a 416, not a negative 206"""
+        empty = media.store(b'', 'reports', 'txt')
+        for header in ('bytes=-500', 'bytes=0-'):
+            response = self.client.get(f'/media/{empty}', HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 416)
+            self.assertEqual(response['Content-Range'], 'bytes */0')
+        self.assertEqual(self.client.get(f'/media/{empty}').status_code, 200)
+
+    def test_private_uploads_only_reach_admins_and_their_owner(self):
+        """Test that expert certificates are not public media"""
+        certificate = media.store(b'%PDF certificate', 'expert_certificates', 'pdf')
+        expert, other, admin = (
+            User.objects.create_user(
+                username=f'{name}@test.com', email=f'{name}@test.com', password='testpass123', user_type=user_type
+            )
+            for name, user_type in [
+                ('expert', User.UserType.EXPERT), ('other', User.UserType.EXPERT), ('admin', User.UserType.ADMIN)
+            ]
+        )
+        Profile(user=expert, certificate_of_expertise=certificate).save(skip_validation=True)
+        url = f'/media/{certificate}'
+
+        def fetch(user=None):
+            headers = {}
+            if user is not None:
+                headers['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsRefreshToken.for_user(user).access_token}'
+            return self.client.get(url, **headers).status_code
+
+        self.assertEqual(fetch(), 404)
+        self.assertEqual(fetch(other), 404)
+        self.assertEqual(fetch(expert), 200)
+        self.assertEqual(fetch(admin), 200)
+
+    @override_settings(MEDIA_OFFLOAD='x-accel-redirect', MEDIA_ACCEL_PREFIX='/protected-media/')
+    def test_offload_to_front_server(self):
+        """Test that the front server is told which file to send"""
+        response = self.client.get(f'/media/{self.hashed}')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.hashed}')
+        self.assertEqual(response.content, b'')
@@ -7,13 +7,13 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'agriculture_marketplace.setting
 django.setup()
 
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import RefreshToken
+from core.authentication import ClaimsRefreshToken
 
 def get_jwt_token(email):
     User = get_user_model()
     try:
         user = User.objects.get(email=email)
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         return {
             'access': str(refresh.access_token),
             'refresh': str(refresh)
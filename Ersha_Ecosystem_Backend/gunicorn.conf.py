@@ -0,0 +1,36 @@
+"""
+Gunicorn configuration for serving the ASGI application in production.
+
+Run one pool per role so WebSocket connections never occupy HTTP workers:
+
+    SERVER_ROLE=http gunicorn -c gunicorn.conf.py        # binds :8000
+    SERVER_ROLE=websocket gunicorn -c gunicorn.conf.py   # binds :8001
+
+and have the reverse proxy send /ws/ to the WebSocket pool. Send SIGHUP to
+the master process to reload code and replace workers gracefully.
+`python manage.py serving_topology` prints the pool sizes for this machine.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.serving import role_settings  # noqa: E402
+
+_role = role_settings(os.environ.get('SERVER_ROLE', 'http'))
+
+wsgi_app = 'agriculture_marketplace.asgi:application'
+worker_class = 'uvicorn_worker.UvicornWorker'
+bind = os.environ.get('BIND', f"0.0.0.0:{_role['port']}")
+workers = _role['workers']
+timeout = _role['timeout']
+graceful_timeout = _role['graceful_timeout']
+max_requests = _role['max_requests']
+max_requests_jitter = max_requests // 10
+keepalive = 5
+# Each worker imports the app itself, so SIGHUP picks up new code
+preload_app = False
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+proc_name = f"ersha-{_role['role']}"
+accesslog = '-'
+errorlog = '-'
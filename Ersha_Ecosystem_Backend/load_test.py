@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+Load test the production server at several worker counts on this machine.
+
+For each worker count, starts `gunicorn -c gunicorn.conf.py` (HTTP role)
+on a spare port, drives it with a fixed number of concurrent clients for a
+fixed time, then stops it and prints requests/sec and latency percentiles:
+
+    python load_test.py --workers 1,2,4,8 --path /api/weather/regions/
+
+Run it against the same database settings you deploy with; the client
+shares the machine with the server, so compare runs rather than reading
+the numbers as absolute capacity.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def wait_until_ready(session, url, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Server exited with status {process.returncode}')
+        try:
+            async with session.get(url) as response:
+                await response.read()
+                return
+        except aiohttp.ClientError:
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f'Server did not answer {url} within {timeout}s')
+
+
+async def drive(url, process, concurrency, duration, warmup, headers):
+    """
+    Run `concurrency` clients in a closed loop for `duration` seconds, after
+    an unmeasured warm-up that lets every worker finish booting
+    """
+    latencies, errors = [], 0
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+        await wait_until_ready(session, url, process, timeout=60)
+
+        async def client(stop_at, record):
+            nonlocal errors
+            while time.monotonic() < stop_at:
+                started = time.perf_counter()
+                try:
+                    async with session.get(url) as response:
+                        await response.read()
+                        if response.status >= 400:
+                            errors += 1
+                            continue
+                except aiohttp.ClientError:
+                    errors += 1
+                    continue
+                if record:
+                    latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(client(time.monotonic() + warmup, False) for _ in range(concurrency)))
+        errors = 0
+        started = time.monotonic()
+        await asyncio.gather(*(client(started + duration, True) for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+    return sorted(latencies), errors, elapsed
+
+
+def start_server(workers, port):
+    env = dict(os.environ, SERVER_ROLE='http', WEB_CONCURRENCY=str(workers), BIND=f'127.0.0.1:{port}')
+    return subprocess.Popen(
+        [
+            sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+            '--access-logfile', os.devnull, '--log-level', 'warning',
+            # Worker recycling mid-run would show up as errors and latency spikes
+            '--max-requests', '0',
+        ],
+        cwd=BASE_DIR, env=env
+    )
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,2,4', help='Comma-separated worker counts (default: 1,2,4)')
+    parser.add_argument('--path', default='/api/weather/regions/', help='Endpoint to request')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients (default: 32)')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per worker count (default: 15)')
+    parser.add_argument('--warmup', type=float, default=5, help='Unmeasured seconds before each run (default: 5)')
+    parser.add_argument('--port', type=int, default=8900, help='Port for the server under test')
+    parser.add_argument('--token', help='Bearer token for authenticated endpoints')
+    args = parser.parse_args()
+
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+    url = f'http://127.0.0.1:{args.port}{args.path}'
+    print(f'{url}, {args.concurrency} clients, {args.duration:g}s per run')
+    print(f"{'workers':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+
+    for workers in [int(value) for value in args.workers.split(',')]:
+        process = start_server(workers, args.port)
+        try:
+            latencies, errors, elapsed = asyncio.run(drive(url, process, args.concurrency, args.duration, args.warmup, headers))
+        finally:
+            stop_server(process)
+        print(
+            f'{workers:>8} {len(latencies):>9} {errors:>7} {len(latencies) / elapsed:>9.1f} '
+            f'{percentile(latencies, 0.50) * 1000:>8.1f} {percentile(latencies, 0.99) * 1000:>8.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
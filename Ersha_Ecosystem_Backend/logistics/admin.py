@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     ServiceProvider, Delivery, DeliveryTracking, 
-    CostEstimate, LogisticsTransaction, LogisticsAnalytics
+    CostEstimate, LogisticsTransaction, LogisticsAnalytics,
+    DeliveryTrackingSegment
 )
 
 @admin.register(ServiceProvider)
@@ -11,10 +12,11 @@ class ServiceProviderAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description', 'contact_phone', 'contact_email']
     readonly_fields = ['id', 'created_at', 'updated_at']
     ordering = ['-rating', '-total_deliveries']
+    raw_id_fields = ['user']
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('id', 'name', 'logo_url', 'description')
+            'fields': ('id', 'user', 'name', 'logo_url', 'description')
         }),
         ('Performance Metrics', {
             'fields': ('rating', 'total_deliveries', 'avg_delivery_time', 'price_per_km')
@@ -91,6 +93,13 @@ class DeliveryTrackingAdmin(admin.ModelAdmin):
         }),
     )
 
+@admin.register(DeliveryTrackingSegment)
+class DeliveryTrackingSegmentAdmin(admin.ModelAdmin):
+    list_display = ['delivery', 'event_count', 'started_at', 'ended_at']
+    search_fields = ['delivery__tracking_number']
+    readonly_fields = ['created_at']
+    ordering = ['-ended_at']
+
 @admin.register(CostEstimate)
 class CostEstimateAdmin(admin.ModelAdmin):
     list_display = ['origin', 'destination', 'weight_kg', 'urgency', 'total_cost', 'created_at']
@@ -141,27 +150,30 @@ class LogisticsTransactionAdmin(admin.ModelAdmin):
 
 @admin.register(LogisticsAnalytics)
 class LogisticsAnalyticsAdmin(admin.ModelAdmin):
-    list_display = ['date', 'total_deliveries', 'completed_deliveries', 'total_revenue', 'customer_satisfaction']
-    list_filter = ['date']
-    search_fields = ['date']
-    readonly_fields = ['created_at']
+    list_display = ['date', 'provider', 'total_deliveries', 'completed_deliveries', 'total_revenue', 'computed_at']
+    list_filter = ['date', 'provider']
+    search_fields = ['date', 'provider__name']
+    readonly_fields = ['created_at', 'computed_at']
     ordering = ['-date']
     
     fieldsets = (
         ('Date', {
-            'fields': ('date',)
+            'fields': ('date', 'provider')
         }),
         ('Delivery Metrics', {
-            'fields': ('total_deliveries', 'completed_deliveries', 'failed_deliveries', 'avg_delivery_time')
+            'fields': (
+                'total_deliveries', 'active_deliveries', 'pending_deliveries', 'completed_deliveries',
+                'failed_deliveries', 'avg_delivery_time', 'timed_deliveries', 'total_delivery_seconds'
+            )
         }),
         ('Financial Metrics', {
-            'fields': ('total_revenue',)
+            'fields': ('total_revenue', 'total_delivery_cost')
         }),
         ('Quality Metrics', {
             'fields': ('customer_satisfaction', 'top_providers')
         }),
         ('Timestamp', {
-            'fields': ('created_at',),
+            'fields': ('created_at', 'computed_at'),
             'classes': ('collapse',)
         }),
     )
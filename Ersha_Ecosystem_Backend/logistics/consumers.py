@@ -0,0 +1,88 @@
+import json
+import logging
+from urllib.parse import parse_qs
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.exceptions import TokenError
+
+from .models import Delivery
+from .services import DeliveryTrackingService
+from .websocket_utils import tracking_group_name
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+class DeliveryTrackingConsumer(AsyncWebsocketConsumer):
+    """
+    Live tracking events for a single delivery.
+
+    Connect to ws/tracking/<tracking_number>/?token=<access>&since=<event id>;
+    events after `since` are replayed before live events start flowing.
+    """
+
+    async def connect(self):
+        self.room_group_name = None
+        self.tracking_number = self.scope['url_route']['kwargs']['tracking_number']
+
+        params = parse_qs(self.scope.get('query_string', b'').decode('utf-8'))
+        token = params.get('token', [None])[0]
+        if not token:
+            await self.close(code=4001)  # Unauthorized
+            return
+
+        try:
+            access_token = AccessToken(token)
+            if not await self.user_exists(access_token['user_id']):
+                raise Exception('User not found')
+        except (TokenError, Exception) as e:
+            logger.warning(f'Tracking WebSocket connection error: {str(e)}')
+            await self.close(code=4001)  # Unauthorized
+            return
+
+        delivery = await self.get_delivery()
+        if delivery is None:
+            await self.close(code=4004)  # Not found
+            return
+
+        self.room_group_name = tracking_group_name(self.tracking_number)
+        await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+        await self.accept()
+
+        try:
+            since_id = int(params.get('since', [0])[0])
+        except ValueError:
+            since_id = 0
+        if since_id:
+            backlog = await self.get_backlog(delivery, since_id)
+            await self.send(text_data=json.dumps({'type': 'tracking_backlog', **backlog}))
+
+    @database_sync_to_async
+    def user_exists(self, user_id):
+        return User.objects.filter(id=user_id, is_active=True).exists()
+
+    @database_sync_to_async
+    def get_delivery(self):
+        return Delivery.objects.filter(tracking_number=self.tracking_number).only('id', 'tracking_number').first()
+
+    @database_sync_to_async
+    def get_backlog(self, delivery, since_id):
+        events, segments = DeliveryTrackingService.get_events_since(delivery, since_id)
+        return {
+            'events': [event.to_event() for event in events],
+            'segments': [segment.to_segment() for segment in segments],
+        }
+
+    async def disconnect(self, close_code):
+        if self.room_group_name:
+            await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+
+    # Send tracking event to WebSocket
+    async def tracking_event(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'tracking_event',
+            'event': event['event']
+        }))
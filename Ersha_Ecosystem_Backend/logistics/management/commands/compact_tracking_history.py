@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from logistics.services import DeliveryTrackingService
+
+
+class Command(BaseCommand):
+    help = 'Compact old delivery tracking events into summarized segments. Intended to run periodically, e.g. from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=30,
+            help='Compact events older than this many days (default: 30)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows per bulk write (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        segments, events = DeliveryTrackingService.compact(
+            older_than_days=options['older_than_days'],
+            batch_size=options['batch_size']
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully compacted {events} tracking events into {segments} segments')
+        )
@@ -1,8 +1,9 @@
 from django.core.management.base import BaseCommand
 from logistics.models import (
     ServiceProvider, Delivery, DeliveryTracking, 
-    CostEstimate, LogisticsTransaction, LogisticsAnalytics
+    CostEstimate, LogisticsTransaction
 )
+from logistics.services import LogisticsAnalyticsService
 from django.utils import timezone
 from decimal import Decimal
 import random
@@ -329,26 +330,8 @@ class Command(BaseCommand):
                 defaults=transaction_data
             )
 
-        # Create Analytics
-        analytics_data = {
-            'date': timezone.now().date(),
-            'total_deliveries': 5,
-            'completed_deliveries': 1,
-            'failed_deliveries': 0,
-            'total_revenue': 1450.00,
-            'avg_delivery_time': 2.5,
-            'customer_satisfaction': 4.6,
-            'top_providers': [
-                {'name': 'FastFreight Ethiopia', 'deliveries': 1},
-                {'name': 'EthioLogistics', 'deliveries': 1},
-                {'name': 'RapidTransport', 'deliveries': 1}
-            ]
-        }
-
-        LogisticsAnalytics.objects.get_or_create(
-            date=analytics_data['date'],
-            defaults=analytics_data
-        )
+        # Materialize analytics from the data created above
+        LogisticsAnalyticsService.refresh(full=True)
 
         self.stdout.write(
             self.style.SUCCESS(f'Successfully created logistics data: {len(providers)} providers, {len(deliveries)} deliveries, {len(tracking_events)} tracking events')
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from logistics.services import LogisticsAnalyticsService
+
+
+class Command(BaseCommand):
+    help = (
+        'Materialize daily logistics KPIs (global and per provider) read by the analytics dashboard. Run it '
+        'periodically, e.g. every 15 minutes from cron; it rebuilds the whole table every '
+        'LOGISTICS_ANALYTICS_FULL_REFRESH_HOURS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild every day instead of only the days changed or marked stale since the last run'
+        )
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Rebuild days touched since this date (YYYY-MM-DD)'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = timezone.make_aware(datetime.strptime(options['since'], '%Y-%m-%d'))
+            except ValueError:
+                raise CommandError('--since must be in YYYY-MM-DD format')
+
+        rows = LogisticsAnalyticsService.refresh(full=options['full'], since=since)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully refreshed logistics analytics: {rows} rows written')
+        )
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0004_logisticsorder'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='logisticsanalytics',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='logisticsanalytics',
+            name='active_deliveries',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='logisticsanalytics',
+            name='computed_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='logisticsanalytics',
+            name='pending_deliveries',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='logisticsanalytics',
+            name='provider',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='analytics', to='logistics.serviceprovider'),
+        ),
+        migrations.AddField(
+            model_name='logisticsanalytics',
+            name='timed_deliveries',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='logisticsanalytics',
+            name='total_delivery_cost',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='logisticsanalytics',
+            name='total_delivery_seconds',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='logisticsanalytics',
+            index=models.Index(fields=['provider', 'date'], name='logistics_l_provide_d28726_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='logisticsanalytics',
+            constraint=models.UniqueConstraint(condition=models.Q(('provider__isnull', True)), fields=('date',), name='unique_global_logistics_analytics_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='logisticsanalytics',
+            constraint=models.UniqueConstraint(fields=('date', 'provider'), name='unique_provider_logistics_analytics_date'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0005_logisticsanalytics_provider_materialization'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryTrackingSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_event_id', models.BigIntegerField()),
+                ('last_event_id', models.BigIntegerField()),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField()),
+                ('event_count', models.IntegerField(default=0)),
+                ('statuses', models.JSONField(blank=True, default=list)),
+                ('locations', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-ended_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='deliverytracking',
+            index=models.Index(fields=['delivery', 'id'], name='logistics_d_deliver_4a424b_idx'),
+        ),
+        migrations.AddField(
+            model_name='deliverytrackingsegment',
+            name='delivery',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tracking_segments', to='logistics.delivery'),
+        ),
+        migrations.AddIndex(
+            model_name='deliverytrackingsegment',
+            index=models.Index(fields=['delivery', 'last_event_id'], name='logistics_d_deliver_8baea0_idx'),
+        ),
+    ]
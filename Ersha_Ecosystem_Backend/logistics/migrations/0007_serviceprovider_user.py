@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def link_providers_by_email(apps, schema_editor):
+    """Link existing providers to the logistics account sharing their contact email"""
+    ServiceProvider = apps.get_model('logistics', 'ServiceProvider')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    users_by_email = {}
+    for user_id, email in User.objects.filter(user_type='logistics').exclude(email='').values_list('id', 'email'):
+        users_by_email.setdefault(email.lower(), user_id)
+
+    linked = set()
+    for provider in ServiceProvider.objects.filter(user__isnull=True).exclude(contact_email=''):
+        user_id = users_by_email.get(provider.contact_email.lower())
+        if user_id and user_id not in linked:
+            provider.user_id = user_id
+            provider.save(update_fields=['user'])
+            linked.add(user_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0006_deliverytrackingsegment'),
+        ('orders', '0006_alter_notification_notification_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='user',
+            field=models.OneToOneField(blank=True, help_text='Logistics account that manages this provider', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='service_provider', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(link_providers_by_email, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='logisticsorder',
+            index=models.Index(fields=['provider', 'tracking_status'], name='logistics_l_provide_62f1e9_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0007_serviceprovider_user'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='delivery',
+            index=models.Index(fields=['-created_at', '-id'], name='logistics_d_created_b8be92_idx'),
+        ),
+    ]
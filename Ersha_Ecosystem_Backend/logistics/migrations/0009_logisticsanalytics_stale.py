@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0008_delivery_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logisticsanalytics',
+            name='stale',
+            field=models.BooleanField(default=False),
+        ),
+    ]
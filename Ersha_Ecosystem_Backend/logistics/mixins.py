@@ -0,0 +1,22 @@
+from .services import ServiceProviderService
+
+
+class ProviderScopedMixin:
+    """
+    Resolves the ServiceProvider managed by the requesting logistics user.
+
+    The lookup goes through the indexed user link and is cached on the
+    request, so get_queryset and the actions it backs share one query.
+    Accounts registered before providers were linked get theirs on first
+    use (see ServiceProviderService.provider_for).
+    """
+
+    def get_provider(self):
+        request = self.request
+        if not hasattr(request, '_service_provider'):
+            provider = None
+            user = request.user
+            if user.is_authenticated and user.is_logistics:
+                provider = ServiceProviderService.provider_for(user)
+            request._service_provider = provider
+        return request._service_provider
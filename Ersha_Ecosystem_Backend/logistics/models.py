@@ -8,6 +8,14 @@ from orders.models import Order
 class ServiceProvider(models.Model):
     """Logistics service providers/companies"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.OneToOneField(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='service_provider',
+        help_text="Logistics account that manages this provider"
+    )
     name = models.CharField(max_length=200)
     logo_url = models.URLField(blank=True)
     description = models.TextField(blank=True)
@@ -169,6 +177,9 @@ class Delivery(models.Model):
         ordering = ['-created_at']
         verbose_name = "Delivery"
         verbose_name_plural = "Deliveries"
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.tracking_number} - {self.product_name}"
@@ -183,10 +194,57 @@ class DeliveryTracking(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Delta reads: events for a delivery after a given event id
+            models.Index(fields=['delivery', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.delivery.tracking_number} - {self.status} at {self.location}"
 
+    def to_event(self):
+        """Payload pushed to tracking subscribers"""
+        return {
+            'id': self.id,
+            'location': self.location,
+            'status': self.status,
+            'description': self.description,
+            'timestamp': self.timestamp.isoformat(),
+        }
+
+class DeliveryTrackingSegment(models.Model):
+    """Summary of a run of old tracking events that have been compacted away"""
+    delivery = models.ForeignKey(Delivery, on_delete=models.CASCADE, related_name='tracking_segments')
+    first_event_id = models.BigIntegerField()
+    last_event_id = models.BigIntegerField()
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField()
+    event_count = models.IntegerField(default=0)
+    statuses = models.JSONField(default=list, blank=True)  # Distinct statuses in the order they occurred
+    locations = models.JSONField(default=list, blank=True)  # Distinct locations in the order they occurred
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-ended_at']
+        indexes = [
+            models.Index(fields=['delivery', 'last_event_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.delivery.tracking_number} - {self.event_count} events until {self.ended_at}"
+
+    def to_segment(self):
+        """Payload returned to clients catching up on compacted history"""
+        return {
+            'first_event_id': self.first_event_id,
+            'last_event_id': self.last_event_id,
+            'started_at': self.started_at.isoformat(),
+            'ended_at': self.ended_at.isoformat(),
+            'event_count': self.event_count,
+            'statuses': self.statuses,
+            'locations': self.locations,
+        }
+
 class CostEstimate(models.Model):
     """Freight cost estimates"""
     URGENCY_CHOICES = [
@@ -260,25 +318,63 @@ class LogisticsTransaction(models.Model):
         return f"{self.transaction_type} - ETB {self.amount} - {self.status}"
 
 class LogisticsAnalytics(models.Model):
-    """Analytics data for logistics performance"""
+    """
+    Materialized daily logistics KPIs.
+
+    One row per day for the whole platform (provider is NULL) and one row
+    per day per provider. Deliveries are bucketed by the day they were
+    created and revenue by the day the transaction was created. Rows are
+    rebuilt by LogisticsAnalyticsService.refresh(); deleting a delivery or
+    transaction marks its day stale so the next refresh rebuilds it.
+    """
     date = models.DateField()
+    provider = models.ForeignKey(
+        ServiceProvider,
+        on_delete=models.CASCADE,
+        related_name='analytics',
+        null=True,
+        blank=True
+    )
     total_deliveries = models.IntegerField(default=0)
+    active_deliveries = models.IntegerField(default=0)
+    pending_deliveries = models.IntegerField(default=0)
     completed_deliveries = models.IntegerField(default=0)
     failed_deliveries = models.IntegerField(default=0)
     total_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0.0)
+    total_delivery_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0.0)
     avg_delivery_time = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    # Inputs of avg_delivery_time, kept so averages can be re-weighted across days
+    timed_deliveries = models.IntegerField(default=0)
+    total_delivery_seconds = models.BigIntegerField(default=0)
     customer_satisfaction = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
-    
+
     # Provider performance
     top_providers = models.JSONField(default=list, blank=True)
-    
+
     created_at = models.DateTimeField(default=timezone.now)
+    computed_at = models.DateTimeField(default=timezone.now, db_index=True)
+    stale = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['-date']
-        unique_together = ['date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date'],
+                condition=models.Q(provider__isnull=True),
+                name='unique_global_logistics_analytics_date'
+            ),
+            models.UniqueConstraint(
+                fields=['date', 'provider'],
+                name='unique_provider_logistics_analytics_date'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['provider', 'date']),
+        ]
 
     def __str__(self):
+        if self.provider_id:
+            return f"Logistics Analytics for {self.date} - {self.provider}"
         return f"Logistics Analytics for {self.date}"
 
 
@@ -400,10 +496,21 @@ class LogisticsOrder(models.Model):
         ordering = ['-created_at']
         verbose_name = "Logistics Order"
         verbose_name_plural = "Logistics Orders"
+        indexes = [
+            # Provider dashboards poll per-status counts
+            models.Index(fields=['provider', 'tracking_status']),
+        ]
 
     def __str__(self):
         return f"Logistics Order {self.id} - {self.product_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets post_save handlers tell a status change from any other save
+        instance._saved_tracking_status = instance.__dict__.get('tracking_status')
+        return instance
+
     @property
     def status_display(self):
         """Get human-readable status"""
@@ -13,6 +13,7 @@ class ServiceProviderSerializer(serializers.ModelSerializer):
     class Meta:
         model = ServiceProvider
         fields = '__all__'
+        read_only_fields = ['user']
     
     def get_delivery_count(self, obj):
         return obj.deliveries.count()
@@ -0,0 +1,347 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    Delivery, DeliveryTracking, DeliveryTrackingSegment,
+    LogisticsAnalytics, LogisticsOrder, LogisticsTransaction, ServiceProvider
+)
+from .websocket_utils import send_tracking_event
+
+
+ACTIVE_DELIVERY_STATUSES = ['pending', 'confirmed', 'picked_up', 'in_transit', 'out_for_delivery']
+
+
+class LogisticsAnalyticsService:
+    """Service for materializing and reading daily logistics KPIs"""
+
+    @staticmethod
+    def _dirty_dates(since):
+        """Dates whose buckets may have changed since the given timestamp"""
+        delivery_days = Delivery.objects.filter(
+            updated_at__gte=since
+        ).annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct()
+
+        transaction_days = LogisticsTransaction.objects.filter(
+            Q(created_at__gte=since) | Q(completed_at__gte=since)
+        ).annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct()
+
+        stale_days = LogisticsAnalytics.objects.filter(stale=True).values_list('date', flat=True).distinct()
+
+        return set(delivery_days) | set(transaction_days) | set(stale_days)
+
+    @staticmethod
+    def mark_stale(created_at):
+        """Flag the rows of the day a deleted delivery or transaction was counted in"""
+        LogisticsAnalytics.objects.filter(date=timezone.localdate(created_at), stale=False).update(stale=True)
+
+    @staticmethod
+    def refresh(full=False, since=None):
+        """
+        Recompute the analytics rows that may be stale.
+
+        By default only days touched since the previous run, or marked stale
+        by a deletion, are rebuilt; once the oldest row is older than
+        LOGISTICS_ANALYTICS_FULL_REFRESH_HOURS the whole table is rebuilt,
+        which also corrects changes the incremental run cannot see. Pass
+        full=True to rebuild everything now. Returns the number of rows
+        written.
+        """
+        started_at = timezone.now()
+
+        if not full and since is None:
+            computed = LogisticsAnalytics.objects.aggregate(last=Max('computed_at'), oldest=Min('computed_at'))
+            max_age = timedelta(hours=getattr(settings, 'LOGISTICS_ANALYTICS_FULL_REFRESH_HOURS', 24))
+            since = computed['last']
+            full = since is None or computed['oldest'] < started_at - max_age
+
+        deliveries = Delivery.objects.all()
+        transactions = LogisticsTransaction.objects.filter(status='completed', transaction_type='payment')
+        dates = None
+        if not full:
+            dates = LogisticsAnalyticsService._dirty_dates(since)
+            if not dates:
+                return 0
+            deliveries = deliveries.filter(created_at__date__in=dates)
+            transactions = transactions.filter(created_at__date__in=dates)
+
+        timed = Q(status='delivered', actual_delivery__isnull=False)
+        delivery_stats = deliveries.annotate(
+            day=TruncDate('created_at')
+        ).values('day', 'provider_id').annotate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status__in=ACTIVE_DELIVERY_STATUSES)),
+            pending=Count('id', filter=Q(status='pending')),
+            completed=Count('id', filter=Q(status='delivered')),
+            failed=Count('id', filter=Q(status='failed')),
+            cost=Sum('cost'),
+            timed=Count('id', filter=timed),
+            duration=Sum(
+                ExpressionWrapper(F('actual_delivery') - F('created_at'), output_field=DurationField()),
+                filter=timed
+            ),
+        ).order_by()
+
+        revenue_stats = transactions.annotate(
+            day=TruncDate('created_at')
+        ).values('day', 'delivery__provider_id').annotate(
+            revenue=Sum('amount')
+        ).order_by()
+
+        buckets = defaultdict(lambda: {
+            'total_deliveries': 0,
+            'active_deliveries': 0,
+            'pending_deliveries': 0,
+            'completed_deliveries': 0,
+            'failed_deliveries': 0,
+            'total_revenue': Decimal('0.00'),
+            'total_delivery_cost': Decimal('0.00'),
+            'timed_deliveries': 0,
+            'total_delivery_seconds': 0,
+        })
+
+        for row in delivery_stats:
+            seconds = int(row['duration'].total_seconds()) if row['duration'] else 0
+            for key in ((row['day'], row['provider_id']), (row['day'], None)):
+                bucket = buckets[key]
+                bucket['total_deliveries'] += row['total']
+                bucket['active_deliveries'] += row['active']
+                bucket['pending_deliveries'] += row['pending']
+                bucket['completed_deliveries'] += row['completed']
+                bucket['failed_deliveries'] += row['failed']
+                bucket['total_delivery_cost'] += row['cost'] or Decimal('0.00')
+                bucket['timed_deliveries'] += row['timed']
+                bucket['total_delivery_seconds'] += seconds
+
+        for row in revenue_stats:
+            for key in ((row['day'], row['delivery__provider_id']), (row['day'], None)):
+                buckets[key]['total_revenue'] += row['revenue'] or Decimal('0.00')
+
+        provider_names = dict(
+            ServiceProvider.objects.filter(
+                id__in={provider_id for _, provider_id in buckets if provider_id}
+            ).values_list('id', 'name')
+        )
+
+        daily_providers = defaultdict(list)
+        for (day, provider_id), values in buckets.items():
+            if provider_id:
+                daily_providers[day].append((provider_id, values['total_deliveries']))
+
+        rows = []
+        for (day, provider_id), values in buckets.items():
+            avg_delivery_time = None
+            if values['timed_deliveries']:
+                avg_delivery_time = round(
+                    Decimal(values['total_delivery_seconds']) / values['timed_deliveries'] / 86400, 2
+                )
+
+            top_providers = []
+            if provider_id is None:
+                ranked = sorted(daily_providers[day], key=lambda item: item[1], reverse=True)[:5]
+                top_providers = [
+                    {'id': str(pid), 'name': provider_names.get(pid, ''), 'deliveries': count}
+                    for pid, count in ranked
+                ]
+
+            rows.append(LogisticsAnalytics(
+                date=day,
+                provider_id=provider_id,
+                avg_delivery_time=avg_delivery_time,
+                top_providers=top_providers,
+                computed_at=started_at,
+                **values
+            ))
+
+        with transaction.atomic():
+            stale = LogisticsAnalytics.objects.all()
+            if dates is not None:
+                stale = stale.filter(date__in=dates)
+            stale.delete()
+            LogisticsAnalytics.objects.bulk_create(rows, batch_size=500)
+
+        return len(rows)
+
+    @staticmethod
+    def get_summary(provider_id=None, revenue_since=None):
+        """Aggregate the materialized rows for the platform or a single provider"""
+        rows = LogisticsAnalytics.objects.all()
+        if provider_id:
+            rows = rows.filter(provider_id=provider_id)
+        else:
+            rows = rows.filter(provider__isnull=True)
+
+        fields = [
+            'total_deliveries', 'active_deliveries', 'pending_deliveries', 'completed_deliveries',
+            'failed_deliveries', 'total_revenue', 'total_delivery_cost', 'timed_deliveries',
+            'total_delivery_seconds',
+        ]
+        # Aliases must not shadow the summed column names
+        aggregates = {f'sum_{field}': Sum(field) for field in fields}
+        aggregates['materialized_at'] = Max('computed_at')
+        if revenue_since:
+            aggregates['sum_recent_revenue'] = Sum('total_revenue', filter=Q(date__gte=revenue_since))
+
+        result = rows.aggregate(**aggregates)
+        summary = {'materialized_at': result.pop('materialized_at')}
+        for alias, value in result.items():
+            key = alias[len('sum_'):]
+            if value is None:
+                value = Decimal('0.00') if 'revenue' in key or 'cost' in key else 0
+            summary[key] = value
+        return summary
+
+    @staticmethod
+    def get_top_providers(limit=5):
+        """Active providers with the most materialized deliveries"""
+        ranked = list(
+            LogisticsAnalytics.objects.filter(
+                provider__isnull=False,
+                provider__is_active=True
+            ).values('provider_id').annotate(
+                delivery_count=Sum('total_deliveries')
+            ).order_by('-delivery_count').values_list('provider_id', flat=True)[:limit]
+        )
+        providers = ServiceProvider.objects.in_bulk(ranked)
+        return [providers[pid] for pid in ranked if pid in providers]
+
+
+class DeliveryTrackingService:
+    """Service for appending, reading and compacting delivery tracking events"""
+
+    TERMINAL_STATUSES = ['delivered', 'failed', 'returned', 'cancelled']
+
+    @staticmethod
+    def record_event(delivery, location, status, description):
+        """Append a tracking event and push it to subscribers once committed"""
+        event = DeliveryTracking.objects.create(
+            delivery=delivery,
+            location=location,
+            status=status,
+            description=description
+        )
+        payload = dict(event.to_event(), tracking_number=delivery.tracking_number)
+        transaction.on_commit(lambda: send_tracking_event(delivery.tracking_number, payload))
+        return event
+
+    @staticmethod
+    def get_events_since(delivery, since_id=0, limit=100):
+        """
+        Events after since_id in the order they happened, plus summaries of
+        any compacted history the client has not seen yet.
+        """
+        events = list(
+            DeliveryTracking.objects.filter(
+                delivery=delivery, id__gt=since_id
+            ).order_by('id')[:limit]
+        )
+        segments = list(
+            DeliveryTrackingSegment.objects.filter(
+                delivery=delivery, last_event_id__gt=since_id
+            ).order_by('first_event_id')
+        )
+        return events, segments
+
+    @staticmethod
+    def compact(older_than_days=30, batch_size=500):
+        """
+        Fold tracking events older than the cutoff into one segment per
+        delivery. The latest event of each delivery is always kept so the
+        current position stays readable. Returns (segments, events removed).
+        """
+        cutoff = timezone.now() - timedelta(days=older_than_days)
+
+        latest_ids = DeliveryTracking.objects.values('delivery_id').annotate(
+            latest_id=Max('id')
+        ).values('latest_id')
+
+        candidates = DeliveryTracking.objects.filter(
+            timestamp__lt=cutoff
+        ).exclude(id__in=latest_ids).order_by('delivery_id', 'id').values_list(
+            'id', 'delivery_id', 'status', 'location', 'timestamp'
+        )
+
+        segments = []
+        compacted_ids = []
+        current = None
+        for event_id, delivery_id, status, location, timestamp in candidates.iterator(chunk_size=batch_size):
+            if current is None or current.delivery_id != delivery_id:
+                current = DeliveryTrackingSegment(
+                    delivery_id=delivery_id,
+                    first_event_id=event_id,
+                    started_at=timestamp,
+                    statuses=[],
+                    locations=[]
+                )
+                segments.append(current)
+            current.last_event_id = event_id
+            current.ended_at = timestamp
+            current.event_count += 1
+            if status and status not in current.statuses:
+                current.statuses.append(status)
+            if location and location not in current.locations:
+                current.locations.append(location)
+            compacted_ids.append(event_id)
+
+        with transaction.atomic():
+            DeliveryTrackingSegment.objects.bulk_create(segments, batch_size=batch_size)
+            for start in range(0, len(compacted_ids), batch_size):
+                DeliveryTracking.objects.filter(id__in=compacted_ids[start:start + batch_size]).delete()
+
+        return len(segments), len(compacted_ids)
+
+
+class LogisticsOrderService:
+    """Service for provider-facing logistics order summaries"""
+
+    CLOSED_STATUSES = ['delivered', 'cancelled']
+
+    @staticmethod
+    def status_counts(queryset):
+        """Per-status order counts from a single grouped query"""
+        counts = {status: 0 for status, _ in LogisticsOrder.TRACKING_STATUS_CHOICES}
+        rows = queryset.order_by().values('tracking_status').annotate(count=Count('id'))
+        for row in rows:
+            counts[row['tracking_status']] = row['count']
+        return counts
+
+
+class ServiceProviderService:
+    """Service for linking logistics accounts to the provider they manage"""
+
+    @staticmethod
+    def provider_for(user):
+        """
+        The user's provider. An unlinked provider sharing the account's
+        email is claimed; otherwise a provider is created from the account
+        and its profile, unverified until an admin reviews it.
+        """
+        provider = ServiceProvider.objects.filter(user=user).first()
+        if provider is not None or not user.is_logistics:
+            return provider
+
+        with transaction.atomic():
+            if user.email:
+                provider = ServiceProvider.objects.select_for_update().filter(
+                    user__isnull=True, contact_email__iexact=user.email
+                ).first()
+            if provider is not None:
+                provider.user = user
+                provider.save(update_fields=['user', 'updated_at'])
+                return provider
+
+            profile = getattr(user, 'profile', None)
+            return ServiceProvider.objects.create(
+                user=user,
+                name=user.get_full_name() or user.username,
+                contact_email=user.email or '',
+                contact_phone=user.phone or '',
+                coverage_areas=list(getattr(profile, 'coverage_areas', None) or []),
+                verified=False,
+            )
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Delivery, LogisticsTransaction
+from .services import LogisticsAnalyticsService
+
+
+@receiver(post_delete, sender=Delivery)
+@receiver(post_delete, sender=LogisticsTransaction)
+def mark_analytics_stale(sender, instance, **kwargs):
+    """Deleted rows leave no trace for the incremental refresh, so flag their day"""
+    LogisticsAnalyticsService.mark_stale(instance.created_at)
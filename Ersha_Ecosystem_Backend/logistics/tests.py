@@ -1,3 +1,314 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from .models import (
+    ServiceProvider, Delivery, DeliveryTracking, DeliveryTrackingSegment,
+    LogisticsTransaction, LogisticsAnalytics, LogisticsRequest, LogisticsOrder
+)
+from orders.models import Order
+from .services import LogisticsAnalyticsService, DeliveryTrackingService
+from .websocket_utils import tracking_group_name
+
+User = get_user_model()
+
+
+class LogisticsAnalyticsMaterializationTestCase(APITestCase):
+    def setUp(self):
+        """Set up providers, deliveries and transactions"""
+        self.admin = User.objects.create_user(
+            username='admin@test.com',
+            email='admin@test.com',
+            password='testpass123',
+            user_type=User.UserType.ADMIN
+        )
+        self.provider = ServiceProvider.objects.create(name='FastFreight', is_active=True)
+        self.other_provider = ServiceProvider.objects.create(name='RapidTransport', is_active=True)
+
+        now = timezone.now()
+        self.delivered = Delivery.objects.create(
+            order_id='ORD-1', tracking_number='TRK-1', product_name='Teff', quantity='100kg',
+            origin='Adama', destination='Addis Ababa', provider=self.provider,
+            status='delivered', cost=Decimal('100.00'),
+            created_at=now - timedelta(days=2), actual_delivery=now
+        )
+        Delivery.objects.create(
+            order_id='ORD-2', tracking_number='TRK-2', product_name='Coffee', quantity='50kg',
+            origin='Jimma', destination='Addis Ababa', provider=self.provider,
+            status='pending', cost=Decimal('300.00')
+        )
+        Delivery.objects.create(
+            order_id='ORD-3', tracking_number='TRK-3', product_name='Maize', quantity='20kg',
+            origin='Bahir Dar', destination='Gondar', provider=self.other_provider,
+            status='failed', cost=Decimal('200.00')
+        )
+        LogisticsTransaction.objects.create(
+            delivery=self.delivered, transaction_type='payment',
+            amount=Decimal('450.00'), status='completed'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_refresh_writes_global_and_provider_rows(self):
+        """Test that a full refresh materializes per-provider and global rows"""
+        LogisticsAnalyticsService.refresh(full=True)
+
+        summary = LogisticsAnalyticsService.get_summary()
+        self.assertEqual(summary['total_deliveries'], 3)
+        self.assertEqual(summary['completed_deliveries'], 1)
+        self.assertEqual(summary['failed_deliveries'], 1)
+        self.assertEqual(summary['pending_deliveries'], 1)
+        self.assertEqual(summary['total_revenue'], Decimal('450.00'))
+        self.assertEqual(summary['timed_deliveries'], 1)
+        self.assertAlmostEqual(summary['total_delivery_seconds'], 2 * 24 * 3600, delta=1)
+
+        provider_summary = LogisticsAnalyticsService.get_summary(self.other_provider.id)
+        self.assertEqual(provider_summary['total_deliveries'], 1)
+        self.assertEqual(provider_summary['total_revenue'], Decimal('0.00'))
+
+    def test_incremental_refresh_only_rebuilds_changed_days(self):
+        """Test that status changes are picked up by an incremental refresh"""
+        LogisticsAnalyticsService.refresh(full=True)
+        stale_row = LogisticsAnalytics.objects.get(date=self.delivered.created_at.date(), provider__isnull=True)
+
+        pending = Delivery.objects.get(tracking_number='TRK-2')
+        pending.status = 'delivered'
+        pending.actual_delivery = timezone.now()
+        pending.save()
+
+        LogisticsAnalyticsService.refresh()
+
+        self.assertTrue(LogisticsAnalytics.objects.filter(pk=stale_row.pk).exists())
+        summary = LogisticsAnalyticsService.get_summary()
+        self.assertEqual(summary['completed_deliveries'], 2)
+        self.assertEqual(summary['pending_deliveries'], 0)
+
+    def test_deletions_and_aged_rows_are_rebuilt(self):
+        """Test that deleted deliveries leave the totals and that old rows trigger a full rebuild"""
+        LogisticsAnalyticsService.refresh(full=True)
+        Delivery.objects.get(tracking_number='TRK-3').delete()
+        self.assertTrue(LogisticsAnalytics.objects.filter(stale=True).exists())
+
+        LogisticsAnalyticsService.refresh()
+        summary = LogisticsAnalyticsService.get_summary()
+        self.assertEqual((summary['total_deliveries'], summary['failed_deliveries']), (2, 0))
+        self.assertFalse(LogisticsAnalytics.objects.filter(stale=True).exists())
+        self.assertFalse(LogisticsAnalytics.objects.filter(provider=self.other_provider).exists())
+
+        # A change the incremental run cannot see is corrected once the rows age out
+        LogisticsTransaction.objects.update(status='cancelled')
+        self.assertEqual(LogisticsAnalyticsService.refresh(), 0)
+        LogisticsAnalytics.objects.update(computed_at=timezone.now() - timedelta(days=2))
+        LogisticsAnalyticsService.refresh()
+        self.assertEqual(LogisticsAnalyticsService.get_summary()['total_revenue'], Decimal('0.00'))
+
+    def test_dashboard_reads_materialized_rows(self):
+        """Test that the dashboard endpoints are served from the materialized table"""
+        response = self.client.get('/api/logistics/analytics/dashboard/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_deliveries'], 0)
+        self.assertIsNone(response.data['materialized_at'])
+
+        response = self.client.get('/api/logistics/analytics/dashboard/', {'provider': 'not-a-uuid'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        LogisticsAnalyticsService.refresh(full=True)
+        response = self.client.get('/api/logistics/analytics/dashboard/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_deliveries'], 3)
+        self.assertEqual(response.data['active_deliveries'], 1)
+        self.assertEqual(response.data['avg_delivery_cost'], Decimal('200.00'))
+        self.assertEqual(response.data['top_providers'][0]['name'], 'FastFreight')
+        self.assertIsNotNone(response.data['materialized_at'])
+
+        response = self.client.get('/api/logistics/analytics/performance_metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['success_rate'], 33.33)
+        self.assertEqual(response.data['avg_delivery_time_days'], 2.0)
+        self.assertEqual(response.data['monthly_revenue'], Decimal('450.00'))
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class DeliveryTrackingStreamTestCase(APITestCase):
+    def setUp(self):
+        """Set up a delivery with a provider"""
+        self.user = User.objects.create_user(
+            username='buyer@test.com',
+            email='buyer@test.com',
+            password='testpass123',
+            user_type=User.UserType.BUYER
+        )
+        provider = ServiceProvider.objects.create(name='FastFreight')
+        self.delivery = Delivery.objects.create(
+            order_id='ORD-1', tracking_number='TRK-1', product_name='Teff', quantity='100kg',
+            origin='Adama', destination='Addis Ababa', provider=provider
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_status_update_pushes_event_to_tracking_group(self):
+        """Test that recorded events are pushed to the tracking number's group"""
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(tracking_group_name('TRK-1'), channel_name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/logistics/deliveries/{self.delivery.id}/update_status/',
+                {'status': 'in_transit', 'current_location': 'Mojo'}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertEqual(message['type'], 'tracking_event')
+        self.assertEqual(message['event']['status'], 'in_transit')
+        self.assertEqual(message['event']['location'], 'Mojo')
+
+    def test_tracking_updates_returns_only_newer_events(self):
+        """Test that the delta endpoint returns events after the given id"""
+        first = DeliveryTrackingService.record_event(self.delivery, 'Adama', 'picked_up', 'Picked up')
+        second = DeliveryTrackingService.record_event(self.delivery, 'Mojo', 'in_transit', 'On the road')
+
+        response = self.client.get(
+            '/api/logistics/deliveries/tracking_updates/',
+            {'tracking_number': 'TRK-1', 'since': first.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([e['id'] for e in response.data['events']], [second.id])
+        self.assertEqual(response.data['last_event_id'], second.id)
+
+        response = self.client.get(
+            '/api/logistics/deliveries/tracking_updates/',
+            {'tracking_number': 'TRK-1', 'since': second.id}
+        )
+        self.assertEqual(response.data['events'], [])
+        self.assertEqual(response.data['last_event_id'], second.id)
+
+    def test_compaction_summarizes_old_events_and_keeps_latest(self):
+        """Test that old events are folded into a segment and the latest one is kept"""
+        old = timezone.now() - timedelta(days=40)
+        events = [
+            DeliveryTracking.objects.create(
+                delivery=self.delivery, location=location, status=event_status,
+                description='', timestamp=old + timedelta(hours=i)
+            )
+            for i, (location, event_status) in enumerate([
+                ('Adama', 'picked_up'), ('Mojo', 'in_transit'), ('Dukem', 'in_transit')
+            ])
+        ]
+
+        segments, removed = DeliveryTrackingService.compact(older_than_days=30)
+
+        self.assertEqual((segments, removed), (1, 2))
+        self.assertEqual(list(self.delivery.tracking_events.values_list('id', flat=True)), [events[-1].id])
+        segment = DeliveryTrackingSegment.objects.get(delivery=self.delivery)
+        self.assertEqual(segment.event_count, 2)
+        self.assertEqual(segment.statuses, ['picked_up', 'in_transit'])
+        self.assertEqual(segment.locations, ['Adama', 'Mojo'])
+
+        response = self.client.get(
+            '/api/logistics/deliveries/tracking_updates/', {'tracking_number': 'TRK-1'}
+        )
+        self.assertEqual(len(response.data['segments']), 1)
+        self.assertEqual(len(response.data['events']), 1)
+
+
+class ProviderScopedQuerysetTestCase(APITestCase):
+    def setUp(self):
+        """Set up a provider account, its provider and a decoy provider"""
+        self.provider_user = User.objects.create_user(
+            username='fleet@test.com',
+            email='fleet@test.com',
+            password='testpass123',
+            user_type=User.UserType.LOGISTICS
+        )
+        self.farmer = User.objects.create_user(
+            username='farmer@test.com',
+            email='farmer@test.com',
+            password='testpass123',
+            user_type=User.UserType.FARMER
+        )
+        self.buyer = User.objects.create_user(
+            username='buyer@test.com',
+            email='buyer@test.com',
+            password='testpass123',
+            user_type=User.UserType.BUYER
+        )
+        self.provider = ServiceProvider.objects.create(name='FastFreight', user=self.provider_user)
+        # Shares the account's email but is not linked to it
+        self.other_provider = ServiceProvider.objects.create(name='Decoy', contact_email='fleet@test.com')
+
+        order = Order.objects.create(
+            buyer=self.buyer, total_amount=Decimal('500.00'),
+            delivery_address='Bole, Addis Ababa', delivery_phone='0911000000'
+        )
+        for provider, tracking_status in [
+            (self.provider, 'pending'), (self.provider, 'pending'),
+            (self.provider, 'on_the_way'), (self.provider, 'delivered'),
+            (self.other_provider, 'pending'),
+        ]:
+            LogisticsOrder.objects.create(
+                order=order, provider=provider, farmer=self.farmer, buyer=self.buyer,
+                product_name='Teff', quantity='100kg', pickup_location='Adama',
+                delivery_location='Addis Ababa', tracking_status=tracking_status
+            )
+        LogisticsRequest.objects.create(
+            farmer=self.farmer, order=order, provider=self.provider,
+            pickup_location='Adama', delivery_location='Addis Ababa'
+        )
+        LogisticsRequest.objects.create(
+            farmer=self.farmer, order=order, provider=self.other_provider,
+            pickup_location='Adama', delivery_location='Addis Ababa'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.provider_user)
+
+    def test_status_counts_use_linked_provider_and_one_grouped_query(self):
+        """Test that counts are scoped by the user link and computed in one query"""
+        # provider resolution + grouped count
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/logistics/orders/status_counts/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['pending'], 2)
+        self.assertEqual(response.data['on_the_way'], 1)
+        self.assertEqual(response.data['delivered'], 1)
+        self.assertEqual(response.data['cancelled'], 0)
+
+        response = self.client.get('/api/logistics/orders/active_orders/')
+        self.assertEqual(len(response.data), 3)
+
+    def test_provider_requests_are_scoped_to_linked_provider(self):
+        """Test that provider request lists ignore providers matched only by email"""
+        response = self.client.get('/api/logistics/requests/provider_requests/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['provider_name'] for r in response.data], ['FastFreight'])
+
+        response = self.client.get('/api/logistics/requests/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Neither a buyer nor a farmer sees other farmers' requests
+        self.client.force_authenticate(user=self.buyer)
+        response = self.client.get('/api/logistics/requests/')
+        self.assertEqual(response.data['count'] if isinstance(response.data, dict) else len(response.data), 0)
+
+        # A new logistics account gets its own provider on first use
+        unlinked = User.objects.create_user(
+            username='unlinked@test.com',
+            email='unlinked@test.com',
+            password='testpass123',
+            user_type=User.UserType.LOGISTICS
+        )
+        self.client.force_authenticate(user=unlinked)
+        response = self.client.get('/api/logistics/requests/provider_requests/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+        self.assertEqual(ServiceProvider.objects.get(user=unlinked).contact_email, 'unlinked@test.com')
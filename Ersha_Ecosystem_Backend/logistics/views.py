@@ -2,6 +2,7 @@ from django.shortcuts import render
 from rest_framework import viewsets, filters, status, permissions
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
@@ -9,6 +10,7 @@ from django.db.models import Q, Avg, Count, Sum
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
+import uuid
 
 from .models import (
     ServiceProvider, Delivery, DeliveryTracking, 
@@ -25,6 +27,9 @@ from .serializers import (
     LogisticsNotificationSerializer, LogisticsOrderSerializer,
     LogisticsOrderCreateSerializer, LogisticsOrderUpdateSerializer
 )
+from .services import LogisticsAnalyticsService, DeliveryTrackingService, LogisticsOrderService
+from .mixins import ProviderScopedMixin
+from core.services import PlatformStatsService
 
 class TestServiceProviderView(APIView):
     """Simple test view to check if ServiceProvider works"""
@@ -84,30 +89,17 @@ class ServiceProviderViewSet(viewsets.ModelViewSet):
         if not request.user.is_admin:
             return Response({'error': 'Admin access required'}, status=403)
         
-        total_providers = ServiceProvider.objects.count()
-        verified_providers = ServiceProvider.objects.filter(verified=True).count()
-        active_providers = ServiceProvider.objects.filter(is_active=True).count()
-        total_deliveries = Delivery.objects.count()
-        completed_deliveries = Delivery.objects.filter(status='delivered').count()
-        
-        # Provider performance stats
-        top_providers = ServiceProvider.objects.filter(is_active=True).order_by('-rating')[:5]
-        provider_stats = []
-        for provider in top_providers:
-            provider_stats.append({
-                'name': provider.name,
-                'rating': float(provider.rating),
-                'total_deliveries': provider.total_deliveries,
-                'verified': provider.verified
-            })
+        snapshot = PlatformStatsService.get_latest(fresh=PlatformStatsService.wants_fresh(request))
+        logistics = snapshot.stats['logistics']
         
         return Response({
-            'total_providers': total_providers,
-            'verified_providers': verified_providers,
-            'active_providers': active_providers,
-            'total_deliveries': total_deliveries,
-            'completed_deliveries': completed_deliveries,
-            'top_providers': provider_stats
+            'total_providers': logistics['providers'],
+            'verified_providers': logistics['verified_providers'],
+            'active_providers': logistics['active_providers'],
+            'total_deliveries': logistics['deliveries'],
+            'completed_deliveries': logistics['completed_deliveries'],
+            'top_providers': logistics['top_providers'],
+            'last_updated': snapshot.created_at.isoformat()
         })
     
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
@@ -148,7 +140,8 @@ class DeliveryViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status', 'provider', 'is_urgent', 'requires_signature']
     search_fields = ['tracking_number', 'order_id', 'product_name', 'origin', 'destination']
     ordering_fields = ['created_at', 'estimated_delivery', 'cost', 'progress_percentage']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    cursor_ordering = ('-created_at', '-id')
     
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
@@ -160,9 +153,9 @@ class DeliveryViewSet(viewsets.ModelViewSet):
             old_status = delivery.status
             serializer.save()
             
-            # Create tracking event
-            DeliveryTracking.objects.create(
-                delivery=delivery,
+            # Create tracking event and push it to subscribers
+            DeliveryTrackingService.record_event(
+                delivery,
                 location=request.data.get('current_location', ''),
                 status=request.data.get('status', ''),
                 description=f"Status updated from {old_status} to {request.data.get('status', '')}"
@@ -178,7 +171,7 @@ class DeliveryViewSet(viewsets.ModelViewSet):
         serializer = DeliveryTrackingUpdateSerializer(data=request.data)
         
         if serializer.is_valid():
-            tracking_event = serializer.save(delivery=delivery)
+            tracking_event = DeliveryTrackingService.record_event(delivery, **serializer.validated_data)
             return Response(DeliveryTrackingSerializer(tracking_event).data)
         return Response(serializer.errors, status=400)
     
@@ -206,12 +199,49 @@ class DeliveryViewSet(viewsets.ModelViewSet):
         tracking_number = request.query_params.get('tracking_number', '')
         if tracking_number:
             try:
-                delivery = self.get_queryset().get(tracking_number=tracking_number)
+                delivery = self.get_queryset().select_related('provider').prefetch_related(
+                    'tracking_events'
+                ).get(tracking_number=tracking_number)
                 serializer = self.get_serializer(delivery)
                 return Response(serializer.data)
             except Delivery.DoesNotExist:
                 return Response({'error': 'Delivery not found'}, status=404)
         return Response({'error': 'Tracking number required'}, status=400)
+    
+    @action(detail=False, methods=['get'])
+    def tracking_updates(self, request):
+        """
+        Get tracking events after a given event id.
+        
+        Lightweight alternative to polling by_tracking_number: clients pass
+        the last event id they saw (`since`) and receive only newer events,
+        plus summaries of any compacted history they missed.
+        """
+        tracking_number = request.query_params.get('tracking_number', '')
+        if not tracking_number:
+            return Response({'error': 'Tracking number required'}, status=400)
+        
+        try:
+            since_id = int(request.query_params.get('since', 0))
+        except ValueError:
+            return Response({'error': 'since must be an event id'}, status=400)
+        
+        delivery = self.get_queryset().filter(tracking_number=tracking_number).only(
+            'id', 'tracking_number', 'status', 'progress_percentage', 'current_location'
+        ).first()
+        if delivery is None:
+            return Response({'error': 'Delivery not found'}, status=404)
+        
+        events, segments = DeliveryTrackingService.get_events_since(delivery, since_id)
+        return Response({
+            'tracking_number': delivery.tracking_number,
+            'status': delivery.status,
+            'progress_percentage': delivery.progress_percentage,
+            'current_location': delivery.current_location,
+            'events': [event.to_event() for event in events],
+            'segments': [segment.to_segment() for segment in segments],
+            'last_event_id': events[-1].id if events else since_id,
+        })
 
 class CostEstimateViewSet(viewsets.ModelViewSet):
     queryset = CostEstimate.objects.all()
@@ -292,47 +322,42 @@ class LogisticsAnalyticsViewSet(viewsets.ModelViewSet):
     ordering_fields = ['date', 'total_deliveries', 'total_revenue']
     ordering = ['-date']
     
+    def _get_summary(self, request, revenue_since=None):
+        """Read the materialized KPIs; refresh_logistics_analytics keeps them current"""
+        provider_id = request.query_params.get('provider')
+        if provider_id:
+            try:
+                provider_id = uuid.UUID(provider_id)
+            except ValueError:
+                raise ValidationError({'provider': 'Must be a valid provider ID'})
+        return LogisticsAnalyticsService.get_summary(provider_id, revenue_since)
+
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
         """Get dashboard overview data"""
-        today = timezone.now().date()
-        last_30_days = today - timedelta(days=30)
-        
-        # Calculate dashboard metrics
-        total_deliveries = Delivery.objects.count()
-        active_deliveries = Delivery.objects.filter(
-            status__in=['pending', 'confirmed', 'picked_up', 'in_transit', 'out_for_delivery']
-        ).count()
-        completed_deliveries = Delivery.objects.filter(status='delivered').count()
-        pending_deliveries = Delivery.objects.filter(status='pending').count()
-        
-        # Revenue calculations
-        total_revenue = LogisticsTransaction.objects.filter(
-            status='completed',
-            transaction_type='payment'
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.0')
+        summary = self._get_summary(request)
         
-        avg_delivery_cost = Delivery.objects.aggregate(avg=Avg('cost'))['avg'] or Decimal('0.0')
+        total_deliveries = summary['total_deliveries']
+        avg_delivery_cost = Decimal('0.0')
+        if total_deliveries:
+            avg_delivery_cost = round(summary['total_delivery_cost'] / total_deliveries, 2)
         
         # Top providers
-        top_providers = ServiceProvider.objects.filter(
-            is_active=True
-        ).annotate(
-            delivery_count=Count('deliveries')
-        ).order_by('-delivery_count')[:5]
+        top_providers = LogisticsAnalyticsService.get_top_providers(limit=5)
         
         # Recent deliveries
-        recent_deliveries = Delivery.objects.all()[:10]
+        recent_deliveries = Delivery.objects.select_related('provider').prefetch_related('tracking_events')[:10]
         
         dashboard_data = {
             'total_deliveries': total_deliveries,
-            'active_deliveries': active_deliveries,
-            'completed_deliveries': completed_deliveries,
-            'pending_deliveries': pending_deliveries,
-            'total_revenue': total_revenue,
+            'active_deliveries': summary['active_deliveries'],
+            'completed_deliveries': summary['completed_deliveries'],
+            'pending_deliveries': summary['pending_deliveries'],
+            'total_revenue': summary['total_revenue'],
             'avg_delivery_cost': avg_delivery_cost,
             'top_providers': ServiceProviderSerializer(top_providers, many=True).data,
             'recent_deliveries': DeliverySerializer(recent_deliveries, many=True).data,
+            'materialized_at': summary['materialized_at'],
         }
         
         return Response(dashboard_data)
@@ -342,51 +367,31 @@ class LogisticsAnalyticsViewSet(viewsets.ModelViewSet):
         """Get performance metrics"""
         today = timezone.now().date()
         last_30_days = today - timedelta(days=30)
+        summary = self._get_summary(request, revenue_since=last_30_days)
         
         # Delivery success rate
-        total_deliveries = Delivery.objects.count()
-        successful_deliveries = Delivery.objects.filter(status='delivered').count()
+        total_deliveries = summary['total_deliveries']
+        successful_deliveries = summary['completed_deliveries']
         success_rate = (successful_deliveries / total_deliveries * 100) if total_deliveries > 0 else 0
         
-        # Calculate average delivery time in Python
-        delivered_orders = Delivery.objects.filter(
-            status='delivered',
-            actual_delivery__isnull=False
-        ).values_list('created_at', 'actual_delivery')
-        
-        # Calculate time differences in Python
-        time_differences = []
-        for created, delivered in delivered_orders:
-            if created and delivered:
-                time_diff = delivered - created
-                time_differences.append(time_diff.total_seconds())
-        
-        # Calculate average in seconds and convert to days
+        # Average delivery time, from durations summed in SQL at materialization time
         avg_delivery_time_days = 0
-        if time_differences:
-            avg_seconds = sum(time_differences) / len(time_differences)
+        if summary['timed_deliveries']:
+            avg_seconds = summary['total_delivery_seconds'] / summary['timed_deliveries']
             avg_delivery_time_days = round(avg_seconds / (24 * 3600), 2)  # Convert to days
         
-        # Revenue trends
-        monthly_revenue = LogisticsTransaction.objects.filter(
-            status='completed',
-            transaction_type='payment',
-            created_at__gte=last_30_days
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.0')
-        
         metrics = {
             'success_rate': round(success_rate, 2),
             'avg_delivery_time_days': avg_delivery_time_days,
-            'monthly_revenue': monthly_revenue,
+            'monthly_revenue': summary['recent_revenue'],
             'total_providers': ServiceProvider.objects.filter(is_active=True).count(),
-            'active_deliveries': Delivery.objects.filter(
-                status__in=['pending', 'confirmed', 'picked_up', 'in_transit', 'out_for_delivery']
-            ).count()
+            'active_deliveries': summary['active_deliveries'],
+            'materialized_at': summary['materialized_at'],
         }
         
         return Response(metrics)
 
-class LogisticsRequestViewSet(viewsets.ModelViewSet):
+class LogisticsRequestViewSet(ProviderScopedMixin, viewsets.ModelViewSet):
     """ViewSet for handling logistics requests from farmers"""
     serializer_class = LogisticsRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -399,16 +404,21 @@ class LogisticsRequestViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Return logistics requests based on user type"""
         user = self.request.user
+        queryset = LogisticsRequest.objects.select_related('farmer', 'provider', 'order')
         
-        if user.is_logistics_provider:
+        if user.is_logistics:
             # Logistics providers see requests sent to them
-            return LogisticsRequest.objects.filter(provider__user=user)
+            provider = self.get_provider()
+            if provider is None:
+                return queryset.none()
+            return queryset.filter(provider=provider)
         elif user.is_farmer:
             # Farmers see their own requests
-            return LogisticsRequest.objects.filter(farmer=user)
-        else:
+            return queryset.filter(farmer=user)
+        elif user.is_admin:
             # Admins see all requests
-            return LogisticsRequest.objects.all()
+            return queryset
+        return queryset.none()
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -431,7 +441,7 @@ class LogisticsRequestViewSet(viewsets.ModelViewSet):
         """Accept a logistics request (for providers)"""
         logistics_request = self.get_object()
         
-        if not request.user.is_logistics_provider:
+        if not request.user.is_logistics:
             return Response(
                 {'error': 'Only logistics providers can accept requests'}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -459,7 +469,7 @@ class LogisticsRequestViewSet(viewsets.ModelViewSet):
         logistics_request = self.get_object()
         reason = request.data.get('reason', '')
         
-        if not request.user.is_logistics_provider:
+        if not request.user.is_logistics:
             return Response(
                 {'error': 'Only logistics providers can reject requests'}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -486,7 +496,7 @@ class LogisticsRequestViewSet(viewsets.ModelViewSet):
         """Complete a logistics request (for providers)"""
         logistics_request = self.get_object()
         
-        if not request.user.is_logistics_provider:
+        if not request.user.is_logistics:
             return Response(
                 {'error': 'Only logistics providers can complete requests'}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -527,16 +537,15 @@ class LogisticsRequestViewSet(viewsets.ModelViewSet):
         if request.user.user_type != 'logistics':
             return Response({'error': 'Access denied'}, status=403)
         
-        try:
-            provider = ServiceProvider.objects.get(contact_email=request.user.email)
-            requests = LogisticsRequest.objects.filter(provider=provider).order_by('-created_at')
-            serializer = LogisticsRequestSerializer(requests, many=True)
-            return Response(serializer.data)
-        except ServiceProvider.DoesNotExist:
+        if self.get_provider() is None:
             return Response({'error': 'Provider not found'}, status=404)
 
+        requests = self.get_queryset().order_by('-created_at')
+        serializer = LogisticsRequestSerializer(requests, many=True)
+        return Response(serializer.data)
+
 
-class LogisticsNotificationViewSet(viewsets.ModelViewSet):
+class LogisticsNotificationViewSet(ProviderScopedMixin, viewsets.ModelViewSet):
     """ViewSet for managing logistics notifications"""
     serializer_class = LogisticsNotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -548,16 +557,18 @@ class LogisticsNotificationViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filter notifications based on user type"""
+        queryset = LogisticsNotification.objects.select_related(
+            'logistics_request__farmer', 'logistics_request__provider', 'logistics_request__order'
+        )
         if self.request.user.user_type == 'logistics':
             # Logistics providers see their own notifications
-            try:
-                provider = ServiceProvider.objects.get(contact_email=self.request.user.email)
-                return LogisticsNotification.objects.filter(provider=provider)
-            except ServiceProvider.DoesNotExist:
+            provider = self.get_provider()
+            if provider is None:
                 return LogisticsNotification.objects.none()
+            return queryset.filter(provider=provider)
         else:
             # Farmers see notifications related to their requests
-            return LogisticsNotification.objects.filter(
+            return queryset.filter(
                 logistics_request__farmer=self.request.user
             )
 
@@ -583,7 +594,7 @@ class LogisticsNotificationViewSet(viewsets.ModelViewSet):
         return Response({'unread_count': unread_count})
 
 
-class LogisticsOrderViewSet(viewsets.ModelViewSet):
+class LogisticsOrderViewSet(ProviderScopedMixin, viewsets.ModelViewSet):
     """ViewSet for managing logistics orders"""
     serializer_class = LogisticsOrderSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -595,16 +606,16 @@ class LogisticsOrderViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filter orders based on user type"""
+        queryset = LogisticsOrder.objects.select_related('farmer', 'buyer')
         if self.request.user.user_type == 'logistics':
             # Logistics providers see orders assigned to them
-            try:
-                provider = ServiceProvider.objects.get(contact_email=self.request.user.email)
-                return LogisticsOrder.objects.filter(provider=provider)
-            except ServiceProvider.DoesNotExist:
-                return LogisticsOrder.objects.none()
+            provider = self.get_provider()
+            if provider is None:
+                return queryset.none()
+            return queryset.filter(provider=provider)
         else:
             # Farmers and buyers see their own orders
-            return LogisticsOrder.objects.filter(
+            return queryset.filter(
                 Q(farmer=self.request.user) | Q(buyer=self.request.user)
             )
 
@@ -634,11 +645,7 @@ class LogisticsOrderViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def status_counts(self, request):
         """Get counts by status"""
-        queryset = self.get_queryset()
-        counts = {}
-        for status, _ in LogisticsOrder.TRACKING_STATUS_CHOICES:
-            counts[status] = queryset.filter(tracking_status=status).count()
-        return Response(counts)
+        return Response(LogisticsOrderService.status_counts(self.get_queryset()))
 
     @action(detail=False, methods=['get'])
     def recent_orders(self, request):
@@ -658,7 +665,7 @@ class LogisticsOrderViewSet(viewsets.ModelViewSet):
     def active_orders(self, request):
         """Get active orders (not delivered or cancelled)"""
         queryset = self.get_queryset().exclude(
-            tracking_status__in=['delivered', 'cancelled']
+            tracking_status__in=LogisticsOrderService.CLOSED_STATUSES
         )
         serializer = LogisticsOrderSerializer(queryset, many=True)
         return Response(serializer.data)
@@ -0,0 +1,42 @@
+import logging
+import re
+
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+
+logger = logging.getLogger(__name__)
+
+
+def tracking_group_name(tracking_number):
+    """
+    Channels group for a tracking number.
+
+    Group names may only contain ASCII alphanumerics, hyphens, underscores
+    and periods, so anything else in the tracking number is replaced.
+    """
+    return f"tracking_{re.sub(r'[^A-Za-z0-9._-]', '_', tracking_number)}"[:99]
+
+
+def send_tracking_event(tracking_number, event_data):
+    """
+    Push a tracking event to every client subscribed to a tracking number
+    
+    Args:
+        tracking_number: Tracking number of the delivery
+        event_data: Dictionary containing the tracking event
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    try:
+        async_to_sync(channel_layer.group_send)(
+            tracking_group_name(tracking_number),
+            {
+                'type': 'tracking_event',
+                'event': event_data
+            }
+        )
+    except Exception as e:
+        # Subscribers can catch up through the delta endpoint
+        logger.error(f"Failed to push tracking event for {tracking_number}: {str(e)}", exc_info=True)
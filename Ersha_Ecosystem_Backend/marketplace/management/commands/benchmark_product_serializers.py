@@ -0,0 +1,99 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from marketplace.models import Product
+from marketplace.serializers import ProductSerializer, ProductListSerializer
+from marketplace.services import reserved_quantity_subquery
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compare payload size, CPU time and queries of the full and compact product serializers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100, help='Products per page (default: 100)')
+        parser.add_argument('--farmers', type=int, default=10, help='Distinct farmers (default: 10)')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed passes per serializer (default: 20)')
+        parser.add_argument('--fields', default='', help='Optional ?fields= value for the compact serializer')
+
+    def _seed(self, products, farmers):
+        owners = [
+            User.objects.create_user(
+                username=f'bench-farmer-{i}@example.com',
+                email=f'bench-farmer-{i}@example.com',
+                password=None,
+                first_name='Bench',
+                last_name=f'Farmer {i}',
+                user_type=User.UserType.FARMER,
+                region='Oromia'
+            )
+            for i in range(farmers)
+        ]
+        Product.objects.bulk_create([
+            Product(
+                farmer=owners[i % farmers],
+                name=f'Benchmark product {i}',
+                description='Freshly harvested produce from the benchmark farm. ' * 4,
+                price=50 + i,
+                quantity=100,
+                harvest_date=date.today()
+            )
+            for i in range(products)
+        ])
+        return [owner.id for owner in owners]
+
+    def _measure(self, label, build_queryset, serializer_class, request, repeat):
+        context = {'request': request}
+        # Warm-up pass, also used for payload size and query count
+        with CaptureQueriesContext(connection) as queries:
+            payload = JSONRenderer().render(serializer_class(list(build_queryset()), many=True, context=context).data)
+
+        started = time.process_time()
+        for _ in range(repeat):
+            serializer_class(list(build_queryset()), many=True, context={'request': request}).data
+        cpu_ms = (time.process_time() - started) * 1000 / repeat
+
+        self.stdout.write(
+            f'{label:<10} {len(payload):>10} bytes {cpu_ms:>10.2f} ms CPU {len(queries.captured_queries):>6} queries'
+        )
+        return len(payload), cpu_ms
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        path = '/api/products/'
+        if options['fields']:
+            path += f"?fields={options['fields']}"
+        # Serializers read query params through the DRF request wrapper
+        request = Request(factory.get(path))
+
+        results = {}
+        with transaction.atomic():
+            farmer_ids = self._seed(options['products'], options['farmers'])
+            products = Product.objects.filter(farmer_id__in=farmer_ids)
+
+            self.stdout.write(
+                f"{options['products']} products, {options['farmers']} farmers, {options['repeat']} passes"
+            )
+            results['full'] = self._measure(
+                'full', lambda: products, ProductSerializer, request, options['repeat']
+            )
+            results['compact'] = self._measure(
+                'compact',
+                lambda: products.select_related('farmer').annotate(reserved_quantity=reserved_quantity_subquery()),
+                ProductListSerializer, request, options['repeat']
+            )
+            # Leave no benchmark rows behind
+            transaction.set_rollback(True)
+
+        (full_bytes, full_cpu), (compact_bytes, compact_cpu) = results['full'], results['compact']
+        self.stdout.write(self.style.SUCCESS(
+            f'compact payload is {compact_bytes / full_bytes:.0%} of full, '
+            f'CPU {compact_cpu / full_cpu:.0%} of full'
+        ))
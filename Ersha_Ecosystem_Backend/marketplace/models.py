@@ -3,6 +3,10 @@ from django.core.validators import MinValueValidator, FileExtensionValidator
 from users.models import User
 
 
+# Order statuses whose items still hold product stock
+RESERVING_ORDER_STATUSES = ['pending', 'confirmed', 'shipped']
+
+
 class Product(models.Model):
     class UnitChoices(models.TextChoices):
         KG = 'kg', 'Kilogram'
@@ -38,12 +42,18 @@ class Product(models.Model):
         null=True,
         validators=[FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png'])]
     )
+    # Thumbnails and responsive sizes of the image (see core/images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination over the active catalog
+            models.Index(fields=['is_active', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.farmer.email}"
@@ -51,12 +61,15 @@ class Product(models.Model):
     @property
     def available_quantity(self):
         """Calculate available quantity by subtracting ordered quantities"""
-        from orders.models import OrderItem
-        ordered_quantity = OrderItem.objects.filter(
-            product=self,
-            order__status__in=['pending', 'confirmed', 'shipped']
-        ).aggregate(total=models.Sum('quantity'))['total'] or 0
-        return self.quantity - ordered_quantity
+        # Querysets may annotate reserved_quantity to avoid one query per product
+        ordered_quantity = getattr(self, 'reserved_quantity', None)
+        if ordered_quantity is None:
+            from orders.models import OrderItem
+            ordered_quantity = OrderItem.objects.filter(
+                product=self,
+                order__status__in=RESERVING_ORDER_STATUSES
+            ).aggregate(total=models.Sum('quantity'))['total']
+        return self.quantity - (ordered_quantity or 0)
 
 
 class Cart(models.Model):
@@ -76,3 +89,12 @@ class Cart(models.Model):
     @property
     def total_price(self):
         return self.quantity * self.product.price
+
+
+class CartVersion(models.Model):
+    """Per-user counter bumped on every cart change, used for conditional GETs"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='cart_version')
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} - v{self.version}"
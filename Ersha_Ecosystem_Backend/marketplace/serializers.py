@@ -1,22 +1,61 @@
 from rest_framework import serializers
 from .models import Product, Cart
+from users.models import User
 from users.serializers import UserSerializer
+from core.serializers import ImageVariantsField, SparseFieldsetsMixin
 
 
 class ProductSerializer(serializers.ModelSerializer):
     farmer = UserSerializer(read_only=True)
     available_quantity = serializers.ReadOnlyField()
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = Product
         fields = [
             'id', 'farmer', 'name', 'description', 'price', 'quantity', 
-            'unit', 'category', 'harvest_date', 'organic', 'image', 'is_active',
+            'unit', 'category', 'harvest_date', 'organic', 'image', 'image_variants', 'is_active',
             'available_quantity', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'farmer', 'created_at', 'updated_at']
 
 
+class FarmerSummarySerializer(serializers.ModelSerializer):
+    """Public farmer details embedded in catalog rows"""
+    class Meta:
+        model = User
+        fields = ['id', 'first_name', 'last_name', 'region', 'is_verified']
+        read_only_fields = fields
+
+
+class ProductListSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    """
+    Catalog representation: the product fields of ProductSerializer with a
+    compact farmer summary. Clients wanting a lighter payload pick fields
+    with ?fields=. Expects the queryset to select the farmer and annotate
+    reserved_quantity so rows cost no extra queries.
+    """
+    farmer = serializers.SerializerMethodField()
+    available_quantity = serializers.ReadOnlyField()
+    image_variants = ImageVariantsField()
+    
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'farmer', 'name', 'description', 'price', 'quantity', 'unit', 'category',
+            'harvest_date', 'organic', 'image', 'image_variants', 'is_active',
+            'available_quantity', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+    
+    def get_farmer(self, obj):
+        # Many rows share a farmer; serialize each one once per request
+        summaries = self.context.setdefault('farmer_summaries', {})
+        if obj.farmer_id not in summaries:
+            summaries[obj.farmer_id] = FarmerSummarySerializer(obj.farmer).data
+        return summaries[obj.farmer_id]
+
+
 class ProductCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
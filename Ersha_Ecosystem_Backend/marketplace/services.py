@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Cart, CartVersion, Product, RESERVING_ORDER_STATUSES
+
+
+def reserved_quantity_subquery(product_ref='pk'):
+    """Quantity of a product held by open orders, for annotating querysets"""
+    from orders.models import OrderItem
+    reserved = Subquery(
+        OrderItem.objects.filter(
+            product=OuterRef(product_ref),
+            order__status__in=RESERVING_ORDER_STATUSES
+        ).values('product').annotate(total=Sum('quantity')).values('total'),
+        output_field=DecimalField(max_digits=10, decimal_places=2)
+    )
+    # Never NULL, so Product.available_quantity can tell it was annotated
+    return Coalesce(reserved, Value(Decimal('0')), output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+class CartService:
+    """Service for reading carts in SQL and tracking per-user cart versions"""
+
+    @staticmethod
+    def get_items(user):
+        """
+        Cart items with product, farmer and available stock loaded up
+        front: one query for the cart rows and one for their products.
+        """
+        products = Product.objects.select_related('farmer').annotate(
+            reserved_quantity=reserved_quantity_subquery()
+        )
+        return Cart.objects.filter(user=user).prefetch_related(Prefetch('product', queryset=products))
+
+    @staticmethod
+    def get_totals(user):
+        totals = Cart.objects.filter(user=user).aggregate(
+            total_items=Count('id'),
+            total_price=Sum(
+                F('quantity') * F('product__price'),
+                output_field=DecimalField(max_digits=14, decimal_places=2)
+            )
+        )
+        totals['total_price'] = totals['total_price'] or Decimal('0.00')
+        return totals
+
+    @staticmethod
+    def get_version(user_id):
+        """The user's cart version; 0 until the cart first changes"""
+        version = CartVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first()
+        return version or 0
+
+    @staticmethod
+    def bump_version(user_id):
+        if not CartVersion.objects.filter(user_id=user_id).update(version=F('version') + 1):
+            _, created = CartVersion.objects.get_or_create(user_id=user_id, defaults={'version': 1})
+            if not created:
+                CartVersion.objects.filter(user_id=user_id).update(version=F('version') + 1)
+
+    @staticmethod
+    def bump_versions_for_product(product_id):
+        """Invalidate the carts holding a product whose price or stock changed"""
+        CartService.bump_versions_for_products([product_id])
+
+    @staticmethod
+    def bump_versions_for_products(product_ids):
+        """Invalidate the carts holding any of the products, e.g. when orders reserve or release them"""
+        user_ids = set(Cart.objects.filter(product_id__in=product_ids).values_list('user_id', flat=True))
+        if not user_ids:
+            return
+        CartVersion.objects.filter(user_id__in=user_ids).update(version=F('version') + 1)
+        # Carts that never changed still read as version 0; move them past it
+        CartVersion.objects.bulk_create(
+            [CartVersion(user_id=user_id, version=1) for user_id in user_ids], ignore_conflicts=True
+        )
+
+    @staticmethod
+    def etag(user_id, version):
+        return f'"cart-{user_id}-{version}"'
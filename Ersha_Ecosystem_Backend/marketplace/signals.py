@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core import images
+from .models import Cart, Product
+from .services import CartService
+
+
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def bump_cart_version(sender, instance, **kwargs):
+    """Invalidate conditional GETs of the owner's cart"""
+    CartService.bump_version(instance.user_id)
+
+
+@receiver(post_save, sender=Product)
+def bump_cart_versions_for_product(sender, instance, created, **kwargs):
+    """Cart totals depend on product price and stock"""
+    if not created:
+        CartService.bump_versions_for_product(instance.id)
+
+
+@receiver(post_save, sender='orders.OrderItem')
+@receiver(post_delete, sender='orders.OrderItem')
+def bump_cart_versions_for_reservation(sender, instance, **kwargs):
+    """Open orders reserve stock, so their items change available_quantity in other carts"""
+    CartService.bump_versions_for_product(instance.product_id)
+
+
+@receiver(post_save, sender='orders.Order')
+def bump_cart_versions_for_order_status(sender, instance, created, update_fields=None, **kwargs):
+    """A status change can reserve or release the stock of every product in the order"""
+    if created or (update_fields is not None and 'status' not in update_fields):
+        return
+    CartService.bump_versions_for_products(instance.items.values_list('product_id', flat=True))
+
+
+@receiver(post_save, sender=Product)
+def process_product_image(sender, instance, **kwargs):
+    images.schedule(instance, 'image')
+
+
+@receiver(images.image_processed, sender=Product)
+def bump_cart_versions_for_product_image(sender, pk, **kwargs):
+    """Cart rows embed the product's image URLs"""
+    CartService.bump_versions_for_product(pk)
@@ -1,12 +1,16 @@
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from .models import Product
+from .models import Product, Cart
+from orders.models import Notification, Order, OrderItem
+from decimal import Decimal
 from datetime import date, timedelta
 import tempfile
 import os
+from io import BytesIO
 from PIL import Image
 
 User = get_user_model()
@@ -267,3 +271,203 @@ class ProductAPITestCase(APITestCase):
         response = self.client.delete(f'/api/products/{self.product.id}/')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertEqual(Product.objects.count(), 1)  # Product should still exist
+
+
+@override_settings(
+    BACKGROUND_TASKS_EAGER=True,
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+)
+class CartEngineTestCase(APITestCase):
+    def setUp(self):
+        """Set up a buyer with a two-item cart"""
+        self.farmer = User.objects.create_user(
+            username='farmer@test.com',
+            email='farmer@test.com',
+            password='testpass123',
+            user_type=User.UserType.FARMER
+        )
+        self.buyer = User.objects.create_user(
+            username='buyer@test.com',
+            email='buyer@test.com',
+            password='testpass123',
+            first_name='Jane',
+            last_name='Buyer',
+            user_type=User.UserType.BUYER
+        )
+        self.tomatoes = Product.objects.create(
+            farmer=self.farmer, name='Tomatoes', description='Fresh', price=45,
+            quantity=100, harvest_date=date.today()
+        )
+        self.onions = Product.objects.create(
+            farmer=self.farmer, name='Onions', description='Red', price=30,
+            quantity=100, harvest_date=date.today()
+        )
+        Cart.objects.create(user=self.buyer, product=self.tomatoes, quantity=2)
+        Cart.objects.create(user=self.buyer, product=self.onions, quantity=3)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.buyer)
+
+    def test_summary_computes_totals_without_per_item_queries(self):
+        """Test that the summary costs a fixed number of queries"""
+        # version, totals, cart rows, products with stock
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/cart/summary/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_items'], 2)
+        self.assertEqual(response.data['total_price'], Decimal('180.00'))
+        self.assertEqual(
+            {item['product']['available_quantity'] for item in response.data['items']},
+            {Decimal('100.00')}
+        )
+
+    def test_conditional_get_until_cart_or_price_changes(self):
+        """Test that unchanged carts answer 304 and changes issue a new ETag"""
+        response = self.client.get('/api/cart/summary/')
+        etag = response['ETag']
+
+        response = self.client.get('/api/cart/summary/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.onions.price = 35
+        self.onions.save()
+        response = self.client.get('/api/cart/summary/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_price'], Decimal('195.00'))
+        self.assertNotEqual(response['ETag'], etag)
+
+        response = self.client.get('/api/cart/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        etag = response['ETag']
+
+        # Another buyer's order reserves stock, and cancelling it releases the stock
+        other = User.objects.create_user(
+            username='other@test.com', email='other@test.com', password='testpass123',
+            user_type=User.UserType.BUYER
+        )
+        order = Order.objects.create(
+            buyer=other, total_amount=Decimal('300.00'),
+            delivery_address='Bole, Addis Ababa', delivery_phone='0911000000'
+        )
+        OrderItem.objects.create(order=order, product=self.onions, quantity=10, unit_price=30)
+        response = self.client.get('/api/cart/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        order.update_status(Order.OrderStatus.CANCELLED)
+        response = self.client.get('/api/cart/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_add_to_cart_notification_runs_after_commit(self):
+        """Test that the farmer notification is deferred until the cart write commits"""
+        cabbage = Product.objects.create(
+            farmer=self.farmer, name='Cabbage', description='Green', price=20,
+            quantity=50, harvest_date=date.today()
+        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post('/api/cart/add_item/', {'product': cabbage.id, 'quantity': '4'})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertFalse(Notification.objects.filter(user=self.farmer).exists())
+
+        for callback in callbacks:
+            callback()
+        notification = Notification.objects.get(user=self.farmer)
+        self.assertEqual(notification.metadata['quantity'], 4.0)
+        self.assertIn('Cabbage', notification.title)
+
+
+class ProductListRepresentationTestCase(APITestCase):
+    def setUp(self):
+        """Set up products from two farmers"""
+        self.farmers = [
+            User.objects.create_user(
+                username=f'farmer{i}@test.com',
+                email=f'farmer{i}@test.com',
+                password='testpass123',
+                first_name='Farmer',
+                last_name=str(i),
+                user_type=User.UserType.FARMER,
+                region='Oromia'
+            )
+            for i in range(2)
+        ]
+        for i in range(6):
+            Product.objects.create(
+                farmer=self.farmers[i % 2], name=f'Product {i}', description='Fresh', price=10 + i,
+                quantity=100, harvest_date=date.today()
+            )
+        self.client = APIClient()
+
+    def test_list_uses_compact_farmer_summary(self):
+        """Test that the list costs a fixed number of queries and omits farmer profile fields"""
+        # count, page
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/products/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        product = response.data['results'][0]
+        self.assertEqual(
+            set(product['farmer']), {'id', 'first_name', 'last_name', 'region', 'is_verified'}
+        )
+        # Clients render and edit from list rows, so the product fields are all there
+        self.assertTrue({'description', 'is_active', 'updated_at'} <= set(product))
+
+    def test_sparse_fieldsets(self):
+        """Test that ?fields= trims the list payload and unknown fields are ignored"""
+        response = self.client.get('/api/products/', {'fields': 'name,price,bogus'})
+        self.assertEqual(set(response.data['results'][0]), {'name', 'price'})
+
+        response = self.client.get('/api/products/', {'fields': 'bogus'})
+        self.assertIn('farmer', response.data['results'][0])
+
+
+class ProductImagePipelineTestCase(APITestCase):
+    def setUp(self):
+        """Set up a product whose photo is a rotated JPEG carrying EXIF data"""
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name, BACKGROUND_TASKS_EAGER=True)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.media_root = media_root.name
+
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise to display
+        exif[0x010F] = 'PhoneMaker'
+        buffer = BytesIO()
+        Image.new('RGB', (800, 400), color='green').save(buffer, 'JPEG', exif=exif)
+        self.farmer = User.objects.create_user(
+            username='farmer@test.com', email='farmer@test.com', password='testpass123',
+            user_type=User.UserType.FARMER
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(
+                farmer=self.farmer, name='Teff', description='White teff', price=90, quantity=10,
+                harvest_date=date.today(), image=SimpleUploadedFile('IMG_0001.jpg', buffer.getvalue())
+            )
+        self.product.refresh_from_db()
+
+    def test_upload_is_stripped_oriented_and_resized(self):
+        """Test that variants are upright, free of EXIF and exposed with a srcset"""
+        variants = self.product.image_variants
+        self.assertEqual(self.product.image.name, variants['source'])
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'product_images', 'IMG_0001.jpg')))
+        self.assertEqual((variants['width'], variants['height']), (400, 800))
+        self.assertEqual((variants['sizes']['thumb']['width'], variants['sizes']['thumb']['height']), (80, 160))
+        # Smaller than the detail size: never upscaled
+        self.assertEqual(variants['sizes']['detail']['height'], 800)
+
+        for name in [variants['source'], variants['sizes']['list']['jpeg'], variants['sizes']['list']['webp']]:
+            with Image.open(os.path.join(self.media_root, name)) as image:
+                self.assertFalse(image.getexif())
+
+        response = self.client.get(f'/api/products/{self.product.id}/')
+        srcset = response.data['image_variants']['srcset']['webp']
+        self.assertIn('http://testserver/media/product_images/variants/', srcset)
+        self.assertTrue(srcset.endswith(' 400w'))
+
+        # Saving again without a new image does not process it again
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = 95
+            self.product.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.image_variants, variants)
@@ -9,10 +9,12 @@ from datetime import timedelta
 
 from .models import Product, Cart
 from .serializers import (
-    ProductSerializer, ProductCreateSerializer, ProductUpdateSerializer,
+    ProductSerializer, ProductListSerializer, ProductCreateSerializer, ProductUpdateSerializer,
     CartSerializer, CartCreateSerializer, CartUpdateSerializer
 )
 from core.permissions import IsFarmer, IsProductOwnerOrReadOnly, IsCartOwnerOrReadOnly
+from core.services import PlatformStatsService
+from .services import CartService, reserved_quantity_subquery
 
 
 class ProductFilter(filters.FilterSet):
@@ -35,13 +37,16 @@ class ProductViewSet(viewsets.ModelViewSet):
     filterset_class = ProductFilter
     search_fields = ['name', 'description', 'farmer__first_name', 'farmer__last_name']
     ordering_fields = ['price', 'created_at', 'harvest_date']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    cursor_ordering = ('-created_at', '-id')
     
     def get_serializer_class(self):
         if self.action == 'create':
             return ProductCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return ProductUpdateSerializer
+        elif self.action in ['list', 'my_products']:
+            return ProductListSerializer
         return ProductSerializer
     
     def get_permissions(self):
@@ -55,7 +60,9 @@ class ProductViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('farmer').annotate(
+            reserved_quantity=reserved_quantity_subquery()
+        )
         
         # Filter by search query
         search = self.request.query_params.get('search', None)
@@ -131,39 +138,19 @@ class ProductViewSet(viewsets.ModelViewSet):
         if not request.user.is_admin:
             return Response({'error': 'Admin access required'}, status=403)
         
-        from users.models import User
-        
-        total_products = Product.objects.count()
-        active_products = Product.objects.filter(is_active=True).count()
-        total_farmers = User.objects.filter(user_type=User.UserType.FARMER).count()
-        total_merchants = User.objects.filter(user_type__in=[User.UserType.BUYER, User.UserType.AGRICULTURAL_BUSINESS]).count()
-        
-        # Products by category/type
-        organic_products = Product.objects.filter(organic=True).count()
-        recent_products = Product.objects.filter(created_at__gte=timezone.now() - timedelta(days=7)).count()
-        
-        # Top farmers by product count
-        top_farmers = User.objects.filter(user_type=User.UserType.FARMER).annotate(
-            product_count=Count('products')
-        ).order_by('-product_count')[:5]
-        
-        farmer_stats = []
-        for farmer in top_farmers:
-            farmer_stats.append({
-                'name': f"{farmer.first_name} {farmer.last_name}",
-                'email': farmer.email,
-                'product_count': farmer.product_count,
-                'region': farmer.region
-            })
+        snapshot = PlatformStatsService.get_latest(fresh=PlatformStatsService.wants_fresh(request))
+        users = snapshot.stats['users']
+        marketplace = snapshot.stats['marketplace']
         
         return Response({
-            'total_products': total_products,
-            'active_products': active_products,
-            'total_farmers': total_farmers,
-            'total_merchants': total_merchants,
-            'organic_products': organic_products,
-            'recent_products': recent_products,
-            'top_farmers': farmer_stats
+            'total_products': marketplace['products'],
+            'active_products': marketplace['active_products'],
+            'total_farmers': users['farmers'],
+            'total_merchants': users['merchants'],
+            'organic_products': marketplace['organic_products'],
+            'recent_products': marketplace['recent_products'],
+            'top_farmers': marketplace['top_farmers'],
+            'last_updated': snapshot.created_at.isoformat()
         })
     
     @action(detail=False, methods=['get'])
@@ -190,7 +177,20 @@ class CartViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsCartOwnerOrReadOnly]
     
     def get_queryset(self):
-        return Cart.objects.filter(user=self.request.user)
+        return CartService.get_items(self.request.user)
+    
+    def _conditional_response(self, request, build_response):
+        """Answer 304 when the client's ETag matches the current cart version"""
+        etag = CartService.etag(request.user.id, CartService.get_version(request.user.id))
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        
+        response = build_response()
+        response['ETag'] = etag
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(request, lambda: super(CartViewSet, self).list(request, *args, **kwargs))
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -214,15 +214,15 @@ class CartViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """Get cart summary with total items and total price"""
-        cart_items = self.get_queryset()
-        total_items = cart_items.count()
-        total_price = sum(item.total_price for item in cart_items)
+        def build_summary():
+            totals = CartService.get_totals(request.user)
+            return Response({
+                'total_items': totals['total_items'],
+                'total_price': totals['total_price'],
+                'items': CartSerializer(self.get_queryset(), many=True).data
+            })
         
-        return Response({
-            'total_items': total_items,
-            'total_price': total_price,
-            'items': CartSerializer(cart_items, many=True).data
-        })
+        return self._conditional_response(request, build_summary)
     
     @action(detail=False, methods=['delete'])
     def clear(self, request):
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import NewsArticle
+from .models import NewsArticle, NewsFeed
 
 @admin.register(NewsArticle)
 class NewsArticleAdmin(admin.ModelAdmin):
@@ -7,3 +7,11 @@ class NewsArticleAdmin(admin.ModelAdmin):
     list_filter = ('category', 'featured', 'published_at')
     search_fields = ('title', 'excerpt', 'content', 'author', 'tags')
     ordering = ('-published_at',)
+
+
+@admin.register(NewsFeed)
+class NewsFeedAdmin(admin.ModelAdmin):
+    list_display = ('name', 'url', 'category', 'is_active', 'last_fetched_at')
+    list_filter = ('is_active', 'category')
+    search_fields = ('name', 'url')
+    readonly_fields = ('etag', 'last_modified', 'last_fetched_at')
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.models import NewsFeed
+from news.services import NewsIngestionService
+from news.sources import FeedError
+
+
+class Command(BaseCommand):
+    help = (
+        'Fetch the active news feeds conditionally (ETag / If-Modified-Since) and insert their new articles, '
+        'skipping items already stored by content hash or URL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--feed', action='append', help='Name of a feed to fetch (repeatable; default: all active)')
+        parser.add_argument('--path', help='Ingest a local RSS/Atom file, registering it as a feed named after the file')
+        parser.add_argument('--category', default='general', help='Category of a --path feed (default: general)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Articles per insert (default: 500)')
+
+    def handle(self, *args, **options):
+        if options['path']:
+            path = Path(options['path']).resolve()
+            if not path.is_file():
+                raise CommandError(f'No such file: {path}')
+            feed, _ = NewsFeed.objects.get_or_create(url=str(path), defaults={
+                'name': path.stem,
+                'adapter': 'news.sources.FileFeedAdapter',
+                'category': options['category'],
+            })
+            feeds = [feed]
+        else:
+            feeds = NewsFeed.objects.filter(is_active=True)
+            if options['feed']:
+                feeds = feeds.filter(name__in=options['feed'])
+            feeds = list(feeds)
+            missing = set(options['feed'] or []) - {feed.name for feed in feeds}
+            if missing:
+                raise CommandError(f"Unknown or inactive feeds: {', '.join(sorted(missing))}")
+
+        totals = {'stored': 0, 'duplicates': 0, 'failed': 0}
+        for feed in feeds:
+            try:
+                result = NewsIngestionService.fetch(feed, batch_size=options['batch_size'])
+            except (FeedError, ImportError) as e:
+                totals['failed'] += 1
+                self.stderr.write(f'{feed.name}: {e}')
+                continue
+            if result['not_modified']:
+                self.stdout.write(f'{feed.name}: not modified')
+                continue
+            for error in result['errors'][:10]:
+                self.stderr.write(f'Skipped: {error}')
+            self.stdout.write(
+                f"{feed.name}: {result['stored']} new of {result['received']} items "
+                f"({result['duplicates']} duplicates, {result['skipped']} skipped)"
+            )
+            totals['stored'] += result['stored']
+            totals['duplicates'] += result['duplicates']
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {totals['stored']} new articles from {len(feeds) - totals['failed']} of {len(feeds)} feeds "
+            f"({totals['duplicates']} duplicates)"
+        ))
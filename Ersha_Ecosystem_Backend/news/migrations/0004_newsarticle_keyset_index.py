@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_alter_newsarticle_image_url'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['-published_at', '-id'], name='news_newsar_publish_20e9b7_idx'),
+        ),
+    ]
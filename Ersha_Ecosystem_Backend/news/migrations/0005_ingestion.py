@@ -0,0 +1,63 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:08
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class AddPostgresIndex(migrations.AddIndex):
+    """AddIndex that only touches the database on PostgreSQL (GIN indexes do not exist elsewhere)"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_newsarticle_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('url', models.CharField(max_length=500, unique=True)),
+                ('adapter', models.CharField(default='news.sources.HTTPFeedAdapter', max_length=255)),
+                ('category', models.CharField(default='general', help_text='Category of items that carry none', max_length=100)),
+                ('is_active', models.BooleanField(default=True)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('last_fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='newsarticle',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='newsarticle',
+            name='source_url',
+            field=models.URLField(blank=True, db_index=True, max_length=500),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['category', '-published_at', '-id'], name='news_newsar_categor_85b6a4_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='newsarticle',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('title', 'excerpt', 'content', 'tags', 'author', 'source', config='english'), name='news_article_search_idx'),
+        ),
+    ]
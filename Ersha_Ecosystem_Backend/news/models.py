@@ -1,7 +1,31 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.utils import timezone
 import uuid
 
+from .search import SEARCH_VECTOR
+
+
+class NewsFeed(models.Model):
+    """An external feed polled by ingest_news, with the validators of its last fetch"""
+    name = models.CharField(max_length=255, unique=True)
+    # A URL for HTTP adapters, a file path for news.sources.FileFeedAdapter
+    url = models.CharField(max_length=500, unique=True)
+    adapter = models.CharField(max_length=255, default='news.sources.HTTPFeedAdapter')
+    category = models.CharField(max_length=100, default='general', help_text='Category of items that carry none')
+    is_active = models.BooleanField(default=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    last_fetched_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
 class NewsArticle(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=500)
@@ -11,8 +35,10 @@ class NewsArticle(models.Model):
     tags = models.JSONField(default=list, blank=True)
     author = models.CharField(max_length=255, blank=True)
     source = models.CharField(max_length=255, blank=True)
-    source_url = models.URLField(blank=True)
+    source_url = models.URLField(blank=True, max_length=500, db_index=True)
     image_url = models.URLField(blank=True, max_length=500)
+    # Hash of the normalized title and text; ingestion skips articles it already holds
+    content_hash = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
     featured = models.BooleanField(default=False)
     views = models.IntegerField(default=0)
     published_at = models.DateTimeField(default=timezone.now)
@@ -20,6 +46,12 @@ class NewsArticle(models.Model):
 
     class Meta:
         ordering = ["-published_at", "-created_at"]
+        indexes = [
+            models.Index(fields=['-published_at', '-id']),
+            models.Index(fields=['category', '-published_at', '-id']),
+            # Full-text search on PostgreSQL; the migration skips it elsewhere
+            GinIndex(SEARCH_VECTOR, name='news_article_search_idx'),
+        ]
 
     def __str__(self):
         return self.title
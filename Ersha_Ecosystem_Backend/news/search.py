@@ -0,0 +1,29 @@
+"""
+Full-text search over news articles.
+
+On PostgreSQL the search fields are matched as one tsvector, served by the
+GIN expression index on NewsArticle; the filter must use SEARCH_VECTOR
+unchanged for the planner to pick that index. Other databases keep the
+default icontains search.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection
+from rest_framework import filters
+
+SEARCH_CONFIG = 'english'
+SEARCH_FIELDS = ['title', 'excerpt', 'content', 'tags', 'author', 'source']
+SEARCH_VECTOR = SearchVector(*SEARCH_FIELDS, config=SEARCH_CONFIG)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """?search= as a full-text query on PostgreSQL, icontains elsewhere"""
+
+    def filter_queryset(self, request, queryset, view):
+        if connection.vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+        terms = ' '.join(self.get_search_terms(request))
+        if not terms:
+            return queryset
+        return queryset.annotate(search_vector=SEARCH_VECTOR).filter(
+            search_vector=SearchQuery(terms, config=SEARCH_CONFIG, search_type='websearch')
+        )
@@ -4,4 +4,13 @@ from .models import NewsArticle
 class NewsArticleSerializer(serializers.ModelSerializer):
     class Meta:
         model = NewsArticle
-        fields = '__all__' 
\ No newline at end of file
+        fields = '__all__' 
+
+class NewsArticleListSerializer(serializers.ModelSerializer):
+    """Article without its full text, for feeds"""
+    class Meta:
+        model = NewsArticle
+        fields = [
+            'id', 'title', 'excerpt', 'category', 'tags', 'author', 'source', 'source_url', 'image_url',
+            'featured', 'views', 'published_at',
+        ]
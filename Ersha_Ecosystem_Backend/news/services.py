@@ -0,0 +1,238 @@
+import hashlib
+import html
+import json
+import re
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.dispatch import Signal
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+from .models import NewsArticle
+from .sources import get_adapter
+
+WHITESPACE = re.compile(r'\s+')
+
+# Sent with the IDs of bulk-inserted articles, which bypass post_save
+articles_ingested = Signal()
+
+
+def _plain(text):
+    return WHITESPACE.sub(' ', html.unescape(strip_tags(text or ''))).strip()
+
+
+class NewsIngestionService:
+    """Service for loading feed items into NewsArticle without duplicates"""
+
+    EXCERPT_LENGTH = 300
+
+    @staticmethod
+    def content_hash(title, content):
+        """Hash of the title and text, insensitive to markup, case and whitespace"""
+        normalized = f'{_plain(title).lower()}\n{_plain(content).lower()}'
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    @staticmethod
+    def parse_published(value):
+        """RFC 822 (RSS) or ISO 8601 (Atom) timestamp, aware; None when unparseable"""
+        if isinstance(value, datetime):
+            published = value
+        elif not value:
+            return None
+        else:
+            try:
+                published = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                published = parse_datetime(value)
+            if published is None:
+                return None
+        if timezone.is_naive(published):
+            published = timezone.make_aware(published)
+        return published
+
+    @staticmethod
+    def normalize(item, feed):
+        """Build an unsaved NewsArticle from a feed item; raises ValueError when invalid"""
+        title = _plain(item.get('title'))[:500]
+        if not title:
+            raise ValueError(f'{feed.name}: item has no title')
+        content = item.get('content') or item.get('summary') or ''
+        if not _plain(content):
+            raise ValueError(f'{feed.name}: "{title}" has no content')
+
+        categories = [str(category).strip() for category in item.get('categories') or [] if str(category).strip()]
+        now = timezone.now()
+        published_at = NewsIngestionService.parse_published(item.get('published')) or now
+        return NewsArticle(
+            title=title,
+            content=content,
+            excerpt=Truncator(_plain(item.get('summary') or content)).chars(NewsIngestionService.EXCERPT_LENGTH),
+            # The feed's category; item categories are kept as tags
+            category=feed.category,
+            tags=categories[:10],
+            author=_plain(item.get('author'))[:255],
+            source=feed.name[:255],
+            source_url=(item.get('link') or '').strip()[:500],
+            image_url=(item.get('image_url') or '').strip()[:500],
+            content_hash=NewsIngestionService.content_hash(title, content),
+            # Items dated in the future would stay pinned to the top
+            published_at=min(published_at, now),
+            created_at=now,
+        )
+
+    @staticmethod
+    def ingest(items, feed, batch_size=500):
+        """
+        Insert the feed items that are not stored yet, in batches.
+
+        An item is a duplicate when an article with the same content hash or
+        source URL exists, or an earlier item in the run had either; only new
+        rows are inserted and existing ones are never rewritten. Returns
+        counts of received, stored, duplicate and skipped items.
+        """
+        result = {'received': 0, 'stored': 0, 'duplicates': 0, 'skipped': 0, 'errors': []}
+        batch = []
+        seen_hashes, seen_urls = set(), set()
+
+        def flush():
+            stored = NewsIngestionService._store_batch(batch)
+            result['stored'] += stored
+            result['duplicates'] += len(batch) - stored
+            batch.clear()
+
+        for item in items:
+            result['received'] += 1
+            try:
+                article = NewsIngestionService.normalize(item, feed)
+            except ValueError as e:
+                result['skipped'] += 1
+                result['errors'].append(str(e))
+                continue
+            if article.content_hash in seen_hashes or (article.source_url and article.source_url in seen_urls):
+                result['duplicates'] += 1
+                continue
+            seen_hashes.add(article.content_hash)
+            if article.source_url:
+                seen_urls.add(article.source_url)
+            batch.append(article)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        return result
+
+    @staticmethod
+    def _store_batch(articles):
+        hashes = [article.content_hash for article in articles]
+        urls = [article.source_url for article in articles if article.source_url]
+        existing_hashes, existing_urls = set(), set()
+        for content_hash, source_url in NewsArticle.objects.filter(
+            Q(content_hash__in=hashes) | Q(source_url__in=urls)
+        ).values_list('content_hash', 'source_url'):
+            existing_hashes.add(content_hash)
+            existing_urls.add(source_url)
+
+        new = [
+            article for article in articles
+            if article.content_hash not in existing_hashes
+            and not (article.source_url and article.source_url in existing_urls)
+        ]
+        if not new:
+            return 0
+        with transaction.atomic():
+            # A concurrent run may have stored the same hash since the lookup
+            NewsArticle.objects.bulk_create(new, ignore_conflicts=True)
+            transaction.on_commit(NewsFrontPageService.bump_version)
+            articles_ingested.send(sender=NewsArticle, ids=[article.pk for article in new])
+        return len(new)
+
+    @staticmethod
+    def fetch(feed, batch_size=500):
+        """
+        Fetch one feed conditionally and ingest what changed. The feed's
+        validators are only stored once its items are, so a failed run is
+        retried in full. Raises FeedError when the feed cannot be read.
+        """
+        adapter = get_adapter(feed)
+        items = adapter.fetch()
+        if items is None:
+            result = {'received': 0, 'stored': 0, 'duplicates': 0, 'skipped': 0, 'errors': [], 'not_modified': True}
+        else:
+            result = {**NewsIngestionService.ingest(items, feed, batch_size=batch_size), 'not_modified': False}
+            feed.etag = adapter.etag[:255]
+            feed.last_modified = adapter.last_modified[:64]
+        feed.last_fetched_at = timezone.now()
+        feed.save(update_fields=['etag', 'last_modified', 'last_fetched_at'])
+        return result
+
+
+class NewsFrontPageService:
+    """Service for serving the featured and latest-per-category articles from the cache"""
+
+    VERSION_KEY = 'news_front_page_version'
+    # Columns of the front page; the full text is left to the article endpoint
+    FIELDS = [
+        'id', 'title', 'excerpt', 'category', 'tags', 'author', 'source', 'source_url', 'image_url',
+        'featured', 'views', 'published_at',
+    ]
+
+    @staticmethod
+    def get_version():
+        return cache.get_or_set(NewsFrontPageService.VERSION_KEY, 1, None)
+
+    @staticmethod
+    def bump_version():
+        try:
+            cache.incr(NewsFrontPageService.VERSION_KEY)
+        except ValueError:
+            cache.set(NewsFrontPageService.VERSION_KEY, 2, None)
+
+    @staticmethod
+    def _row(article):
+        return {
+            **article,
+            'id': str(article['id']),
+            'published_at': article['published_at'].isoformat(),
+        }
+
+    @staticmethod
+    def build(featured_limit=None, per_category=None):
+        """The newest featured articles and the newest articles of each category, in two queries"""
+        featured_limit = featured_limit or getattr(settings, 'NEWS_FRONT_PAGE_FEATURED', 5)
+        per_category = per_category or getattr(settings, 'NEWS_FRONT_PAGE_PER_CATEGORY', 4)
+        fields = NewsFrontPageService.FIELDS
+
+        featured = NewsArticle.objects.filter(featured=True).order_by('-published_at', '-id').values(*fields)
+        latest = NewsArticle.objects.annotate(
+            rank=Window(RowNumber(), partition_by=F('category'), order_by=[F('published_at').desc(), F('id').desc()])
+        ).filter(rank__lte=per_category).order_by('category', 'rank').values(*fields)
+
+        categories = {}
+        for article in latest:
+            categories.setdefault(article['category'], []).append(NewsFrontPageService._row(article))
+        return {
+            'featured': [NewsFrontPageService._row(article) for article in featured[:featured_limit]],
+            'categories': categories,
+        }
+
+    @staticmethod
+    def get_response():
+        """Response body and ETag of the front page, cached per article-set version"""
+        key = f'news_front_page:{NewsFrontPageService.get_version()}'
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        body = NewsFrontPageService.build()
+        digest = hashlib.md5(json.dumps(body, sort_keys=True).encode()).hexdigest()
+        cached = (body, f'"front-page-{digest}"')
+        cache.set(key, cached, getattr(settings, 'NEWS_FRONT_PAGE_CACHE_SECONDS', 300))
+        return cached
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import NewsArticle
+from .services import NewsFrontPageService
+
+
+@receiver(post_save, sender=NewsArticle)
+@receiver(post_delete, sender=NewsArticle)
+def invalidate_front_page(sender, instance, **kwargs):
+    """Articles edited one at a time (admin, feature action, API) refresh the cached front page"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'views'}:
+        return
+    transaction.on_commit(NewsFrontPageService.bump_version)
@@ -1,3 +1,142 @@
-from django.test import TestCase
+import tempfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import NewsArticle, NewsFeed
+from .services import NewsIngestionService
+from .sources import FeedError, HTTPFeedAdapter, parse_feed
+
+ATOM_FEED = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Coffee Desk</title>
+  <entry>
+    <title>Sidama Coffee Auction Opens</title>
+    <link href="https://coffee.example.et/auction"/>
+    <id>urn:coffee:1</id>
+    <published>2026-10-01T08:00:00+03:00</published>
+    <author><name>Meron Alemu</name></author>
+    <category term="Coffee"/>
+    <summary>The first lots of the season sold above last year's prices.</summary>
+  </entry>
+  <entry>
+    <title>SIDAMA coffee auction opens</title>
+    <link href="https://mirror.example.et/auction-copy"/>
+    <id>urn:coffee:2</id>
+    <published>2026-10-01T09:00:00+03:00</published>
+    <summary><![CDATA[<p>The first lots of the season   sold above last year's prices.</p>]]></summary>
+  </entry>
+  <entry>
+    <title>Washing Stations Report Record Cherry Intake</title>
+    <link href="https://coffee.example.et/auction"/>
+    <id>urn:coffee:3</id>
+    <updated>2026-10-02T08:00:00Z</updated>
+    <summary>Intake is up a fifth on last season.</summary>
+  </entry>
+  <entry>
+    <title></title>
+    <id>urn:coffee:4</id>
+    <summary>Untitled</summary>
+  </entry>
+</feed>
+"""
+
+
+class NewsIngestionTestCase(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = Path(self.directory.name) / 'coffee.xml'
+        self.path.write_bytes(ATOM_FEED)
+        self.feed = NewsFeed.objects.create(
+            name='Coffee Desk', url=str(self.path), adapter='news.sources.FileFeedAdapter', category='market'
+        )
+
+    def test_fetch_inserts_new_items_once(self):
+        """Items repeated by content or URL are stored once, and an unchanged feed is not parsed again"""
+        result = NewsIngestionService.fetch(self.feed)
+        self.assertEqual(
+            (result['received'], result['stored'], result['duplicates'], result['skipped']), (4, 1, 2, 1)
+        )
+        article = NewsArticle.objects.get()
+        self.assertEqual((article.category, article.tags, article.author), ('market', ['Coffee'], 'Meron Alemu'))
+        self.assertEqual(article.published_at.isoformat(), '2026-10-01T05:00:00+00:00')
+
+        self.feed.refresh_from_db()
+        self.assertTrue(self.feed.last_modified)
+        self.assertTrue(NewsIngestionService.fetch(self.feed)['not_modified'])
+
+        # A changed feed is read again, but what is already stored is not inserted twice
+        self.feed.last_modified = ''
+        result = NewsIngestionService.fetch(self.feed)
+        self.assertEqual((result['stored'], result['duplicates']), (0, 3))
+
+        # The offline command reads the repository's sample feed
+        sample = Path(__file__).parent / 'data' / 'sample_feed.xml'
+        call_command('ingest_news', path=str(sample), stdout=mock.Mock(), stderr=mock.Mock())
+        self.assertEqual(NewsArticle.objects.filter(source='sample_feed').count(), 3)
+
+    def test_http_adapter_sends_stored_validators(self):
+        """The HTTP adapter asks for changes only and keeps the new validators"""
+        feed = NewsFeed(
+            name='Wire', url='https://wire.example.et/rss', etag='"v1"', last_modified='Thu, 01 Oct 2026 00:00:00 GMT'
+        )
+        with mock.patch('news.sources.requests.get') as get:
+            get.return_value = mock.Mock(status_code=304, headers={})
+            self.assertIsNone(HTTPFeedAdapter(feed).fetch())
+            headers = get.call_args.kwargs['headers']
+            self.assertEqual(headers['If-None-Match'], '"v1"')
+            self.assertEqual(headers['If-Modified-Since'], feed.last_modified)
+
+            get.return_value = mock.Mock(status_code=200, headers={'ETag': '"v2"'}, content=ATOM_FEED)
+            adapter = HTTPFeedAdapter(feed)
+            self.assertEqual(len(adapter.fetch()), 4)
+            self.assertEqual((adapter.etag, adapter.last_modified), ('"v2"', ''))
+
+    def test_feeds_with_entity_declarations_are_refused(self):
+        """Untrusted XML cannot expand entities or pull in external files"""
+        bomb = b'<?xml version="1.0"?><!DOCTYPE rss [<!ENTITY a "aaaa"><!ENTITY b "&a;&a;&a;">]><rss>&b;</rss>'
+        with self.assertRaisesMessage(FeedError, 'Unsafe feed'):
+            parse_feed(bomb)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class NewsFrontPageTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.articles = [
+            NewsArticle.objects.create(
+                title=f'{category} story {index}', content='Body', category=category, featured=index == 0
+            )
+            for category in ('market', 'policy')
+            for index in range(6)
+        ]
+
+    def test_front_page_is_cached_until_articles_change(self):
+        """Featured plus the latest per category, answered from the cache and revalidated by ETag"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get('/api/news/news/front_page/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['featured']), 2)
+        self.assertEqual(
+            {name: len(rows) for name, rows in response.data['categories'].items()}, {'market': 4, 'policy': 4}
+        )
+        self.assertNotIn('content', response.data['featured'][0])
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/news/news/front_page/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Featuring an article changes the page
+        with self.captureOnCommitCallbacks(execute=True):
+            self.articles[1].featured = True
+            self.articles[1].save()
+        response = self.client.get('/api/news/news/front_page/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['featured']), 3)
@@ -4,7 +4,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import NewsArticle
+from .search import FullTextSearchFilter
 from .serializers import NewsArticleSerializer
+from .services import NewsFrontPageService
+from core.services import PlatformStatsService
 from django.db import models
 
 # Create your views here.
@@ -13,13 +16,20 @@ class NewsArticleViewSet(viewsets.ModelViewSet):
     queryset = NewsArticle.objects.all()
     serializer_class = NewsArticleSerializer
     permission_classes = [permissions.AllowAny]  # Allow public access to news
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'featured']
     search_fields = ['title', 'excerpt', 'content', 'tags', 'author', 'source']
     ordering_fields = ['published_at', 'views', 'created_at']
-    ordering = ['-published_at']
+    ordering = ['-published_at', '-id']
+    cursor_ordering = ('-published_at', '-id')
     
-
+    @action(detail=False, methods=['get'])
+    def front_page(self, request):
+        """Featured articles and the latest of each category, cached until articles change"""
+        body, etag = NewsFrontPageService.get_response()
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return Response(body, headers={'ETag': etag})
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def approve(self, request, pk=None):
@@ -58,21 +68,13 @@ class NewsArticleViewSet(viewsets.ModelViewSet):
         if not request.user.is_admin:
             return Response({'error': 'Admin access required'}, status=403)
         
-        total_articles = NewsArticle.objects.count()
-        featured_articles = NewsArticle.objects.filter(featured=True).count()
-        verified_articles = NewsArticle.objects.filter(verified=True).count()
-        total_views = NewsArticle.objects.aggregate(total_views=models.Sum('views'))['total_views'] or 0
-        
-        # Articles by category
-        category_stats = NewsArticle.objects.values('category').annotate(
-            count=models.Count('id'),
-            total_views=models.Sum('views')
-        )
+        snapshot = PlatformStatsService.get_latest(fresh=PlatformStatsService.wants_fresh(request))
+        news = snapshot.stats['news']
         
         return Response({
-            'total_articles': total_articles,
-            'featured_articles': featured_articles,
-            'verified_articles': verified_articles,
-            'total_views': total_views,
-            'category_stats': category_stats
+            'total_articles': news['total'],
+            'featured_articles': news['featured'],
+            'total_views': news['views'],
+            'category_stats': news['categories'],
+            'last_updated': snapshot.created_at.isoformat()
         })
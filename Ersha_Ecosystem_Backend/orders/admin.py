@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Order, OrderItem, Notification
+from .models import Order, OrderItem, OrderSeller, Notification, ActivityEntry
 
 
 class OrderItemInline(admin.TabularInline):
@@ -42,6 +42,15 @@ class OrderItemAdmin(admin.ModelAdmin):
     readonly_fields = ('total_price',)
 
 
+@admin.register(OrderSeller)
+class OrderSellerAdmin(admin.ModelAdmin):
+    list_display = ('order', 'farmer', 'status', 'subtotal', 'item_count', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('farmer__email', 'buyer__email')
+    raw_id_fields = ('order', 'farmer', 'buyer')
+    readonly_fields = ('subtotal', 'item_count', 'total_quantity', 'created_at', 'delivered_at')
+
+
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ('user', 'notification_type', 'title', 'is_read', 'created_at')
@@ -49,3 +58,12 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ('user__email', 'title', 'message')
     list_editable = ('is_read',)
     readonly_fields = ('created_at',)
+
+
+@admin.register(ActivityEntry)
+class ActivityEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'activity_type', 'title', 'status', 'created_at')
+    list_filter = ('activity_type', 'created_at')
+    search_fields = ('user__email', 'title', 'source_key')
+    raw_id_fields = ('user',)
+    readonly_fields = ('created_at',)
@@ -95,3 +95,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'type': 'notification',
             'notification': notification
         }))
+    
+    # Send timeline entry to WebSocket
+    async def send_activity(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'activity',
+            'activity': event['activity']
+        }))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from orders.services import ActivityTimelineService
+
+
+class Command(BaseCommand):
+    help = 'Populate the activity timeline from existing orders, notifications and logistics orders. Safe to re-run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows per bulk write (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        written = ActivityTimelineService.backfill(batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully processed {written} timeline entries')
+        )
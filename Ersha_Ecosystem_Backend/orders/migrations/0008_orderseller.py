@@ -0,0 +1,73 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_order_sellers(apps, schema_editor):
+    """Index existing orders by seller"""
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    OrderSeller = apps.get_model('orders', 'OrderSeller')
+
+    orders = {
+        order.id: order
+        for order in Order.objects.only('id', 'buyer_id', 'status', 'created_at', 'delivered_at')
+    }
+    shares = OrderItem.objects.values('order_id', 'product__farmer_id').annotate(
+        subtotal=models.Sum(
+            models.F('quantity') * models.F('unit_price'),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        ),
+        item_count=models.Count('id'),
+        total_quantity=models.Sum('quantity'),
+    ).order_by()
+
+    sellers = []
+    for share in shares:
+        order = orders[share['order_id']]
+        sellers.append(OrderSeller(
+            order_id=order.id,
+            farmer_id=share['product__farmer_id'],
+            buyer_id=order.buyer_id,
+            status=order.status,
+            created_at=order.created_at,
+            delivered_at=order.delivered_at,
+            subtotal=share['subtotal'] or 0,
+            item_count=share['item_count'],
+            total_quantity=share['total_quantity'] or 0,
+        ))
+    OrderSeller.objects.bulk_create(sellers, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_activityentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSeller',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled'), ('returned', 'Returned'), ('refunded', 'Refunded')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('total_quantity', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('buyer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('farmer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sold_orders', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sellers', to='orders.order')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['farmer', 'status', 'created_at'], name='orders_orde_farmer__66a562_idx'), models.Index(fields=['farmer', 'created_at'], name='orders_orde_farmer__9eb8ab_idx')],
+                'constraints': [models.UniqueConstraint(fields=('order', 'farmer'), name='unique_order_seller')],
+            },
+        ),
+        migrations.RunPython(build_order_sellers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_notification_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('order_status', 'Order Status Update'), ('order_placed', 'Order Placed'), ('product_update', 'Product Update'), ('cart_added', 'Product Added to Cart'), ('system', 'System Notification'), ('weather_alert', 'Weather Alert')], max_length=20),
+        ),
+    ]
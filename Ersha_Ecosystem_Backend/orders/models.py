@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from users.models import User
 from marketplace.models import Product
 
@@ -46,6 +47,10 @@ class Order(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Product performance refreshes look up the orders saved since their last run
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         return f"Order #{self.id} - {self.buyer.email} - {self.status}"
@@ -58,13 +63,13 @@ class Order(models.Model):
         """Update order status and set appropriate timestamp"""
         self.status = new_status
         if new_status == self.OrderStatus.CONFIRMED:
-            self.confirmed_at = models.timezone.now()
+            self.confirmed_at = timezone.now()
         elif new_status == self.OrderStatus.SHIPPED:
-            self.shipped_at = models.timezone.now()
+            self.shipped_at = timezone.now()
         elif new_status == self.OrderStatus.DELIVERED:
-            self.delivered_at = models.timezone.now()
+            self.delivered_at = timezone.now()
         elif new_status == self.OrderStatus.CANCELLED:
-            self.cancelled_at = models.timezone.now()
+            self.cancelled_at = timezone.now()
         self.save()
 
 
@@ -82,6 +87,37 @@ class OrderItem(models.Model):
         return self.quantity * self.unit_price
 
 
+class OrderSeller(models.Model):
+    """
+    One row per (order, farmer) with that farmer's share of the order.
+    Maintained from OrderItem writes so seller-side queries avoid the
+    OrderItem -> Product join and DISTINCT.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='sellers')
+    farmer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sold_orders')
+    buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    # Copied from the order so seller queries never join back to it
+    status = models.CharField(max_length=20, choices=Order.OrderStatus.choices)
+    created_at = models.DateTimeField()
+    delivered_at = models.DateTimeField(blank=True, null=True)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    item_count = models.PositiveIntegerField(default=0)
+    total_quantity = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'farmer'], name='unique_order_seller'),
+        ]
+        indexes = [
+            models.Index(fields=['farmer', 'status', 'created_at']),
+            models.Index(fields=['farmer', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.order_id} - farmer {self.farmer_id} - {self.subtotal}"
+
+
 class Notification(models.Model):
     class NotificationType(models.TextChoices):
         ORDER_STATUS = 'order_status', 'Order Status Update'
@@ -89,6 +125,7 @@ class Notification(models.Model):
         PRODUCT_UPDATE = 'product_update', 'Product Update'
         CART_ADDED = 'cart_added', 'Product Added to Cart'
         SYSTEM = 'system', 'System Notification'
+        WEATHER_ALERT = 'weather_alert', 'Weather Alert'
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     notification_type = models.CharField(max_length=20, choices=NotificationType.choices)
@@ -100,6 +137,52 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.title}"
+
+
+class ActivityEntry(models.Model):
+    """Append-only per-user activity timeline backing the farmer landing feed"""
+    class ActivityType(models.TextChoices):
+        ORDER = 'order', 'Order'
+        NOTIFICATION = 'notification', 'Notification'
+        LOGISTICS = 'logistics', 'Logistics'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities')
+    activity_type = models.CharField(max_length=20, choices=ActivityType.choices)
+    # Identifies the source event, e.g. "order_12"; one entry per event and user
+    source_key = models.CharField(max_length=100)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    status = models.CharField(max_length=30, blank=True)
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'source_key'], name='unique_activity_source_per_user'),
+        ]
+        indexes = [
+            # Keyset pagination over a user's timeline
+            models.Index(fields=['user', '-created_at', '-id']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.title}"
+
+    def to_activity(self):
+        """Feed representation, matching the legacy recent activities shape"""
+        return {
+            'id': self.source_key,
+            'type': self.activity_type,
+            'title': self.title,
+            'description': self.description,
+            'timestamp': self.created_at.isoformat(),
+            'status': self.status,
+            **self.payload,
+        }
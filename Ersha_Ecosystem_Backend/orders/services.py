@@ -0,0 +1,373 @@
+import base64
+import logging
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ActivityEntry, Notification, Order, OrderItem, OrderSeller
+from .websocket_utils import send_activity_to_user, send_notification_to_farmer
+
+logger = logging.getLogger(__name__)
+
+
+class CartNotificationService:
+    """Service for notifying farmers about cart activity on their products"""
+
+    @staticmethod
+    def notify_cart_added(cart_id):
+        """Create and push the farmer's add-to-cart notification"""
+        from marketplace.models import Cart
+
+        cart_item = Cart.objects.select_related('product__farmer', 'user').filter(pk=cart_id).first()
+        if cart_item is None:
+            # Removed from the cart before the notification ran
+            return None
+
+        product = cart_item.product
+        farmer = product.farmer
+        buyer = cart_item.user
+
+        # Don't create notification if farmer is adding their own product to cart
+        if farmer == buyer:
+            return None
+
+        notification = Notification.objects.create(
+            user=farmer,
+            notification_type=Notification.NotificationType.CART_ADDED,
+            title=f"Your {product.name} was added to cart!",
+            message=f"{buyer.first_name} {buyer.last_name} added {cart_item.quantity} {product.unit} of your {product.name} to their cart.",
+            is_read=False,
+            metadata={
+                'product_id': str(product.id),
+                'product_name': product.name,
+                'buyer_id': str(buyer.id),
+                'buyer_name': f"{buyer.first_name} {buyer.last_name}",
+                'quantity': float(cart_item.quantity),
+                'unit': product.unit,
+                'cart_id': str(cart_item.id)
+            }
+        )
+
+        try:
+            # Send real-time notification via WebSocket
+            send_notification_to_farmer(
+                farmer_id=farmer.id,
+                notification_data={
+                    'id': str(notification.id),
+                    'notification_type': 'CART_ADDED',
+                    'title': notification.title,
+                    'message': notification.message,
+                    'is_read': False,
+                    'created_at': notification.created_at.isoformat(),
+                    'metadata': notification.metadata
+                }
+            )
+        except Exception as e:
+            # Don't fail the notification if WebSocket fails
+            logger.error(f"Failed to send WebSocket notification: {str(e)}", exc_info=True)
+        return notification
+
+
+class _SyncOrderSellers:
+    """on_commit callback rebuilding one order's seller rows, recognisable so it is queued once"""
+
+    def __init__(self, order_id):
+        self.order_id = order_id
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        OrderSellerService.sync_order(self.order_id)
+
+    def covers(self, order_id):
+        return not self.done and self.order_id == order_id
+
+
+class OrderSellerService:
+    """Service for maintaining the seller-side order index"""
+
+    @staticmethod
+    def schedule_sync(order_id):
+        """
+        Rebuild the order's seller rows once the current transaction
+        commits. Checkout writes every item of an order in one transaction,
+        so its rows are built once rather than after each item.
+        """
+        pending = transaction.get_connection().run_on_commit
+        if any(isinstance(func, _SyncOrderSellers) and func.covers(order_id) for _, func, _ in pending):
+            return
+        transaction.on_commit(_SyncOrderSellers(order_id))
+
+    @staticmethod
+    def sync_order(order_id):
+        """Rebuild the seller rows of one order from its current items"""
+        order = Order.objects.filter(pk=order_id).first()
+        if order is None:
+            return
+
+        shares = OrderItem.objects.filter(order_id=order_id).values('product__farmer_id').annotate(
+            subtotal=Sum(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+            item_count=Count('id'),
+            total_quantity=Sum('quantity'),
+        ).order_by()
+
+        sellers = [
+            OrderSeller(
+                order_id=order_id,
+                farmer_id=share['product__farmer_id'],
+                buyer_id=order.buyer_id,
+                status=order.status,
+                created_at=order.created_at,
+                delivered_at=order.delivered_at,
+                subtotal=share['subtotal'] or 0,
+                item_count=share['item_count'],
+                total_quantity=share['total_quantity'] or 0,
+            )
+            for share in shares
+        ]
+
+        with transaction.atomic():
+            OrderSeller.objects.filter(order_id=order_id).delete()
+            OrderSeller.objects.bulk_create(sellers)
+
+    @staticmethod
+    def sync_status(order):
+        """Copy the order's status fields onto its seller rows"""
+        OrderSeller.objects.filter(order=order).update(
+            status=order.status,
+            delivered_at=order.delivered_at
+        )
+
+    @staticmethod
+    def farmer_orders(farmer):
+        """Orders containing the farmer's products, one row per order"""
+        return Order.objects.filter(sellers__farmer=farmer)
+
+
+class ActivityTimelineService:
+    """Service for writing and reading the per-user activity timeline"""
+
+    PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+
+    @staticmethod
+    def _order_entries(order, items):
+        """One order entry per farmer whose products are in the order"""
+        items_by_farmer = defaultdict(list)
+        for item in items:
+            items_by_farmer[item.product.farmer_id].append(item)
+
+        entries = []
+        for farmer_id, farmer_items in items_by_farmer.items():
+            product_names = [item.product.name for item in farmer_items]
+            product_list = ", ".join(product_names[:3])
+            if len(product_names) > 3:
+                product_list += f" and {len(product_names) - 3} more"
+
+            entries.append(ActivityEntry(
+                user_id=farmer_id,
+                activity_type=ActivityEntry.ActivityType.ORDER,
+                source_key=f'order_{order.id}',
+                title=f'New Order #{order.id}',
+                description=f'Order received for {product_list or "your products"}',
+                status=order.status,
+                created_at=order.created_at,
+                payload={
+                    'amount': float(order.total_amount),
+                    'order_id': order.id,
+                    'notification_type': 'order_status',
+                    'logistics_provider': str(order.logistics_provider_id) if order.logistics_provider_id else None,
+                    'delivery_address': order.delivery_address,
+                    'total_weight': sum(float(item.quantity) for item in farmer_items),
+                }
+            ))
+        return entries
+
+    @staticmethod
+    def _notification_entry(notification):
+        metadata = notification.metadata or {}
+        return ActivityEntry(
+            user_id=notification.user_id,
+            activity_type=ActivityEntry.ActivityType.NOTIFICATION,
+            source_key=f'notification_{notification.id}',
+            title=notification.title,
+            description=notification.message,
+            status='read' if notification.is_read else 'unread',
+            created_at=notification.created_at,
+            payload={
+                'notification_id': notification.id,
+                'notification_type': notification.notification_type,
+                'logistics_provider': metadata.get('logistics_provider'),
+                'delivery_address': metadata.get('delivery_address'),
+                'total_weight': metadata.get('quantity'),
+            }
+        )
+
+    @staticmethod
+    def _logistics_entry(logistics_order, created_at=None):
+        return ActivityEntry(
+            user_id=logistics_order.farmer_id,
+            activity_type=ActivityEntry.ActivityType.LOGISTICS,
+            # One entry per tracking status the order passes through
+            source_key=f'logistics_order_{logistics_order.id}_{logistics_order.tracking_status}',
+            title=f'Logistics Order {logistics_order.order_number} {logistics_order.status_display}',
+            description=f'{logistics_order.product_name}: {logistics_order.pickup_location} to {logistics_order.delivery_location}',
+            status=logistics_order.tracking_status,
+            created_at=created_at or timezone.now(),
+            payload={
+                'order_id': logistics_order.order_id,
+                'logistics_order_id': str(logistics_order.id),
+                'notification_type': 'logistics',
+                'logistics_provider': str(logistics_order.provider_id),
+                'delivery_address': logistics_order.delivery_location,
+                'total_weight': float(logistics_order.weight_kg) if logistics_order.weight_kg else None,
+            }
+        )
+
+    @staticmethod
+    def _push(entry):
+        try:
+            send_activity_to_user(entry.user_id, entry.to_activity())
+        except Exception as e:
+            # Don't fail the write if WebSocket fails
+            logger.error(f"Failed to push activity {entry.source_key}: {str(e)}", exc_info=True)
+
+    @staticmethod
+    def _append(entry):
+        """Insert an entry unless its source event is already recorded, then push it after commit"""
+        try:
+            with transaction.atomic():
+                entry.save()
+        except IntegrityError:
+            return None
+        transaction.on_commit(lambda: ActivityTimelineService._push(entry))
+        return entry
+
+    @staticmethod
+    def record_order(order):
+        items = order.items.select_related('product')
+        return [
+            entry for entry in map(
+                ActivityTimelineService._append,
+                ActivityTimelineService._order_entries(order, items)
+            ) if entry
+        ]
+
+    @staticmethod
+    def record_notification(notification):
+        return ActivityTimelineService._append(ActivityTimelineService._notification_entry(notification))
+
+    @staticmethod
+    def record_notifications(notifications):
+        """Timeline entries for notifications written with bulk_create, which skips post_save"""
+        return ActivityEntry.objects.bulk_create(
+            [ActivityTimelineService._notification_entry(notification) for notification in notifications],
+            ignore_conflicts=True
+        )
+
+    @staticmethod
+    def record_logistics_order(logistics_order):
+        return ActivityTimelineService._append(ActivityTimelineService._logistics_entry(logistics_order))
+
+    @staticmethod
+    def update_order_status(order):
+        """Reflect an order's current status on its farmers' entries"""
+        farmer_ids = OrderSeller.objects.filter(order=order).values('farmer_id')
+        ActivityEntry.objects.filter(
+            user_id__in=farmer_ids, source_key=f'order_{order.id}'
+        ).update(status=order.status)
+
+    @staticmethod
+    def update_notification_status(notification):
+        ActivityEntry.objects.filter(
+            user_id=notification.user_id, source_key=f'notification_{notification.id}'
+        ).update(status='read' if notification.is_read else 'unread')
+
+    @staticmethod
+    def mark_notifications_read(user):
+        ActivityEntry.objects.filter(
+            user=user,
+            activity_type=ActivityEntry.ActivityType.NOTIFICATION,
+            status='unread'
+        ).update(status='read')
+
+    @staticmethod
+    def encode_cursor(entry):
+        value = f'{entry.created_at.isoformat()}|{entry.id}'
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Parse a cursor into (created_at, id); raises ValueError when malformed"""
+        try:
+            created_at, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+            parsed = parse_datetime(created_at)
+            entry_id = int(entry_id)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError('Invalid cursor')
+        if parsed is None:
+            raise ValueError('Invalid cursor')
+        return parsed, entry_id
+
+    @staticmethod
+    def get_page(user, cursor=None, limit=None):
+        """
+        One page of the user's timeline, newest first, read with a keyset
+        on (created_at, id). Returns (entries, next_cursor).
+        """
+        limit = min(limit or ActivityTimelineService.PAGE_SIZE, ActivityTimelineService.MAX_PAGE_SIZE)
+        entries = ActivityEntry.objects.filter(user=user)
+        if cursor:
+            created_at, entry_id = ActivityTimelineService.decode_cursor(cursor)
+            entries = entries.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=entry_id)
+            )
+
+        page = list(entries.order_by('-created_at', '-id')[:limit + 1])
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = ActivityTimelineService.encode_cursor(page[-1])
+        return page, next_cursor
+
+    @staticmethod
+    def count(user):
+        """Entries in the user's whole timeline, not just one page"""
+        return ActivityEntry.objects.filter(user=user).count()
+
+    @staticmethod
+    def backfill(batch_size=500):
+        """Populate the timeline from existing orders, notifications and logistics orders"""
+        from logistics.models import LogisticsOrder
+
+        written = 0
+        batch = []
+
+        def flush():
+            nonlocal written, batch
+            ActivityEntry.objects.bulk_create(batch, batch_size=batch_size, ignore_conflicts=True)
+            written += len(batch)
+            batch = []
+
+        orders = Order.objects.filter(items__isnull=False).distinct().prefetch_related('items__product')
+        for order in orders.iterator(chunk_size=batch_size):
+            batch.extend(ActivityTimelineService._order_entries(order, order.items.all()))
+            if len(batch) >= batch_size:
+                flush()
+
+        for notification in Notification.objects.iterator(chunk_size=batch_size):
+            batch.append(ActivityTimelineService._notification_entry(notification))
+            if len(batch) >= batch_size:
+                flush()
+
+        for logistics_order in LogisticsOrder.objects.iterator(chunk_size=batch_size):
+            batch.append(ActivityTimelineService._logistics_entry(logistics_order, logistics_order.updated_at))
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+        return written
@@ -1,3 +1,209 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from marketplace.models import Product
+from sales_analytics.services import AnalyticsCalculationService
+from .models import Order, OrderItem, OrderSeller, Notification, ActivityEntry
+from .services import ActivityTimelineService
+
+User = get_user_model()
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class ActivityTimelineTestCase(APITestCase):
+    def setUp(self):
+        """Set up a farmer with a product and a buyer"""
+        self.farmer = User.objects.create_user(
+            username='farmer@test.com',
+            email='farmer@test.com',
+            password='testpass123',
+            user_type=User.UserType.FARMER
+        )
+        self.buyer = User.objects.create_user(
+            username='buyer@test.com',
+            email='buyer@test.com',
+            password='testpass123',
+            user_type=User.UserType.BUYER
+        )
+        self.product = Product.objects.create(
+            farmer=self.farmer, name='Teff', description='White teff', price=80,
+            quantity=100, harvest_date=date.today()
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.farmer)
+
+    def _place_order(self):
+        order = Order.objects.create(
+            buyer=self.buyer, total_amount=Decimal('160.00'),
+            delivery_address='Bole, Addis Ababa', delivery_phone='0911000000'
+        )
+        OrderItem.objects.create(order=order, product=self.product, quantity=2, unit_price=80)
+        ActivityTimelineService.record_order(order)
+        return order
+
+    def test_orders_and_notifications_are_written_to_the_timeline(self):
+        """Test that the feed is read from timeline entries in one query"""
+        order = self._place_order()
+        Notification.objects.create(
+            user=self.farmer, notification_type='order_placed',
+            title='New Order Received', message='You have received a new order'
+        )
+        # Recording the same order again does not duplicate it
+        ActivityTimelineService.record_order(order)
+
+        # The page and the total
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/orders/recent-activities/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        activities = response.data['activities']
+        self.assertEqual([a['type'] for a in activities], ['notification', 'order'])
+        self.assertEqual(activities[1]['id'], f'order_{order.id}')
+        self.assertEqual(activities[1]['description'], 'Order received for Teff')
+        self.assertEqual(activities[1]['total_weight'], 2.0)
+        self.assertEqual(activities[0]['status'], 'unread')
+
+        self.client.post('/api/orders/notifications/mark_all_read/')
+        response = self.client.get('/api/orders/orders/recent_activities/')
+        self.assertEqual(response.data['activities'][0]['status'], 'read')
+
+    def test_logistics_entries_are_written_only_on_status_changes(self):
+        """Test that other logistics order saves do not try to insert an entry"""
+        from logistics.models import LogisticsOrder, ServiceProvider
+
+        provider = ServiceProvider.objects.create(name='FastFreight')
+        logistics_order = LogisticsOrder.objects.create(
+            order=self._place_order(), provider=provider, farmer=self.farmer, buyer=self.buyer,
+            product_name='Teff', quantity='2kg', pickup_location='Adama', delivery_location='Addis Ababa'
+        )
+        logistics_order = LogisticsOrder.objects.get(pk=logistics_order.pk)
+        logistics_order.provider_notes = 'Call on arrival'
+        with self.assertNumQueries(1):
+            logistics_order.save()
+
+        logistics_order.update_status('accepted')
+        self.assertEqual(
+            list(ActivityEntry.objects.filter(activity_type='logistics').order_by('id').values_list('status', flat=True)),
+            ['pending', 'accepted']
+        )
+
+    def test_keyset_pagination_walks_the_whole_timeline(self):
+        """Test that following next_cursor returns every entry exactly once"""
+        for i in range(5):
+            Notification.objects.create(
+                user=self.farmer, notification_type='system', title=f'Notice {i}', message=''
+            )
+
+        seen = []
+        params = {'limit': 2}
+        while True:
+            response = self.client.get('/api/orders/recent-activities/', params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(a['title'] for a in response.data['activities'])
+            self.assertEqual(response.data['total_count'], 5)
+            if not response.data['next_cursor']:
+                break
+            params['cursor'] = response.data['next_cursor']
+
+        self.assertEqual(seen, [f'Notice {i}' for i in reversed(range(5))])
+
+        response = self.client.get('/api/orders/recent-activities/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_new_entries_are_pushed_to_notifications_socket(self):
+        """Test that appended entries are pushed to the user's notifications group"""
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f'notifications_{self.farmer.id}', channel_name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order = self._place_order()
+
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertEqual(message['type'], 'send_activity')
+        self.assertEqual(message['activity']['order_id'], order.id)
+        self.assertEqual(ActivityEntry.objects.filter(user=self.farmer).count(), 1)
+
+
+class OrderSellerIndexTestCase(APITestCase):
+    def setUp(self):
+        """Set up two farmers sharing one order"""
+        self.buyer = User.objects.create_user(
+            username='buyer@test.com',
+            email='buyer@test.com',
+            password='testpass123',
+            user_type=User.UserType.BUYER
+        )
+        self.farmer = User.objects.create_user(
+            username='farmer@test.com',
+            email='farmer@test.com',
+            password='testpass123',
+            user_type=User.UserType.FARMER
+        )
+        self.other_farmer = User.objects.create_user(
+            username='farmer2@test.com',
+            email='farmer2@test.com',
+            password='testpass123',
+            user_type=User.UserType.FARMER
+        )
+        teff = Product.objects.create(
+            farmer=self.farmer, name='Teff', description='White teff', price=80,
+            quantity=100, harvest_date=date.today()
+        )
+        barley = Product.objects.create(
+            farmer=self.farmer, name='Barley', description='Malt barley', price=40,
+            quantity=100, harvest_date=date.today()
+        )
+        coffee = Product.objects.create(
+            farmer=self.other_farmer, name='Coffee', description='Sidamo', price=300,
+            quantity=100, harvest_date=date.today()
+        )
+        self.order = Order.objects.create(
+            buyer=self.buyer, total_amount=Decimal('1100.00'),
+            delivery_address='Bole, Addis Ababa', delivery_phone='0911000000'
+        )
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            OrderItem.objects.create(order=self.order, product=teff, quantity=5, unit_price=80)
+            OrderItem.objects.create(order=self.order, product=barley, quantity=5, unit_price=40)
+            self.coffee_item = OrderItem.objects.create(order=self.order, product=coffee, quantity=2, unit_price=300)
+        # The order's seller rows are built once, after commit
+        self.assertEqual(len(callbacks), 1)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.farmer)
+
+    def test_item_writes_maintain_per_seller_subtotals(self):
+        """Test that each farmer gets one row with their own share of the order"""
+        sellers = {s.farmer_id: s for s in OrderSeller.objects.filter(order=self.order)}
+        self.assertEqual(sellers[self.farmer.id].subtotal, Decimal('600.00'))
+        self.assertEqual(sellers[self.farmer.id].item_count, 2)
+        self.assertEqual(sellers[self.other_farmer.id].subtotal, Decimal('600.00'))
+
+        self.order.update_status(Order.OrderStatus.DELIVERED)
+        self.assertEqual(
+            set(OrderSeller.objects.filter(order=self.order).values_list('status', flat=True)),
+            {'delivered'}
+        )
+        self.assertIsNotNone(OrderSeller.objects.get(order=self.order, farmer=self.farmer).delivered_at)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.coffee_item.delete()
+        self.assertFalse(OrderSeller.objects.filter(farmer=self.other_farmer).exists())
+
+    def test_farmer_views_read_the_seller_index(self):
+        """Test that seller-facing reads count one row per order and only the farmer's share"""
+        response = self.client.get('/api/orders/orders/farmer_orders/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual(len(results), 1)
+
+        self.order.update_status(Order.OrderStatus.DELIVERED)
+        credit_score = AnalyticsCalculationService.calculate_credit_score(self.farmer)
+        self.assertEqual(credit_score.total_revenue, Decimal('600.00'))
+        self.assertEqual(credit_score.on_time_deliveries, 1)
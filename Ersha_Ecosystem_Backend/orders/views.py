@@ -9,6 +9,7 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
 from .models import Order, OrderItem, Notification
+from .services import ActivityTimelineService, OrderSellerService
 from .serializers import (
     OrderSerializer, OrderCreateSerializer, OrderStatusUpdateSerializer,
     NotificationSerializer, NotificationUpdateSerializer
@@ -18,6 +19,28 @@ from core.permissions import IsOrderOwnerOrReadOnly
 from payments.services.processor import PaymentProcessor
 
 
+def _timeline_response(request):
+    """Page through the user's activity timeline with ?cursor= and ?limit="""
+    try:
+        limit = int(request.query_params.get('limit', ActivityTimelineService.PAGE_SIZE))
+        activities, next_cursor = ActivityTimelineService.get_page(
+            request.user,
+            cursor=request.query_params.get('cursor'),
+            limit=max(limit, 1)
+        )
+    except ValueError:
+        return Response(
+            {'error': 'Invalid cursor or limit'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return Response({
+        'activities': [activity.to_activity() for activity in activities],
+        'total_count': ActivityTimelineService.count(request.user),
+        'next_cursor': next_cursor
+    })
+
+
 class OrderFilter(filters.FilterSet):
     status = filters.CharFilter()
     min_total = filters.NumberFilter(field_name="total_amount", lookup_expr='gte')
@@ -113,6 +136,8 @@ class OrderViewSet(viewsets.ModelViewSet):
                     except Product.DoesNotExist:
                         raise Exception(f"Product with id {item_data['product_id']} not found")
                 
+                ActivityTimelineService.record_order(order)
+                
                 # Create notification for farmers
                 for item in order.items.all():
                     # Prepare notification metadata
@@ -215,6 +240,8 @@ class OrderViewSet(viewsets.ModelViewSet):
                 # Clear cart
                 cart_items.delete()
                 
+                ActivityTimelineService.record_order(order)
+                
                 # Create notification for farmers
                 for item in order.items.all():
                     # Prepare notification metadata
@@ -303,6 +330,8 @@ class OrderViewSet(viewsets.ModelViewSet):
                     except Product.DoesNotExist:
                         raise Exception(f"Product with id {item_data['product_id']} not found")
                 
+                ActivityTimelineService.record_order(order)
+                
                 # Generate unique reference for payment
                 payment_reference = f"order_{order.id}_{uuid.uuid4().hex[:8]}"
                 
@@ -378,6 +407,7 @@ class OrderViewSet(viewsets.ModelViewSet):
             
             # Update status
             order.update_status(new_status)
+            ActivityTimelineService.update_order_status(order)
             
             # Create notification for buyer
             Notification.objects.create(
@@ -412,7 +442,7 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        orders = Order.objects.filter(items__product__farmer=request.user).distinct()
+        orders = OrderSellerService.farmer_orders(request.user).select_related('buyer').prefetch_related('items__product')
         page = self.paginate_queryset(orders)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -430,91 +460,15 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Get recent orders for this farmer's products
-        recent_orders = Order.objects.filter(
-            items__product__farmer=request.user
-        ).distinct().order_by('-created_at')[:10]
-        
-        # Get all recent notifications for the user
-        recent_notifications = Notification.objects.filter(
-            user=request.user
-        ).order_by('-created_at')[:20]  # Get more notifications to ensure we have enough after filtering
-        
-        # Combine and sort activities
-        activities = []
-        
-        # Add order activities
-        for order in recent_orders:
-            # Get product names for the order
-            product_names = [item.product.name for item in order.items.filter(product__farmer=request.user)]
-            product_list = ", ".join(product_names[:3])  # Show up to 3 product names
-            if len(product_names) > 3:
-                product_list += f" and {len(product_names) - 3} more"
-                
-            activities.append({
-                'id': f'order_{order.id}',
-                'type': 'order',
-                'title': f'New Order #{order.id}',
-                'description': f'Order received for {product_list or "your products"}',
-                'timestamp': order.created_at,
-                'status': order.status,
-                'amount': float(order.total_amount),
-                'order_id': order.id,
-                'notification_type': 'order_status',
-                'logistics_provider': str(order.logistics_provider.id) if order.logistics_provider else None,
-                'delivery_address': order.delivery_address,
-                'total_weight': sum(float(item.quantity) for item in order.items.filter(product__farmer=request.user))
-            })
-        
-        # Add notification activities (include all notification types)
-        for notification in recent_notifications:
-            activities.append({
-                'id': f'notification_{notification.id}',
-                'type': 'notification',
-                'title': notification.title,
-                'description': notification.message,
-                'timestamp': notification.created_at,
-                'status': 'unread' if not notification.is_read else 'read',
-                'notification_id': notification.id,
-                'notification_type': notification.notification_type,
-                'logistics_provider': notification.metadata.get('logistics_provider') if notification.metadata else None,
-                'delivery_address': notification.metadata.get('delivery_address') if notification.metadata else None,
-                'total_weight': notification.metadata.get('quantity') if notification.metadata else None
-            })
-        
-        # Sort by timestamp (most recent first)
-        activities.sort(key=lambda x: x['timestamp'], reverse=True)
-        
-        # Filter out any potential duplicates and limit to 20 items
-        seen = set()
-        unique_activities = []
-        
-        for activity in activities:
-            # Create a unique key for each activity
-            if activity['type'] == 'order':
-                key = f"order_{activity['order_id']}"
-            else:
-                key = f"notification_{activity['notification_id']}"
-                
-            if key not in seen:
-                seen.add(key)
-                unique_activities.append(activity)
-                
-                # Stop once we have 20 unique activities
-                if len(unique_activities) >= 20:
-                    break
-        
-        return Response({
-            'activities': unique_activities,
-            'total_count': len(unique_activities)
-        })
+        return _timeline_response(request)
 
 
 class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
     ordering_fields = ['created_at', 'is_read']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    cursor_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
@@ -533,6 +487,7 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     def mark_all_read(self, request):
         """Mark all notifications as read"""
         self.get_queryset().update(is_read=True)
+        ActivityTimelineService.mark_notifications_read(request.user)
         return Response({'message': 'All notifications marked as read'})
     
     @action(detail=False, methods=['get'])
@@ -552,51 +507,7 @@ def recent_activities_view(request):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    # Get recent orders for this farmer's products
-    recent_orders = Order.objects.filter(
-        items__product__farmer=request.user
-    ).distinct().order_by('-created_at')[:10]
-    
-    # Get recent notifications
-    recent_notifications = Notification.objects.filter(
-        user=request.user
-    ).order_by('-created_at')[:10]
-    
-    # Combine and sort activities
-    activities = []
-    
-    # Add order activities
-    for order in recent_orders:
-        activities.append({
-            'id': f'order_{order.id}',
-            'type': 'order',
-            'title': f'New Order #{order.id}',
-            'description': f'Order received for {order.items.count()} items',
-            'timestamp': order.created_at,
-            'status': order.status,
-            'amount': float(order.total_amount),
-            'order_id': order.id
-        })
-    
-    # Add notification activities
-    for notification in recent_notifications:
-        activities.append({
-            'id': f'notification_{notification.id}',
-            'type': 'notification',
-            'title': notification.title,
-            'description': notification.message,
-            'timestamp': notification.created_at,
-            'status': 'unread' if not notification.is_read else 'read',
-            'notification_id': notification.id
-        })
-    
-    # Sort by timestamp (most recent first)
-    activities.sort(key=lambda x: x['timestamp'], reverse=True)
-    
-    return Response({
-        'activities': activities[:20],  # Return top 20 activities
-        'total_count': len(activities)
-    })
+    return _timeline_response(request)
 
 
 @api_view(['POST'])
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.contrib.auth import get_user_model
 from orders.models import Order, Notification
+from orders.services import OrderSellerService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,9 +26,7 @@ class DebugRecentActivitiesView(APIView):
             logger.info(f"Debugging recent activities for user: {user.email} (is_farmer: {getattr(user, 'is_farmer', False)})")
             
             # Get recent orders for this farmer's products
-            recent_orders = Order.objects.filter(
-                items__product__farmer=user
-            ).distinct().order_by('-created_at')[:10]
+            recent_orders = OrderSellerService.farmer_orders(user).order_by('-created_at')[:10]
             
             logger.info(f"Found {recent_orders.count()} recent orders")
             
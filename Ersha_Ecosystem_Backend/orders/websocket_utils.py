@@ -57,3 +57,22 @@ def broadcast_notification(notification_data, group_name='notifications'):
             'notification': notification_data
         }
     )
+
+def send_activity_to_user(user_id, activity_data):
+    """
+    Push a new timeline entry to a user's notifications socket
+    
+    Args:
+        user_id: ID of the user whose timeline changed
+        activity_data: Dictionary produced by ActivityEntry.to_activity()
+    """
+    channel_layer = get_channel_layer()
+    room_name = f'notifications_{user_id}'
+    
+    async_to_sync(channel_layer.group_send)(
+        room_name,
+        {
+            'type': 'send_activity',
+            'activity': activity_data
+        }
+    )
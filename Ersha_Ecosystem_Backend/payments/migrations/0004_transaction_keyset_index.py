@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_remove_invoiceitem_invoice_delete_invoice_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['-created_at', '-id'], name='payments_tr_created_bee2c2_idx'),
+        ),
+    ]
@@ -155,6 +155,9 @@ class Transaction(models.Model):
         ordering = ['-created_at']
         verbose_name = "Transaction"
         verbose_name_plural = "Transactions"
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.transaction_id} - {self.get_transaction_type_display()} - {self.currency} {self.amount}"
@@ -111,7 +111,8 @@ class TransactionViewSet(viewsets.ModelViewSet):
     filterset_fields = ['transaction_type', 'status', 'escrow_status', 'currency', 'payment_provider']
     search_fields = ['transaction_id', 'sender_name', 'receiver_name', 'product_name', 'order_id']
     ordering_fields = ['amount', 'created_at', 'completed_at']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    cursor_ordering = ('-created_at', '-id')
     
     def get_serializer_class(self):
         if self.action == 'create':
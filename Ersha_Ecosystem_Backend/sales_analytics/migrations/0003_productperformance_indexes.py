@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0006_product_image_variants'),
+        ('sales_analytics', '0002_exportrequest_salestarget_paymentanalysis'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productperformance',
+            index=models.Index(fields=['farmer', 'date'], name='sales_analy_farmer__2848d3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productperformance',
+            index=models.Index(fields=['date'], name='sales_analy_date_c07a84_idx'),
+        ),
+    ]
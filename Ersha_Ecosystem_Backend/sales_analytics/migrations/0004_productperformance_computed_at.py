@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_analytics', '0003_productperformance_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productperformance',
+            name='computed_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
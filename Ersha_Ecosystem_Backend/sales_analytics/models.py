@@ -162,10 +162,18 @@ class ProductPerformance(models.Model):
     growth_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0.0)
     
     created_at = models.DateTimeField(default=timezone.now)
+    # Start of the materialization run that last wrote the row
+    computed_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         ordering = ['-date']
         unique_together = ['farmer', 'product', 'date']
+        indexes = [
+            # Top products of a farmer over recent days
+            models.Index(fields=['farmer', 'date']),
+            # Incremental refreshes rewrite recent days across all farmers
+            models.Index(fields=['date']),
+        ]
         verbose_name = "Product Performance"
         verbose_name_plural = "Product Performance"
 
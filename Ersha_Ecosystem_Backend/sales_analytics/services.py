@@ -1,11 +1,16 @@
-from django.db.models import Sum, Count, Avg, Q, F
+from django.db import transaction
+from django.db.models import Sum, Count, Avg, Q, F, Max, Min
+from django.db.models.functions import TruncDate
 from django.utils import timezone
-from datetime import timedelta, datetime
+from datetime import time, timedelta, datetime
 from decimal import Decimal
+from itertools import accumulate
 from users.models import User
-from orders.models import Order, OrderItem
+from orders.models import Order, OrderItem, OrderSeller
 from marketplace.models import Product
-from .models import CreditScore, LoanOffer, SalesAnalytics, MonthlyReport
+from .models import CreditScore, LoanOffer, SalesAnalytics, MonthlyReport, ProductPerformance
+
+GROWTH_LIMIT = Decimal('999.99')
 
 
 class AnalyticsCalculationService:
@@ -17,30 +22,34 @@ class AnalyticsCalculationService:
         if not user.is_farmer:
             return None
             
-        # Get user's actual performance data
-        farmer_orders = Order.objects.filter(
-            items__product__farmer=user,
+        # Get user's actual performance data (the farmer's share of each order)
+        farmer_orders = OrderSeller.objects.filter(
+            farmer=user,
             status='delivered'
         )
         
         # Base score starts at 300
         base_score = 300
         
-        # Calculate performance metrics
-        total_orders = farmer_orders.count()
-        total_revenue = farmer_orders.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.0')
+        # Calculate performance metrics in one pass
+        totals = farmer_orders.aggregate(
+            orders=Count('id'),
+            revenue=Sum('subtotal'),
+            # Assume 7 days is on-time
+            on_time=Count('id', filter=Q(delivered_at__lte=F('created_at') + timedelta(days=7))),
+            first_order_at=Min('created_at')
+        )
+        total_orders = totals['orders']
+        total_revenue = totals['revenue'] or Decimal('0.0')
         
         # Calculate payment reliability (on-time deliveries)
-        on_time_orders = farmer_orders.filter(
-            delivered_at__lte=F('created_at') + timedelta(days=7)  # Assume 7 days is on-time
-        ).count()
+        on_time_orders = totals['on_time']
         payment_reliability = (on_time_orders / total_orders * 100) if total_orders > 0 else 0
         
         # Calculate sales history (months since first order)
-        first_order = farmer_orders.order_by('created_at').first()
         sales_history_months = 0
-        if first_order:
-            months_diff = (timezone.now() - first_order.created_at).days / 30
+        if totals['first_order_at']:
+            months_diff = (timezone.now() - totals['first_order_at']).days / 30
             sales_history_months = int(months_diff)
         
         # Calculate average order value
@@ -73,7 +82,8 @@ class AnalyticsCalculationService:
         credit_score.sales_history_months = sales_history_months
         credit_score.total_revenue = total_revenue
         credit_score.on_time_deliveries = on_time_orders
-        credit_score.customer_satisfaction = customer_satisfaction
+        # Stored as a 0-5 rating; the percentage would overflow the column
+        credit_score.customer_satisfaction = round(Decimal(customer_satisfaction) / 20, 2)
         credit_score.save()
         
         return credit_score
@@ -88,9 +98,7 @@ class AnalyticsCalculationService:
         period_start = today - timedelta(days=period_days)
         
         # Get user's actual orders
-        farmer_orders = Order.objects.filter(
-            items__product__farmer=user
-        ).distinct()
+        farmer_orders = OrderSeller.objects.filter(farmer=user)
         
         # Calculate current period metrics
         current_period_orders = farmer_orders.filter(
@@ -98,9 +106,11 @@ class AnalyticsCalculationService:
             created_at__gte=period_start
         )
         
-        total_revenue = current_period_orders.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.0')
-        total_sales = current_period_orders.count()
-        avg_order_value = total_revenue / total_sales if total_sales > 0 else 0
+        current_totals = current_period_orders.aggregate(total=Sum('subtotal'), sales=Count('id'))
+        # Rounded to the columns' precision, which the dashboard serializer enforces
+        total_revenue = round(current_totals['total'] or Decimal('0.0'), 2)
+        total_sales = current_totals['sales']
+        avg_order_value = round(total_revenue / total_sales, 2) if total_sales > 0 else 0
         
         # Calculate previous period for growth comparison
         previous_period_start = period_start - timedelta(days=period_days)
@@ -110,8 +120,9 @@ class AnalyticsCalculationService:
             created_at__lt=period_start
         )
         
-        previous_revenue = previous_period_orders.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.0')
-        previous_sales = previous_period_orders.count()
+        previous_totals = previous_period_orders.aggregate(total=Sum('subtotal'), sales=Count('id'))
+        previous_revenue = previous_totals['total'] or Decimal('0.0')
+        previous_sales = previous_totals['sales']
         
         # Calculate growth rates
         revenue_growth = 0
@@ -121,14 +132,13 @@ class AnalyticsCalculationService:
         sales_growth = 0
         if previous_sales > 0:
             sales_growth = ((total_sales - previous_sales) / previous_sales) * 100
+
+        # The growth columns hold at most +/-999.99 percent
+        revenue_growth = max(-GROWTH_LIMIT, min(GROWTH_LIMIT, round(Decimal(revenue_growth), 2)))
+        sales_growth = max(-GROWTH_LIMIT, min(GROWTH_LIMIT, round(Decimal(sales_growth), 2)))
         
-        # Calculate top products
-        top_products = OrderItem.objects.filter(
-            order__in=current_period_orders
-        ).values('product__name').annotate(
-            revenue=Sum(F('quantity') * F('unit_price')),
-            sales=Sum('quantity')
-        ).order_by('-revenue')[:4]
+        # Calculate top products from the daily materialized rows
+        top_products = ProductPerformanceService.top_products(user, period_start)
         
         # Calculate monthly trends (last 5 months)
         monthly_trends = []
@@ -142,8 +152,9 @@ class AnalyticsCalculationService:
                 created_at__lt=month_end
             )
             
-            month_revenue = month_orders.aggregate(total=Sum('total_amount'))['total'] or 0
-            month_sales = month_orders.count()
+            month_totals = month_orders.aggregate(total=Sum('subtotal'), sales=Count('id'))
+            month_revenue = month_totals['total'] or 0
+            month_sales = month_totals['sales']
             
             monthly_trends.append({
                 'month': month_start.strftime('%b'),
@@ -193,16 +204,15 @@ class AnalyticsCalculationService:
             return []
         
         # Get user's actual performance
-        farmer_orders = Order.objects.filter(
-            items__product__farmer=user,
+        totals = OrderSeller.objects.filter(
+            farmer=user,
             status='delivered'
-        )
+        ).aggregate(revenue=Sum('subtotal'), first_order_at=Min('created_at'))
         
-        total_revenue = farmer_orders.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.0')
-        first_order = farmer_orders.order_by('created_at').first()
+        total_revenue = totals['revenue'] or Decimal('0.0')
         sales_history_months = 0
-        if first_order:
-            months_diff = (timezone.now() - first_order.created_at).days / 30
+        if totals['first_order_at']:
+            months_diff = (timezone.now() - totals['first_order_at']).days / 30
             sales_history_months = int(months_diff)
         
         # Get eligible loan offers
@@ -239,16 +249,17 @@ class AnalyticsCalculationService:
                 end_date = today.replace(month=today.month + 1, day=1)
         
         # Get orders for the period
-        farmer_orders = Order.objects.filter(
-            items__product__farmer=user,
+        farmer_orders = OrderSeller.objects.filter(
+            farmer=user,
             status='delivered',
             created_at__gte=start_date,
             created_at__lt=end_date
         )
         
         # Calculate report metrics
-        revenue = farmer_orders.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.0')
-        sales = farmer_orders.count()
+        totals = farmer_orders.aggregate(total=Sum('subtotal'), sales=Count('id'))
+        revenue = totals['total'] or Decimal('0.0')
+        sales = totals['sales']
         
         # Calculate profit (simplified - assume 30% margin)
         profit = revenue * Decimal('0.3')
@@ -256,9 +267,10 @@ class AnalyticsCalculationService:
         
         # Find top category
         top_category = "Mixed"
-        if farmer_orders.exists():
+        if sales:
             category_counts = OrderItem.objects.filter(
-                order__in=farmer_orders
+                order_id__in=farmer_orders.values('order_id'),
+                product__farmer=user
             ).values('product__name').annotate(
                 count=Count('id')
             ).order_by('-count')[:1]
@@ -268,13 +280,13 @@ class AnalyticsCalculationService:
         
         # Calculate growth rate (compare with previous month)
         prev_start = start_date - timedelta(days=30)
-        prev_orders = Order.objects.filter(
-            items__product__farmer=user,
+        prev_orders = OrderSeller.objects.filter(
+            farmer=user,
             status='delivered',
             created_at__gte=prev_start,
             created_at__lt=start_date
         )
-        prev_revenue = prev_orders.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.0')
+        prev_revenue = prev_orders.aggregate(total=Sum('subtotal'))['total'] or Decimal('0.0')
         
         growth_rate = 0
         if prev_revenue > 0:
@@ -308,4 +320,184 @@ class AnalyticsCalculationService:
             report.growth_rate = growth_rate
             report.save()
         
-        return report 
\ No newline at end of file
+        return report 
+
+def _rolling_sums(values, window):
+    """Sum of each position's trailing window, from one prefix-sum pass over the series"""
+    prefix = [0, *accumulate(values)]
+    return [prefix[i] - prefix[max(0, i - window)] for i in range(1, len(prefix))]
+
+
+class ProductPerformanceService:
+    """
+    Daily per-product sales, materialized into ProductPerformance.
+
+    Each run aggregates the delivered OrderItems of the refreshed days by
+    product and day in one grouped query, then derives the rolling
+    figures series by series: avg_price is the revenue-weighted price over
+    the trailing WINDOW_DAYS, growth_rate compares that window's revenue
+    with the window before it. Rows are upserted in bulk, and days whose
+    sales were cancelled lose their row.
+
+    Sales are dated by order creation but count once delivered, which can
+    be weeks later, so incremental runs pick the days to recompute from
+    the orders saved since the previous run (computed_at), whatever their
+    age.
+    """
+
+    WINDOW_DAYS = 7
+
+    @staticmethod
+    def _changed_ranges(since, end):
+        """
+        Merged (start, end) ranges of the days whose rows may have changed
+        since a run: the creation days of orders saved since then, and the
+        days after them whose rolling windows include those days.
+        """
+        tz = timezone.get_current_timezone()
+        days = sorted(
+            Order.objects.filter(updated_at__gte=since).annotate(
+                day=TruncDate('created_at', tzinfo=tz)
+            ).values_list('day', flat=True).distinct()
+        )
+        reach = timedelta(days=2 * ProductPerformanceService.WINDOW_DAYS - 1)
+        ranges = []
+        for day in days:
+            if day > end:
+                break
+            last = min(end, day + reach)
+            if ranges and day <= ranges[-1][1] + timedelta(days=1):
+                ranges[-1][1] = max(ranges[-1][1], last)
+            else:
+                ranges.append([day, last])
+        return [tuple(bounds) for bounds in ranges]
+
+    @staticmethod
+    def _daily_sales(start, end):
+        """{(farmer_id, product_id): {day: (units, revenue)}} of delivered orders created from start to end"""
+        tz = timezone.get_current_timezone()
+        rows = OrderItem.objects.filter(
+            order__status='delivered',
+            order__created_at__gte=datetime.combine(start, time.min, tzinfo=tz),
+            order__created_at__lt=datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz),
+        ).annotate(day=TruncDate('order__created_at', tzinfo=tz)).values(
+            'product__farmer_id', 'product_id', 'day'
+        ).annotate(
+            units=Sum('quantity'), revenue=Sum(F('quantity') * F('unit_price'))
+        ).order_by()
+
+        series = {}
+        for row in rows:
+            series.setdefault((row['product__farmer_id'], row['product_id']), {})[row['day']] = (
+                row['units'], row['revenue']
+            )
+        return series
+
+    @staticmethod
+    def compute(series, first_day, start, end, computed_at=None):
+        """
+        ProductPerformance rows for the days from start to end with sales.
+        `series` holds each product's daily (units, revenue) from first_day,
+        which must reach two windows before start.
+        """
+        window = ProductPerformanceService.WINDOW_DAYS
+        days = [first_day + timedelta(days=offset) for offset in range((end - first_day).days + 1)]
+        first_index = (start - first_day).days
+        zero = (Decimal('0'), Decimal('0'))
+        now = computed_at or timezone.now()
+        records = []
+        for (farmer_id, product_id), by_day in series.items():
+            # Dense arrays over the whole range, so windows are calendar days rather than rows
+            units, revenue = zip(*(by_day.get(day, zero) for day in days))
+            window_units = _rolling_sums(units, window)
+            window_revenue = _rolling_sums(revenue, window)
+            previous_revenue = [Decimal('0')] * window + window_revenue[:-window]
+
+            for i in range(first_index, len(days)):
+                if not units[i]:
+                    continue
+                growth = Decimal('0')
+                if previous_revenue[i] > 0:
+                    growth = (window_revenue[i] - previous_revenue[i]) / previous_revenue[i] * 100
+                records.append(ProductPerformance(
+                    farmer_id=farmer_id,
+                    product_id=product_id,
+                    date=days[i],
+                    units_sold=units[i],
+                    revenue=round(revenue[i], 2),
+                    avg_price=round(window_revenue[i] / window_units[i], 2),
+                    # The column holds at most +/-999.99 percent
+                    growth_rate=max(-GROWTH_LIMIT, min(GROWTH_LIMIT, round(growth, 2))),
+                    created_at=now,
+                    computed_at=now,
+                ))
+        return records
+
+    @staticmethod
+    def materialize(start=None, end=None, chunk_days=90, batch_size=1000):
+        """
+        Recompute the rows of the days from start to end (default: today),
+        chunk_days at a time. Without a start, only the days changed since
+        the previous run are recomputed (see the class docstring), or every
+        day from the first delivered order on the first run. Returns the
+        recomputed ranges and the number of rows written and deleted.
+        """
+        started_at = timezone.now()
+        end = end or timezone.localdate()
+        if start is not None:
+            ranges = [(start, end)]
+        else:
+            since = ProductPerformance.objects.aggregate(last=Max('computed_at'))['last']
+            if since is not None:
+                ranges = ProductPerformanceService._changed_ranges(since, end)
+            else:
+                first_order = OrderSeller.objects.filter(status='delivered').aggregate(first=Min('created_at'))['first']
+                ranges = [(timezone.localtime(first_order).date(), end)] if first_order else []
+
+        result = {'ranges': ranges, 'written': 0, 'deleted': 0}
+        for range_start, range_end in ranges:
+            chunk_start = range_start
+            while chunk_start <= range_end:
+                chunk_end = min(range_end, chunk_start + timedelta(days=chunk_days - 1))
+                written, deleted = ProductPerformanceService._materialize_range(
+                    chunk_start, chunk_end, batch_size, started_at
+                )
+                result['written'] += written
+                result['deleted'] += deleted
+                chunk_start = chunk_end + timedelta(days=1)
+        return result
+
+    @staticmethod
+    def _materialize_range(start, end, batch_size, computed_at):
+        first_day = start - timedelta(days=2 * ProductPerformanceService.WINDOW_DAYS - 1)
+        series = ProductPerformanceService._daily_sales(first_day, end)
+        records = ProductPerformanceService.compute(series, first_day, start, end, computed_at)
+        kept = {(record.product_id, record.date) for record in records}
+
+        with transaction.atomic():
+            stale_ids = [
+                pk for pk, product_id, day in ProductPerformance.objects.filter(
+                    date__gte=start, date__lte=end
+                ).values_list('pk', 'product_id', 'date')
+                if (product_id, day) not in kept
+            ]
+            deleted, _ = ProductPerformance.objects.filter(pk__in=stale_ids).delete()
+            ProductPerformance.objects.bulk_create(
+                records,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['farmer', 'product', 'date'],
+                update_fields=['units_sold', 'revenue', 'avg_price', 'growth_rate', 'computed_at'],
+            )
+        return len(records), deleted
+
+    @staticmethod
+    def top_products(farmer, since, limit=4):
+        """The farmer's best-selling products by revenue since a day, from the materialized rows"""
+        return [
+            # Floats: the dashboard stores these in a JSON field, which cannot hold Decimals
+            {'product__name': row['product__name'], 'revenue': float(row['revenue']), 'sales': float(row['sales'])}
+            for row in ProductPerformance.objects.filter(farmer=farmer, date__gte=since).values(
+                'product_id', 'product__name'
+            ).annotate(revenue=Sum('revenue'), sales=Sum('units_sold')).order_by('-revenue')[:limit]
+        ]
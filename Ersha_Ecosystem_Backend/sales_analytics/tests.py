@@ -1,3 +1,114 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from io import StringIO
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from marketplace.models import Product
+from orders.models import Order, OrderItem
+from .models import ProductPerformance
+from .services import ProductPerformanceService
+
+User = get_user_model()
+
+
+class ProductPerformanceTestCase(APITestCase):
+    def setUp(self):
+        """Set up a farmer with two products sold on different days"""
+        self.buyer = User.objects.create_user(
+            username='buyer@test.com', email='buyer@test.com', password='testpass123',
+            user_type=User.UserType.BUYER
+        )
+        self.farmer = User.objects.create_user(
+            username='farmer@test.com', email='farmer@test.com', password='testpass123',
+            user_type=User.UserType.FARMER
+        )
+        self.teff = Product.objects.create(
+            farmer=self.farmer, name='Teff', description='White teff', price=100,
+            quantity=100, harvest_date=date.today()
+        )
+        self.barley = Product.objects.create(
+            farmer=self.farmer, name='Barley', description='Malt barley', price=40,
+            quantity=100, harvest_date=date.today()
+        )
+        self.today = timezone.localdate()
+        self.order(self.teff, 2, 50, days_ago=10)
+        self.recent_teff = self.order(self.teff, 3, 100, days_ago=3)
+        self.order(self.barley, 5, 40, days_ago=1)
+        self.order(self.barley, 50, 40, days_ago=1, status=Order.OrderStatus.PENDING)
+
+    def order(self, product, quantity, unit_price, days_ago, status=Order.OrderStatus.DELIVERED):
+        order = Order.objects.create(
+            buyer=self.buyer, total_amount=Decimal(quantity) * unit_price,
+            delivery_address='Bole, Addis Ababa', delivery_phone='0911000000'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderItem.objects.create(order=order, product=product, quantity=quantity, unit_price=unit_price)
+        created_at = timezone.now() - timedelta(days=days_ago)
+        Order.objects.filter(pk=order.pk).update(created_at=created_at)
+        order.sellers.update(created_at=created_at)
+        if status != Order.OrderStatus.PENDING:
+            order.refresh_from_db()
+            order.update_status(status)
+        return order
+
+    def test_daily_rows_rolling_figures_and_incremental_refresh(self):
+        """Test the grouped daily rows, the rolling price and growth, and that refreshes drop cancelled sales"""
+        result = ProductPerformanceService.materialize()
+        self.assertEqual(result['written'], 3)
+        rows = {
+            (row.product_id, (self.today - row.date).days): row
+            for row in ProductPerformance.objects.filter(farmer=self.farmer)
+        }
+        self.assertEqual(set(rows), {(self.teff.id, 10), (self.teff.id, 3), (self.barley.id, 1)})
+
+        recent = rows[(self.teff.id, 3)]
+        self.assertEqual((recent.units_sold, recent.revenue), (Decimal('3.00'), Decimal('300.00')))
+        # Only the day's own sale falls in its 7-day window; the previous window had 100 of revenue
+        self.assertEqual(recent.avg_price, Decimal('100.00'))
+        self.assertEqual(recent.growth_rate, Decimal('200.00'))
+        self.assertEqual(rows[(self.teff.id, 10)].growth_rate, Decimal('0.00'))
+
+        self.client.force_authenticate(user=self.farmer)
+        response = self.client.get('/api/analytics/sales/sales_overview/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['product__name'], row['revenue']) for row in response.data['top_products']],
+            [('Teff', 400.0), ('Barley', 200.0)]
+        )
+
+        # A later run recomputes the recent days and removes the cancelled sale
+        self.recent_teff.update_status(Order.OrderStatus.CANCELLED)
+        result = ProductPerformanceService.materialize()
+        self.assertEqual(result['deleted'], 1)
+        self.assertFalse(
+            ProductPerformance.objects.filter(product=self.teff, date=self.today - timedelta(days=3)).exists()
+        )
+        self.assertEqual(ProductPerformance.objects.count(), 2)
+
+    def test_late_deliveries_are_counted_on_their_order_day(self):
+        """Test that an order delivered weeks after it was placed is picked up by the next incremental run"""
+        late = self.order(self.barley, 4, 40, days_ago=30, status=Order.OrderStatus.SHIPPED)
+        ProductPerformanceService.materialize()
+        day = self.today - timedelta(days=30)
+        self.assertFalse(ProductPerformance.objects.filter(date=day).exists())
+
+        late.update_status(Order.OrderStatus.DELIVERED)
+        result = ProductPerformanceService.materialize()
+        # Only the order's day and the rolling windows after it are recomputed
+        self.assertEqual(result['ranges'], [(day, day + timedelta(days=13))])
+        row = ProductPerformance.objects.get(product=self.barley, date=day)
+        self.assertEqual(row.revenue, Decimal('160.00'))
+
+        self.assertEqual(ProductPerformanceService.materialize()['ranges'], [])
+
+    @override_settings(SCHEDULED_JOBS=[('materialize_product_performance', 3600)])
+    def test_scheduler_materializes_top_products(self):
+        """Test that the scheduled jobs fill the table the top-products widgets read"""
+        call_command('run_scheduled_jobs', once=True, stdout=StringIO())
+        self.assertEqual(ProductPerformance.objects.count(), 3)
@@ -14,9 +14,9 @@ from .serializers import (
     FarmerDashboardSerializer, SalesOverviewSerializer, CreditOverviewSerializer,
     ReportOverviewSerializer, SalesTargetSerializer, PaymentAnalysisSerializer, ExportRequestSerializer
 )
-from .services import AnalyticsCalculationService
+from .services import AnalyticsCalculationService, ProductPerformanceService
 from users.models import User
-from orders.models import Order, OrderItem
+from orders.models import OrderItem, OrderSeller
 from marketplace.models import Product
 
 
@@ -100,45 +100,32 @@ class SalesAnalyticsViewSet(viewsets.ModelViewSet):
             last_30_days = today - timedelta(days=30)
             last_month = today - timedelta(days=60)
 
-            farmer_orders = Order.objects.filter(
-                items__product__farmer=request.user
-            ).distinct()
-
-            total_revenue = farmer_orders.filter(
+            # Current and previous 30-day windows in one pass over the seller index
+            current = Q(created_at__gte=last_30_days)
+            previous = Q(created_at__gte=last_month, created_at__lt=last_30_days)
+            totals = OrderSeller.objects.filter(
+                farmer=request.user,
                 status='delivered',
-                created_at__gte=last_30_days
-            ).aggregate(total=Sum('total_amount'))['total'] or 0
+                created_at__gte=last_month
+            ).aggregate(
+                revenue=Sum('subtotal', filter=current),
+                sales=Count('id', filter=current),
+                previous_revenue=Sum('subtotal', filter=previous)
+            )
 
-            total_sales = farmer_orders.filter(
-                status='delivered',
-                created_at__gte=last_30_days
-            ).count()
+            total_revenue = totals['revenue'] or 0
+            total_sales = totals['sales']
 
             # Calculate growth
-            current_month_revenue = farmer_orders.filter(
-                status='delivered',
-                created_at__gte=last_30_days
-            ).aggregate(total=Sum('total_amount'))['total'] or 0
-
-            previous_month_revenue = farmer_orders.filter(
-                status='delivered',
-                created_at__gte=last_month,
-                created_at__lt=last_30_days
-            ).aggregate(total=Sum('total_amount'))['total'] or 0
+            current_month_revenue = total_revenue
+            previous_month_revenue = totals['previous_revenue'] or 0
 
             revenue_growth = 0
             if previous_month_revenue > 0:
                 revenue_growth = ((current_month_revenue - previous_month_revenue) / previous_month_revenue) * 100
 
-            # Get top products
-            top_products = OrderItem.objects.filter(
-                order__in=farmer_orders,
-                order__status='delivered',
-                order__created_at__gte=last_30_days
-            ).values('product__name').annotate(
-                revenue=Sum(F('quantity') * F('unit_price')),
-                sales=Sum('quantity')
-            ).order_by('-revenue')[:4]
+            # Get top products from the daily materialized rows
+            top_products = ProductPerformanceService.top_products(request.user, last_30_days)
 
             # Find best month
             best_month = "Current Month"  # Simplified for now
@@ -340,14 +327,14 @@ class MonthlyReportViewSet(viewsets.ModelViewSet):
                 today = timezone.now().date()
                 last_30_days = today - timedelta(days=30)
 
-                farmer_orders = Order.objects.filter(
-                    items__product__farmer=request.user,
+                totals = OrderSeller.objects.filter(
+                    farmer=request.user,
                     status='delivered',
                     created_at__gte=last_30_days
-                )
+                ).aggregate(total=Sum('subtotal'), sales=Count('id'))
 
-                revenue = farmer_orders.aggregate(total=Sum('total_amount'))['total'] or 0
-                sales = farmer_orders.count()
+                revenue = totals['total'] or 0
+                sales = totals['sales']
                 profit = revenue * 0.3  # Simplified profit calculation (30% margin)
                 profit_margin = 30.0
                 top_category = "Vegetables"
@@ -375,14 +362,14 @@ class MonthlyReportViewSet(viewsets.ModelViewSet):
             today = timezone.now().date()
             last_30_days = today - timedelta(days=30)
 
-            farmer_orders = Order.objects.filter(
-                items__product__farmer=request.user,
+            totals = OrderSeller.objects.filter(
+                farmer=request.user,
                 status='delivered',
                 created_at__gte=last_30_days
-            )
+            ).aggregate(total=Sum('subtotal'), sales=Count('id'))
 
-            revenue = farmer_orders.aggregate(total=Sum('total_amount'))['total'] or 0
-            sales = farmer_orders.count()
+            revenue = totals['total'] or 0
+            sales = totals['sales']
             profit = revenue * 0.3  # Simplified profit calculation (30% margin)
             profit_margin = 30.0
             top_category = "Vegetables"
@@ -613,26 +600,26 @@ class SalesTargetViewSet(viewsets.ModelViewSet):
             today = timezone.now().date()
             last_30_days = today - timedelta(days=30)
             
-            farmer_orders = Order.objects.filter(
-                items__product__farmer=request.user,
+            farmer_orders = OrderSeller.objects.filter(
+                farmer=request.user,
                 status='delivered',
                 created_at__gte=last_30_days
             )
 
             if target.target_type == 'revenue':
-                current_value = farmer_orders.aggregate(total=Sum('total_amount'))['total'] or 0
+                current_value = farmer_orders.aggregate(total=Sum('subtotal'))['total'] or 0
             elif target.target_type == 'sales':
                 current_value = farmer_orders.count()
             elif target.target_type == 'growth':
                 # Calculate growth percentage
-                current_month_revenue = farmer_orders.aggregate(total=Sum('total_amount'))['total'] or 0
+                current_month_revenue = farmer_orders.aggregate(total=Sum('subtotal'))['total'] or 0
                 previous_month = last_30_days - timedelta(days=30)
-                previous_month_revenue = Order.objects.filter(
-                    items__product__farmer=request.user,
+                previous_month_revenue = OrderSeller.objects.filter(
+                    farmer=request.user,
                     status='delivered',
                     created_at__gte=previous_month,
                     created_at__lt=last_30_days
-                ).aggregate(total=Sum('total_amount'))['total'] or 0
+                ).aggregate(total=Sum('subtotal'))['total'] or 0
                 
                 if previous_month_revenue > 0:
                     current_value = ((current_month_revenue - previous_month_revenue) / previous_month_revenue) * 100
@@ -684,30 +671,30 @@ class PaymentAnalysisViewSet(viewsets.ModelViewSet):
             start_date = today - timedelta(days=30)
             end_date = today
 
-            # Get farmer's orders
-            farmer_orders = Order.objects.filter(
-                items__product__farmer=request.user,
+            # Get farmer's share of each order, with all payment metrics in one pass
+            totals = OrderSeller.objects.filter(
+                farmer=request.user,
                 created_at__gte=start_date,
                 created_at__lte=end_date
+            ).aggregate(
+                total_payments=Sum('subtotal', filter=Q(status='delivered')),
+                pending_payments=Sum('subtotal', filter=Q(status='pending')),
+                overdue_payments=Sum(
+                    'subtotal',
+                    filter=Q(status='pending', created_at__lt=today - timedelta(days=7))
+                ),
+                total_orders=Count('id'),
+                delivered_orders=Count('id', filter=Q(status='delivered'))
             )
 
             # Calculate payment metrics
-            total_payments = farmer_orders.filter(status='delivered').aggregate(
-                total=Sum('total_amount')
-            )['total'] or 0
-
-            pending_payments = farmer_orders.filter(status='pending').aggregate(
-                total=Sum('total_amount')
-            )['total'] or 0
-
-            overdue_payments = farmer_orders.filter(
-                status='pending',
-                created_at__lt=today - timedelta(days=7)
-            ).aggregate(total=Sum('total_amount'))['total'] or 0
+            total_payments = totals['total_payments'] or 0
+            pending_payments = totals['pending_payments'] or 0
+            overdue_payments = totals['overdue_payments'] or 0
 
             # Calculate payment reliability
-            total_orders = farmer_orders.count()
-            delivered_orders = farmer_orders.filter(status='delivered').count()
+            total_orders = totals['total_orders']
+            delivered_orders = totals['delivered_orders']
             
             if total_orders > 0:
                 payment_reliability_score = (delivered_orders / total_orders) * 100
@@ -796,27 +783,30 @@ class ExportRequestViewSet(viewsets.ModelViewSet):
                 end_date = export_request.end_date
 
             # Get data based on export type
-            farmer_orders = Order.objects.filter(
-                items__product__farmer=request.user,
+            farmer_orders = OrderSeller.objects.filter(
+                farmer=request.user,
                 created_at__gte=start_date,
                 created_at__lte=end_date
             )
 
             if export_request.export_type == 'sales_data':
-                export_data = list(farmer_orders.values(
-                    'id', 'total_amount', 'status', 'created_at'
-                ))
+                export_data = [
+                    {'id': order_id, 'total_amount': subtotal, 'status': order_status, 'created_at': created_at}
+                    for order_id, subtotal, order_status, created_at in farmer_orders.values_list(
+                        'order_id', 'subtotal', 'status', 'created_at'
+                    )
+                ]
             elif export_request.export_type == 'revenue_report':
+                totals = farmer_orders.aggregate(total=Sum('subtotal'), orders=Count('id'))
                 export_data = {
-                    'total_revenue': float(farmer_orders.aggregate(
-                        total=Sum('total_amount')
-                    )['total'] or 0),
-                    'total_orders': farmer_orders.count(),
+                    'total_revenue': float(totals['total'] or 0),
+                    'total_orders': totals['orders'],
                     'period': f"{start_date} to {end_date}"
                 }
             elif export_request.export_type == 'product_performance':
                 export_data = list(OrderItem.objects.filter(
-                    order__in=farmer_orders
+                    order_id__in=farmer_orders.values('order_id'),
+                    product__farmer=request.user
                 ).values('product__name').annotate(
                     total_sales=Sum('quantity'),
                     total_revenue=Sum(F('quantity') * F('unit_price'))
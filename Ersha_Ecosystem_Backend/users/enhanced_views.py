@@ -3,10 +3,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from django.utils import timezone
-from datetime import timedelta
-from .models import PKCESession
 from core.fayda import fayda_oidc
+from core.pkce import get_pkce_store
 import secrets
 import time
 
@@ -24,14 +22,8 @@ def enhanced_fayda_authorization_url(request):
         # Generate PKCE pair using the fayda_oidc method
         code_verifier, code_challenge = fayda_oidc.generate_pkce_pair()
         
-        # Store in database with expiration
-        expires_at = timezone.now() + timedelta(minutes=30)
-        PKCESession.objects.create(
-            user=request.user,
-            state=state,
-            code_verifier=code_verifier,
-            expires_at=expires_at
-        )
+        # Store where the callback can find it, whichever worker serves it
+        get_pkce_store().save(state, code_verifier, user=request.user)
         
         # Build authorization URL manually to use our code_challenge
         params = {
@@ -72,25 +64,11 @@ def enhanced_fayda_callback(request):
                 'error': 'Authorization code and state are required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Retrieve PKCE session from database
-        try:
-            pkce_session = PKCESession.objects.get(state=state, user=request.user)
-            
-            # Check if session is expired
-            if pkce_session.is_expired:
-                pkce_session.delete()
-                return Response({
-                    'error': 'PKCE session expired'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            code_verifier = pkce_session.code_verifier
-            
-            # Clean up the session
-            pkce_session.delete()
-            
-        except PKCESession.DoesNotExist:
+        # Retrieve the PKCE verifier; each can be consumed once
+        code_verifier = get_pkce_store().consume(state, user=request.user)
+        if not code_verifier:
             return Response({
-                'error': 'PKCE session not found'
+                'error': 'PKCE session not found or expired'
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Exchange code for tokens
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_alter_user_user_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pkcesession',
+            name='user',
+            field=models.ForeignKey(blank=True, help_text='User associated with this PKCE session', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pkce_sessions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='pkcesession',
+            index=models.Index(fields=['expires_at'], name='users_pkce__expires_1aaf1c_idx'),
+        ),
+    ]
@@ -113,6 +113,47 @@ class User(AbstractUser):
         self.save()
 
 
+class ClaimsUser(User):
+    """
+    A user known only from access token claims, used as request.user.
+    Every field outside the claims is deferred, and the first one read
+    loads the rest of the row in a single query.
+    """
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        known = {'id': user_id, 'is_active': True, **claims}
+        fields = [field.attname for field in cls._meta.concrete_fields if field.attname in known]
+        user = cls.from_db('default', fields, [known[name] for name in fields])
+        user._claimed = {name: known[name] for name in fields if name != 'id'}
+        return user
+
+    def save(self, *args, update_fields=None, **kwargs):
+        # Claimed values may be older than the row; only write those a view changed
+        claimed = getattr(self, '_claimed', {})
+        stale = {name for name, value in claimed.items() if getattr(self, name) == value}
+        if stale:
+            if update_fields is None:
+                deferred = self.get_deferred_fields()
+                update_fields = [
+                    field.attname for field in self._meta.concrete_fields
+                    if not field.primary_key and field.attname not in deferred
+                ]
+            update_fields = [name for name in update_fields if name not in stale]
+            if not update_fields:
+                return
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.issuperset(fields):
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+
 class Profile(models.Model):
     user = models.OneToOneField(
         User, 
@@ -169,6 +210,8 @@ class Profile(models.Model):
         validators=[FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png'])],
         help_text="Profile picture image file (JPG, JPEG, PNG only)"
     )
+    # Thumbnails and responsive sizes of the picture (see core/images.py)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     # Expert-specific fields
     area_of_expertise = models.CharField(
@@ -256,6 +299,8 @@ class PKCESession(models.Model):
         User, 
         on_delete=models.CASCADE,
         related_name='pkce_sessions',
+        null=True,
+        blank=True,
         help_text="User associated with this PKCE session"
     )
     state = models.CharField(
@@ -275,10 +320,12 @@ class PKCESession(models.Model):
         indexes = [
             models.Index(fields=['state']),
             models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['expires_at']),
         ]
     
     def __str__(self):
-        return f"PKCE Session for {self.user.email} - {self.state[:10]}..."
+        owner = self.user.email if self.user_id else 'anonymous'
+        return f"PKCE Session for {owner} - {self.state[:10]}..."
     
     @property
     def is_expired(self):
@@ -287,7 +334,13 @@ class PKCESession(models.Model):
         return timezone.now() > self.expires_at
     
     @classmethod
-    def cleanup_expired(cls):
-        """Remove expired PKCE sessions"""
+    def cleanup_expired(cls, batch_size=1000):
+        """Remove expired PKCE sessions in batches; returns the number removed"""
         from django.utils import timezone
-        cls.objects.filter(expires_at__lt=timezone.now()).delete()
+        expired = cls.objects.filter(expires_at__lt=timezone.now())
+        removed = 0
+        while True:
+            batch = list(expired.values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                return removed
+            removed += cls.objects.filter(pk__in=batch).delete()[0]
@@ -1,6 +1,7 @@
 import logging
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from core.serializers import ImageVariantsField
 from .models import User, Profile
 
 logger = logging.getLogger(__name__)
@@ -29,12 +30,13 @@ class UserSerializer(serializers.ModelSerializer):
 class ProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     full_location = serializers.ReadOnlyField()
+    profile_picture_variants = ImageVariantsField()
     
     class Meta:
         model = Profile
         fields = [
             'id', 'user', 'farm_size', 'farm_size_unit', 'woreda', 'kebele',
-            'business_license_number', 'business_license', 'bio', 'profile_picture', 
+            'business_license_number', 'business_license', 'bio', 'profile_picture', 'profile_picture_variants',
             'full_location', 'created_at', 'updated_at', 'area_of_expertise', 
             'certificate_of_expertise', 'coverage_areas', 'deliveries_count', 'rating'
         ]
@@ -254,6 +256,11 @@ class RegisterSerializer(serializers.ModelSerializer):
                 # Delete the user if profile validation fails
                 user.delete()
                 raise serializers.ValidationError(str(e))
+
+            if user.is_logistics:
+                # The provider record the logistics views are scoped to
+                from logistics.services import ServiceProviderService
+                ServiceProviderService.provider_for(user)
             
             return user
             
@@ -1,7 +1,10 @@
 import logging
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import User, Profile
+from core import images
+from core.authentication import STATE_FIELDS, publish_user_state
+from .models import ClaimsUser, User, Profile
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +31,7 @@ _creating_user = False
 
 
 @receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
 def save_user_profile(sender, instance, **kwargs):
     """Save the profile when user is saved"""
     global _creating_user
@@ -39,4 +43,24 @@ def save_user_profile(sender, instance, **kwargs):
     
     if hasattr(instance, 'profile'):
         logger.info(f"Saving profile for user {instance.id}")
-        instance.profile.save() 
\ No newline at end of file
+        instance.profile.save()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+def publish_token_claims(sender, instance, created, update_fields=None, **kwargs):
+    """Let tokens issued before a role, verification or ban change see it"""
+    if created or (update_fields is not None and not set(update_fields) & set(STATE_FIELDS)):
+        return
+    transaction.on_commit(lambda: publish_user_state(instance))
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=ClaimsUser)
+def revoke_token_claims(sender, instance, **kwargs):
+    transaction.on_commit(lambda: publish_user_state(instance, is_active=False))
+
+
+@receiver(post_save, sender=Profile)
+def process_profile_picture(sender, instance, **kwargs):
+    images.schedule(instance, 'profile_picture')
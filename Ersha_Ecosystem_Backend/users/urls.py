@@ -33,6 +33,7 @@ urlpatterns = [
     path('admin/login/', views.AdminLoginView.as_view(), name='admin_login'),
     path('admin/dashboard/', views.AdminDashboardView.as_view(), name='admin_dashboard'),
     path('admin/comprehensive-dashboard/', views.ComprehensiveAdminDashboardView.as_view(), name='comprehensive_admin_dashboard'),
+    path('admin/stats-history/', views.AdminStatsHistoryView.as_view(), name='admin_stats_history'),
     path('admin/', include(admin_router.urls)),
 ]
 
@@ -19,8 +19,10 @@ from .serializers import (
     RegisterSerializer, LoginSerializer, ChangePasswordSerializer,
     FaydaVerificationSerializer, VerificationStatusSerializer
 )
+from core.authentication import ClaimsRefreshToken
 from core.permissions import IsOwnerOrReadOnly
 from core.fayda import fayda_oidc
+from core.services import PlatformStatsService
 
 logger = logging.getLogger(__name__)
 
@@ -83,7 +85,7 @@ class RegisterView(APIView):
             try:
                 user = serializer.save()
                 logger.info(f"User created successfully with ID: {user.id}")
-                refresh = RefreshToken.for_user(user)
+                refresh = ClaimsRefreshToken.for_user(user)
                 return Response({
                     'user': UserSerializer(user).data,
                     'refresh': str(refresh),
@@ -147,7 +149,7 @@ class LoginView(APIView):
         serializer = LoginSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             return Response({
                 'user': UserSerializer(user).data,
                 'refresh': str(refresh),
@@ -412,7 +414,7 @@ def fayda_authorization_url(request):
         state = secrets.token_urlsafe(32)
         
         # Generate authorization URL with PKCE
-        auth_url, _ = fayda_oidc.generate_authorization_url(state=state)
+        auth_url, _ = fayda_oidc.generate_authorization_url(state=state, user=request.user)
         
         return Response({
             'authorization_url': auth_url,
@@ -502,7 +504,7 @@ def fayda_callback(request):
     
     try:
         # Complete the verification flow
-        user_data = fayda_oidc.complete_verification_flow(authorization_code, state)
+        user_data = fayda_oidc.complete_verification_flow(authorization_code, state, user=request.user)
         
         # Link Fayda data to user
         result = fayda_oidc.link_fayda_to_user(request.user, user_data)
@@ -718,23 +720,17 @@ class AdminUserViewSet(viewsets.ModelViewSet):
         if not request.user.is_admin:
             return Response({'error': 'Admin access required'}, status=403)
         
-        total_users = User.objects.count()
-        farmers = User.objects.filter(user_type=User.UserType.FARMER).count()
-        merchants = User.objects.filter(user_type=User.UserType.BUYER).count()
-        verified_users = User.objects.filter(verification_status=User.VerificationStatus.VERIFIED).count()
-        pending_users = User.objects.filter(verification_status=User.VerificationStatus.PENDING).count()
-        
-        # Recent registrations (last 30 days)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        recent_registrations = User.objects.filter(date_joined__gte=thirty_days_ago).count()
+        snapshot = PlatformStatsService.get_latest(fresh=PlatformStatsService.wants_fresh(request))
+        users = snapshot.stats['users']
         
         return Response({
-            'total_users': total_users,
-            'farmers': farmers,
-            'merchants': merchants,
-            'verified_users': verified_users,
-            'pending_users': pending_users,
-            'recent_registrations': recent_registrations
+            'total_users': users['total'],
+            'farmers': users['farmers'],
+            'merchants': users['merchants'],
+            'verified_users': users['verified'],
+            'pending_users': users['pending'],
+            'recent_registrations': users['recent_30d'],
+            'last_updated': snapshot.created_at.isoformat()
         })
 
 
@@ -747,32 +743,20 @@ class AdminDashboardView(APIView):
         if not request.user.is_admin:
             return Response({'error': 'Admin access required'}, status=403)
         
-        # User statistics
-        total_users = User.objects.count()
-        farmers = User.objects.filter(user_type=User.UserType.FARMER).count()
-        merchants = User.objects.filter(user_type=User.UserType.BUYER).count()
-        verified_users = User.objects.filter(verification_status=User.VerificationStatus.VERIFIED).count()
-        
-        # Recent activity (last 7 days)
-        seven_days_ago = timezone.now() - timedelta(days=7)
-        recent_users = User.objects.filter(date_joined__gte=seven_days_ago).count()
-        
-        # User type distribution
-        user_types = User.objects.values('user_type').annotate(count=Count('id'))
-        
-        # Verification status distribution
-        verification_statuses = User.objects.values('verification_status').annotate(count=Count('id'))
+        snapshot = PlatformStatsService.get_latest(fresh=PlatformStatsService.wants_fresh(request))
+        users = snapshot.stats['users']
         
         return Response({
             'user_stats': {
-                'total_users': total_users,
-                'farmers': farmers,
-                'merchants': merchants,
-                'verified_users': verified_users,
-                'recent_users': recent_users
+                'total_users': users['total'],
+                'farmers': users['farmers'],
+                'merchants': users['merchants'],
+                'verified_users': users['verified'],
+                'recent_users': users['recent_7d']
             },
-            'user_types': user_types,
-            'verification_statuses': verification_statuses
+            'user_types': users['by_type'],
+            'verification_statuses': users['by_verification_status'],
+            'last_updated': snapshot.created_at.isoformat()
         })
 
 
@@ -786,92 +770,60 @@ class ComprehensiveAdminDashboardView(APIView):
             return Response({'error': 'Admin access required'}, status=403)
         
         try:
-            # Import models from other apps
-            from news.models import NewsArticle
-            from logistics.models import ServiceProvider, Delivery
-            from advisory.models import Expert
-            from marketplace.models import Product
-            
-            # User statistics
-            total_users = User.objects.count()
-            farmers = User.objects.filter(user_type=User.UserType.FARMER).count()
-            merchants = User.objects.filter(user_type=User.UserType.BUYER).count()
-            verified_users = User.objects.filter(verification_status=User.VerificationStatus.VERIFIED).count()
-            pending_users = User.objects.filter(verification_status=User.VerificationStatus.PENDING).count()
-            
-            # News statistics
-            total_articles = NewsArticle.objects.count()
-            featured_articles = NewsArticle.objects.filter(featured=True).count()
-            total_news_views = NewsArticle.objects.aggregate(total_views=Sum('views'))['total_views'] or 0
-            
-            # Logistics statistics
-            total_providers = ServiceProvider.objects.count()
-            verified_providers = ServiceProvider.objects.filter(verified=True).count()
-            total_deliveries = Delivery.objects.count()
-            completed_deliveries = Delivery.objects.filter(status='delivered').count()
-            
-            # Expert statistics
-            total_experts = Expert.objects.count()
-            verified_experts = Expert.objects.filter(verified=True).count()
-            featured_experts = Expert.objects.filter(featured=True).count()
-            
-            # Marketplace statistics
-            total_products = Product.objects.count()
-            active_products = Product.objects.filter(is_active=True).count()
-            organic_products = Product.objects.filter(organic=True).count()
-            
-            # Recent activity (last 7 days)
-            seven_days_ago = timezone.now() - timedelta(days=7)
-            recent_users = User.objects.filter(date_joined__gte=seven_days_ago).count()
-            recent_articles = NewsArticle.objects.filter(created_at__gte=seven_days_ago).count()
-            recent_products = Product.objects.filter(created_at__gte=seven_days_ago).count()
+            snapshot = PlatformStatsService.get_latest(fresh=PlatformStatsService.wants_fresh(request))
+            stats = snapshot.stats
+            users = stats['users']
+            news = stats['news']
+            logistics = stats['logistics']
+            experts = stats['experts']
+            marketplace = stats['marketplace']
             
             # Platform overview
             platform_stats = {
                 'users': {
-                    'total': total_users,
-                    'farmers': farmers,
-                    'merchants': merchants,
-                    'verified': verified_users,
-                    'pending': pending_users,
-                    'recent': recent_users
+                    'total': users['total'],
+                    'farmers': users['farmers'],
+                    'merchants': users['merchants'],
+                    'verified': users['verified'],
+                    'pending': users['pending'],
+                    'recent': users['recent_7d']
                 },
                 'content': {
-                    'news_articles': total_articles,
-                    'featured_articles': featured_articles,
-                    'news_views': total_news_views,
-                    'recent_articles': recent_articles
+                    'news_articles': news['total'],
+                    'featured_articles': news['featured'],
+                    'news_views': news['views'],
+                    'recent_articles': news['recent_7d']
                 },
                 'logistics': {
-                    'providers': total_providers,
-                    'verified_providers': verified_providers,
-                    'deliveries': total_deliveries,
-                    'completed_deliveries': completed_deliveries
+                    'providers': logistics['providers'],
+                    'verified_providers': logistics['verified_providers'],
+                    'deliveries': logistics['deliveries'],
+                    'completed_deliveries': logistics['completed_deliveries']
                 },
                 'experts': {
-                    'total': total_experts,
-                    'verified': verified_experts,
-                    'featured': featured_experts
+                    'total': experts['total'],
+                    'verified': experts['verified'],
+                    'featured': experts['featured']
                 },
                 'marketplace': {
-                    'products': total_products,
-                    'active_products': active_products,
-                    'organic_products': organic_products,
-                    'recent_products': recent_products
+                    'products': marketplace['products'],
+                    'active_products': marketplace['active_products'],
+                    'organic_products': marketplace['organic_products'],
+                    'recent_products': marketplace['recent_products']
                 }
             }
             
             # Quick actions summary
             quick_actions = {
-                'pending_verifications': pending_users,
-                'unverified_providers': total_providers - verified_providers,
-                'inactive_products': total_products - active_products
+                'pending_verifications': users['pending'],
+                'unverified_providers': logistics['providers'] - logistics['verified_providers'],
+                'inactive_products': marketplace['products'] - marketplace['active_products']
             }
             
             return Response({
                 'platform_stats': platform_stats,
                 'quick_actions': quick_actions,
-                'last_updated': timezone.now().isoformat()
+                'last_updated': snapshot.created_at.isoformat()
             })
             
         except Exception as e:
@@ -882,6 +834,30 @@ class ComprehensiveAdminDashboardView(APIView):
             )
 
 
+class AdminStatsHistoryView(APIView):
+    """Stored platform stats snapshots for admin trend charts"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        """Get platform stats snapshots for the last `days` days (default 30)"""
+        if not request.user.is_admin:
+            return Response({'error': 'Admin access required'}, status=403)
+        
+        try:
+            days = min(int(request.query_params.get('days', 30)), 365)
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        snapshots = PlatformStatsService.get_history(days=days)
+        return Response({
+            'days': days,
+            'snapshots': [
+                {'created_at': snapshot.created_at.isoformat(), 'stats': snapshot.stats}
+                for snapshot in snapshots
+            ]
+        })
+
+
 class AdminLoginView(APIView):
     """Admin-specific login endpoint"""
     permission_classes = [permissions.AllowAny]
@@ -937,7 +913,7 @@ class AdminLoginView(APIView):
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             return Response({
                 'user': {
                     'id': user.id,
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import WeatherData
+from .models import DailyWeatherSummary, LatestWeather, WeatherAlert, WeatherData
 
 @admin.register(WeatherData)
 class WeatherDataAdmin(admin.ModelAdmin):
@@ -32,3 +32,28 @@ class WeatherDataAdmin(admin.ModelAdmin):
     )
     
     list_per_page = 25
+
+
+@admin.register(LatestWeather)
+class LatestWeatherAdmin(admin.ModelAdmin):
+    list_display = ['region', 'woreda', 'observed_at']
+    search_fields = ['region', 'woreda']
+    raw_id_fields = ['observation']
+    ordering = ['region', 'woreda']
+
+
+@admin.register(DailyWeatherSummary)
+class DailyWeatherSummaryAdmin(admin.ModelAdmin):
+    list_display = ['region', 'woreda', 'day', 'observation_count', 'temperature_min', 'temperature_max', 'rainfall_total']
+    list_filter = ['region', 'day']
+    search_fields = ['region', 'woreda']
+    ordering = ['-day', 'region']
+
+
+@admin.register(WeatherAlert)
+class WeatherAlertAdmin(admin.ModelAdmin):
+    list_display = ['code', 'kind', 'severity', 'region', 'woreda', 'valid_from', 'valid_until']
+    list_filter = ['kind', 'severity', 'code', 'region']
+    search_fields = ['region', 'woreda', 'code']
+    raw_id_fields = ['observation']
+    ordering = ['region', 'woreda', 'kind']
@@ -0,0 +1,175 @@
+"""
+Weather alert and recommendation rules.
+
+Each rule's ``when`` is a list of (field, lookup, value) conditions on a
+WeatherData observation, all of which must hold; ``unless`` conditions
+must all fail. The same definition compiles to a queryset filter, used to
+evaluate a rule over every location in one query, and to a Python check
+for single observations. Payload strings may use {region} and {woreda}.
+"""
+import operator
+
+from django.db.models import Q
+
+ALERT = 'alert'
+RECOMMENDATION = 'recommendation'
+
+RULES = [
+    {
+        'code': 'heat_wave',
+        'kind': ALERT,
+        'severity': 'high',
+        'when': [('temperature', 'gt', 35)],
+        'payload': {
+            'type': 'warning',
+            'title': 'Heat Wave Alert',
+            'message': 'Extreme heat conditions. Increase irrigation and provide crop shade.',
+            'actions': ['Increase watering frequency', 'Provide shade covers', 'Monitor crop stress'],
+        },
+    },
+    {
+        'code': 'high_temperature',
+        'kind': ALERT,
+        'severity': 'medium',
+        'when': [('temperature', 'gt', 30), ('temperature', 'lte', 35)],
+        'payload': {
+            'type': 'caution',
+            'title': 'High Temperature',
+            'message': 'Increase watering frequency and monitor for heat stress.',
+            'actions': ['Increase irrigation', 'Monitor crop stress', 'Provide shade'],
+        },
+    },
+    {
+        'code': 'high_humidity',
+        'kind': ALERT,
+        'severity': 'medium',
+        'when': [('humidity', 'gt', 80)],
+        'payload': {
+            'type': 'info',
+            'title': 'High Humidity',
+            'message': 'Increased risk of fungal diseases. Monitor crops closely.',
+            'actions': ['Apply fungicide if needed', 'Improve air circulation', 'Reduce watering'],
+        },
+    },
+    {
+        'code': 'strong_winds',
+        'kind': ALERT,
+        'severity': 'medium',
+        'when': [('wind_speed', 'gt', 10)],
+        'payload': {
+            'type': 'caution',
+            'title': 'Strong Winds',
+            'message': 'Protect tall crops and seedlings from wind damage.',
+            'actions': ['Install windbreaks', 'Stake tall plants', 'Harvest ripe crops'],
+        },
+    },
+    # Low-severity notices, previously generated on the fly when no other alerts existed
+    {
+        'code': 'rain_expected',
+        'kind': ALERT,
+        'severity': 'low',
+        'when': [('rainfall', 'gt', 5)],
+        'payload': {
+            'type': 'info',
+            'title': 'Rain Expected',
+            'message': 'Rain expected in {region}: Prepare for wet conditions!',
+            'actions': [],
+        },
+    },
+    {
+        'code': 'dry_conditions',
+        'kind': ALERT,
+        'severity': 'low',
+        'when': [('rainfall', 'lte', 0), ('temperature', 'gt', 20)],
+        'payload': {
+            'type': 'info',
+            'title': 'Dry Conditions',
+            'message': 'Dry conditions in {region}: Consider irrigation for crops!',
+            'actions': [],
+        },
+    },
+    {
+        'code': 'harvest_before_rain',
+        'kind': RECOMMENDATION,
+        'severity': 'high',
+        'when': [('weather_condition', 'icontains', 'rain')],
+        'payload': {
+            'priority': 'high',
+            'activity': 'Harvesting',
+            'description': 'Complete harvesting before heavy rains',
+            'timeFrame': 'Next 24 hours',
+        },
+    },
+    {
+        'code': 'planting_window',
+        'kind': RECOMMENDATION,
+        'severity': 'medium',
+        'when': [('temperature', 'gt', 25), ('temperature', 'lt', 30)],
+        'unless': [('weather_condition', 'icontains', 'rain')],
+        'payload': {
+            'priority': 'medium',
+            'activity': 'Planting',
+            'description': 'Optimal conditions for planting new crops',
+            'timeFrame': 'This week',
+        },
+    },
+    {
+        'code': 'soil_preparation',
+        'kind': RECOMMENDATION,
+        'severity': 'low',
+        'when': [],
+        'payload': {
+            'priority': 'low',
+            'activity': 'Soil Preparation',
+            'description': 'Prepare soil for upcoming planting season',
+            'timeFrame': 'Next 2 weeks',
+        },
+    },
+]
+
+_OPERATORS = {
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'icontains': lambda value, expected: expected.lower() in value.lower(),
+}
+
+
+def rule_filter(rule):
+    """Queryset filter selecting the observations a rule applies to"""
+    condition = Q(**{f'{field}__{lookup}': value for field, lookup, value in rule['when']})
+    for field, lookup, value in rule.get('unless', []):
+        condition &= ~Q(**{f'{field}__{lookup}': value})
+    return condition
+
+
+def _holds(observation, field, lookup, expected):
+    value = getattr(observation, field)
+    # Unmeasured values never satisfy a condition, as in SQL
+    return value not in (None, '') and _OPERATORS[lookup](value, expected)
+
+
+def rule_matches(rule, observation):
+    """Python equivalent of rule_filter for a single observation"""
+    return (
+        all(_holds(observation, *condition) for condition in rule['when'])
+        and not any(_holds(observation, *condition) for condition in rule.get('unless', []))
+    )
+
+
+def render(rule, region, woreda=''):
+    """The rule's payload with location placeholders filled in"""
+    return {
+        key: value.format(region=region or 'Unknown', woreda=woreda) if isinstance(value, str) else value
+        for key, value in rule['payload'].items()
+    }
+
+
+def evaluate(observation, kind):
+    """Payloads of every rule of a kind that applies to the observation"""
+    return [
+        render(rule, observation.region, observation.woreda)
+        for rule in RULES
+        if rule['kind'] == kind and rule_matches(rule, observation)
+    ]
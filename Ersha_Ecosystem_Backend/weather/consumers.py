@@ -0,0 +1,125 @@
+import json
+import logging
+from urllib.parse import parse_qs
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.exceptions import TokenError
+
+from .alerts import ALERT
+from .services import WeatherAlertPushService, WeatherAlertService
+from .websocket_utils import region_group_name
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+class WeatherAlertConsumer(AsyncWebsocketConsumer):
+    """
+    Live weather alerts for one region.
+
+    Connect to ws/weather/alerts/?token=<access> to follow the user's own
+    region and woreda, or pass ?region=<name>&woreda=<name> (no token
+    needed). The currently valid alerts are sent on connect, then new ones
+    as they are generated. Send {"type": "ping"} periodically to stay
+    marked online; users who are not connected get a stored notification.
+    """
+
+    async def connect(self):
+        self.user_id = None
+        self.room_group_name = None
+
+        params = parse_qs(self.scope.get('query_string', b'').decode('utf-8'))
+        token = params.get('token', [None])[0]
+        region = params.get('region', [None])[0]
+        woreda = params.get('woreda', [None])[0]
+
+        if token:
+            try:
+                access_token = AccessToken(token)
+                location = await self.get_user_location(access_token['user_id'])
+                if location is None:
+                    raise Exception('User not found')
+            except (TokenError, Exception) as e:
+                logger.warning(f'Weather WebSocket connection error: {str(e)}')
+                await self.close(code=4001)  # Unauthorized
+                return
+            self.user_id = access_token['user_id']
+            region = region or location[0]
+            woreda = woreda or location[1]
+
+        if not region:
+            await self.close(code=4000)  # No region to follow
+            return
+
+        self.region = region
+        self.woreda = (woreda or '').strip().lower()
+        self.room_group_name = region_group_name(region)
+        await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+        await self.accept()
+
+        await self.set_online(True)
+        snapshot = await self.get_active_alerts()
+        await self.send(text_data=json.dumps({'type': 'weather_alerts_snapshot', 'alerts': snapshot}))
+
+    @database_sync_to_async
+    def get_user_location(self, user_id):
+        user = User.objects.filter(id=user_id, is_active=True).select_related('profile').only(
+            'region', 'profile__woreda'
+        ).first()
+        if user is None:
+            return None
+        profile = getattr(user, 'profile', None)
+        return user.region, profile.woreda if profile else None
+
+    @database_sync_to_async
+    def get_active_alerts(self):
+        return [
+            alert.to_dict() for alert in WeatherAlertService.active(ALERT, region=self.region)
+            if self.follows(alert.woreda)
+        ]
+
+    @database_sync_to_async
+    def set_online(self, online):
+        """Count this connection in the user's presence; only connect and disconnect call this"""
+        if self.user_id is None:
+            return
+        if online:
+            WeatherAlertPushService.mark_online(self.user_id)
+        else:
+            WeatherAlertPushService.mark_offline(self.user_id)
+
+    @database_sync_to_async
+    def keep_online(self):
+        if self.user_id is not None:
+            WeatherAlertPushService.keep_online(self.user_id)
+
+    def follows(self, woreda):
+        """Region-wide alerts reach everyone; woreda alerts only that woreda and region-wide followers"""
+        return not woreda or not self.woreda or woreda.lower() == self.woreda
+
+    async def disconnect(self, close_code):
+        if self.room_group_name:
+            await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+            await self.set_online(False)
+
+    async def receive(self, text_data):
+        try:
+            data = json.loads(text_data)
+        except json.JSONDecodeError:
+            await self.send(text_data=json.dumps({'error': 'Invalid JSON format'}))
+            return
+        if data.get('type') == 'ping':
+            await self.keep_online()
+            await self.send(text_data=json.dumps({'type': 'pong'}))
+
+    # Send a batch of new alerts to WebSocket
+    async def weather_alerts(self, event):
+        alerts = [alert for alert in event['alerts'] if self.follows(alert.get('woreda'))]
+        if alerts:
+            await self.send(text_data=json.dumps({
+                'type': 'weather_alerts',
+                'alerts': alerts
+            }))
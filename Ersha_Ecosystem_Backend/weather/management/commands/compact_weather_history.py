@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from weather.services import WeatherIngestionService
+
+
+class Command(BaseCommand):
+    help = 'Fold old raw weather observations into daily summaries and delete them. Intended to run daily, e.g. from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=getattr(settings, 'WEATHER_RAW_RETENTION_DAYS', 30),
+            help='Raw observations to keep, in days (default: WEATHER_RAW_RETENTION_DAYS)'
+        )
+
+    def handle(self, *args, **options):
+        removed = WeatherIngestionService.downsample(keep_days=options['keep_days'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Compacted {removed} observations older than {options["keep_days"]} days into daily summaries')
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from weather.services import WeatherAlertService
+
+
+class Command(BaseCommand):
+    help = 'Re-evaluate the alert rules for every location. Ingestion keeps alerts current; run this after changing the rules.'
+
+    def handle(self, *args, **options):
+        created = WeatherAlertService.generate()
+        self.stdout.write(self.style.SUCCESS(f'Generated {created} weather alerts and recommendations'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from weather.services import WeatherIngestionService
+from weather.sources import get_source
+
+
+class Command(BaseCommand):
+    help = 'Ingest weather observations from the configured source and refresh the latest-per-location table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', help='Dotted path of the source class (default: WEATHER_SOURCE)')
+        parser.add_argument('--path', help='File for file-based sources (default: WEATHER_SOURCE_PATH)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Observations per upsert (default: 500)')
+
+    def handle(self, *args, **options):
+        try:
+            source = get_source(path=options['path'], name=options['source'])
+        except (ImportError, ValueError) as e:
+            raise CommandError(str(e))
+
+        result = WeatherIngestionService.ingest(source.fetch(), batch_size=options['batch_size'])
+
+        for error in result['errors'][:10]:
+            self.stderr.write(f'Skipped: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {result['stored']} of {result['received']} observations ({result['skipped']} skipped)"
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='weatherdata',
+            index=models.Index(fields=['-created_at', '-id'], name='weather_wea_created_1bba7f_idx'),
+        ),
+    ]
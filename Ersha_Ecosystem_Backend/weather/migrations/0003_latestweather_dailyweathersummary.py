@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_latest_weather(apps, schema_editor):
+    WeatherData = apps.get_model('weather', 'WeatherData')
+    LatestWeather = apps.get_model('weather', 'LatestWeather')
+    latest = {}
+    for observation in WeatherData.objects.order_by('created_at').values('id', 'region', 'woreda', 'created_at').iterator():
+        latest[(observation['region'], observation['woreda'])] = observation
+    LatestWeather.objects.bulk_create([
+        LatestWeather(
+            region=region, woreda=woreda,
+            observation_id=observation['id'], observed_at=observation['created_at']
+        )
+        for (region, woreda), observation in latest.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0002_weatherdata_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyWeatherSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(max_length=100)),
+                ('woreda', models.CharField(blank=True, max_length=100)),
+                ('day', models.DateField()),
+                ('observation_count', models.PositiveIntegerField(default=0)),
+                ('temperature_min', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('temperature_max', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('temperature_avg', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('humidity_avg', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('rainfall_total', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('wind_speed_max', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('pressure_avg', models.DecimalField(decimal_places=2, max_digits=8, null=True)),
+            ],
+            options={
+                'ordering': ['-day', 'region', 'woreda'],
+                'unique_together': {('region', 'woreda', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LatestWeather',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(max_length=100)),
+                ('woreda', models.CharField(blank=True, max_length=100)),
+                ('observed_at', models.DateTimeField()),
+                ('observation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='latest_for', to='weather.weatherdata')),
+            ],
+            options={
+                'ordering': ['region', 'woreda'],
+                'unique_together': {('region', 'woreda')},
+            },
+        ),
+        migrations.RunPython(backfill_latest_weather, migrations.RunPython.noop),
+    ]
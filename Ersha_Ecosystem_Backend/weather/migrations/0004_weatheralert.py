@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0003_latestweather_dailyweathersummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(max_length=100)),
+                ('woreda', models.CharField(blank=True, max_length=100)),
+                ('kind', models.CharField(choices=[('alert', 'Alert'), ('recommendation', 'Recommendation')], max_length=20)),
+                ('code', models.CharField(max_length=50)),
+                ('severity', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=10)),
+                ('payload', models.JSONField(default=dict)),
+                ('valid_from', models.DateTimeField()),
+                ('valid_until', models.DateTimeField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('observation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='weather.weatherdata')),
+            ],
+            options={
+                'ordering': ['region', 'woreda', 'id'],
+                'indexes': [models.Index(fields=['kind', 'valid_until'], name='weather_wea_kind_6d334c_idx'), models.Index(fields=['kind', 'region', 'valid_until'], name='weather_wea_kind_ac23b1_idx')],
+                'unique_together': {('region', 'woreda', 'kind', 'code')},
+            },
+        ),
+    ]
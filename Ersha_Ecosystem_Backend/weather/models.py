@@ -23,6 +23,91 @@ class WeatherData(models.Model):
     class Meta:
         unique_together = ('region', 'woreda', 'created_at')
         ordering = ['-created_at', 'region']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.region} - {self.woreda} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
+
+
+class LatestWeather(models.Model):
+    """Most recent observation for each region/woreda, maintained on ingest"""
+    region = models.CharField(max_length=100)
+    woreda = models.CharField(max_length=100, blank=True)
+    observation = models.OneToOneField(WeatherData, on_delete=models.CASCADE, related_name='latest_for')
+    observed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('region', 'woreda')
+        ordering = ['region', 'woreda']
+
+    def __str__(self):
+        return f"Latest for {self.region} - {self.woreda}"
+
+
+class DailyWeatherSummary(models.Model):
+    """Daily aggregate of observations older than the raw retention window"""
+    region = models.CharField(max_length=100)
+    woreda = models.CharField(max_length=100, blank=True)
+    day = models.DateField()
+    observation_count = models.PositiveIntegerField(default=0)
+    temperature_min = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    temperature_max = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    temperature_avg = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    humidity_avg = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    rainfall_total = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    wind_speed_max = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    pressure_avg = models.DecimalField(max_digits=8, decimal_places=2, null=True)
+
+    class Meta:
+        unique_together = ('region', 'woreda', 'day')
+        ordering = ['-day', 'region', 'woreda']
+
+    def __str__(self):
+        return f"{self.region} - {self.woreda} on {self.day}"
+
+
+class WeatherAlert(models.Model):
+    """Alert or recommendation generated from a location's latest observation"""
+    class Kind(models.TextChoices):
+        ALERT = 'alert', 'Alert'
+        RECOMMENDATION = 'recommendation', 'Recommendation'
+
+    class Severity(models.TextChoices):
+        LOW = 'low', 'Low'
+        MEDIUM = 'medium', 'Medium'
+        HIGH = 'high', 'High'
+
+    region = models.CharField(max_length=100)
+    woreda = models.CharField(max_length=100, blank=True)
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    code = models.CharField(max_length=50)
+    severity = models.CharField(max_length=10, choices=Severity.choices)
+    observation = models.ForeignKey(WeatherData, on_delete=models.CASCADE, related_name='alerts')
+    payload = models.JSONField(default=dict)
+    valid_from = models.DateTimeField()
+    valid_until = models.DateTimeField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('region', 'woreda', 'kind', 'code')
+        ordering = ['region', 'woreda', 'id']
+        indexes = [
+            models.Index(fields=['kind', 'valid_until']),
+            models.Index(fields=['kind', 'region', 'valid_until']),
+        ]
+
+    def __str__(self):
+        return f"{self.code} for {self.region} - {self.woreda}"
+
+    def to_dict(self):
+        return {
+            **self.payload,
+            'severity': self.payload.get('severity', self.severity),
+            'code': self.code,
+            'region': self.region,
+            'woreda': self.woreda,
+            'valid_from': self.valid_from.isoformat(),
+            'valid_until': self.valid_until.isoformat(),
+        }
@@ -0,0 +1,488 @@
+import hashlib
+import json
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.background import defer
+from orders.models import Notification
+from orders.services import ActivityTimelineService
+
+from . import alerts
+from .models import DailyWeatherSummary, LatestWeather, WeatherAlert, WeatherData
+from .websocket_utils import region_group_name, send_weather_alerts
+
+User = get_user_model()
+
+
+class WeatherIngestionService:
+    """Service for loading observations and keeping the weather tables bounded"""
+
+    DECIMAL_FIELDS = ['temperature', 'rainfall', 'wind_speed', 'pressure', 'visibility']
+    INTEGER_FIELDS = ['humidity', 'uv_index']
+    TEXT_FIELDS = ['wind_direction', 'weather_condition', 'advisory_text', 'data_source']
+    # Fields refreshed when an observation for the same region/woreda/time is ingested again
+    UPDATE_FIELDS = DECIMAL_FIELDS + INTEGER_FIELDS + TEXT_FIELDS + ['forecast_data']
+
+    @staticmethod
+    def normalize(record):
+        """Build an unsaved WeatherData from a source record; raises ValueError when invalid"""
+        region = str(record.get('region') or '').strip()
+        if not region:
+            raise ValueError('Observation has no region')
+
+        observed_at = record.get('observed_at') or record.get('created_at')
+        if isinstance(observed_at, str):
+            observed_at = parse_datetime(observed_at)
+        if not isinstance(observed_at, datetime):
+            raise ValueError(f'Observation for {region} has no valid observed_at')
+        if timezone.is_naive(observed_at):
+            observed_at = timezone.make_aware(observed_at)
+
+        fields = {
+            'region': region,
+            'woreda': str(record.get('woreda') or '').strip(),
+            'created_at': observed_at,
+        }
+        try:
+            for name in WeatherIngestionService.DECIMAL_FIELDS:
+                value = record.get(name)
+                fields[name] = None if value in (None, '') else Decimal(str(value))
+            for name in WeatherIngestionService.INTEGER_FIELDS:
+                value = record.get(name)
+                fields[name] = None if value in (None, '') else int(float(value))
+        except (InvalidOperation, ValueError):
+            raise ValueError(f'Observation for {region} has a non-numeric measurement')
+        for name in WeatherIngestionService.TEXT_FIELDS:
+            if record.get(name) is not None:
+                fields[name] = str(record[name])
+
+        forecast = record.get('forecast_data') or {}
+        fields['forecast_data'] = json.loads(forecast) if isinstance(forecast, str) else forecast
+        return WeatherData(**fields)
+
+    @staticmethod
+    def ingest(records, batch_size=500):
+        """
+        Upsert observations in batches and refresh the latest table.
+
+        Re-ingesting an observation (same region, woreda and time) updates
+        it in place, so sources can be replayed safely. Returns counts of
+        received, stored and skipped records.
+        """
+        result = {'received': 0, 'stored': 0, 'skipped': 0, 'errors': []}
+        batch = {}
+
+        def flush():
+            WeatherIngestionService._store_batch(list(batch.values()))
+            result['stored'] += len(batch)
+            batch.clear()
+
+        for record in records:
+            result['received'] += 1
+            try:
+                observation = WeatherIngestionService.normalize(record)
+            except ValueError as e:
+                result['skipped'] += 1
+                result['errors'].append(str(e))
+                continue
+            # A batch may not upsert the same row twice; the last record wins
+            batch[(observation.region, observation.woreda, observation.created_at)] = observation
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        return result
+
+    @staticmethod
+    def _store_batch(observations):
+        newest = {}
+        for observation in observations:
+            location = (observation.region, observation.woreda)
+            if location not in newest or observation.created_at > newest[location]:
+                newest[location] = observation.created_at
+
+        with transaction.atomic():
+            WeatherData.objects.bulk_create(
+                observations,
+                update_conflicts=True,
+                unique_fields=['region', 'woreda', 'created_at'],
+                update_fields=WeatherIngestionService.UPDATE_FIELDS
+            )
+            changed = WeatherIngestionService.refresh_latest(newest)
+            WeatherAlertService.generate(changed)
+
+    @staticmethod
+    def refresh_latest(newest):
+        """
+        Point LatestWeather at the given observations where they are newer
+        than the current ones. `newest` maps (region, woreda) to the time of
+        the newest stored observation for that location.
+        """
+        if not newest:
+            return []
+        current = {
+            (row['region'], row['woreda']): row['observed_at']
+            for row in LatestWeather.objects.filter(
+                region__in={region for region, _ in newest}
+            ).values('region', 'woreda', 'observed_at')
+        }
+        changed = {
+            location: observed_at for location, observed_at in newest.items()
+            if location not in current or observed_at > current[location]
+        }
+        if not changed:
+            return []
+
+        lookup = Q()
+        for (region, woreda), observed_at in changed.items():
+            lookup |= Q(region=region, woreda=woreda, created_at=observed_at)
+        rows = [
+            LatestWeather(
+                region=observation['region'],
+                woreda=observation['woreda'],
+                observation_id=observation['id'],
+                observed_at=observation['created_at']
+            )
+            for observation in WeatherData.objects.filter(lookup).values('id', 'region', 'woreda', 'created_at')
+        ]
+        LatestWeather.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['region', 'woreda'],
+            update_fields=['observation', 'observed_at']
+        )
+        return list(changed)
+
+    @staticmethod
+    def observe(observation):
+        """Reflect one saved observation in the latest table and its alerts"""
+        changed = WeatherIngestionService.refresh_latest({
+            (observation.region, observation.woreda): observation.created_at
+        })
+        WeatherAlertService.generate(changed)
+        return changed
+
+    @staticmethod
+    def latest_observations():
+        """Current observation of every location"""
+        return WeatherData.objects.filter(latest_for__isnull=False)
+
+    @staticmethod
+    def _merge(summary, day_stats):
+        """Fold a day's aggregates into an existing summary (late observations)"""
+        count = summary.observation_count + day_stats['observation_count']
+
+        def weighted(old, new):
+            if old is None or new is None:
+                return new if old is None else old
+            return (old * summary.observation_count + new * day_stats['observation_count']) / count
+
+        def extreme(pick, old, new):
+            values = [value for value in (old, new) if value is not None]
+            return pick(values) if values else None
+
+        summary.temperature_min = extreme(min, summary.temperature_min, day_stats['temperature_min'])
+        summary.temperature_max = extreme(max, summary.temperature_max, day_stats['temperature_max'])
+        summary.wind_speed_max = extreme(max, summary.wind_speed_max, day_stats['wind_speed_max'])
+        summary.temperature_avg = weighted(summary.temperature_avg, day_stats['temperature_avg'])
+        summary.humidity_avg = weighted(summary.humidity_avg, day_stats['humidity_avg'])
+        summary.pressure_avg = weighted(summary.pressure_avg, day_stats['pressure_avg'])
+        if day_stats['rainfall_total'] is not None:
+            summary.rainfall_total = (summary.rainfall_total or 0) + day_stats['rainfall_total']
+        summary.observation_count = count
+        return summary
+
+    @staticmethod
+    def _to_decimal(value):
+        return None if value is None else Decimal(str(round(value, 2)))
+
+    @staticmethod
+    def downsample(keep_days=30):
+        """
+        Fold raw observations older than keep_days into DailyWeatherSummary
+        rows and delete them, one day per transaction. The current
+        observation of each location is always kept. Returns the number of
+        raw observations removed.
+        """
+        cutoff = timezone.make_aware(
+            datetime.combine(timezone.localdate() - timedelta(days=keep_days), time.min)
+        )
+        expired = WeatherData.objects.filter(created_at__lt=cutoff, latest_for__isnull=True)
+        days = expired.annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct().order_by('day')
+
+        removed = 0
+        for day in list(days):
+            start = timezone.make_aware(datetime.combine(day, time.min))
+            day_rows = expired.filter(created_at__gte=start, created_at__lt=start + timedelta(days=1))
+            with transaction.atomic():
+                aggregates = day_rows.values('region', 'woreda').annotate(
+                    observation_count=Count('id'),
+                    temperature_min=Min('temperature'),
+                    temperature_max=Max('temperature'),
+                    temperature_avg=Avg('temperature'),
+                    humidity_avg=Avg('humidity'),
+                    rainfall_total=Sum('rainfall'),
+                    wind_speed_max=Max('wind_speed'),
+                    pressure_avg=Avg('pressure'),
+                ).order_by()
+                existing = {
+                    (summary.region, summary.woreda): summary
+                    for summary in DailyWeatherSummary.objects.select_for_update().filter(day=day)
+                }
+                for stats in aggregates:
+                    for name in ['temperature_avg', 'humidity_avg', 'pressure_avg']:
+                        stats[name] = WeatherIngestionService._to_decimal(stats[name])
+                    location = (stats.pop('region'), stats.pop('woreda'))
+                    summary = existing.get(location)
+                    if summary is None:
+                        summary = DailyWeatherSummary(region=location[0], woreda=location[1], day=day, **stats)
+                    else:
+                        WeatherIngestionService._merge(summary, stats)
+                        for name in ['temperature_avg', 'humidity_avg', 'pressure_avg']:
+                            setattr(summary, name, WeatherIngestionService._to_decimal(getattr(summary, name)))
+                    summary.save()
+                deleted, _ = day_rows.delete()
+                removed += deleted
+        return removed
+
+
+class WeatherAlertService:
+    """Service for materializing rule-based alerts and serving them from the cache"""
+
+    VERSION_KEY = 'weather_alerts_version'
+    RESPONSE_KEYS = {alerts.ALERT: 'alerts', alerts.RECOMMENDATION: 'recommendations'}
+
+    @staticmethod
+    def generate(locations=None):
+        """
+        Re-evaluate the rules for the given (region, woreda) locations, or
+        all of them, against their latest observations and replace their
+        stored alerts. Each rule is one query over the latest table rather
+        than one Python pass per observation. Returns the number of alerts
+        written.
+        """
+        if locations is not None and not locations:
+            return 0
+        observations = WeatherIngestionService.latest_observations()
+        scope = Q()
+        if locations is not None:
+            for region, woreda in locations:
+                scope |= Q(region=region, woreda=woreda)
+            observations = observations.filter(scope)
+
+        validity = timedelta(hours=getattr(settings, 'WEATHER_ALERT_VALIDITY_HOURS', 24))
+        fields = ['id', 'region', 'woreda', 'created_at']
+        rows = []
+        for rule in alerts.RULES:
+            for observation in observations.filter(alerts.rule_filter(rule)).values(*fields):
+                rows.append(WeatherAlert(
+                    region=observation['region'],
+                    woreda=observation['woreda'],
+                    kind=rule['kind'],
+                    code=rule['code'],
+                    severity=rule['severity'],
+                    observation_id=observation['id'],
+                    payload=alerts.render(rule, observation['region'], observation['woreda']),
+                    valid_from=observation['created_at'],
+                    valid_until=observation['created_at'] + validity
+                ))
+
+        now = timezone.now()
+        with transaction.atomic():
+            existing = set(
+                WeatherAlert.objects.filter(scope, kind=alerts.ALERT).values_list('region', 'woreda', 'code')
+            )
+            WeatherAlert.objects.filter(scope).delete()
+            WeatherAlert.objects.bulk_create(rows)
+            transaction.on_commit(WeatherAlertService.bump_version)
+
+            # Only alerts a location did not already have are pushed to subscribers
+            raised = [
+                row.to_dict() for row in rows
+                if row.kind == alerts.ALERT and row.valid_until > now
+                and (row.region, row.woreda, row.code) not in existing
+            ]
+            if raised:
+                defer(WeatherAlertPushService.push, raised)
+        return len(rows)
+
+    @staticmethod
+    def get_version():
+        return cache.get_or_set(WeatherAlertService.VERSION_KEY, 1, None)
+
+    @staticmethod
+    def bump_version():
+        try:
+            cache.incr(WeatherAlertService.VERSION_KEY)
+        except ValueError:
+            cache.set(WeatherAlertService.VERSION_KEY, 2, None)
+
+    @staticmethod
+    def active(kind, region=None, woreda=None):
+        """Alerts of a kind that are currently valid, optionally for one location"""
+        queryset = WeatherAlert.objects.filter(kind=kind, valid_until__gt=timezone.now())
+        if region:
+            queryset = queryset.filter(region=region)
+        if woreda:
+            queryset = queryset.filter(woreda=woreda)
+        return queryset
+
+    @staticmethod
+    def get_response(kind, region=None, woreda=None):
+        """
+        Response body and ETag for the alerts endpoints. Bodies are cached
+        per rule-set version and filter, and expire no later than the first
+        alert in them does.
+        """
+        key = f'weather_alerts:{WeatherAlertService.get_version()}:{kind}:{region or ""}:{woreda or ""}'
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        items = list(WeatherAlertService.active(kind, region, woreda))
+        name = WeatherAlertService.RESPONSE_KEYS[kind]
+        body = {name: [item.to_dict() for item in items], 'count': len(items)}
+        digest = hashlib.md5(json.dumps(body, sort_keys=True).encode()).hexdigest()
+        cached = (body, f'"{name}-{digest}"')
+
+        timeout = getattr(settings, 'WEATHER_ALERT_CACHE_SECONDS', 300)
+        if items:
+            expires_in = (min(item.valid_until for item in items) - timezone.now()).total_seconds()
+            timeout = max(1, min(timeout, int(expires_in)))
+        cache.set(key, cached, timeout)
+        return cached
+
+
+class WeatherAlertPushService:
+    """
+    Service for fanning newly raised alerts out to the users of a region.
+
+    Connected clients (weather/consumers.py) receive one message per region
+    and batch; users who are not connected get a stored Notification
+    instead. Presence is kept in the cache, so it must be shared between
+    the ASGI and web workers in production.
+    """
+
+    @staticmethod
+    def _presence_key(user_id):
+        return f'weather_online:{user_id}'
+
+    @staticmethod
+    def mark_online(user_id):
+        """Count one open connection for the user; also refreshes the presence timeout"""
+        key = WeatherAlertPushService._presence_key(user_id)
+        timeout = getattr(settings, 'WEATHER_PRESENCE_TIMEOUT_SECONDS', 3600)
+        cache.add(key, 0, timeout)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout)
+        cache.touch(key, timeout)
+
+    @staticmethod
+    def keep_online(user_id):
+        """Refresh the presence timeout of a connected user without counting another connection"""
+        key = WeatherAlertPushService._presence_key(user_id)
+        timeout = getattr(settings, 'WEATHER_PRESENCE_TIMEOUT_SECONDS', 3600)
+        if not cache.touch(key, timeout):
+            # Expired while connected: the connection making this call is still open
+            cache.add(key, 1, timeout)
+
+    @staticmethod
+    def mark_offline(user_id):
+        key = WeatherAlertPushService._presence_key(user_id)
+        try:
+            if cache.decr(key) <= 0:
+                cache.delete(key)
+        except ValueError:
+            pass
+
+    @staticmethod
+    def online_user_ids(user_ids):
+        keys = {WeatherAlertPushService._presence_key(user_id): user_id for user_id in user_ids}
+        return {keys[key] for key, count in cache.get_many(keys).items() if count and count > 0}
+
+    @staticmethod
+    def push(raised):
+        """
+        Deliver newly raised alerts. An alert already delivered for the same
+        location within WEATHER_ALERT_PUSH_COOLDOWN_SECONDS is dropped, so
+        readings hovering around a threshold do not repeat it.
+        """
+        cooldown = getattr(settings, 'WEATHER_ALERT_PUSH_COOLDOWN_SECONDS', 3 * 3600)
+        by_region = defaultdict(list)
+        for alert in raised:
+            location = f"{region_group_name(alert['region'])}:{region_group_name(alert['woreda'])}"
+            if cache.add(f"weather_alert_pushed:{location}:{alert['code']}", True, cooldown):
+                by_region[alert['region']].append(alert)
+
+        for region, region_alerts in by_region.items():
+            send_weather_alerts(region, region_alerts)
+            WeatherAlertPushService.notify_offline(region, region_alerts)
+
+    @staticmethod
+    def _notification(user_id, region, alerts_for_user):
+        if len(alerts_for_user) == 1:
+            title = alerts_for_user[0]['title']
+        else:
+            title = f'{len(alerts_for_user)} weather alerts for {region}'
+        return Notification(
+            user_id=user_id,
+            notification_type=Notification.NotificationType.WEATHER_ALERT,
+            title=title[:200],
+            message=' '.join(alert['message'] for alert in alerts_for_user),
+            metadata={
+                'region': region,
+                'alerts': [
+                    {key: alert[key] for key in ('code', 'woreda', 'severity', 'valid_until')}
+                    for alert in alerts_for_user
+                ],
+            }
+        )
+
+    @staticmethod
+    def notify_offline(region, region_alerts):
+        """
+        Store one notification per offline user of the region, covering the
+        alerts for their woreda, written in batches of
+        WEATHER_ALERT_NOTIFICATION_BATCH. Returns the number created.
+        """
+        batch_size = getattr(settings, 'WEATHER_ALERT_NOTIFICATION_BATCH', 500)
+        woredas = {alert['woreda'].lower() for alert in region_alerts}
+        recipients = User.objects.filter(region__iexact=region, is_active=True)
+        if '' not in woredas:
+            # Every alert is woreda specific; skip users known to be elsewhere
+            woreda_filter = Q(profile__woreda__isnull=True) | Q(profile__woreda='')
+            for woreda in woredas:
+                woreda_filter |= Q(profile__woreda__iexact=woreda)
+            recipients = recipients.filter(woreda_filter)
+
+        created = 0
+        rows = recipients.values_list('id', 'profile__woreda').order_by('id')
+        for start in range(0, rows.count(), batch_size):
+            chunk = list(rows[start:start + batch_size])
+            online = WeatherAlertPushService.online_user_ids([user_id for user_id, _ in chunk])
+            notifications = []
+            for user_id, user_woreda in chunk:
+                user_woreda = (user_woreda or '').lower()
+                alerts_for_user = [
+                    alert for alert in region_alerts
+                    if not alert['woreda'] or not user_woreda or alert['woreda'].lower() == user_woreda
+                ]
+                if user_id not in online and alerts_for_user:
+                    notifications.append(WeatherAlertPushService._notification(user_id, region, alerts_for_user))
+            with transaction.atomic():
+                Notification.objects.bulk_create(notifications)
+                ActivityTimelineService.record_notifications(notifications)
+            created += len(notifications)
+        return created
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import WeatherData
+from .services import WeatherIngestionService
+
+
+@receiver(post_save, sender=WeatherData)
+def update_latest_weather(sender, instance, **kwargs):
+    """Observations saved one at a time (admin, API, populate command) update the latest table"""
+    WeatherIngestionService.observe(instance)
@@ -0,0 +1,59 @@
+"""
+Weather observation sources for the ingest_weather command.
+
+A source is any class with a ``fetch()`` method yielding one dict per
+observation, keyed by WeatherData field names. ``observed_at`` may be
+used instead of ``created_at``. Select one with the WEATHER_SOURCE setting
+or ``ingest_weather --source``.
+"""
+import csv
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class WeatherSource:
+    """Base class for observation sources"""
+
+    def fetch(self):
+        raise NotImplementedError
+
+
+class FileWeatherSource(WeatherSource):
+    """
+    Reads observations from a local file, for offline runs and fixtures.
+
+    Supports a JSON list (optionally under an ``observations`` key), JSON
+    lines (.jsonl) and CSV with a header row.
+    """
+
+    def __init__(self, path=None):
+        path = path or getattr(settings, 'WEATHER_SOURCE_PATH', '')
+        if not path:
+            raise ValueError('FileWeatherSource needs a path (WEATHER_SOURCE_PATH or --path)')
+        self.path = Path(path)
+
+    def fetch(self):
+        suffix = self.path.suffix.lower()
+        with self.path.open(newline='' if suffix == '.csv' else None, encoding='utf-8') as handle:
+            if suffix == '.csv':
+                for row in csv.DictReader(handle):
+                    # Empty CSV cells mean "not measured"
+                    yield {key: value for key, value in row.items() if value != ''}
+            elif suffix == '.jsonl':
+                for line in handle:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                data = json.load(handle)
+                if isinstance(data, dict):
+                    data = data.get('observations', [])
+                yield from data
+
+
+def get_source(path=None, name=None):
+    """Instantiate the configured source class"""
+    source_class = import_string(name or getattr(settings, 'WEATHER_SOURCE', 'weather.sources.FileWeatherSource'))
+    return source_class(path=path) if path else source_class()
@@ -1,3 +1,238 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from .alerts import evaluate
+from .models import DailyWeatherSummary, LatestWeather, WeatherAlert, WeatherData
+from orders.models import ActivityEntry, Notification
+from users.models import Profile
+from .services import WeatherAlertPushService, WeatherAlertService, WeatherIngestionService
+from .websocket_utils import region_group_name
+
+User = get_user_model()
+
+
+class WeatherIngestionTestCase(APITestCase):
+    def setUp(self):
+        """Set up observations for two locations over several days"""
+        # Noon local time, so a day's observations never straddle midnight
+        self.noon = timezone.make_aware(
+            timezone.datetime.combine(timezone.localdate(), timezone.datetime.min.time())
+        ) + timedelta(hours=12)
+        self.records = []
+        for days_ago in (40, 40, 2, 0):
+            for region, woreda in (('Oromia', 'Bishoftu'), ('Amhara', 'Bahir Dar')):
+                self.records.append({
+                    'region': region,
+                    'woreda': woreda,
+                    'observed_at': (self.noon - timedelta(days=days_ago, minutes=len(self.records))).isoformat(),
+                    'temperature': 20 + len(self.records),
+                    'humidity': '60',
+                    'rainfall': 1.5,
+                })
+        self.client = APIClient()
+
+    def test_ingest_upserts_and_tracks_latest_observation(self):
+        """Test that replayed records update in place and each location has one latest row"""
+        result = WeatherIngestionService.ingest(self.records + [{'region': ''}], batch_size=3)
+        self.assertEqual((result['stored'], result['skipped']), (8, 1))
+
+        self.records[-1]['temperature'] = 35
+        WeatherIngestionService.ingest(self.records, batch_size=3)
+        self.assertEqual(WeatherData.objects.count(), 8)
+        self.assertEqual(LatestWeather.objects.count(), 2)
+
+        latest = LatestWeather.objects.select_related('observation').get(region='Amhara')
+        self.assertEqual(latest.observation.temperature, Decimal('35.00'))
+
+        # An older observation saved directly does not replace the latest one
+        WeatherData.objects.create(region='Amhara', woreda='Bahir Dar', created_at=self.noon - timedelta(days=1))
+        self.assertEqual(LatestWeather.objects.get(region='Amhara').observation_id, latest.observation_id)
+
+    def test_public_endpoints_read_the_latest_table(self):
+        """Test that current conditions return one row per location"""
+        WeatherIngestionService.ingest(self.records)
+
+        response = self.client.get('/api/weather/current_conditions/', {'region': 'Oromia'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/weather/regions/')
+        self.assertEqual(response.data['regions'], ['Amhara', 'Oromia'])
+
+    def test_downsample_folds_old_observations_into_daily_summaries(self):
+        """Test that expired observations become one summary per location and day"""
+        WeatherIngestionService.ingest(self.records)
+
+        removed = WeatherIngestionService.downsample(keep_days=30)
+        self.assertEqual(removed, 4)
+        self.assertEqual(WeatherData.objects.count(), 4)
+
+        summary = DailyWeatherSummary.objects.get(region='Oromia')
+        self.assertEqual(summary.observation_count, 2)
+        self.assertEqual(summary.rainfall_total, Decimal('3.00'))
+        self.assertEqual(summary.temperature_min, Decimal('20.00'))
+
+        # A late observation for a compacted day is merged into its summary
+        WeatherIngestionService.ingest([{
+            'region': 'Oromia', 'woreda': 'Bishoftu', 'temperature': 10, 'rainfall': 1,
+            'observed_at': timezone.make_aware(
+                timezone.datetime.combine(summary.day, timezone.datetime.min.time()) + timedelta(hours=12)
+            ).isoformat(),
+        }])
+        WeatherIngestionService.downsample(keep_days=30)
+        summary.refresh_from_db()
+        self.assertEqual(summary.observation_count, 3)
+        self.assertEqual(summary.temperature_min, Decimal('10.00'))
+        self.assertEqual(summary.rainfall_total, Decimal('4.00'))
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class WeatherAlertTestCase(APITestCase):
+    def setUp(self):
+        """Set up a hot, windy location and a mild, rainy one"""
+        cache.clear()
+        self.now = timezone.now()
+        self.records = [
+            {'region': 'Afar', 'woreda': 'Semera', 'observed_at': self.now.isoformat(),
+             'temperature': 38, 'wind_speed': 12, 'rainfall': 0, 'weather_condition': 'Sunny'},
+            {'region': 'Oromia', 'woreda': 'Bishoftu', 'observed_at': self.now.isoformat(),
+             'temperature': 22, 'rainfall': 8, 'weather_condition': 'Light rain'},
+        ]
+        self.client = APIClient()
+
+    def test_ingest_materializes_alerts_matching_the_serializer_rules(self):
+        """Test that stored alerts agree with per-observation evaluation"""
+        with self.captureOnCommitCallbacks(execute=True):
+            WeatherIngestionService.ingest(self.records)
+
+        codes = set(WeatherAlert.objects.filter(region='Afar').values_list('code', flat=True))
+        self.assertEqual(codes, {'heat_wave', 'strong_winds', 'dry_conditions', 'soil_preparation'})
+        for observation in WeatherIngestionService.latest_observations():
+            stored = {
+                alert.payload['title'] for alert in WeatherAlert.objects.filter(region=observation.region, kind='alert')
+            }
+            self.assertEqual(stored, {alert['title'] for alert in evaluate(observation, 'alert')})
+
+        # A newer observation replaces the location's alerts
+        self.records[0].update({'observed_at': (self.now + timedelta(hours=1)).isoformat(), 'temperature': 28,
+                                'wind_speed': 2})
+        WeatherIngestionService.ingest(self.records[:1])
+        codes = set(WeatherAlert.objects.filter(region='Afar').values_list('code', flat=True))
+        self.assertEqual(codes, {'dry_conditions', 'planting_window', 'soil_preparation'})
+
+    def test_alert_endpoints_are_cached_and_conditional(self):
+        """Test that repeated reads skip the database and unchanged alerts answer 304"""
+        with self.captureOnCommitCallbacks(execute=True):
+            WeatherIngestionService.ingest(self.records)
+
+        response = self.client.get('/api/weather/alerts/', {'region': 'Oromia'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['alerts'][0]['title'], 'Rain Expected')
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/weather/alerts/', {'region': 'Oromia'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get('/api/weather/recommendations/')
+        self.assertEqual(response.data['count'], 3)
+
+        # Expired alerts are no longer served
+        WeatherAlert.objects.update(valid_until=self.now - timedelta(minutes=1))
+        WeatherAlertService.bump_version()
+        response = self.client.get('/api/weather/alerts/', {'region': 'Oromia'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    BACKGROUND_TASKS_EAGER=True,
+)
+class WeatherAlertPushTestCase(APITestCase):
+    def setUp(self):
+        """Set up farmers in and around the alerted woreda"""
+        cache.clear()
+        self.farmers = {}
+        for name, region, woreda in [
+            ('semera', 'Afar', 'Semera'), ('asayita', 'Afar', 'Asayita'),
+            ('regionwide', 'afar', None), ('online', 'Afar', 'Semera'), ('elsewhere', 'Oromia', 'Semera'),
+        ]:
+            farmer = User.objects.create_user(
+                username=f'{name}@test.com', email=f'{name}@test.com', password='testpass123',
+                user_type=User.UserType.FARMER, region=region
+            )
+            if woreda:
+                Profile.objects.create(user=farmer, woreda=woreda, farm_size=2)
+            self.farmers[name] = farmer
+        self.record = {
+            'region': 'Afar', 'woreda': 'Semera', 'observed_at': timezone.now().isoformat(),
+            'temperature': 38, 'wind_speed': 12, 'rainfall': 2,
+        }
+
+    def test_new_alerts_reach_subscribers_once_and_offline_users_as_notifications(self):
+        """Test that one batch goes to the region group and offline users in the woreda are notified"""
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(region_group_name('Afar'), channel_name)
+        WeatherAlertPushService.mark_online(self.farmers['online'].id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WeatherIngestionService.ingest([self.record])
+
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertEqual(message['type'], 'weather_alerts')
+        self.assertEqual({alert['code'] for alert in message['alerts']}, {'heat_wave', 'strong_winds'})
+
+        notified = set(
+            Notification.objects.filter(notification_type='weather_alert').values_list('user__username', flat=True)
+        )
+        self.assertEqual(notified, {'semera@test.com', 'regionwide@test.com'})
+        notification = Notification.objects.get(user=self.farmers['semera'])
+        self.assertEqual(notification.title, '2 weather alerts for Afar')
+        self.assertTrue(ActivityEntry.objects.filter(source_key=f'notification_{notification.id}').exists())
+
+        # A newer reading that keeps the same alerts raises nothing new
+        self.record['observed_at'] = (timezone.now() + timedelta(minutes=30)).isoformat()
+        with self.captureOnCommitCallbacks(execute=True):
+            WeatherIngestionService.ingest([self.record])
+        self.assertEqual(Notification.objects.filter(notification_type='weather_alert').count(), 2)
+
+    def test_pings_keep_a_connection_online_without_counting_it_again(self):
+        """Test that presence returns to offline once every connection has closed, however often they pinged"""
+        user_id = self.farmers['online'].id
+        WeatherAlertPushService.mark_online(user_id)
+        WeatherAlertPushService.mark_online(user_id)
+        for _ in range(3):
+            WeatherAlertPushService.keep_online(user_id)
+        WeatherAlertPushService.mark_offline(user_id)
+        self.assertEqual(WeatherAlertPushService.online_user_ids([user_id]), {user_id})
+        WeatherAlertPushService.mark_offline(user_id)
+        self.assertEqual(WeatherAlertPushService.online_user_ids([user_id]), set())
+
+        # A ping after the presence entry expired restores it for the open connection
+        WeatherAlertPushService.keep_online(user_id)
+        self.assertEqual(WeatherAlertPushService.online_user_ids([user_id]), {user_id})
+
+    def test_repeated_alerts_are_held_back_during_the_cooldown(self):
+        """Test that an alert that clears and returns is not pushed again straight away"""
+        readings = [38, 25, 38]
+        for minutes, temperature in enumerate(readings):
+            self.record.update({
+                'temperature': temperature, 'wind_speed': 0,
+                'observed_at': (timezone.now() + timedelta(minutes=minutes)).isoformat(),
+            })
+            with self.captureOnCommitCallbacks(execute=True):
+                WeatherIngestionService.ingest([self.record])
+
+        self.assertEqual(Notification.objects.filter(user=self.farmers['semera']).count(), 1)
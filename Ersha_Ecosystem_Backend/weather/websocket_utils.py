@@ -0,0 +1,43 @@
+import logging
+import re
+
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+
+logger = logging.getLogger(__name__)
+
+
+def region_group_name(region):
+    """
+    Channels group for a region.
+
+    Region names are matched case-insensitively, and group names may only
+    contain ASCII alphanumerics, hyphens, underscores and periods, so the
+    name is lowercased and anything else is replaced.
+    """
+    return f"weather_{re.sub(r'[^a-z0-9._-]', '_', region.strip().lower())}"[:99]
+
+
+def send_weather_alerts(region, alerts):
+    """
+    Push a batch of new alerts to every client subscribed to a region
+    
+    Args:
+        region: Region the alerts were generated for
+        alerts: List of dictionaries produced by WeatherAlert.to_dict()
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    try:
+        async_to_sync(channel_layer.group_send)(
+            region_group_name(region),
+            {
+                'type': 'weather_alerts',
+                'alerts': alerts
+            }
+        )
+    except Exception as e:
+        # Connected clients still get the alerts in their next snapshot
+        logger.error(f"Failed to push weather alerts for {region}: {str(e)}", exc_info=True)